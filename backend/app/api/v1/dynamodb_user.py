@@ -4,8 +4,11 @@ from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, Dict, Any
 from datetime import datetime
 import boto3
+from app.core import dynamo, passwords, phone_index, user_index
+from app.core.passwords import PasswordHasherBusyError
+from app.core.phone_index import PhoneInUseError
+from botocore.exceptions import ClientError
 import os
-import bcrypt
 import uuid
 import asyncio
 
@@ -21,11 +24,10 @@ from app.api.v1.utils.notification_utils import create_notification
 
 
 # DynamoDB resource
-region_name = os.getenv("AWS_REGION", "ap-south-1")  # Change if needed
-dynamodb = boto3.resource("dynamodb", region_name=region_name)
-users_table = dynamodb.Table("users")
+users_table = dynamo.table("users")
+async_users_table = dynamo.async_table("users")
 WALLET_TABLE = 'wallet'
-wallet_table = dynamodb.Table(WALLET_TABLE)
+wallet_table = dynamo.table(WALLET_TABLE)
 
 class OtherAttributes(BaseModel):
     FullName: str
@@ -118,9 +120,6 @@ def create_user(user: UserCreateRequest):
                 string.ascii_letters + string.digits + string.punctuation, k=12
             )
         )
-        password_hash = bcrypt.hashpw(
-            password_to_email.encode("utf-8"), bcrypt.gensalt()
-        ).decode("utf-8")
     elif (
         google_signin
         and hasattr(user, "PasswordHash")
@@ -128,14 +127,14 @@ def create_user(user: UserCreateRequest):
     ):
         # Defensive: if a password is provided (should not happen), use it
         password_to_email = user.PasswordHash
-        password_hash = bcrypt.hashpw(
-            user.PasswordHash.encode("utf-8"), bcrypt.gensalt()
-        ).decode("utf-8")
     else:
         password_to_email = user.PasswordHash
-        password_hash = bcrypt.hashpw(
-            user.PasswordHash.encode("utf-8"), bcrypt.gensalt()
-        ).decode("utf-8")
+
+    # bcrypt runs on the password hashing pool; this thread only waits for it
+    try:
+        password_hash = passwords.hash_password_sync(password_to_email)
+    except PasswordHasherBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
     item = user.dict()
     item["PasswordHash"] = password_hash
@@ -151,7 +150,14 @@ def create_user(user: UserCreateRequest):
 
     # Remove .dict() usage, as OtherAttributes is already a dict
     try:
-        users_table.put_item(Item=item)
+        # Write the profile together with its UserID and phone number lookup items
+        transact_items = [
+            dynamo.transact_put(phone_index.USERS_TABLE, item),
+            user_index.claim(item["PK"], item["UserID"]),
+        ]
+        if item.get("Phone"):
+            transact_items.append(phone_index.claim(item["PK"], item["Phone"]))
+        phone_index.commit(transact_items, item.get("Phone"))
         # --- Welcome Email Logic ---
 
         try:
@@ -248,7 +254,7 @@ def create_user(user: UserCreateRequest):
                 'SK': "METADATA",
                 'wallet_id': wallet_id,
                 'user_id': item["UserID"],
-                'balance': "0.0",  # Store as string for DynamoDB
+                'balance': Decimal("0.0"),  # Stored as a number so wallet_ledger can ADD to it
                 'status': WalletStatus.ACTIVE.value,
                 'created_at': now,
                 'updated_at': now
@@ -313,6 +319,8 @@ def create_user(user: UserCreateRequest):
         # --- End Send Welcome Notification ---
         
         return {"message": "User created", "user": item}
+    except PhoneInUseError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -345,30 +353,52 @@ def get_user_profile(email: str):
 
 
 @router.post("/dynamodb/users/login")
-def login_user(login: UserLoginRequest):
+async def login_user(login: UserLoginRequest):
     try:
-        response = users_table.get_item(
-            Key={"PK": f"USER#{login.email}", "SK": "PROFILE"}
-        )
+        user_key = {"PK": f"USER#{login.email}", "SK": "PROFILE"}
+        response = await async_users_table.get_item(Key=user_key)
         user = response.get("Item")
         if not user:
             raise HTTPException(status_code=401, detail="Invalid email or password")
-        stored_hash = user["PasswordHash"].encode("utf-8")
-        if not bcrypt.checkpw(login.password.encode("utf-8"), stored_hash):
+        # bcrypt runs on the password hashing pool, not on the event loop
+        matches, new_hash = await passwords.verify_password(login.password, user["PasswordHash"])
+        if not matches:
             raise HTTPException(status_code=401, detail="Invalid email or password")
         # Optionally, update LastLoginAt
         from datetime import datetime
 
-        users_table.update_item(
-            Key={"PK": f"USER#{login.email}", "SK": "PROFILE"},
-            UpdateExpression="SET LastLoginAt = :now",
-            ExpressionAttributeValues={":now": datetime.utcnow().isoformat()},
-        )
+        now = datetime.utcnow().isoformat()
+        login_recorded = False
+        if new_hash:
+            # The stored hash uses an outdated cost; replace it unless the password changed meanwhile
+            try:
+                await async_users_table.update_item(
+                    Key=user_key,
+                    UpdateExpression="SET LastLoginAt = :now, PasswordHash = :new_hash",
+                    ConditionExpression="PasswordHash = :old_hash",
+                    ExpressionAttributeValues={
+                        ":now": now,
+                        ":new_hash": new_hash,
+                        ":old_hash": user["PasswordHash"],
+                    },
+                )
+                login_recorded = True
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+        if not login_recorded:
+            await async_users_table.update_item(
+                Key=user_key,
+                UpdateExpression="SET LastLoginAt = :now",
+                ExpressionAttributeValues={":now": now},
+            )
         # Remove sensitive info before returning
         user.pop("PasswordHash", None)
         return {"message": "Login successful", "user": user}
     except HTTPException:
         raise
+    except PasswordHasherBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -377,24 +407,13 @@ def login_user(login: UserLoginRequest):
 def mobile_login(login: MobileLoginRequest):
     """Login user with mobile number"""
     try:
-        # Scan the table to find a user with the given mobile number
-        # Note: In a production environment, consider creating a GSI on Phone attribute for better performance
-        response = users_table.scan(
-            FilterExpression="Phone = :phone",
-            ExpressionAttributeValues={
-                ":phone": login.mobile
-            }
-        )
-        
-        items = response.get('Items', [])
+        # Find the user through the phone number's lookup item
+        user = phone_index.find_user(login.mobile)
         
         # If no user found with this mobile number
-        if not items:
+        if not user:
             raise HTTPException(status_code=401, detail="No account found with this mobile number")
         
-        # Get the first user (should be only one with this mobile)
-        user = items[0]
-        
         # Update LastLoginAt
         from datetime import datetime
         
@@ -447,20 +466,41 @@ def update_user_profile(email: str, user_update: UserUpdateRequest):
             update_expression += ", Username = :username"
             expression_attribute_values[':username'] = user_update.Username
         
-        # Update user in DynamoDB
-        response = users_table.update_item(
-            Key={"PK": f"USER#{email}", "SK": "PROFILE"},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_attribute_values,
-            ReturnValues="ALL_NEW"
-        )
-        
-        updated_user = response.get("Attributes", {})
+        old_phone = user.get("Phone")
+        if user_update.Phone is not None and user_update.Phone != old_phone:
+            # Move the phone lookup item in the same transaction as the profile
+            user_pk = f"USER#{email}"
+            transact_items = [
+                dynamo.transact_update(
+                    phone_index.USERS_TABLE,
+                    {"PK": user_pk, "SK": "PROFILE"},
+                    update_expression,
+                    values=expression_attribute_values
+                )
+            ]
+            if user_update.Phone:
+                transact_items.append(phone_index.claim(user_pk, user_update.Phone))
+            if old_phone:
+                transact_items.append(phone_index.release(user_pk, old_phone))
+            phone_index.commit(transact_items, user_update.Phone)
+            response = users_table.get_item(Key={"PK": user_pk, "SK": "PROFILE"})
+            updated_user = response.get("Item", {})
+        else:
+            # Update user in DynamoDB
+            response = users_table.update_item(
+                Key={"PK": f"USER#{email}", "SK": "PROFILE"},
+                UpdateExpression=update_expression,
+                ExpressionAttributeValues=expression_attribute_values,
+                ReturnValues="ALL_NEW"
+            )
+            updated_user = response.get("Attributes", {})
         # Remove sensitive info before returning
         updated_user.pop("PasswordHash", None)
         
         return {"message": "Profile updated successfully", "user": updated_user}
     except HTTPException:
         raise
+    except PhoneInUseError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -2,27 +2,24 @@ from fastapi import APIRouter, HTTPException, status, Query, Depends
 from typing import List, Optional, Dict, Any
 from boto3.dynamodb.conditions import Key
 from datetime import datetime
-import boto3
+from app.core import dynamo, outbox, seat_inventory, templates
+from app.core.pnr import has_valid_check_digit, pnr_allocator
 import os
 import uuid
-import random
 import string
 import sendgrid
 from sendgrid.helpers.mail import Mail
-import jinja2
-import pathlib
 import asyncio
 from typing import List, Dict, Any
 from decimal import Decimal
 
 # Import notification utilities
-from app.api.v1.utils.notification_utils import create_notification
 from app.schemas.notification import NotificationType
 
 # Import wallet and transaction schemas and functions
 from app.schemas.wallet_transaction import WalletTransactionCreate, TransactionType, TransactionSource, TransactionStatus
 from app.api.v1.endpoints.wallet import get_wallet_by_user_id, update_wallet
-from app.api.v1.endpoints.wallet_transactions import create_transaction
+from app.api.v1.endpoints.wallet_transactions import apply_wallet_transaction
 from app.schemas.wallet import WalletUpdate
 
 # Import schemas
@@ -32,51 +29,7 @@ router = APIRouter()
 
 # Table names
 BOOKINGS_TABLE = 'bookings'
-dynamodb = boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "ap-south-1"))
-bookings_table = dynamodb.Table(BOOKINGS_TABLE)
-
-def generate_seat_numbers(train_number: str, travel_class: str, passenger_count: int) -> List[str]:
-    """
-    Generate seat numbers for passengers based on train number and travel class.
-    
-    Args:
-        train_number: The train number (e.g., '12345')
-        travel_class: The travel class (e.g., '3A', '2A', 'SL')
-        passenger_count: Number of seat numbers to generate
-        
-    Returns:
-        List of seat numbers as strings
-    """
-    # Define seat patterns based on class
-    class_patterns = {
-        '1A': {'prefix': 'A', 'rows': range(1, 10), 'seats': range(1, 5)},  # 1st AC
-        '2A': {'prefix': 'B', 'rows': range(1, 15), 'seats': range(1, 5)},  # 2nd AC
-        '3A': {'prefix': 'C', 'rows': range(1, 21), 'seats': range(1, 9)},  # 3rd AC
-        'SL': {'prefix': 'S', 'rows': range(1, 26), 'seats': range(1, 9)},  # Sleeper
-        'CC': {'prefix': 'D', 'rows': range(1, 16), 'seats': range(1, 6)},  # Chair Car
-        '2S': {'prefix': 'E', 'rows': range(1, 31), 'seats': range(1, 9)},  # 2nd Seater
-        '3E': {'prefix': 'F', 'rows': range(1, 31), 'seats': range(1, 9)},  # 2nd Seater
-    }
-    
-    # Get the pattern for the requested class, default to SL if not found
-    pattern = class_patterns.get(travel_class.upper(), class_patterns['SL'])
-    
-    # Generate seat numbers
-    seat_numbers = []
-    for _ in range(passenger_count):
-        row = random.choice(pattern['rows'])
-        seat = random.choice(pattern['seats'])
-        seat_number = f"{pattern['prefix']}{row:02d}{seat:02d}"
-        seat_numbers.append(seat_number)
-    
-    return seat_numbers
-
-# Generate PNR function
-def generate_pnr():
-    """Generate a unique PNR number"""
-    prefix = "PNR"
-    date_part = datetime.now().strftime("%y%m%d%H%M%S")
-    return f"{prefix}{date_part}"
+bookings_table = dynamo.async_table(BOOKINGS_TABLE)
 
 # Function to send booking confirmation email
 def send_booking_confirmation_email(booking_data):
@@ -104,17 +57,6 @@ def send_booking_confirmation_email(booking_data):
         # Format booking date
         booking_date = datetime.fromisoformat(booking_data.get("created_at")).strftime("%B %d, %Y")
         
-        # Load the email template
-        template_dir = pathlib.Path(__file__).parent.parent.parent.parent / "templates"
-        template_path = template_dir / "booking_confirmation_email.html"
-        
-        with open(template_path, "r") as file:
-            template_content = file.read()
-        
-        # Create Jinja2 environment
-        env = jinja2.Environment()
-        template = env.from_string(template_content)
-        
         # Prepare template variables
         template_vars = {
             "passenger_name": passenger_name,
@@ -139,8 +81,8 @@ def send_booking_confirmation_email(booking_data):
             } for p in booking_data.get("passengers", [])]
         }
         
-        # Render the template
-        html_content = template.render(**template_vars)
+        # Render the template (compiled once per process by the template registry)
+        html_content = templates.render(templates.BOOKING_CONFIRMATION_EMAIL, **template_vars)
         
         # Create the email message
         message = Mail(
@@ -160,12 +102,27 @@ def send_booking_confirmation_email(booking_data):
         print(f"[TatkalPro][Email] Error in send_booking_confirmation_email: {e}")
         raise e
 
+@outbox.handler(outbox.BOOKING_EMAIL)
+async def deliver_booking_confirmation_email(payload: Dict[str, Any], event_id: str):
+    """Outbox handler: send the confirmation email for a committed booking"""
+    response = await bookings_table.get_item(
+        Key={
+            'PK': f"BOOKING#{payload['booking_id']}",
+            'SK': "METADATA"
+        }
+    )
+    if 'Item' not in response:
+        print(f"[TatkalPro][Email] Booking {payload['booking_id']} not found, skipping confirmation email")
+        return
+    # SendGrid's client is blocking
+    await asyncio.get_running_loop().run_in_executor(None, send_booking_confirmation_email, response['Item'])
+
 @router.post("/", response_model=Dict[str, Any])
 async def create_booking(booking: BookingCreate):
     """Create a new booking"""
     try:
         booking_id = str(uuid.uuid4())
-        pnr = generate_pnr()
+        pnr = await pnr_allocator.allocate_async()
         now = datetime.utcnow().isoformat()
         
         # Validate and clean train information
@@ -184,22 +141,6 @@ async def create_booking(booking: BookingCreate):
                 # Use train_id as fallback
                 train_number = train_id
         
-        # Process passengers and assign seat numbers
-        passengers = []
-        if booking.passengers:
-            # Generate seat numbers for all passengers
-            seat_numbers = generate_seat_numbers(
-                train_number=str(train_number),
-                travel_class=booking.travel_class,
-                passenger_count=len(booking.passengers)
-            )
-            
-            # Assign seat numbers to passengers
-            for i, passenger in enumerate(booking.passengers):
-                passenger_dict = passenger.dict()
-                passenger_dict['seat'] = seat_numbers[i] if i < len(seat_numbers) else "A01"  # Fallback
-                passengers.append(passenger_dict)
-        
         # Process price details
         price_details = booking.price_details or {}
         if not price_details and booking.fare:
@@ -258,7 +199,6 @@ async def create_booking(booking: BookingCreate):
             'tax': str(booking.tax) if booking.tax else '0',
             'total_amount': str(booking.total_amount) if booking.total_amount else str(booking.fare),
             'price_details': {k: str(v) if isinstance(v, (float, int)) and k != 'adult_count' and k != 'senior_count' else v for k, v in price_details.items()},
-            'passengers': [passenger.dict() for passenger in booking.passengers],
             'booking_email': booking.booking_email,
             'booking_phone': booking.booking_phone,
             'booking_date': booking.booking_date or datetime.now().strftime('%Y-%m-%d'),
@@ -267,53 +207,51 @@ async def create_booking(booking: BookingCreate):
             'updated_at': now
         }
         
-        bookings_table.put_item(Item=booking_item)
+        # Queue the notification and confirmation email in the same write as the booking;
+        # the outbox dispatcher delivers them after the response
+        origin = booking.origin_station_code
+        destination = booking.destination_station_code
+        side_effects = [outbox.notification(
+            user_id=booking.user_id,
+            title=f"Booking Confirmed: {origin} to {destination}",
+            message=f"Your booking for {train_name} ({train_number}) from {origin} to {destination} on {booking.journey_date} has been confirmed. PNR: {pnr}",
+            notification_type=NotificationType.BOOKING,
+            reference_id=booking_id,
+            metadata={
+                "event": "booking_created",
+                "pnr": pnr,
+                "train_number": train_number,
+                "journey_date": booking.journey_date,
+                "origin": origin,
+                "destination": destination,
+                "travel_class": booking.travel_class,
+                "passenger_count": len(booking.passengers) if booking.passengers else 0
+            }
+        )]
+        if booking.booking_email:
+            side_effects.append(outbox.record(outbox.BOOKING_EMAIL, {'booking_id': booking_id}, booking_id))
         
-        # Create booking notification
+        # Seats come from the inventory in the same transaction as the booking, so a
+        # booking is never written without its seats and two bookings never share one
+        passengers = []
+
+        def build_items(seats: List[str]) -> List[Dict[str, Any]]:
+            passengers[:] = [{**passenger.dict(), 'seat': seat} for passenger, seat in zip(booking.passengers, seats)]
+            booking_item['passengers'] = passengers
+            return [dynamo.transact_put(BOOKINGS_TABLE, booking_item)] + outbox.put_records(side_effects)
+
         try:
-            print(f"[TatkalPro][Notification] Creating booking notification for user {booking.user_id}")
-            
-            # Format origin and destination for notification
-            origin = booking.origin_station_code
-            destination = booking.destination_station_code
-            
-            # Create notification message
-            notification_title = f"Booking Confirmed: {origin} to {destination}"
-            notification_message = f"Your booking for {train_name} ({train_number}) from {origin} to {destination} on {booking.journey_date} has been confirmed. PNR: {pnr}"
-            
-            # Create notification with booking details
-            notification_id = await create_notification(
-                user_id=booking.user_id,
-                title=notification_title,
-                message=notification_message,
-                notification_type=NotificationType.BOOKING,
-                reference_id=booking_id,
-                metadata={
-                    "event": "booking_created",
-                    "pnr": pnr,
-                    "train_number": train_number,
-                    "journey_date": booking.journey_date,
-                    "origin": origin,
-                    "destination": destination,
-                    "travel_class": booking.travel_class,
-                    "passenger_count": len(booking.passengers) if booking.passengers else 0
-                }
+            await seat_inventory.reserve_async(
+                str(train_number), booking.journey_date, booking.travel_class,
+                len(booking.passengers), build_items=build_items,
+                preferences=[passenger.berth_preference for passenger in booking.passengers]
             )
-            
-            print(f"[TatkalPro][Notification] Booking notification created: {notification_id}")
-        except Exception as notif_err:
-            print(f"[TatkalPro][Notification] Error creating booking notification: {notif_err}")
-            # Don't fail booking creation if notification fails
-        
-        # Send booking confirmation email if email is provided
-        if booking.booking_email:
-            try:
-                print(f"[TatkalPro][Email] Sending booking confirmation email to {booking.booking_email}")
-                send_booking_confirmation_email(booking_item)
-                print(f"[TatkalPro][Email] Booking confirmation email sent successfully")
-            except Exception as email_error:
-                print(f"[TatkalPro][Email] Error sending booking confirmation email: {email_error}")
-                # Don't fail the booking if email fails
+        except seat_inventory.SoldOutError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        except seat_inventory.InventoryContentionError as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+        outbox.wake()
+        print(f"[TatkalPro][Outbox] Booking {booking_id} committed with {len(side_effects)} side effects")
         
         response = {
             'booking_id': booking_id,
@@ -345,6 +283,8 @@ async def create_booking(booking: BookingCreate):
         }
         
         return response
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -355,7 +295,7 @@ async def create_booking(booking: BookingCreate):
 async def get_booking(booking_id: str):
     """Get booking details by ID"""
     try:
-        response = bookings_table.get_item(
+        response = await bookings_table.get_item(
             Key={
                 'PK': f"BOOKING#{booking_id}",
                 'SK': "METADATA"
@@ -417,8 +357,15 @@ async def get_booking(booking_id: str):
 async def get_booking_by_pnr(pnr: str):
     """Get booking details by PNR number"""
     try:
+        # A mistyped PNR fails its check digit; no need to query for it
+        if not has_valid_check_digit(pnr):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Booking with PNR {pnr} not found"
+            )
+        
         # Query the GSI for pnr
-        response = bookings_table.query(
+        response = await bookings_table.query(
             IndexName='pnr-index',
             KeyConditionExpression=Key('pnr').eq(pnr),
             Limit=1  # We only need one result as PNR should be unique
@@ -470,7 +417,7 @@ async def get_booking_by_pnr(pnr: str):
 async def get_user_bookings(user_id: str, limit: int = 10):
     """Get all bookings for a user"""
     try:
-        response = bookings_table.query(
+        response = await bookings_table.query(
             IndexName='user_id-index',
             KeyConditionExpression=Key('user_id').eq(user_id),
             Limit=limit,
@@ -513,7 +460,7 @@ async def cancel_booking(booking_id: str):
     """Cancel a booking and refund the amount to user's wallet"""
     try:
         # Get the booking details
-        response = bookings_table.get_item(
+        response = await bookings_table.get_item(
             Key={
                 'PK': f"BOOKING#{booking_id}",
                 'SK': "METADATA"
@@ -593,7 +540,7 @@ async def cancel_booking(booking_id: str):
         }
         
         # Update the booking
-        bookings_table.update_item(
+        await bookings_table.update_item(
             Key={
                 'PK': f"BOOKING#{booking_id}",
                 'SK': "METADATA"
@@ -617,46 +564,43 @@ async def cancel_booking(booking_id: str):
             notes=f"Refund for cancelled booking {booking_id}"
         )
         
+        # Cancellation notification for user, committed together with the refund
+        origin = booking_item.get('origin_station_code', 'N/A')
+        destination = booking_item.get('destination_station_code', 'N/A')
+        train_name = booking_item.get('train_name', 'N/A')
+        train_number = booking_item.get('train_number', 'N/A')
+        journey_date = booking_item.get('journey_date', 'N/A')
+        pnr = booking_item.get('pnr', 'N/A')
+        cancellation_notification = outbox.notification(
+            user_id=user_id,
+            title=f"Booking Cancelled: {origin} to {destination}",
+            message=f"Your booking for {train_name} ({train_number}) from {origin} to {destination} on {journey_date} has been cancelled. Refund of ₹{refund_amount} has been credited to your wallet. PNR: {pnr}",
+            notification_type=NotificationType.BOOKING,
+            reference_id=booking_id,
+            metadata={
+                "event": "booking_cancelled",
+                "pnr": pnr,
+                "train_number": train_number,
+                "journey_date": journey_date,
+                "origin": origin,
+                "destination": destination,
+                "refund_amount": str(refund_amount)
+            }
+        )
+        
         # Process the transaction
         try:
-            transaction_result = await create_transaction(transaction)
+            transaction_result = await apply_wallet_transaction(transaction, side_effects=[cancellation_notification])
             
-            # Create notification for user
+            # Return the seats to the inventory; a failure here leaves them sold
+            # but must not fail a cancellation that has been refunded
             try:
-                # Format origin and destination for notification
-                origin = booking_item.get('origin_station_code', 'N/A')
-                destination = booking_item.get('destination_station_code', 'N/A')
-                train_name = booking_item.get('train_name', 'N/A')
-                train_number = booking_item.get('train_number', 'N/A')
-                journey_date = booking_item.get('journey_date', 'N/A')
-                pnr = booking_item.get('pnr', 'N/A')
-                
-                # Create notification message
-                notification_title = f"Booking Cancelled: {origin} to {destination}"
-                notification_message = f"Your booking for {train_name} ({train_number}) from {origin} to {destination} on {journey_date} has been cancelled. Refund of ₹{refund_amount} has been credited to your wallet. PNR: {pnr}"
-                
-                # Create notification with cancellation details
-                notification_id = await create_notification(
-                    user_id=user_id,
-                    title=notification_title,
-                    message=notification_message,
-                    notification_type=NotificationType.BOOKING,
-                    reference_id=booking_id,
-                    metadata={
-                        "event": "booking_cancelled",
-                        "pnr": pnr,
-                        "train_number": train_number,
-                        "journey_date": journey_date,
-                        "origin": origin,
-                        "destination": destination,
-                        "refund_amount": str(refund_amount)
-                    }
+                await seat_inventory.release_async(
+                    str(train_number), journey_date, booking_item.get('class', ''),
+                    [p.get('seat') for p in booking_item.get('passengers', [])]
                 )
-                
-                print(f"[TatkalPro][Notification] Booking cancellation notification created: {notification_id}")
-            except Exception as notif_err:
-                print(f"[TatkalPro][Notification] Error creating cancellation notification: {notif_err}")
-                # Don't fail cancellation if notification fails
+            except Exception as e:
+                print(f"[TatkalPro][Inventory] Failed to release seats of booking {booking_id}: {e}")
             
             return {
                 "status": "success",
@@ -668,7 +612,7 @@ async def cancel_booking(booking_id: str):
             
         except Exception as e:
             # Revert booking status if transaction fails
-            bookings_table.update_item(
+            await bookings_table.update_item(
                 Key={
                     'PK': f"BOOKING#{booking_id}",
                     'SK': "METADATA"
@@ -703,7 +647,7 @@ async def update_booking(booking_id: str, booking_update: BookingUpdate):
     """Update a booking"""
     try:
         # Get current booking
-        response = bookings_table.get_item(
+        response = await bookings_table.get_item(
             Key={
                 'PK': f"BOOKING#{booking_id}",
                 'SK': "METADATA"
@@ -751,7 +695,7 @@ async def update_booking(booking_id: str, booking_update: BookingUpdate):
             expression_attribute_values[':booking_phone'] = booking_update.booking_phone
         
         # Update booking in DynamoDB
-        response = bookings_table.update_item(
+        response = await bookings_table.update_item(
             Key={
                 'PK': f"BOOKING#{booking_id}",
                 'SK': "METADATA"
@@ -1,6 +1,8 @@
 # FastAPI endpoint to fetch all cities from the mock API
-from fastapi import APIRouter, HTTPException
-import boto3
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from app.core import dynamo
+from app.core.cities_payload import CitiesPayloadCache
+from app.core.station_index import StationIndex
 import os
 from decimal import Decimal
 import sys
@@ -9,14 +11,26 @@ router = APIRouter()
 
 DYNAMO_TABLE = "stations"
 
-def get_all_cities_from_dynamo():
-    dynamodb = boto3.resource("dynamodb")  # region_name not needed in Lambda
-    table = dynamodb.Table(DYNAMO_TABLE)
+def scan_all_stations():
+    """Every station item, in cities.json order (city_id) so major cities rank first"""
+    table = dynamo.get_table(DYNAMO_TABLE)
+    items = []
     response = table.scan()
-    # Only return items with PK starting with STATION#
-    items = [item for item in response.get("Items", []) if item.get("PK", "").startswith("STATION#")]
-    # Optionally, map to city schema if needed
-    return items
+    items.extend(response.get("Items", []))
+    while "LastEvaluatedKey" in response:
+        response = table.scan(ExclusiveStartKey=response["LastEvaluatedKey"])
+        items.extend(response.get("Items", []))
+    stations = [item for item in items if item.get("PK", "").startswith("STATION#")]
+    stations.sort(key=lambda item: (int(item.get("city_id", sys.maxsize)), item.get("station_code", "")))
+    return stations
+
+# Warm-process autocomplete index, built lazily from the stations table on cold start
+# or loaded from STATION_INDEX_ARTIFACT (see app/core/station_index.py)
+station_index = StationIndex(loader=scan_all_stations, artifact_path=os.getenv("STATION_INDEX_ARTIFACT") or None)
+
+# Precomputed /cities response (see app/core/cities_payload.py)
+cities_payload = CitiesPayloadCache(loader=scan_all_stations)
+CITIES_CACHE_CONTROL = f"public, max-age={os.getenv('CITIES_MAX_AGE_SECONDS', '300')}"
 
 @router.on_event("startup")
 def log_cities_endpoint():
@@ -24,12 +38,35 @@ def log_cities_endpoint():
     print("[FastAPI] Endpoint available: /api/v1/cities", file=sys.stderr)
 
 @router.get("", tags=["cities"])
-def fetch_cities_noslash():
-    return fetch_cities()
+def fetch_cities_noslash(request: Request):
+    return fetch_cities(request)
 
 @router.get("/", tags=["cities"])
-def fetch_cities():
+def fetch_cities(request: Request):
+    """Every station, served from the precomputed payload with ETag revalidation"""
+    try:
+        payload = cities_payload.get()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    headers = {"ETag": payload.etag, "Cache-Control": CITIES_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if payload.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=payload.gzip_body, media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+@router.get("/search", tags=["cities"])
+def search_cities(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    """Autocomplete stations by code, name or any word of the name"""
     try:
-        return get_all_cities_from_dynamo()
+        return station_index.search(q, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/search/index-stats", tags=["cities"])
+def search_index_stats():
+    """Search/cache/rebuild counters for the in-memory station index"""
+    return station_index.stats()
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from typing import List, Dict, Any
-import boto3
+from app.core import dynamo
 import os
 from boto3.dynamodb.conditions import Key
 from decimal import Decimal
@@ -11,12 +11,6 @@ router = APIRouter()
 # Get table name from environment variable with default
 JOB_LOGS_TABLE = os.getenv('JOB_LOGS_TABLE', 'job_logs')
 
-# Get AWS region from environment variable
-AWS_REGION = os.getenv('REGION', os.getenv('AWS_REGION', 'ap-south-1'))
-
-# Initialize DynamoDB resource
-dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
-
 # Helper class for JSON serialization of Decimal types
 class DecimalEncoder(json.JSONEncoder):
     def default(self, o):
@@ -37,7 +31,7 @@ async def get_job_logs(job_id: str):
     """Get all logs for a specific job"""
     try:
         # Query the job_logs table directly
-        job_logs_table = dynamodb.Table(JOB_LOGS_TABLE)
+        job_logs_table = dynamo.table(JOB_LOGS_TABLE)
         
         # Format the job_id as the PK value (assuming format is JOB#{job_id})
         pk_value = f"JOB#{job_id}"
@@ -2,8 +2,7 @@ from fastapi import APIRouter, HTTPException, status, Query, Depends
 from typing import List, Optional, Dict, Any
 from boto3.dynamodb.conditions import Key, Attr
 from datetime import datetime
-import boto3
-import os
+from app.core import dynamo, outbox
 import uuid
 import json
 import asyncio
@@ -16,14 +15,16 @@ from app.schemas.notification import NotificationType
 # Import schemas
 from app.schemas.job import Job, JobCreate, JobUpdate, JobStatus, JobType
 
+# Due-time key for the cron runner's sparse index
+from app.core.job_due_index import job_due_key, due_key_update, CANCELLED_REASON
+
 router = APIRouter()
 
 # Table names
 JOBS_TABLE = 'jobs'
 JOB_EXECUTIONS_TABLE = 'job_executions'
-dynamodb = boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "ap-south-1"))
-jobs_table = dynamodb.Table(JOBS_TABLE)
-job_executions_table = dynamodb.Table(JOB_EXECUTIONS_TABLE)
+jobs_table = dynamo.async_table(JOBS_TABLE)
+job_executions_table = dynamo.async_table(JOB_EXECUTIONS_TABLE)
 
 # Helper function to convert DynamoDB items to Python types
 class DecimalEncoder(json.JSONEncoder):
@@ -100,6 +101,11 @@ async def create_job(job: JobCreate):
         if job.job_execution_time:
             job_item['job_execution_time'] = job.job_execution_time
         
+        # Index the job for the cron runner once it has a job date
+        due_key = job_due_key(job_item)
+        if due_key:
+            job_item['due_date'], job_item['due_time'] = due_key
+        
         # Calculate next execution time based on booking_time and journey_date
         try:
             booking_time_parts = job.booking_time.split(":")
@@ -118,46 +124,32 @@ async def create_job(job: JobCreate):
             # Default to None if calculation fails
             job_item['next_execution_time'] = None
         
-        jobs_table.put_item(Item=job_item)
-        
-        # Create job notification
-        try:
-            print(f"[TatkalPro][Notification] Creating job notification for user {job.user_id}")
-            
-            # Format job type for notification
-            job_type_display = {
-                JobType.TATKAL.value: "Tatkal",
-                JobType.PREMIUM_TATKAL.value: "Premium Tatkal",
-                JobType.GENERAL.value: "General"
-            }.get(job.job_type, "Booking")
-            
-            # Create notification message
-            notification_title = f"New {job_type_display} Job Created"
-            notification_message = f"Your {job_type_display} booking job from {job.origin_station_code} to {job.destination_station_code} for {job.journey_date} has been scheduled."
-            
-            # Create notification with job details
-            notification_id = await create_notification(
-                user_id=job.user_id,
-                title=notification_title,
-                message=notification_message,
-                notification_type=NotificationType.BOOKING,
-                reference_id=job_id,
-                metadata={
-                    "event": "job_created",
-                    "job_id": job_id,
-                    "job_type": job.job_type,
-                    "journey_date": job.journey_date,
-                    "origin": job.origin_station_code,
-                    "destination": job.destination_station_code,
-                    "travel_class": job.travel_class,
-                    "passenger_count": len(job.passengers) if job.passengers else 0
-                }
-            )
-            
-            print(f"[TatkalPro][Notification] Job notification created: {notification_id}")
-        except Exception as notif_err:
-            print(f"[TatkalPro][Notification] Error creating job notification: {notif_err}")
-            # Don't fail job creation if notification fails
+        # Format job type for notification
+        job_type_display = {
+            JobType.TATKAL.value: "Tatkal",
+            JobType.PREMIUM_TATKAL.value: "Premium Tatkal",
+            JobType.GENERAL.value: "General"
+        }.get(job.job_type, "Booking")
+        
+        # Save the job and queue its notification in one write
+        job_notification = outbox.notification(
+            user_id=job.user_id,
+            title=f"New {job_type_display} Job Created",
+            message=f"Your {job_type_display} booking job from {job.origin_station_code} to {job.destination_station_code} for {job.journey_date} has been scheduled.",
+            notification_type=NotificationType.BOOKING,
+            reference_id=job_id,
+            metadata={
+                "event": "job_created",
+                "job_id": job_id,
+                "job_type": job.job_type,
+                "journey_date": job.journey_date,
+                "origin": job.origin_station_code,
+                "destination": job.destination_station_code,
+                "travel_class": job.travel_class,
+                "passenger_count": len(job.passengers) if job.passengers else 0
+            }
+        )
+        await outbox.write([dynamo.transact_put(JOBS_TABLE, job_item)], [job_notification])
         
         return {
             'job_id': job_id,
@@ -174,7 +166,7 @@ async def create_job(job: JobCreate):
 async def get_job(job_id: str):
     """Get job details by ID"""
     try:
-        response = jobs_table.get_item(
+        response = await jobs_table.get_item(
             Key={
                 'PK': f"JOB#{job_id}",
                 'SK': "METADATA"
@@ -283,7 +275,7 @@ async def get_user_jobs(
             query_params['FilterExpression'] = filter_expression
         
         # Execute query
-        response = jobs_table.query(**query_params)
+        response = await jobs_table.query(**query_params)
         
         items = response.get('Items', [])
         jobs_data = []
@@ -345,7 +337,7 @@ async def update_job(job_id: str, job_update: JobUpdate):
     """Update an existing job"""
     try:
         # First check if job exists
-        response = jobs_table.get_item(
+        response = await jobs_table.get_item(
             Key={
                 'PK': f"JOB#{job_id}",
                 'SK': "METADATA"
@@ -500,8 +492,28 @@ async def update_job(job_id: str, job_update: JobUpdate):
             update_expression += ", execution_attempts = :execution_attempts"
             expression_attribute_values[':execution_attempts'] = job_update.execution_attempts
         
+        # Keep the due-time key in sync with the job's status, date and time after this update
+        updated_fields = {
+            'job_status': expression_attribute_values.get(':job_status', existing_job.get('job_status')),
+            'job_date': expression_attribute_values.get(':job_date', existing_job.get('job_date')),
+            'job_execution_time': expression_attribute_values.get(':job_execution_time', existing_job.get('job_execution_time')),
+            'execution_attempts': expression_attribute_values.get(
+                ':execution_attempts',
+                expression_attribute_values.get(':null_execution_attempts', existing_job.get('execution_attempts'))
+            ),
+            'failure_reason': expression_attribute_values.get(
+                ':failure_reason',
+                None if ':null_failure_reason' in expression_attribute_values else existing_job.get('failure_reason')
+            )
+        }
+        due_set, due_remove = due_key_update(updated_fields, expression_attribute_values)
+        if due_set:
+            update_expression += f", {due_set}"
+        if due_remove:
+            update_expression += f" REMOVE {due_remove}"
+        
         # Update job in DynamoDB
-        response = jobs_table.update_item(
+        response = await jobs_table.update_item(
             Key={
                 'PK': f"JOB#{job_id}",
                 'SK': "METADATA"
@@ -621,7 +633,7 @@ async def delete_job(job_id: str):
     """Delete a job"""
     try:
         # First check if job exists
-        response = jobs_table.get_item(
+        response = await jobs_table.get_item(
             Key={
                 'PK': f"JOB#{job_id}",
                 'SK': "METADATA"
@@ -644,7 +656,7 @@ async def delete_job(job_id: str):
             )
         
         # Delete job from DynamoDB
-        jobs_table.delete_item(
+        await jobs_table.delete_item(
             Key={
                 'PK': f"JOB#{job_id}",
                 'SK': "METADATA"
@@ -669,7 +681,7 @@ async def cancel_job(job_id: str):
     """Cancel a scheduled or in-progress job"""
     try:
         # First check if job exists
-        response = jobs_table.get_item(
+        response = await jobs_table.get_item(
             Key={
                 'PK': f"JOB#{job_id}",
                 'SK': "METADATA"
@@ -691,18 +703,19 @@ async def cancel_job(job_id: str):
                 detail=f"Cannot cancel job when status is {existing_job['job_status']}"
             )
         
-        # Update job status to Failed with cancellation reason
+        # Update job status to Failed with cancellation reason; dropping the lease stops a runner
+        # still executing the job from completing or failing it over the cancellation
         now = datetime.utcnow().isoformat()
         
-        response = jobs_table.update_item(
+        response = await jobs_table.update_item(
             Key={
                 'PK': f"JOB#{job_id}",
                 'SK': "METADATA"
             },
-            UpdateExpression="SET job_status = :job_status, failure_reason = :failure_reason, updated_at = :updated_at",
+            UpdateExpression="SET job_status = :job_status, failure_reason = :failure_reason, updated_at = :updated_at REMOVE due_date, due_time, lease_owner, lease_expires_at",
             ExpressionAttributeValues={
                 ':job_status': JobStatus.FAILED.value,
-                ':failure_reason': 'Cancelled by user',
+                ':failure_reason': CANCELLED_REASON,
                 ':updated_at': now
             },
             ReturnValues="UPDATED_NEW"
@@ -768,7 +781,7 @@ async def retry_job(job_id: str):
     """Retry a failed job"""
     try:
         # First check if job exists
-        response = jobs_table.get_item(
+        response = await jobs_table.get_item(
             Key={
                 'PK': f"JOB#{job_id}",
                 'SK': "METADATA"
@@ -793,19 +806,29 @@ async def retry_job(job_id: str):
         # Reset job status to Scheduled
         now = datetime.utcnow().isoformat()
         
-        response = jobs_table.update_item(
+        expression_attribute_values = {
+            ':job_status': JobStatus.SCHEDULED.value,
+            ':failure_reason': None,
+            ':updated_at': now,
+            ':execution_attempts': 0,
+            ':next_execution_time': now  # Set to now for immediate retry
+        }
+        update_expression = "SET job_status = :job_status, failure_reason = :failure_reason, updated_at = :updated_at, execution_attempts = :execution_attempts, next_execution_time = :next_execution_time"
+        
+        # Re-index the job for the cron runner
+        due_set, due_remove = due_key_update({**existing_job, 'job_status': JobStatus.SCHEDULED.value, 'execution_attempts': 0, 'failure_reason': None}, expression_attribute_values)
+        if due_set:
+            update_expression += f", {due_set}"
+        if due_remove:
+            update_expression += f" REMOVE {due_remove}"
+        
+        response = await jobs_table.update_item(
             Key={
                 'PK': f"JOB#{job_id}",
                 'SK': "METADATA"
             },
-            UpdateExpression="SET job_status = :job_status, failure_reason = :failure_reason, updated_at = :updated_at, execution_attempts = :execution_attempts, next_execution_time = :next_execution_time",
-            ExpressionAttributeValues={
-                ':job_status': JobStatus.SCHEDULED.value,
-                ':failure_reason': None,
-                ':updated_at': now,
-                ':execution_attempts': 0,
-                ':next_execution_time': now  # Set to now for immediate retry
-            },
+            UpdateExpression=update_expression,
+            ExpressionAttributeValues=expression_attribute_values,
             ReturnValues="UPDATED_NEW"
         )
         
@@ -827,7 +850,7 @@ async def get_job_executions(job_id: str, limit: int = Query(10, ge=1, le=100)):
     """Get execution history for a job"""
     try:
         # First check if job exists
-        response = jobs_table.get_item(
+        response = await jobs_table.get_item(
             Key={
                 'PK': f"JOB#{job_id}",
                 'SK': "METADATA"
@@ -841,7 +864,7 @@ async def get_job_executions(job_id: str, limit: int = Query(10, ge=1, le=100)):
             )
         
         # Query executions for the job
-        response = job_executions_table.query(
+        response = await job_executions_table.query(
             KeyConditionExpression=Key('job_id').eq(job_id),
             Limit=limit,
             ScanIndexForward=False  # Return in descending order (newest first)
@@ -1,8 +1,7 @@
 from fastapi import APIRouter, HTTPException, status, Query
 from typing import List, Optional
 from datetime import datetime
-import boto3
-import os
+from app.core import dynamo, notification_counters
 from boto3.dynamodb.conditions import Key, Attr
 
 # Import schemas
@@ -20,15 +19,15 @@ from app.api.v1.utils.notification_utils import (
     create_notification,
     mark_notification_as_read,
     mark_all_notifications_as_read,
-    delete_notification
+    delete_notification,
+    bulk_delete_notifications
 )
 
 router = APIRouter()
 
 # Table names
-NOTIFICATIONS_TABLE = 'notifications'
-dynamodb = boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "ap-south-1"))
-notifications_table = dynamodb.Table(NOTIFICATIONS_TABLE)
+NOTIFICATIONS_TABLE = notification_counters.NOTIFICATIONS_TABLE
+notifications_table = dynamo.async_table(NOTIFICATIONS_TABLE)
 
 
 @router.get("/user/{user_id}", response_model=NotificationList)
@@ -43,8 +42,8 @@ async def get_user_notifications(
     Get notifications for a user with optional filtering by type and status
     """
     try:
-        # Base query condition
-        key_condition = Key('PK').eq(f"USER#{user_id}")
+        # Base query condition; the partition also holds the user's counter item
+        key_condition = Key('PK').eq(f"USER#{user_id}") & Key('SK').begins_with(notification_counters.NOTIFICATION_SK_PREFIX)
         
         # Start with empty filter expression
         filter_expression = None
@@ -78,19 +77,10 @@ async def get_user_notifications(
             query_params['ExclusiveStartKey'] = json.loads(last_evaluated_key)
         
         # Execute query
-        response = notifications_table.query(**query_params)
+        response = await notifications_table.query(**query_params)
         
-        # Get total and unread counts
-        total_count_response = notifications_table.query(
-            KeyConditionExpression=key_condition,
-            Select='COUNT'
-        )
-        
-        unread_count_response = notifications_table.query(
-            KeyConditionExpression=key_condition,
-            FilterExpression=Attr('status').eq(NotificationStatus.UNREAD.value),
-            Select='COUNT'
-        )
+        # Get total and unread counts from the user's counter item
+        total_count, unread_count = await notification_counters.get_counts(user_id)
         
         # Process items
         notifications = []
@@ -124,8 +114,8 @@ async def get_user_notifications(
         # Return response
         return {
             'notifications': notifications,
-            'total_count': total_count_response.get('Count', 0),
-            'unread_count': unread_count_response.get('Count', 0),
+            'total_count': total_count,
+            'unread_count': unread_count,
             'last_evaluated_key': last_evaluated_key_json
         }
     except Exception as e:
@@ -188,9 +178,9 @@ async def mark_all_user_notifications_read(user_id: str):
     Mark all notifications for a user as read
     """
     try:
-        success = await mark_all_notifications_as_read(user_id)
-        if success:
-            return {"message": "All notifications marked as read"}
+        updated = await mark_all_notifications_as_read(user_id)
+        if updated is not None:
+            return {"message": "All notifications marked as read", "updated": updated}
         else:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -203,6 +193,30 @@ async def mark_all_user_notifications_read(user_id: str):
         )
 
 
+@router.delete("/user/{user_id}")
+async def delete_user_notifications(
+    user_id: str,
+    older_than_days: Optional[int] = Query(None, ge=0)
+):
+    """
+    Delete all notifications for a user, or only those older than `older_than_days`
+    """
+    try:
+        deleted = await bulk_delete_notifications(user_id, older_than_days)
+        if deleted is not None:
+            return {"message": "Notifications deleted successfully", "deleted": deleted}
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to delete notifications"
+            )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error deleting notifications: {str(e)}"
+        )
+
+
 @router.delete("/{notification_id}")
 async def delete_user_notification(notification_id: str, user_id: str):
     """
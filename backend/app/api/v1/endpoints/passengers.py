@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List, Optional
 from datetime import datetime
-import boto3
-import os
+from app.core import dynamo, outbox
 import json
 import asyncio
 from boto3.dynamodb.conditions import Key
@@ -18,10 +17,8 @@ from app.schemas.passenger import PassengerBase, PassengerCreate, Passenger
 router = APIRouter()
 
 # Table name for passengers
-import boto3
 PASSENGERS_TABLE = 'passengers'
-dynamodb = boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "ap-south-1"))
-passengers_table = dynamodb.Table(PASSENGERS_TABLE)
+passengers_table = dynamo.table(PASSENGERS_TABLE)
 
 @router.post("/", response_model=Passenger, status_code=status.HTTP_201_CREATED)
 async def create_passenger(
@@ -150,35 +147,28 @@ async def delete_passenger(
         # Get passenger details for notification
         passenger_name = response['Item'].get('name', 'Unknown')
         
-        # Delete the passenger
-        passengers_table.delete_item(Key={'id': passenger_id})
-        
-        # Create passenger deletion notification
-        try:
-            print(f"[TatkalPro][Notification] Creating passenger deletion notification for user {user_id}")
-            
-            # Create notification message
-            notification_title = "Passenger Removed"
-            notification_message = f"Passenger {passenger_name} has been removed from your account."
-            
-            # Create notification with passenger details
-            notification_id = await create_notification(
-                user_id=user_id,
-                title=notification_title,
-                message=notification_message,
-                notification_type=NotificationType.ACCOUNT,
-                reference_id=passenger_id,
-                metadata={
-                    "event": "passenger_deleted",
-                    "passenger_id": passenger_id,
-                    "passenger_name": passenger_name
-                }
-            )
-            
-            print(f"[TatkalPro][Notification] Passenger deletion notification created: {notification_id}")
-        except Exception as notif_err:
-            print(f"[TatkalPro][Notification] Error creating passenger deletion notification: {notif_err}")
-            # Don't fail passenger deletion if notification fails
+        # Delete the passenger and queue the deletion notification in one write
+        passenger_notification = outbox.notification(
+            user_id=user_id,
+            title="Passenger Removed",
+            message=f"Passenger {passenger_name} has been removed from your account.",
+            notification_type=NotificationType.ACCOUNT,
+            reference_id=passenger_id,
+            metadata={
+                "event": "passenger_deleted",
+                "passenger_id": passenger_id,
+                "passenger_name": passenger_name
+            }
+        )
+        await outbox.write(
+            [dynamo.transact_delete(
+                PASSENGERS_TABLE,
+                {'id': passenger_id},
+                condition="user_id = :user_id",
+                values={':user_id': user_id}
+            )],
+            [passenger_notification]
+        )
         
         return None
     except HTTPException:
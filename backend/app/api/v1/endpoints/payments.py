@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List, Optional
 from datetime import datetime
-import boto3
-import os
+from app.core import dynamo
 import json
 import uuid
 import asyncio
@@ -20,8 +19,7 @@ router = APIRouter()
 
 # Table names
 PAYMENTS_TABLE = 'payments'
-dynamodb = boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "ap-south-1"))
-payments_table = dynamodb.Table(PAYMENTS_TABLE)
+payments_table = dynamo.async_table(PAYMENTS_TABLE)
 
 @router.post("/", response_model=Payment, status_code=status.HTTP_201_CREATED)
 async def create_payment(payment: PaymentCreate):
@@ -44,7 +42,7 @@ async def create_payment(payment: PaymentCreate):
     
     try:
         # Save to DynamoDB
-        payments_table.put_item(Item=payment_item)
+        await payments_table.put_item(Item=payment_item)
         
         # Create payment notification
         try:
@@ -104,7 +102,7 @@ async def create_payment(payment: PaymentCreate):
 async def get_payment(payment_id: str):
     """Get payment details by ID"""
     try:
-        response = payments_table.get_item(
+        response = await payments_table.get_item(
             Key={
                 'PK': f"PAYMENT#{payment_id}",
                 'SK': "METADATA"
@@ -146,7 +144,7 @@ async def get_payment(payment_id: str):
 async def get_payments_by_booking(booking_id: str):
     """Get all payments for a specific booking"""
     try:
-        response = payments_table.query(
+        response = await payments_table.query(
             IndexName='booking_id-index',
             KeyConditionExpression=Key('booking_id').eq(booking_id)
         )
@@ -178,7 +176,7 @@ async def get_payments_by_booking(booking_id: str):
 async def get_user_payments(user_id: str, limit: int = 10):
     """Get all payments for a user"""
     try:
-        response = payments_table.query(
+        response = await payments_table.query(
             IndexName='user_id-index',
             KeyConditionExpression=Key('user_id').eq(user_id),
             Limit=limit,
@@ -213,7 +211,7 @@ async def update_payment(payment_id: str, payment_update: PaymentUpdate):
     """Update payment details (e.g., mark as successful or failed)"""
     try:
         # First get the current payment
-        response = payments_table.get_item(
+        response = await payments_table.get_item(
             Key={
                 'PK': f"PAYMENT#{payment_id}",
                 'SK': "METADATA"
@@ -261,7 +259,7 @@ async def update_payment(payment_id: str, payment_update: PaymentUpdate):
             )
         
         # Update the item
-        response = payments_table.update_item(
+        response = await payments_table.update_item(
             Key={
                 'PK': f"PAYMENT#{payment_id}",
                 'SK': "METADATA"
@@ -7,6 +7,8 @@ import json
 import os
 
 import boto3
+from app.core import dynamo
+from boto3.dynamodb.conditions import Key, Attr
 import os
 from decimal import Decimal
 from typing import Optional
@@ -14,12 +16,12 @@ from typing import Optional
 router = APIRouter()
 
 TRAINS_TABLE = "trains"
+TRAIN_STOPS_TABLE = "train_stops"
 
 # Helper to get DynamoDB table
 
 def get_trains_table():
-    dynamodb = boto3.resource("dynamodb")  # region_name not needed in Lambda
-    return dynamodb.Table(TRAINS_TABLE)
+    return dynamo.get_table(TRAINS_TABLE)
 
 # Helper to query by train_number-index
 
@@ -44,6 +46,47 @@ def scan_all_trains():
 
 # Fix search_trains to only filter by source, destination, and date/day. Remove class filtering.
 import logging
+from app.core.route_index import RouteIndex, unmarshal
+
+# Warm-process route index, built lazily from the trains table on cold start
+route_index = RouteIndex(loader=scan_all_trains)
+
+def query_train_stops(origin, destination, day_of_week):
+    """Query the origin/destination pair items (STOP#<origin>, DEST#<destination>#...) running on day_of_week"""
+    table = dynamo.get_table(TRAIN_STOPS_TABLE)
+    query_kwargs = {
+        "KeyConditionExpression": Key("PK").eq(f"STOP#{origin}") & Key("SK").begins_with(f"DEST#{destination}#"),
+        "FilterExpression": Attr("run_days").contains(day_of_week.lower()),
+    }
+    items = []
+    response = table.query(**query_kwargs)
+    items.extend(response.get("Items", []))
+    while 'LastEvaluatedKey' in response:
+        response = table.query(ExclusiveStartKey=response['LastEvaluatedKey'], **query_kwargs)
+        items.extend(response.get("Items", []))
+    return items
+
+def batch_get_trains(train_ids):
+    """Fetch TRAIN#<id>/METADATA items in batches of 100, retrying unprocessed keys"""
+    dynamodb = dynamo.get_resource()
+    trains = []
+    train_ids = list(dict.fromkeys(train_ids))
+    for start in range(0, len(train_ids), 100):
+        request = {TRAINS_TABLE: {"Keys": [{"PK": f"TRAIN#{train_id}", "SK": "METADATA"} for train_id in train_ids[start:start + 100]]}}
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            trains.extend(response.get("Responses", {}).get(TRAINS_TABLE, []))
+            request = response.get("UnprocessedKeys") or None
+    return trains
+
+def search_trains_via_stops(origin, destination, day_of_week):
+    """Cold path: one query on the train_stops table, then fetch the matching trains"""
+    stops = query_train_stops(origin, destination, day_of_week)
+    trains = [unmarshal(train) for train in batch_get_trains([stop["train_id"] for stop in stops])]
+    # Keep the stop-table order, which is sorted by train id
+    order = {str(stop["train_id"]): idx for idx, stop in enumerate(stops)}
+    trains.sort(key=lambda train: order.get(str(train.get("train_id")), len(order)))
+    return trains
 
 @router.get("/search", tags=["trains"])
 def search_trains(
@@ -51,81 +94,27 @@ def search_trains(
     destination: str = Query(..., description="Destination station code (e.g., HWH)"),
     date: str = Query(..., description="Journey date (YYYY-MM-DD)")
 ):
-    import logging
-    logger = logging.getLogger("dynamo.trains")
     print("ENTERED search_trains endpoint")
     print(f"Train search requested: origin={origin}, destination={destination}, date={date}")
-    from boto3.dynamodb.types import TypeDeserializer
-    deserializer = TypeDeserializer()
-
-    def unmarshal(item):
-        # Recursively unmarshal a DynamoDB item
-        if isinstance(item, dict) and set(item.keys()) <= {'S','N','BOOL','NULL','M','L'}:
-            return deserializer.deserialize(item)
-        elif isinstance(item, dict):
-            return {k: unmarshal(v) for k, v in item.items()}
-        elif isinstance(item, list):
-            return [unmarshal(x) for x in item]
-        else:
-            return item
-
-    def extract_list(raw, key='S'):
-        # Handles DynamoDB format or plain list of strings
-        if isinstance(raw, list):
-            return [x[key] if isinstance(x, dict) and key in x else str(x) for x in raw]
-        elif isinstance(raw, dict) and 'L' in raw:
-            return [x[key] if isinstance(x, dict) and key in x else str(x) for x in raw['L']]
-        return []
-
     try:
-        from datetime import datetime
         day_of_week = datetime.strptime(date, "%Y-%m-%d").strftime("%a")
-        # Query using the new source-destination-station-index GSI
-        table = get_trains_table()
-        response = table.query(
-            IndexName="source-destination-station-index",
-            KeyConditionExpression=(
-                boto3.dynamodb.conditions.Key("source_station").eq(origin)
-            )
-        )
-        trains = response.get("Items", [])
-        results = []
-        for train in trains:
-            train = unmarshal(train)  # Always unmarshal!
-            route_stations = train.get('route', [])
-            # Robustly handle both string and dict route entries
-            route_stations = [s if isinstance(s, str) else s.get('station_code') or s.get('S') for s in route_stations]
-            train_source = train.get('source_station') or train.get('source_station_code')
-            train_dest = train.get('destination_station') or train.get('destination_station_code')
-            print(f"Checking train_id={train.get('train_id')}, route_stations={route_stations}, train_source={train_source}, train_dest={train_dest}")
-            print(f"origin={origin}, destination={destination}, origin_in_route={origin in route_stations}, dest_in_route={destination in route_stations}")
-            if origin in route_stations and destination in route_stations:
-                print(f"Order check: {route_stations.index(origin)} < {route_stations.index(destination)}")
-                if route_stations.index(origin) < route_stations.index(destination):
-                    print(f"Source match: {train_source} == {origin}, Dest match: {train_dest} == {destination}")
-                    if (not train_source or train_source == origin) and (not train_dest or train_dest == destination):
-                        days_of_run = train.get('days_of_run', [])
-                        # Normalize days_of_run to list of str
-                        if days_of_run and isinstance(days_of_run[0], dict):
-                            days_of_run = [d.get('S') or str(d) for d in days_of_run]
-                        print(f"days_of_run={days_of_run}, day_of_week={day_of_week}")
-                        if any(day.lower() == day_of_week.lower() for day in days_of_run):
-                            print(f"MATCH: Appending train_id={train.get('train_id')}")
-                            results.append(train)
-                        else:
-                            print(f"Day of run mismatch for train_id={train.get('train_id')}")
-                    else:
-                        print(f"Source or destination mismatch for train_id={train.get('train_id')}")
-                else:
-                    print(f"Route order mismatch for train_id={train.get('train_id')}")
-            else:
-                print(f"Origin or destination not in route for train_id={train.get('train_id')}")
+        try:
+            results = route_index.search(origin, destination, day_of_week)
+        except Exception as index_error:
+            # Fall back to the stop-level table if the index cannot be built
+            print(f"Route index unavailable, falling back to train_stops query: {index_error}")
+            results = search_trains_via_stops(origin, destination, day_of_week)
         print(f"Returning {len(results)} trains after filtering.")
         return results
     except Exception as e:
         print(f"Error in train search: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/search/index-stats", tags=["trains"])
+def search_index_stats():
+    """Hit/miss/rebuild counters for the in-memory route index"""
+    return route_index.stats()
+
 @router.get("/search/minimal", tags=["trains"])
 def search_trains_minimal():
     logger = logging.getLogger("mockapi.trains")
@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List, Optional
 from datetime import datetime
-import boto3
-import os
+from app.core import dynamo
 import json
 import uuid
 from boto3.dynamodb.conditions import Key
@@ -15,8 +14,7 @@ router = APIRouter()
 
 # Table names
 WALLET_TABLE = 'wallet'
-dynamodb = boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "ap-south-1"))
-wallet_table = dynamodb.Table(WALLET_TABLE)
+wallet_table = dynamo.async_table(WALLET_TABLE)
 
 @router.post("/", response_model=Wallet, status_code=status.HTTP_201_CREATED)
 async def create_wallet(wallet: WalletCreate):
@@ -30,7 +28,7 @@ async def create_wallet(wallet: WalletCreate):
         'SK': "METADATA",
         'wallet_id': wallet_id,
         'user_id': wallet.user_id,
-        'balance': str(wallet.balance),  # Convert Decimal to string for DynamoDB
+        'balance': wallet.balance,  # Stored as a number so wallet_ledger can ADD to it
         'status': wallet.status.value,
         'created_at': now,
         'updated_at': now
@@ -46,7 +44,7 @@ async def create_wallet(wallet: WalletCreate):
             )
         
         # Save to DynamoDB
-        wallet_table.put_item(Item=wallet_item)
+        await wallet_table.put_item(Item=wallet_item)
         
         # Convert to response model
         response = {**wallet.dict(), 
@@ -66,7 +64,7 @@ async def create_wallet(wallet: WalletCreate):
 async def get_wallet(wallet_id: str):
     """Get wallet details by ID"""
     try:
-        response = wallet_table.get_item(
+        response = await wallet_table.get_item(
             Key={
                 'PK': f"WALLET#{wallet_id}",
                 'SK': "METADATA"
@@ -104,7 +102,7 @@ async def get_wallet(wallet_id: str):
 async def get_wallet_by_user_id(user_id: str):
     """Get wallet details by user ID"""
     try:
-        response = wallet_table.query(
+        response = await wallet_table.query(
             IndexName='user_id-index',
             KeyConditionExpression=Key('user_id').eq(user_id),
             Limit=1
@@ -141,7 +139,7 @@ async def update_wallet(wallet_id: str, wallet_update: WalletUpdate):
     """Update wallet details (e.g., balance or status)"""
     try:
         # First get the current wallet
-        response = wallet_table.get_item(
+        response = await wallet_table.get_item(
             Key={
                 'PK': f"WALLET#{wallet_id}",
                 'SK': "METADATA"
@@ -167,7 +165,7 @@ async def update_wallet(wallet_id: str, wallet_update: WalletUpdate):
         # Add fields to update
         if wallet_update.balance is not None:
             update_expression += ", balance = :balance"
-            expression_attribute_values[':balance'] = str(wallet_update.balance)  # Convert Decimal to string for DynamoDB
+            expression_attribute_values[':balance'] = wallet_update.balance
         
         if wallet_update.status is not None:
             update_expression += ", #status = :status"
@@ -189,7 +187,7 @@ async def update_wallet(wallet_id: str, wallet_update: WalletUpdate):
         if expression_attribute_names:
             update_params['ExpressionAttributeNames'] = expression_attribute_names
             
-        response = wallet_table.update_item(**update_params)
+        response = await wallet_table.update_item(**update_params)
         
         updated_item = response['Attributes']
         
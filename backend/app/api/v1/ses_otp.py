@@ -6,7 +6,7 @@ from fastapi import APIRouter, HTTPException, Body
 from pydantic import BaseModel, EmailStr
 import os
 import time
-import boto3
+from app.core import dynamo, templates
 from typing import Dict
 from twilio.rest import Client
 
@@ -35,11 +35,7 @@ class OtpVerifyRequest(BaseModel):
 
 # DynamoDB OTP table setup
 otp_table_name = os.getenv("OTP_TABLE_NAME", "otp_codes")
-dynamodb = boto3.resource(
-    'dynamodb',
-    region_name=os.getenv("AWS_REGION", "ap-south-1")
-)
-otp_table = dynamodb.Table(otp_table_name)
+otp_table = dynamo.table(otp_table_name)
 
 # Twilio setup
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
@@ -87,44 +83,7 @@ def send_otp(request: OtpRequest):
         "Expiry": expiry
     })
 
-    html_body = f"""
-    <html>
-      <body style='background:#f6f6f6; font-family:sans-serif; padding:0; margin:0;'>
-        <table width='100%' cellpadding='0' cellspacing='0' style='background:#f6f6f6; padding:40px 0;'>
-          <tr>
-            <td align='center'>
-              <table width='400' cellpadding='0' cellspacing='0' style='background:#fff; border-radius:12px; border:1px solid #e0e0e0; box-shadow:0 2px 8px #eee;'>
-                <tr>
-                  <td align='center' style='padding:32px 24px 10px 24px;'>
-                    <img src='https://cdn-icons-png.flaticon.com/512/561/561127.png' alt='OTP' width='80' style='margin-bottom:16px;' />
-                    <h2 style='color:#4B0082; margin:0 0 8px 0;'>Email Verification</h2>
-                    <p style='font-size:14px; color:#888; margin:0 0 18px 0;'>To: <b>{request.email}</b></p>
-                    <p style='font-size:18px; color:#222; margin:0 0 12px 0;'>Hello,</p>
-                    <p style='font-size:15px; color:#222; margin:0 0 18px 0;'>Your one-time password (OTP) is:</p>
-                    <table width='100%' cellpadding='0' cellspacing='0'>
-                      <tr>
-                        <td align='center'>
-                          <div style='font-size:32px; font-weight:bold; color:#4B0082; letter-spacing:8px; border:2px dashed #4B0082; border-radius:8px; padding:16px 32px; margin:12px 0 18px 0; background:#f4f0fa; display:inline-block;'>
-                            {otp}
-                          </div>
-                        </td>
-                      </tr>
-                    </table>
-                    <p style='font-size:14px; color:#333; margin:0 0 8px 0;'>Enter this code to verify your email address. <br>It is valid for 10 minutes.</p>
-                  </td>
-                </tr>
-                <tr>
-                  <td align='center' style='padding:0 24px 24px 24px;'>
-                    <p style='font-size:12px; color:#888; margin:0;'>If you did not request this, you can ignore this email.</p>
-                  </td>
-                </tr>
-              </table>
-            </td>
-          </tr>
-        </table>
-      </body>
-    </html>
-    """
+    html_body = templates.render(templates.OTP_EMAIL, email=request.email, otp=otp)
     try:
         sg = sendgrid.SendGridAPIClient(api_key=SENDGRID_API_KEY)
         message = Mail(
@@ -1,20 +1,28 @@
-import boto3
+from app.core import dynamo
+from app.core.user_index import resolve_user
 import os
 import json
+import asyncio
 import logging
 import base64
 import tempfile
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from datetime import datetime
 import firebase_admin
-from firebase_admin import credentials, messaging
+from botocore.exceptions import ClientError
+from firebase_admin import credentials, exceptions, messaging
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 # Initialize DynamoDB resource
-dynamodb = boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "ap-south-1"))
-users_table = dynamodb.Table('users')
+users_table = dynamo.async_table('users')
+
+# FCM accepts at most 500 tokens per multicast call
+FCM_MULTICAST_LIMIT = 500
+
+# Provides send_each_for_multicast(); benchmarks swap in a fake transport
+transport = messaging
 
 # Initialize Firebase Admin SDK
 try:
@@ -50,62 +58,28 @@ try:
 except Exception as e:
     logger.error(f"Error initializing Firebase Admin SDK: {str(e)}")
 
-async def register_fcm_token(user_id: str, token: str) -> bool:
+async def register_fcm_token(user_id: str, token: str, user_pk: Optional[str] = None) -> bool:
     """
     Register or update a user's FCM token for push notifications
     
     Args:
         user_id: The user ID (could be UUID or email)
         token: The FCM token to register
+        user_pk: The profile PK, if the caller already resolved it
         
     Returns:
         bool: True if successful, False otherwise
     """
     try:
-        # First, try to find the user to get the correct PK
-        try:
-            # Try direct lookup with USER# prefix
-            get_response = users_table.get_item(
-                Key={
-                    'PK': f"USER#{user_id}",
-                    'SK': "PROFILE"
-                }
-            )
-            
-            user_pk = f"USER#{user_id}"
-            
-            # If not found, try scan by UserID
-            if 'Item' not in get_response:
-                logger.info(f"User not found with direct key USER#{user_id}, trying scan by UserID")
-                scan_response = users_table.scan(
-                    FilterExpression="UserID = :userid",
-                    ExpressionAttributeValues={
-                        ':userid': user_id
-                    },
-                    Limit=1
-                )
-                
-                if 'Items' in scan_response and len(scan_response['Items']) > 0:
-                    user_pk = scan_response['Items'][0]['PK']
-                    logger.info(f"Found user via UserID scan: {user_pk}")
-        except Exception as e:
-            logger.error(f"Error finding user for FCM token registration: {str(e)}")
-            return False
+        if user_pk is None:
+            user = await resolve_user(user_id, projection="UserID")
+            if not user:
+                logger.error(f"User {user_id} not found for FCM token registration")
+                return False
+            user_pk = user['PK']
         
-        # Update the user item with the FCM token
-        response = users_table.update_item(
-            Key={
-                'PK': user_pk,
-                'SK': "PROFILE"
-            },
-            UpdateExpression="SET fcm_tokens = list_append(if_not_exists(fcm_tokens, :empty_list), :token), updated_at = :updated_at",
-            ExpressionAttributeValues={
-                ':token': [token],
-                ':empty_list': [],
-                ':updated_at': datetime.utcnow().isoformat()
-            },
-            ReturnValues="UPDATED_NEW"
-        )
+        # Add the token to the user's token set; registering the same token twice is a no-op
+        await _update_token_set(user_pk, 'ADD', [token])
         
         logger.info(f"Registered FCM token for user with PK {user_pk}")
         return True
@@ -113,29 +87,105 @@ async def register_fcm_token(user_id: str, token: str) -> bool:
         logger.error(f"Error registering FCM token for user {user_id}: {str(e)}")
         return False
 
+async def _convert_legacy_token_list(user_pk: str) -> None:
+    """Store a list-typed fcm_tokens attribute as a string set, unless another writer got there first"""
+    response = await users_table.get_item(
+        Key={'PK': user_pk, 'SK': "PROFILE"},
+        ProjectionExpression="fcm_tokens"
+    )
+    legacy = response.get('Item', {}).get('fcm_tokens')
+    if not isinstance(legacy, list):
+        return
+    tokens = set(legacy)
+    try:
+        if tokens:
+            await users_table.update_item(
+                Key={'PK': user_pk, 'SK': "PROFILE"},
+                UpdateExpression="SET fcm_tokens = :tokens",
+                ConditionExpression="fcm_tokens = :legacy",
+                ExpressionAttributeValues={':tokens': tokens, ':legacy': legacy}
+            )
+        else:
+            # String sets cannot be empty
+            await users_table.update_item(
+                Key={'PK': user_pk, 'SK': "PROFILE"},
+                UpdateExpression="REMOVE fcm_tokens",
+                ConditionExpression="fcm_tokens = :legacy",
+                ExpressionAttributeValues={':legacy': legacy}
+            )
+        logger.info(f"Converted legacy FCM token list of {user_pk} to a string set")
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+async def _update_token_set(user_pk: str, action: str, tokens: Iterable[str]) -> None:
+    """ADD tokens to or DELETE tokens from the user's fcm_tokens string set"""
+    update = {
+        'Key': {'PK': user_pk, 'SK': "PROFILE"},
+        'UpdateExpression': f"{action} fcm_tokens :tokens SET updated_at = :updated_at",
+        'ConditionExpression': "attribute_exists(PK)",
+        'ExpressionAttributeValues': {
+            ':tokens': set(tokens),
+            ':updated_at': datetime.utcnow().isoformat()
+        }
+    }
+    try:
+        await users_table.update_item(**update)
+    except ClientError as e:
+        # Profiles written before tokens became a set hold a list, which ADD/DELETE reject
+        if e.response['Error']['Code'] != 'ValidationException':
+            raise
+        await _convert_legacy_token_list(user_pk)
+        await users_table.update_item(**update)
+
+async def prune_fcm_tokens(user_pk: str, tokens: List[str]) -> bool:
+    """
+    Remove tokens that FCM rejected as unregistered or invalid from a user's profile
+    
+    Args:
+        user_pk: The profile PK
+        tokens: The dead tokens
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        await _update_token_set(user_pk, 'DELETE', tokens)
+        logger.info(f"Pruned {len(tokens)} dead FCM tokens for {user_pk}")
+        return True
+    except Exception as e:
+        logger.error(f"Error pruning FCM tokens for {user_pk}: {str(e)}")
+        return False
+
+def _is_dead_token_error(error: Exception, batch_had_success: bool) -> bool:
+    """Whether a per-token send error means the token will never work again"""
+    if isinstance(error, (messaging.UnregisteredError, messaging.SenderIdMismatchError)):
+        return True
+    # INVALID_ARGUMENT also covers malformed messages; blame the token only if
+    # the same message reached other tokens
+    return isinstance(error, exceptions.InvalidArgumentError) and batch_had_success
+
+async def _get_tokens(user_id: str) -> Tuple[Optional[str], List[str]]:
+    """The profile PK and FCM tokens of a user, (None, []) if there is no such user"""
+    user = await resolve_user(user_id, projection="fcm_tokens")
+    if not user:
+        return None, []
+    # A string set, or a list on profiles not yet converted
+    return user['PK'], list(set(user.get('fcm_tokens', ())))
+
 async def get_user_fcm_tokens(user_id: str) -> List[str]:
     """
     Get all FCM tokens for a user
     
     Args:
-        user_id: The user ID
+        user_id: The user ID (could be UUID or email)
         
     Returns:
         List[str]: List of FCM tokens
     """
     try:
-        response = users_table.get_item(
-            Key={
-                'PK': f"USER#{user_id}",
-                'SK': "PROFILE"
-            }
-        )
-        
-        if 'Item' in response and 'fcm_tokens' in response['Item']:
-            # Return unique tokens only
-            return list(set(response['Item']['fcm_tokens']))
-        
-        return []
+        _, tokens = await _get_tokens(user_id)
+        return tokens
     except Exception as e:
         logger.error(f"Error getting FCM tokens for user {user_id}: {str(e)}")
         return []
@@ -160,7 +210,7 @@ async def send_push_notification(
     """
     try:
         # Get user's FCM tokens
-        tokens = await get_user_fcm_tokens(user_id)
+        user_pk, tokens = await _get_tokens(user_id)
         
         if not tokens:
             logger.info(f"No FCM tokens found for user {user_id}")
@@ -192,25 +242,38 @@ async def send_push_notification(
             )
         )
         
-        # Send to each token
-        success = False
-        for token in tokens:
-            message = messaging.Message(
+        # Send to up to FCM_MULTICAST_LIMIT tokens per call; the SDK call blocks, so run it off the event loop
+        loop = asyncio.get_running_loop()
+        
+        async def send_batch(batch: List[str]):
+            message = messaging.MulticastMessage(
+                tokens=batch,
                 notification=notification,
                 android=android_config,
                 apns=apns_config,
-                data=data or {},
-                token=token
+                data=data or {}
             )
-            
-            try:
-                response = messaging.send(message)
-                success = True
-                logger.info(f"Successfully sent push notification to user {user_id}, message ID: {response}")
-            except Exception as e:
-                logger.error(f"Error sending push notification to token {token}: {str(e)}")
-        
-        return success
+            return batch, await loop.run_in_executor(None, transport.send_each_for_multicast, message)
+        
+        batches = [tokens[i:i + FCM_MULTICAST_LIMIT] for i in range(0, len(tokens), FCM_MULTICAST_LIMIT)]
+        results = await asyncio.gather(*(send_batch(batch) for batch in batches))
+        
+        sent = 0
+        dead_tokens = []
+        for batch, batch_response in results:
+            for token, token_response in zip(batch, batch_response.responses):
+                if token_response.success:
+                    sent += 1
+                elif _is_dead_token_error(token_response.exception, batch_response.success_count > 0):
+                    dead_tokens.append(token)
+                else:
+                    logger.error(f"Error sending push notification to token {token}: {str(token_response.exception)}")
+        
+        logger.info(f"Sent push notification to {sent}/{len(tokens)} devices of user {user_id}")
+        if dead_tokens:
+            await prune_fcm_tokens(user_pk, dead_tokens)
+        
+        return sent > 0
     except Exception as e:
         logger.error(f"Error sending push notification to user {user_id}: {str(e)}")
         return False
@@ -1,8 +1,11 @@
 import boto3
+from botocore.exceptions import ClientError
+from app.core import dynamo
 import os
 import uuid
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Awaitable, Callable, Dict, Any, Optional, List
 from datetime import datetime, timedelta
 
 # Import schemas
@@ -10,14 +13,18 @@ from app.schemas.notification import NotificationType, NotificationStatus
 
 # Import FCM utilities
 from app.api.v1.utils.fcm_utils import send_push_notification
+from app.core import notification_counters, outbox
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 # DynamoDB resource
-region_name = os.getenv("AWS_REGION", "ap-south-1")
-dynamodb = boto3.resource("dynamodb", region_name=region_name)
-notifications_table = dynamodb.Table("notifications")
+NOTIFICATIONS_TABLE = notification_counters.NOTIFICATIONS_TABLE
+notifications_table = dynamo.async_table(NOTIFICATIONS_TABLE)
+
+# TransactWriteItems takes 100 items: the notifications plus the counter update
+BULK_TRANSACT_CHUNK = 99
+BULK_CONCURRENCY = int(os.getenv("NOTIFICATION_BULK_CONCURRENCY", "4"))
 
 
 async def create_notification(
@@ -27,7 +34,8 @@ async def create_notification(
     notification_type: NotificationType,
     reference_id: Optional[str] = None,
     metadata: Optional[Dict[str, Any]] = None,
-    send_push: bool = True
+    send_push: bool = True,
+    notification_id: Optional[str] = None
 ) -> str:
     """
     Create a notification for a user
@@ -40,11 +48,12 @@ async def create_notification(
         reference_id: Optional ID of related entity (booking_id, wallet_transaction_id, etc.)
         metadata: Optional additional data related to the notification
         send_push: Whether to send a push notification (default: True)
+        notification_id: Optional ID to use, so retried deliveries overwrite the same notification
         
     Returns:
         notification_id: ID of the created notification
     """
-    notification_id = str(uuid.uuid4())
+    notification_id = notification_id or str(uuid.uuid4())
     # Convert UTC to IST (UTC+5:30)
     now_utc = datetime.utcnow()
     now_ist = now_utc + timedelta(hours=5, minutes=30)
@@ -72,8 +81,15 @@ async def create_notification(
         notification_item['metadata'] = metadata
     
     try:
-        # Save to DynamoDB
-        notifications_table.put_item(Item=notification_item)
+        # Save to DynamoDB and count it in the same transaction
+        failed = await notification_counters.commit([
+            dynamo.transact_put(NOTIFICATIONS_TABLE, notification_item, condition="attribute_not_exists(SK)"),
+            notification_counters.counters_update(user_id, total=1, unread=1)
+        ])
+        if failed:
+            # A retried delivery of a notification that was already created
+            logger.info(f"Notification {notification_id} for user {user_id} already exists")
+            return notification_id
         logger.info(f"Created notification {notification_id} for user {user_id}")
         
         # Send push notification if requested
@@ -108,6 +124,20 @@ async def create_notification(
         raise e
 
 
+@outbox.handler(outbox.NOTIFICATION)
+async def deliver_notification(payload: Dict[str, Any], event_id: str) -> str:
+    """Outbox handler: create the notification recorded by outbox.notification()"""
+    return await create_notification(
+        user_id=payload['user_id'],
+        title=payload['title'],
+        message=payload['message'],
+        notification_type=NotificationType(payload['notification_type']),
+        reference_id=payload.get('reference_id'),
+        metadata=payload.get('metadata'),
+        notification_id=event_id
+    )
+
+
 async def mark_notification_as_read(notification_id: str, user_id: str) -> bool:
     """
     Mark a notification as read
@@ -122,55 +152,217 @@ async def mark_notification_as_read(notification_id: str, user_id: str) -> bool:
     try:
         now = datetime.utcnow().isoformat()
         
-        # Update notification status
-        notifications_table.update_item(
-            Key={
-                'PK': f"USER#{user_id}",
-                'SK': f"NOTIF#{notification_id}"
-            },
-            UpdateExpression="SET #status = :status, updated_at = :updated_at",
-            ExpressionAttributeNames={
-                '#status': 'status'
-            },
-            ExpressionAttributeValues={
-                ':status': NotificationStatus.READ.value,
-                ':updated_at': now
-            }
-        )
+        # Update notification status; only an unread notification moves the unread counter
+        await notification_counters.commit([
+            dynamo.transact_update(
+                NOTIFICATIONS_TABLE,
+                {
+                    'PK': f"USER#{user_id}",
+                    'SK': f"NOTIF#{notification_id}"
+                },
+                "SET #status = :status, updated_at = :updated_at",
+                names={
+                    '#status': 'status'
+                },
+                values={
+                    ':status': NotificationStatus.READ.value,
+                    ':unread': NotificationStatus.UNREAD.value,
+                    ':updated_at': now
+                },
+                condition="#status = :unread"
+            ),
+            notification_counters.counters_update(user_id, unread=-1)
+        ])
+        # A failed condition means it was already read (or does not exist): nothing to do
         return True
     except Exception as e:
         print(f"[Notification] Error marking notification as read: {str(e)}")
         return False
 
 
-async def mark_all_notifications_as_read(user_id: str) -> bool:
+async def _bulk_apply(
+    user_id: str,
+    write_chunk: Callable[[List[Dict[str, Any]]], Awaitable[int]],
+    chunk_size: int,
+    concurrency: int,
+    filter_expression=None,
+    on_progress: Optional[Callable[[int], None]] = None
+) -> int:
+    """
+    Page through a user's notifications and hand them to `write_chunk` in chunks
+    
+    Reading the next page overlaps with writing the previous chunks; at most
+    `concurrency` chunks are written at a time.
+    
+    Returns:
+        Number of notifications written, as reported by `write_chunk`
+    """
+    query_kwargs = {
+        'KeyConditionExpression': boto3.dynamodb.conditions.Key('PK').eq(f"USER#{user_id}")
+        & boto3.dynamodb.conditions.Key('SK').begins_with(notification_counters.NOTIFICATION_SK_PREFIX),
+        'ProjectionExpression': "PK, SK, #status",
+        'ExpressionAttributeNames': {'#status': 'status'}
+    }
+    if filter_expression is not None:
+        query_kwargs['FilterExpression'] = filter_expression
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+    done = 0
+    
+    async def write(chunk: List[Dict[str, Any]]):
+        nonlocal done
+        try:
+            done += await write_chunk(chunk)
+        finally:
+            semaphore.release()
+        logger.info(f"Bulk update for user {user_id}: {done} notifications done")
+        if on_progress:
+            on_progress(done)
+    
+    async def schedule(chunk: List[Dict[str, Any]]):
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(write(chunk)))
+    
+    try:
+        pending = []
+        while True:
+            response = await notifications_table.query(**query_kwargs)
+            pending.extend(response.get('Items', []))
+            while len(pending) >= chunk_size:
+                await schedule(pending[:chunk_size])
+                pending = pending[chunk_size:]
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        if pending:
+            await schedule(pending)
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return done
+
+
+async def _mark_chunk_as_read(user_id: str, items: List[Dict[str, Any]]) -> int:
+    """Mark up to BULK_TRANSACT_CHUNK notifications read together with one counter update"""
+    now = datetime.utcnow().isoformat()
+    for _ in range(notification_counters.MAX_TRANSACT_ATTEMPTS):
+        failed = await notification_counters.commit([
+            dynamo.transact_update(
+                NOTIFICATIONS_TABLE,
+                {'PK': item['PK'], 'SK': item['SK']},
+                "SET #status = :status, updated_at = :updated_at",
+                names={'#status': 'status'},
+                values={
+                    ':status': NotificationStatus.READ.value,
+                    ':unread': NotificationStatus.UNREAD.value,
+                    ':updated_at': now
+                },
+                condition="#status = :unread"
+            )
+            for item in items
+        ] + [notification_counters.counters_update(user_id, unread=-len(items))])
+        if not failed:
+            return len(items)
+        # Drop the notifications that were read or deleted since the query and retry the rest
+        items = [item for item, reason in zip(items, failed) if reason.get('Code') != 'ConditionalCheckFailed']
+        if not items:
+            return 0
+    raise RuntimeError(f"Notifications of user {user_id} kept changing while being marked as read")
+
+
+async def _delete_chunk(user_id: str, items: List[Dict[str, Any]]) -> int:
+    """Delete up to dynamo.BATCH_WRITE_LIMIT notifications and take them off the counters"""
+    unprocessed = await dynamo.batch_delete(
+        NOTIFICATIONS_TABLE,
+        [{'PK': item['PK'], 'SK': item['SK']} for item in items]
+    )
+    unprocessed_keys = {key['SK'] for key in unprocessed}
+    deleted = [item for item in items if item['SK'] not in unprocessed_keys]
+    if unprocessed:
+        logger.error(f"Could not delete {len(unprocessed)} notifications of user {user_id}")
+    if deleted:
+        # BatchWriteItem cannot carry the counter update; a status change between the
+        # query and the delete can leave unread_count off until the next repair
+        _, unread = notification_counters.tally(deleted)
+        try:
+            await notifications_table.update_item(
+                Key=notification_counters.counters_key(user_id),
+                UpdateExpression="ADD total_count :total, unread_count :unread",
+                ConditionExpression="attribute_exists(PK)",
+                ExpressionAttributeValues={':total': -len(deleted), ':unread': -unread}
+            )
+        except ClientError as e:
+            # No counters yet: they are seeded from the remaining notifications on next use
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+    return len(deleted)
+
+
+async def mark_all_notifications_as_read(
+    user_id: str,
+    on_progress: Optional[Callable[[int], None]] = None
+) -> Optional[int]:
     """
     Mark all notifications for a user as read
     
     Args:
         user_id: ID of the user
+        on_progress: Optional callback receiving the running count after each chunk
         
     Returns:
-        success: True if successful, False otherwise
+        updated: Number of notifications marked as read, None on failure
     """
     try:
-        # Get all unread notifications for the user
-        response = notifications_table.query(
-            KeyConditionExpression=boto3.dynamodb.conditions.Key('PK').eq(f"USER#{user_id}"),
-            FilterExpression=boto3.dynamodb.conditions.Attr('status').eq(NotificationStatus.UNREAD.value)
+        # Every chunk also updates the user's counter item, and concurrent
+        # transactions on one item conflict, so chunks are committed one at a time
+        return await _bulk_apply(
+            user_id,
+            lambda items: _mark_chunk_as_read(user_id, items),
+            chunk_size=BULK_TRANSACT_CHUNK,
+            concurrency=1,
+            filter_expression=boto3.dynamodb.conditions.Attr('status').eq(NotificationStatus.UNREAD.value),
+            on_progress=on_progress
         )
-        
-        now = datetime.utcnow().isoformat()
-        
-        # Update each notification
-        for item in response.get('Items', []):
-            notification_id = item['notification_id']
-            await mark_notification_as_read(notification_id, user_id)
-            
-        return True
     except Exception as e:
         print(f"[Notification] Error marking all notifications as read: {str(e)}")
-        return False
+        return None
+
+
+async def bulk_delete_notifications(
+    user_id: str,
+    older_than_days: Optional[int] = None,
+    on_progress: Optional[Callable[[int], None]] = None
+) -> Optional[int]:
+    """
+    Delete a user's notifications, or only those older than a retention period
+    
+    Args:
+        user_id: ID of the user
+        older_than_days: Only delete notifications created more than this many days ago
+        on_progress: Optional callback receiving the running count after each chunk
+        
+    Returns:
+        deleted: Number of notifications deleted, None on failure
+    """
+    filter_expression = None
+    if older_than_days is not None:
+        # created_at is stored in IST, see create_notification
+        cutoff = datetime.utcnow() + timedelta(hours=5, minutes=30) - timedelta(days=older_than_days)
+        filter_expression = boto3.dynamodb.conditions.Attr('created_at').lt(cutoff.isoformat())
+    try:
+        return await _bulk_apply(
+            user_id,
+            lambda items: _delete_chunk(user_id, items),
+            chunk_size=dynamo.BATCH_WRITE_LIMIT,
+            concurrency=BULK_CONCURRENCY,
+            filter_expression=filter_expression,
+            on_progress=on_progress
+        )
+    except Exception as e:
+        print(f"[Notification] Error deleting notifications: {str(e)}")
+        return None
 
 
 async def delete_notification(notification_id: str, user_id: str) -> bool:
@@ -185,14 +377,38 @@ async def delete_notification(notification_id: str, user_id: str) -> bool:
         success: True if successful, False otherwise
     """
     try:
-        # Delete notification
-        notifications_table.delete_item(
-            Key={
-                'PK': f"USER#{user_id}",
-                'SK': f"NOTIF#{notification_id}"
-            }
-        )
-        return True
+        key = {
+            'PK': f"USER#{user_id}",
+            'SK': f"NOTIF#{notification_id}"
+        }
+        
+        # Delete on the status we expect so the counters move by the right amount;
+        # a failed condition returns the current item and we retry with its status
+        status = NotificationStatus.UNREAD.value
+        for _ in range(notification_counters.MAX_TRANSACT_ATTEMPTS):
+            delete = dynamo.transact_delete(
+                NOTIFICATIONS_TABLE,
+                key,
+                condition="#status = :status",
+                names={'#status': 'status'},
+                values={':status': status}
+            )
+            delete['Delete']['ReturnValuesOnConditionCheckFailure'] = 'ALL_OLD'
+            unread = -1 if status == NotificationStatus.UNREAD.value else 0
+            failed = await notification_counters.commit([
+                delete,
+                notification_counters.counters_update(user_id, total=-1, unread=unread)
+            ])
+            if not failed:
+                return True
+            old_item = failed[0].get('Item')
+            if not old_item:
+                # Already deleted
+                return True
+            status = dynamo.unmarshal(old_item).get('status')
+        
+        print(f"[Notification] Notification {notification_id} kept changing while being deleted")
+        return False
     except Exception as e:
         print(f"[Notification] Error deleting notification: {str(e)}")
         return False
@@ -0,0 +1,116 @@
+"""
+Precomputed `/cities` response.
+
+The full station list is serialized to JSON once, sorted by PK so the bytes
+only change when the data does, and gzipped once (level 9, no timestamp).
+The ETag is a hash of the JSON. `/cities` then answers with the stored
+bytes: gzip when the client accepts it, plain JSON otherwise, and 304 when
+If-None-Match carries the current ETag.
+
+The payload comes from an artifact file, CITIES_PAYLOAD_ARTIFACT
+(default app/static/cities.json.gz), which mock_api/migrate_cities_to_dynamodb.py
+rewrites whenever it changes the stations table; it is shipped with the
+deployment. Without the artifact the payload is built from a stations scan
+on first use and rebuilt once its TTL has elapsed.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARTIFACT_PATH = str(pathlib.Path(__file__).parent.parent / "static" / "cities.json.gz")
+ARTIFACT_PATH = os.getenv("CITIES_PAYLOAD_ARTIFACT", DEFAULT_ARTIFACT_PATH)
+DEFAULT_TTL_SECONDS = int(os.getenv("CITIES_PAYLOAD_TTL_SECONDS", "3600"))
+
+
+def _json_default(value: Any) -> Any:
+    # Same numbers FastAPI's encoder produced for DynamoDB Decimals
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class CitiesPayload:
+    """Serialized station list: plain and gzipped bytes plus their ETag"""
+
+    def __init__(self, body: bytes, gzip_body: Optional[bytes] = None):
+        self.body = body
+        self.gzip_body = gzip_body if gzip_body is not None else gzip.compress(body, compresslevel=9, mtime=0)
+        self.etag = f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    @classmethod
+    def from_items(cls, items: List[Dict[str, Any]]) -> "CitiesPayload":
+        items = sorted(items, key=lambda item: str(item.get("PK", "")))
+        body = json.dumps(items, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return cls(body)
+
+    @classmethod
+    def load(cls, path: str) -> "CitiesPayload":
+        with open(path, "rb") as f:
+            gzip_body = f.read()
+        return cls(gzip.decompress(gzip_body), gzip_body)
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.gzip_body)
+        os.replace(tmp_path, path)
+
+
+def write_artifact(items: List[Dict[str, Any]], path: str = ARTIFACT_PATH) -> CitiesPayload:
+    """Materialize the `/cities` payload for `items` at `path`"""
+    payload = CitiesPayload.from_items(items)
+    payload.write(path)
+    return payload
+
+
+class CitiesPayloadCache:
+    """
+    Process-wide `/cities` payload.
+
+    Args:
+        loader: Callable returning every station item, used without an artifact
+        artifact_path: Artifact written by write_artifact()
+        ttl_seconds: Age after which a payload built from the loader is rebuilt
+    """
+
+    def __init__(self, loader: Callable[[], List[Dict[str, Any]]], artifact_path: str = ARTIFACT_PATH,
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.loader = loader
+        self.artifact_path = artifact_path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._payload: Optional[CitiesPayload] = None
+        self._built_at: Optional[float] = None
+        self._from_artifact = False
+
+    def _is_fresh(self) -> bool:
+        if self._payload is None:
+            return False
+        return self._from_artifact or (time.monotonic() - self._built_at) < self.ttl_seconds
+
+    def get(self) -> CitiesPayload:
+        """Return the payload, loading or building it on first use"""
+        if self._is_fresh():
+            return self._payload
+        with self._lock:
+            if not self._is_fresh():
+                started = time.perf_counter()
+                if os.path.exists(self.artifact_path):
+                    self._payload = CitiesPayload.load(self.artifact_path)
+                    self._from_artifact = True
+                else:
+                    self._payload = CitiesPayload.from_items(self.loader())
+                self._built_at = time.monotonic()
+                logger.info(f"Cities payload ready ({len(self._payload.body)} bytes, {len(self._payload.gzip_body)} gzipped, "
+                            f"{'artifact' if self._from_artifact else 'stations scan'}) in {time.perf_counter() - started:.3f}s")
+        return self._payload
@@ -0,0 +1,336 @@
+"""
+Shared DynamoDB access for the API.
+
+One boto3 session and DynamoDB resource per process, created on first use,
+with an explicit botocore Config (connection pool size, adaptive retries,
+connect/read timeouts). Table handles are cached, and `table()` returns a
+lazy handle that modules can bind at import time without creating any
+client until the first request.
+
+`get_client()` returns a separate plain low-level client for calls built
+from DynamoDB attribute values (`marshal()`, TransactItems). The resource's
+own `meta.client` serializes parameters again and must not be used for them.
+
+Pool usage is tracked with botocore call events: the number of in-flight
+calls against the pool size, the peak, and how many calls started while
+the pool was already saturated. See `pool_stats()`.
+
+`async_table()` wraps a table for `async def` handlers: every method call
+runs on a bounded thread pool sized to the connection pool, so blocking
+boto3 calls no longer stall the event loop.
+
+`transact_put()`/`transact_update()`/`transact_delete()` build low-level
+TransactItems entries from plain Python values for `transact_write()`.
+`batch_delete()` deletes keys with BatchWriteItem, retrying unprocessed ones.
+"""
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.config import Config
+
+logger = logging.getLogger(__name__)
+
+AWS_REGION = os.getenv("REGION", os.getenv("AWS_REGION", "ap-south-1"))
+# Set to e.g. http://localhost:8000 to use DynamoDB Local
+ENDPOINT_URL = os.getenv("DYNAMODB_ENDPOINT_URL") or None
+MAX_POOL_CONNECTIONS = int(os.getenv("DYNAMODB_MAX_POOL_CONNECTIONS", "50"))
+CONNECT_TIMEOUT = float(os.getenv("DYNAMODB_CONNECT_TIMEOUT", "2"))
+READ_TIMEOUT = float(os.getenv("DYNAMODB_READ_TIMEOUT", "5"))
+MAX_ATTEMPTS = int(os.getenv("DYNAMODB_MAX_ATTEMPTS", "5"))
+BATCH_WRITE_LIMIT = 25
+MAX_BATCH_RETRIES = 5
+
+BOTO_CONFIG = Config(
+    region_name=AWS_REGION,
+    max_pool_connections=MAX_POOL_CONNECTIONS,
+    connect_timeout=CONNECT_TIMEOUT,
+    read_timeout=READ_TIMEOUT,
+    retries={"max_attempts": MAX_ATTEMPTS, "mode": "adaptive"},
+    tcp_keepalive=True,
+)
+
+_lock = threading.Lock()
+_session = None
+_resource = None
+_client = None
+_tables: Dict[str, Any] = {}
+_lazy_tables: Dict[str, "LazyTable"] = {}
+_async_tables: Dict[str, "AsyncTable"] = {}
+_executor = None
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+class _PoolMetrics:
+    """In-flight call counters used to estimate connection pool saturation"""
+
+    def __init__(self, pool_size: int):
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.saturated_calls = 0
+        self.errors = 0
+
+    def before_call(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            if self.in_flight >= self.pool_size:
+                self.saturated_calls += 1
+                if self.saturated_calls == 1:
+                    logger.warning(f"DynamoDB connection pool saturated ({self.pool_size} connections in use)")
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def after_call(self, **kwargs):
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+
+    def after_call_error(self, **kwargs):
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_pool_connections": self.pool_size,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "peak_utilization": round(self.peak_in_flight / self.pool_size, 3) if self.pool_size else None,
+                "calls": self.calls,
+                "saturated_calls": self.saturated_calls,
+                "errors": self.errors,
+            }
+
+
+pool_metrics = _PoolMetrics(MAX_POOL_CONNECTIONS)
+
+
+def get_session():
+    """Return the process-wide boto3 session"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = boto3.session.Session(region_name=AWS_REGION)
+    return _session
+
+
+def _register_pool_metrics(client) -> None:
+    events = client.meta.events
+    events.register("before-call.dynamodb", pool_metrics.before_call)
+    events.register("after-call.dynamodb", pool_metrics.after_call)
+    events.register("after-call-error.dynamodb", pool_metrics.after_call_error)
+
+
+def get_resource():
+    """Return the process-wide DynamoDB resource, creating it on first use"""
+    global _resource
+    if _resource is None:
+        session = get_session()
+        with _lock:
+            if _resource is None:
+                resource = session.resource("dynamodb", config=BOTO_CONFIG, endpoint_url=ENDPOINT_URL)
+                _register_pool_metrics(resource.meta.client)
+                _resource = resource
+    return _resource
+
+
+def get_client():
+    """Return the process-wide low-level DynamoDB client, taking and returning attribute values"""
+    global _client
+    if _client is None:
+        session = get_session()
+        with _lock:
+            if _client is None:
+                client = session.client("dynamodb", config=BOTO_CONFIG, endpoint_url=ENDPOINT_URL)
+                _register_pool_metrics(client)
+                _client = client
+    return _client
+
+
+def get_table(name: str):
+    """Return a cached Table handle"""
+    table = _tables.get(name)
+    if table is None:
+        resource = get_resource()
+        with _lock:
+            table = _tables.get(name)
+            if table is None:
+                table = resource.Table(name)
+                _tables[name] = table
+    return table
+
+
+class LazyTable:
+    """Table handle that resolves the shared resource on first use"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_table(self.name), attr)
+
+    def __repr__(self):
+        return f"LazyTable({self.name!r})"
+
+
+def table(name: str) -> LazyTable:
+    """Return a lazy Table handle, safe to create at import time"""
+    lazy = _lazy_tables.get(name)
+    if lazy is None:
+        lazy = _lazy_tables.setdefault(name, LazyTable(name))
+    return lazy
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the thread pool used to offload blocking DynamoDB calls"""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_POOL_CONNECTIONS, thread_name_prefix="dynamo")
+    return _executor
+
+
+async def run(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking boto3 call on the DynamoDB thread pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+class AsyncTable:
+    """
+    Awaitable Table handle for async endpoints.
+
+    Methods of the underlying Table (get_item, put_item, query, update_item,
+    delete_item, scan, ...) become coroutines run on the DynamoDB thread pool:
+    `await bookings_table.get_item(Key=...)`. Non-callable attributes are
+    returned as is; `.sync` gives the blocking handle.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.sync = table(name)
+
+    def __getattr__(self, attr):
+        value = getattr(self.sync, attr)
+        if not callable(value):
+            return value
+
+        async def call(*args, **kwargs):
+            return await run(value, *args, **kwargs)
+
+        call.__name__ = attr
+        return call
+
+    def __repr__(self):
+        return f"AsyncTable({self.name!r})"
+
+
+def async_table(name: str) -> AsyncTable:
+    """Return an awaitable Table handle, safe to create at import time"""
+    handle = _async_tables.get(name)
+    if handle is None:
+        handle = _async_tables.setdefault(name, AsyncTable(name))
+    return handle
+
+
+def marshal(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a plain item or value map to DynamoDB attribute values"""
+    return {k: _serializer.serialize(v) for k, v in values.items()}
+
+
+def unmarshal(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert DynamoDB attribute values back to plain Python values"""
+    return {k: _deserializer.deserialize(v) for k, v in values.items()}
+
+
+def transact_put(table_name: str, item: Dict[str, Any], condition: Optional[str] = None,
+                 values: Optional[Dict[str, Any]] = None, names: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """TransactItems entry putting `item`"""
+    put = {"TableName": table_name, "Item": marshal(item)}
+    if condition:
+        put["ConditionExpression"] = condition
+    if values:
+        put["ExpressionAttributeValues"] = marshal(values)
+    if names:
+        put["ExpressionAttributeNames"] = names
+    return {"Put": put}
+
+
+def transact_update(table_name: str, key: Dict[str, Any], update_expression: str,
+                    values: Optional[Dict[str, Any]] = None, names: Optional[Dict[str, str]] = None,
+                    condition: Optional[str] = None) -> Dict[str, Any]:
+    """TransactItems entry updating the item at `key`"""
+    update = {"TableName": table_name, "Key": marshal(key), "UpdateExpression": update_expression}
+    if values:
+        update["ExpressionAttributeValues"] = marshal(values)
+    if names:
+        update["ExpressionAttributeNames"] = names
+    if condition:
+        update["ConditionExpression"] = condition
+    return {"Update": update}
+
+
+def transact_delete(table_name: str, key: Dict[str, Any], condition: Optional[str] = None,
+                    values: Optional[Dict[str, Any]] = None, names: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """TransactItems entry deleting the item at `key`"""
+    delete = {"TableName": table_name, "Key": marshal(key)}
+    if condition:
+        delete["ConditionExpression"] = condition
+    if values:
+        delete["ExpressionAttributeValues"] = marshal(values)
+    if names:
+        delete["ExpressionAttributeNames"] = names
+    return {"Delete": delete}
+
+
+async def transact_write(items: List[Dict[str, Any]]) -> None:
+    """Commit TransactItems in one TransactWriteItems call on the DynamoDB thread pool"""
+    await run(get_client().transact_write_items, TransactItems=items)
+
+
+async def batch_delete(table_name: str, keys: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Delete up to BATCH_WRITE_LIMIT keys with BatchWriteItem.
+
+    Unprocessed keys are retried with capped exponential backoff; the keys
+    still unprocessed after MAX_BATCH_RETRIES are returned.
+    """
+    request = {table_name: [{"DeleteRequest": {"Key": key}} for key in keys]}
+    for attempt in range(MAX_BATCH_RETRIES + 1):
+        response = await run(get_resource().batch_write_item, RequestItems=request)
+        unprocessed = response.get("UnprocessedItems") or {}
+        if not unprocessed.get(table_name):
+            return []
+        request = unprocessed
+        if attempt < MAX_BATCH_RETRIES:
+            await asyncio.sleep(min(0.05 * (2 ** attempt), 1.0))
+    return [entry["DeleteRequest"]["Key"] for entry in request[table_name]]
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Connection pool configuration and saturation counters"""
+    stats = pool_metrics.snapshot()
+    stats.update({
+        "region": AWS_REGION,
+        "connect_timeout": CONNECT_TIMEOUT,
+        "read_timeout": READ_TIMEOUT,
+        "max_attempts": MAX_ATTEMPTS,
+        "retry_mode": "adaptive",
+        "endpoint_url": ENDPOINT_URL,
+        "resource_created": _resource is not None,
+        "client_created": _client is not None,
+        "tables_cached": sorted(_tables.keys()),
+    })
+    return stats
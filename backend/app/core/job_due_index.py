@@ -0,0 +1,54 @@
+"""
+Due-time key for the sparse `due_date-due_time-index` GSI on the jobs table.
+
+Only jobs the cron runner may pick up carry the `due_date`/`due_time`
+attributes, so the runner can fetch due jobs with a Query on DUE#<today>
+instead of scanning the table:
+
+- Scheduled jobs are keyed on their job_date and job_execution_time
+- Failed (fewer than MAX_EXECUTION_ATTEMPTS attempts) and In Progress jobs are
+  keyed at 00:00 of their job_date so they are retried on the next run; the
+  runner skips In Progress jobs whose lease (lease_owner/lease_expires_at,
+  set when a runner claims the job) has not expired
+- Completed jobs, cancelled jobs, exhausted jobs and jobs without a job_date
+  have no key
+"""
+from typing import Any, Dict, Optional, Tuple
+
+DUE_INDEX_NAME = "due_date-due_time-index"
+MAX_EXECUTION_ATTEMPTS = 5
+CANCELLED_REASON = "Cancelled by user"
+
+
+def job_due_key(job: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """Return (due_date, due_time) for a job, or None if the cron runner should skip it"""
+    job_date = job.get("job_date")
+    if not job_date:
+        return None
+
+    status = job.get("job_status")
+    if status == "Scheduled":
+        return f"DUE#{job_date}", job.get("job_execution_time") or "00:00"
+    if status == "In Progress":
+        return f"DUE#{job_date}", "00:00"
+    if status == "Failed":
+        if int(job.get("execution_attempts") or 0) >= MAX_EXECUTION_ATTEMPTS:
+            return None
+        if job.get("failure_reason") == CANCELLED_REASON:
+            return None
+        return f"DUE#{job_date}", "00:00"
+    return None
+
+
+def due_key_update(job: Dict[str, Any], expression_values: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Build the SET and REMOVE clauses keeping the due key in sync with `job`.
+
+    Adds the needed values to `expression_values` and returns
+    (set_clause, remove_clause); either may be an empty string.
+    """
+    due_key = job_due_key(job)
+    if due_key is None:
+        return "", "due_date, due_time"
+    expression_values[":due_date"], expression_values[":due_time"] = due_key
+    return "due_date = :due_date, due_time = :due_time", ""
@@ -0,0 +1,150 @@
+"""
+Per-user notification counters.
+
+Each user's partition in the notifications table holds one counter item
+(PK `USER#<user_id>`, SK `COUNTERS`) with `total_count` and `unread_count`,
+next to the notification items (SK `NOTIF#<notification_id>`). Every write
+that changes a notification's existence or status commits the notification
+item and an `ADD` on the counters in one TransactWriteItems call, so the
+list endpoint reads both counts with one GetItem instead of counting the
+whole partition twice.
+
+Counter updates are conditioned on the counters existing, so the first write
+for a user whose history predates the counters cannot start them at zero:
+`commit()` seeds them from the partition (a put that only succeeds if no one
+else seeded them first) and retries. Reads seed missing counters the same
+way; `repair_notification_counters.py` rebuilds them for every user.
+"""
+import asyncio
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from app.core import dynamo
+from app.schemas.notification import NotificationStatus
+
+NOTIFICATIONS_TABLE = "notifications"
+COUNTERS_SK = "COUNTERS"
+NOTIFICATION_SK_PREFIX = "NOTIF#"
+MAX_TRANSACT_ATTEMPTS = 5
+
+
+def counters_key(user_id: str) -> Dict[str, str]:
+    return {"PK": f"USER#{user_id}", "SK": COUNTERS_SK}
+
+
+def counters_update(user_id: str, total: int = 0, unread: int = 0) -> Dict[str, Any]:
+    """TransactItems entry adding `total`/`unread` to a user's counters"""
+    return dynamo.transact_update(
+        NOTIFICATIONS_TABLE,
+        counters_key(user_id),
+        "ADD total_count :total, unread_count :unread",
+        values={":total": total, ":unread": unread},
+        condition="attribute_exists(PK)",
+    )
+
+
+def counters_item(user_id: str, total: int, unread: int) -> Dict[str, Any]:
+    return {**counters_key(user_id), "total_count": total, "unread_count": unread}
+
+
+def tally(items: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+    """(total, unread) over notification items; other items in the partition are ignored"""
+    total = unread = 0
+    for item in items:
+        if not str(item.get("SK", "")).startswith(NOTIFICATION_SK_PREFIX):
+            continue
+        total += 1
+        if item.get("status") == NotificationStatus.UNREAD.value:
+            unread += 1
+    return total, unread
+
+
+def _missing_counters(items: List[Dict[str, Any]], reasons: List[Dict[str, Any]]) -> List[str]:
+    """Users whose counter updates failed because their counters do not exist yet"""
+    user_ids = []
+    for item, reason in zip(items, reasons):
+        key = item.get("Update", {}).get("Key", {})
+        if reason.get("Code") == "ConditionalCheckFailed" and key.get("SK") == {"S": COUNTERS_SK}:
+            user_ids.append(key["PK"]["S"][len("USER#"):])
+    return user_ids
+
+
+async def commit(items: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Commit TransactItems, retrying when another transaction holds the counters.
+
+    Missing counters are seeded from the partition before retrying.
+
+    Returns None on success, or the CancellationReasons if a condition failed.
+    """
+    for attempt in range(MAX_TRANSACT_ATTEMPTS):
+        try:
+            await dynamo.transact_write(items)
+            return None
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            reasons = e.response.get("CancellationReasons") or []
+            codes = [reason.get("Code") for reason in reasons]
+            missing = _missing_counters(items, reasons)
+            if missing:
+                if attempt == MAX_TRANSACT_ATTEMPTS - 1:
+                    raise
+                for user_id in missing:
+                    await rebuild(user_id, seed=True)
+                continue
+            if "ConditionalCheckFailed" in codes:
+                return reasons
+            if "TransactionConflict" not in codes or attempt == MAX_TRANSACT_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(random.uniform(0, min(0.02 * (2 ** attempt), 1.0)))
+
+
+async def rebuild(user_id: str, seed: bool = False) -> Tuple[int, int]:
+    """
+    Count a user's notifications and store the result as their counters.
+
+    With `seed`, the counters are only written if they do not exist yet. The
+    count is a strongly consistent read, so it sees every write committed
+    before it, and writes committed after it cannot be lost: their counter
+    updates fail until the counters exist.
+    """
+    table = dynamo.async_table(NOTIFICATIONS_TABLE)
+    query_kwargs = {
+        "KeyConditionExpression": Key("PK").eq(f"USER#{user_id}") & Key("SK").begins_with(NOTIFICATION_SK_PREFIX),
+        "ProjectionExpression": "SK, #status",
+        "ExpressionAttributeNames": {"#status": "status"},
+        "ConsistentRead": True,
+    }
+    total = unread = 0
+    while True:
+        response = await table.query(**query_kwargs)
+        page_total, page_unread = tally(response.get("Items", []))
+        total += page_total
+        unread += page_unread
+        if "LastEvaluatedKey" not in response:
+            break
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    if not seed:
+        await table.put_item(Item=counters_item(user_id, total, unread))
+        return total, unread
+    try:
+        await table.put_item(Item=counters_item(user_id, total, unread), ConditionExpression="attribute_not_exists(PK)")
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+    return total, unread
+
+
+async def get_counts(user_id: str) -> Tuple[int, int]:
+    """(total, unread) for a user, rebuilding the counters if they do not exist yet"""
+    table = dynamo.async_table(NOTIFICATIONS_TABLE)
+    response = await table.get_item(Key=counters_key(user_id))
+    item = response.get("Item")
+    if item is None:
+        return await rebuild(user_id, seed=True)
+    # Clamp in case a repair raced with concurrent writes
+    return max(int(item.get("total_count", 0)), 0), max(int(item.get("unread_count", 0)), 0)
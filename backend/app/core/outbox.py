@@ -0,0 +1,308 @@
+"""
+Transactional outbox for request side effects.
+
+Endpoints used to create notifications, send FCM pushes and send emails
+inline before responding. They now write an outbox record in the same
+TransactWriteItems call as the business item (`write()`, or `put_records()`
+for callers that build their own transaction) and return; a dispatcher
+delivers the records afterwards.
+
+Records live in the outbox table (PK `OUTBOX#<event_id>`, SK `METADATA`).
+Undelivered records carry `pending_shard`/`available_at`, the keys of the
+sparse `pending_shard-available_at-index` GSI, so the dispatcher finds due
+records with one Query per shard. Delivered and dead records drop out of the
+index and expire through the `expires_at` TTL attribute.
+
+Delivery is at least once. A record is claimed with a conditional update that
+moves `available_at` forward by a lease, passed to the handler registered for
+its kind, then marked DELIVERED; on error it is rescheduled with exponential
+backoff and marked FAILED after OUTBOX_MAX_ATTEMPTS. Handlers get the event
+id to use as an idempotency key.
+
+On Lambda, due records are drained by `main.outbox_handler`, invoked every
+minute by an EventBridge schedule (terraform/main.tf). The API function must
+not run the dispatcher: Mangum would start and cancel it around every
+request, interrupting deliveries mid-flight. Under a long-running server
+(uvicorn) the dispatcher runs as a background task instead, woken right
+after each commit and polling otherwise.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from app.core import dynamo
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_TABLE = os.getenv("OUTBOX_TABLE", "outbox")
+PENDING_INDEX = "pending_shard-available_at-index"
+SHARDS = int(os.getenv("OUTBOX_SHARDS", "4"))
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "10"))
+BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "25"))
+POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+# Background dispatcher in the API process; off by default on Lambda, where the schedule drains
+DISPATCHER_ENABLED = os.getenv(
+    "OUTBOX_DISPATCHER", "false" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "true"
+).lower() in ("1", "true", "yes")
+LEASE_SECONDS = 60
+RETENTION_DAYS = 7
+
+STATUS_PENDING = "PENDING"
+STATUS_DELIVERED = "DELIVERED"
+STATUS_FAILED = "FAILED"
+
+# Record kinds
+NOTIFICATION = "notification"
+BOOKING_EMAIL = "booking_email"
+
+outbox_table = dynamo.async_table(OUTBOX_TABLE)
+
+Handler = Callable[[Dict[str, Any], str], Awaitable[Any]]
+_handlers: Dict[str, Handler] = {}
+
+
+def handler(kind: str) -> Callable[[Handler], Handler]:
+    """Register the coroutine delivering records of `kind`: handler(payload, event_id)"""
+    def register(fn: Handler) -> Handler:
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def _timestamp(dt: Optional[datetime] = None) -> str:
+    # Fixed width so that available_at sorts correctly as a string
+    return (dt or datetime.utcnow()).isoformat(timespec="milliseconds")
+
+
+def _expires_at() -> int:
+    return int(time.time()) + RETENTION_DAYS * 86400
+
+
+def record(kind: str, payload: Dict[str, Any], reference_id: Optional[str] = None) -> Dict[str, Any]:
+    """Build an outbox record; `payload` must be DynamoDB-serializable (no floats)"""
+    event_id = str(uuid.uuid4())
+    now = _timestamp()
+    item = {
+        "PK": f"OUTBOX#{event_id}",
+        "SK": "METADATA",
+        "event_id": event_id,
+        "kind": kind,
+        "payload": payload,
+        "status": STATUS_PENDING,
+        "attempts": 0,
+        "created_at": now,
+        "pending_shard": f"PENDING#{random.randrange(SHARDS)}",
+        "available_at": now,
+    }
+    if reference_id:
+        item["reference_id"] = reference_id
+    return item
+
+
+def notification(user_id: str, title: str, message: str, notification_type: Any,
+                 reference_id: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Outbox record creating an in-app notification (and its push) for a user"""
+    payload = {
+        "user_id": user_id,
+        "title": title,
+        "message": message,
+        "notification_type": getattr(notification_type, "value", notification_type),
+    }
+    if reference_id:
+        payload["reference_id"] = reference_id
+    if metadata:
+        payload["metadata"] = metadata
+    return record(NOTIFICATION, payload, reference_id)
+
+
+def put_records(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """TransactItems entries writing outbox records"""
+    return [dynamo.transact_put(OUTBOX_TABLE, item, condition="attribute_not_exists(PK)") for item in records]
+
+
+async def write(items: Iterable[Dict[str, Any]], records: Iterable[Dict[str, Any]]) -> None:
+    """Commit business TransactItems together with outbox records, then wake the dispatcher"""
+    await dynamo.transact_write(list(items) + put_records(records))
+    wake()
+
+
+def wake() -> None:
+    """Tell the dispatcher that new records were committed"""
+    dispatcher.wake()
+
+
+class OutboxDispatcher:
+    """Delivers due outbox records with bounded concurrency"""
+
+    def __init__(self, concurrency: int = CONCURRENCY, batch_size: int = BATCH_SIZE,
+                 poll_seconds: float = POLL_SECONDS):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._wake_event: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"delivered": 0, "retried": 0, "failed": 0, "claim_conflicts": 0, "passes": 0}
+
+    async def fetch_due(self, limit: int) -> List[Dict[str, Any]]:
+        """Due records across all shards, oldest first"""
+        now = _timestamp()
+
+        async def query_shard(shard: int) -> List[Dict[str, Any]]:
+            response = await outbox_table.query(
+                IndexName=PENDING_INDEX,
+                KeyConditionExpression=Key("pending_shard").eq(f"PENDING#{shard}") & Key("available_at").lte(now),
+                Limit=limit,
+            )
+            return response.get("Items", [])
+
+        shards = await asyncio.gather(*(query_shard(shard) for shard in range(SHARDS)))
+        items = [item for shard_items in shards for item in shard_items]
+        items.sort(key=lambda item: item["available_at"])
+        return items[:limit]
+
+    async def _claim(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Lease a record; None if another dispatcher got it first"""
+        now = datetime.utcnow()
+        try:
+            response = await outbox_table.update_item(
+                Key={"PK": item["PK"], "SK": item["SK"]},
+                UpdateExpression="SET available_at = :lease_until, last_attempt_at = :now ADD attempts :one",
+                ConditionExpression="#status = :pending AND available_at = :seen",
+                ExpressionAttributeNames={"#status": "status"},
+                ExpressionAttributeValues={
+                    ":lease_until": _timestamp(now + timedelta(seconds=LEASE_SECONDS)),
+                    ":now": _timestamp(now),
+                    ":one": 1,
+                    ":pending": STATUS_PENDING,
+                    ":seen": item["available_at"],
+                },
+                ReturnValues="ALL_NEW",
+            )
+            return response["Attributes"]
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                self.stats["claim_conflicts"] += 1
+                return None
+            raise
+
+    async def _mark_done(self, item: Dict[str, Any], status: str, error: Optional[str] = None) -> None:
+        values = {":status": status, ":now": _timestamp(), ":expires_at": _expires_at()}
+        update_expression = "SET #status = :status, finished_at = :now, expires_at = :expires_at"
+        if error:
+            update_expression += ", last_error = :error"
+            values[":error"] = error[:1000]
+        await outbox_table.update_item(
+            Key={"PK": item["PK"], "SK": item["SK"]},
+            UpdateExpression=update_expression + " REMOVE pending_shard, available_at",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues=values,
+        )
+
+    async def _reschedule(self, item: Dict[str, Any], error: str) -> None:
+        attempts = int(item.get("attempts", 1))
+        delay = min(5 * (2 ** (attempts - 1)), 900)
+        await outbox_table.update_item(
+            Key={"PK": item["PK"], "SK": item["SK"]},
+            UpdateExpression="SET available_at = :available_at, last_error = :error",
+            ExpressionAttributeValues={
+                ":available_at": _timestamp(datetime.utcnow() + timedelta(seconds=delay)),
+                ":error": error[:1000],
+            },
+        )
+
+    async def _process(self, item: Dict[str, Any]) -> None:
+        claimed = await self._claim(item)
+        if claimed is None:
+            return
+        event_id = claimed["event_id"]
+        kind = claimed.get("kind")
+        try:
+            deliver = _handlers.get(kind)
+            if deliver is None:
+                raise LookupError(f"No outbox handler registered for kind {kind!r}")
+            await deliver(claimed.get("payload") or {}, event_id)
+        except Exception as e:
+            attempts = int(claimed.get("attempts", 1))
+            if attempts >= MAX_ATTEMPTS:
+                logger.error(f"[TatkalPro][Outbox] Giving up on {kind} {event_id} after {attempts} attempts: {e}")
+                self.stats["failed"] += 1
+                await self._mark_done(claimed, STATUS_FAILED, str(e))
+            else:
+                logger.warning(f"[TatkalPro][Outbox] Delivery of {kind} {event_id} failed (attempt {attempts}): {e}")
+                self.stats["retried"] += 1
+                await self._reschedule(claimed, str(e))
+            return
+        self.stats["delivered"] += 1
+        await self._mark_done(claimed, STATUS_DELIVERED)
+
+    async def drain_once(self, max_records: Optional[int] = None) -> Dict[str, int]:
+        """Deliver due records until none are left (or `max_records` were processed)"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        processed = 0
+
+        async def process(item: Dict[str, Any]) -> None:
+            async with semaphore:
+                try:
+                    await self._process(item)
+                except Exception as e:
+                    logger.error(f"[TatkalPro][Outbox] Error processing {item.get('event_id')}: {e}")
+
+        self.stats["passes"] += 1
+        seen = set()
+        while max_records is None or processed < max_records:
+            limit = self.batch_size if max_records is None else min(self.batch_size, max_records - processed)
+            # The index is eventually consistent: skip records already handled in this pass
+            due = [item for item in await self.fetch_due(limit) if item["event_id"] not in seen]
+            if not due:
+                break
+            seen.update(item["event_id"] for item in due)
+            await asyncio.gather(*(process(item) for item in due))
+            processed += len(due)
+        return {"processed": processed, **self.stats}
+
+    async def run(self) -> None:
+        """Drain in a loop, waking on commits or every `poll_seconds`"""
+        logger.info("[TatkalPro][Outbox] Dispatcher started")
+        while True:
+            try:
+                await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[TatkalPro][Outbox] Dispatcher pass failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake_event.clear()
+
+    def start(self) -> None:
+        """Start the background task on the running event loop"""
+        if self._task is None or self._task.done():
+            self._wake_event = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self) -> None:
+        if self._wake_event is not None:
+            self._wake_event.set()
+
+
+dispatcher = OutboxDispatcher()
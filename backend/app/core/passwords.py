@@ -0,0 +1,118 @@
+"""
+Password hashing service.
+
+bcrypt at the default cost burns ~250 ms of CPU per hash or check. Run
+inline, a login burst at Tatkal opening time occupies every worker thread and
+starves all other requests. Hashes and checks here run on a dedicated,
+bounded executor instead:
+
+- a process pool of PASSWORD_HASH_WORKERS processes (default: CPU count),
+  so hashing runs in parallel and never holds the API process's GIL. Where
+  processes cannot be started (AWS Lambda has no /dev/shm), or with
+  PASSWORD_HASH_EXECUTOR=thread, a thread pool of the same size is used;
+  bcrypt releases the GIL while hashing.
+- at most PASSWORD_HASH_MAX_PENDING operations queued or running. Beyond
+  that, calls fail fast with PasswordHasherBusyError rather than letting
+  every request wait behind the backlog.
+
+The work factor is BCRYPT_ROUNDS (default 12). `verify_password()` reports
+when a stored hash was made with a different cost, so callers can store the
+rehash it returns and raise (or lower) the cost of existing accounts as
+their owners log in.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(WORKERS * 16)))
+EXECUTOR_KIND = os.getenv("PASSWORD_HASH_EXECUTOR", "process").lower()
+
+_lock = threading.Lock()
+_executor: Optional[Executor] = None
+_pending = threading.BoundedSemaphore(MAX_PENDING)
+
+
+class PasswordHasherBusyError(Exception):
+    def __init__(self):
+        super().__init__(f"Too many password operations in progress (limit {MAX_PENDING})")
+
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _check(password: str, stored_hash: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), stored_hash.encode("utf-8"))
+
+
+def _check_and_rehash(password: str, stored_hash: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    if not _check(password, stored_hash):
+        return False, None
+    if hash_rounds(stored_hash) == rounds:
+        return True, None
+    return True, _hash(password, rounds)
+
+
+def hash_rounds(stored_hash: str) -> Optional[int]:
+    """Cost factor of a bcrypt hash ($2b$<rounds>$...), None if it is not one"""
+    parts = stored_hash.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def get_executor() -> Executor:
+    """Return the executor password operations run on, creating it on first use"""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                executor = None
+                if EXECUTOR_KIND == "process":
+                    try:
+                        executor = ProcessPoolExecutor(max_workers=WORKERS)
+                        # Start a worker now so a missing /dev/shm shows up here, not mid-request
+                        executor.submit(int).result()
+                    except (OSError, NotImplementedError) as e:
+                        print(f"[TatkalPro][Passwords] Process pool unavailable, using threads: {e}")
+                        executor = None
+                _executor = executor or ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+
+def _submit(fn: Callable, *args) -> Future:
+    if not _pending.acquire(blocking=False):
+        raise PasswordHasherBusyError()
+    try:
+        future = get_executor().submit(fn, *args)
+    except BaseException:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    return future
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password with the current work factor"""
+    return await asyncio.wrap_future(_submit(_hash, password, BCRYPT_ROUNDS))
+
+
+async def verify_password(password: str, stored_hash: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password against a stored hash.
+
+    Returns (matches, new_hash); new_hash is set when the password matches but
+    the stored hash uses a different cost than BCRYPT_ROUNDS.
+    """
+    return await asyncio.wrap_future(_submit(_check_and_rehash, password, stored_hash, BCRYPT_ROUNDS))
+
+
+def hash_password_sync(password: str) -> str:
+    """hash_password() for sync endpoints: blocks the calling thread, not the CPU"""
+    return _submit(_hash, password, BCRYPT_ROUNDS).result()
@@ -0,0 +1,89 @@
+"""
+Phone number -> user lookup for mobile login.
+
+Each phone number in use has a pointer item in the users table
+(PK `PHONE#<number>`, SK `LOOKUP`) holding the `user_pk` of its owner, so
+`/mobile/login` finds the user with two key reads instead of scanning the
+table.
+
+The pointer is written in the same TransactWriteItems call as the profile
+change that sets the number, conditioned on the number being free or
+already owned by that user; a number can therefore belong to one profile
+only. Changing a number deletes the old pointer in the same transaction.
+
+`backfill_phone_index.py` writes pointers for users created before this
+module.
+"""
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+from app.core import dynamo
+from app.core.dynamo import unmarshal
+
+USERS_TABLE = "users"
+LOOKUP_SK = "LOOKUP"
+
+
+class PhoneInUseError(Exception):
+    def __init__(self, phone: str):
+        super().__init__(f"Mobile number {phone} is already registered to another account")
+        self.phone = phone
+
+
+def phone_key(phone: str) -> Dict[str, str]:
+    return {"PK": f"PHONE#{phone}", "SK": LOOKUP_SK}
+
+
+def claim(user_pk: str, phone: str) -> Dict[str, Any]:
+    """TransactItems entry pointing `phone` at `user_pk`, unless another user holds it"""
+    return dynamo.transact_put(
+        USERS_TABLE,
+        {**phone_key(phone), "user_pk": user_pk},
+        condition="attribute_not_exists(PK) OR user_pk = :user_pk",
+        values={":user_pk": user_pk},
+    )
+
+
+def release(user_pk: str, phone: str) -> Dict[str, Any]:
+    """TransactItems entry deleting the pointer of `phone` if `user_pk` still holds it"""
+    return dynamo.transact_delete(
+        USERS_TABLE,
+        phone_key(phone),
+        condition="attribute_not_exists(PK) OR user_pk = :user_pk",
+        values={":user_pk": user_pk},
+    )
+
+
+def commit(items: List[Dict[str, Any]], phone: Optional[str]) -> None:
+    """
+    Commit TransactItems that may include a claim() of `phone`.
+
+    Raises PhoneInUseError if the claim's condition failed; other failures
+    surface as botocore ClientError.
+    """
+    try:
+        dynamo.get_client().transact_write_items(TransactItems=items)
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "TransactionCanceledException":
+            raise
+        reasons = e.response.get("CancellationReasons") or []
+        for entry, reason in zip(items, reasons):
+            if reason.get("Code") != "ConditionalCheckFailed":
+                continue
+            if phone and unmarshal(entry.get("Put", {}).get("Item", {})).get("PK") == phone_key(phone)["PK"]:
+                raise PhoneInUseError(phone)
+        raise
+
+
+def find_user(phone: str) -> Optional[Dict[str, Any]]:
+    """Return the profile that owns `phone`, or None"""
+    users_table = dynamo.get_table(USERS_TABLE)
+    pointer = users_table.get_item(Key=phone_key(phone)).get("Item")
+    if not pointer:
+        return None
+    user = users_table.get_item(Key={"PK": pointer["user_pk"], "SK": "PROFILE"}).get("Item")
+    # Ignore pointers left behind by profiles that no longer carry the number
+    if not user or user.get("Phone") != phone:
+        return None
+    return user
@@ -0,0 +1,147 @@
+"""
+PNR allocation from leased blocks of a DynamoDB sequence.
+
+PNRs used to be "PNR" + the booking's %y%m%d%H%M%S, so two bookings made in
+the same second shared one. Now every PNR is "PNR" + a 10-digit sequence
+number + a Luhn check digit, e.g. PNR00000012344 for number 1234.
+
+The sequence is one counter item in the sequences table (PK `SEQUENCE#PNR`,
+SK `METADATA`, `next_value`). A process leases a block of numbers with one
+`ADD next_value :block` (ReturnValues UPDATED_NEW) and hands them out
+locally until the block runs out. The ADD is atomic, so blocks leased by
+concurrent processes and Lambdas never overlap, and every number is
+handed out at most once. Numbers left in a block when a process exits are
+skipped, never reused. Blocks start at MIN_BLOCK numbers, double (up to
+MAX_BLOCK) when a block lasted less than GROWTH_SECONDS and halve when it
+lasted longer, so a short-lived Lambda leaves few numbers unused and a busy
+process leases about once a second.
+"""
+import os
+import re
+import threading
+import time
+from typing import Optional, Tuple
+
+from app.core import dynamo
+from app.core.dynamo import marshal
+
+SEQUENCES_TABLE = os.getenv("SEQUENCES_TABLE", "sequences")
+PNR_SEQUENCE_KEY = {"PK": "SEQUENCE#PNR", "SK": "METADATA"}
+MIN_BLOCK = int(os.getenv("PNR_MIN_BLOCK", "20"))
+MAX_BLOCK = int(os.getenv("PNR_MAX_BLOCK", "5000"))
+GROWTH_SECONDS = 1.0
+
+PREFIX = "PNR"
+SEQUENCE_DIGITS = 10
+_PNR_FORMAT = re.compile(rf"^{PREFIX}(\d{{{SEQUENCE_DIGITS + 1}}})$")
+
+
+class PnrSpaceExhaustedError(Exception):
+    pass
+
+
+def luhn_check_digit(digits: str) -> int:
+    """Check digit that makes `digits` + it pass the Luhn check"""
+    total = 0
+    for position, digit in enumerate(reversed(digits)):
+        value = int(digit)
+        if position % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return (10 - total % 10) % 10
+
+
+def format_pnr(sequence: int) -> str:
+    digits = f"{sequence:0{SEQUENCE_DIGITS}d}"
+    return f"{PREFIX}{digits}{luhn_check_digit(digits)}"
+
+
+def has_valid_check_digit(pnr: str) -> bool:
+    """
+    False for a PNR in the allocator's format whose check digit is wrong
+    (a typo); True otherwise, including PNRs of the older formats.
+    """
+    match = _PNR_FORMAT.match(pnr or "")
+    if not match:
+        return True
+    digits = match.group(1)
+    return luhn_check_digit(digits[:-1]) == int(digits[-1])
+
+
+class PnrAllocator:
+    """
+    Hands out PNRs from blocks leased from the PNR sequence.
+
+    Thread safe: one thread leases a new block while the others wait for it.
+    """
+
+    def __init__(self, client=None, table: str = SEQUENCES_TABLE,
+                 min_block: int = MIN_BLOCK, max_block: int = MAX_BLOCK):
+        self._client = client
+        self.table = table
+        self.min_block = min_block
+        self.max_block = max_block
+        self.block_size = min_block
+        self.leases = 0
+        self._next = 1
+        self._end = 0
+        self._last_lease = 0.0
+        self._lock = threading.Lock()
+        self._lease_lock = threading.Lock()
+
+    def _lease(self) -> Tuple[int, int]:
+        """Lease the next block; returns its first and last sequence numbers"""
+        now = time.monotonic()
+        if self.leases and now - self._last_lease < GROWTH_SECONDS:
+            self.block_size = min(self.block_size * 2, self.max_block)
+        elif self.leases:
+            self.block_size = max(self.block_size // 2, self.min_block)
+        client = self._client or dynamo.get_client()
+        response = client.update_item(
+            TableName=self.table,
+            Key=marshal(PNR_SEQUENCE_KEY),
+            UpdateExpression="ADD next_value :block",
+            ExpressionAttributeValues=marshal({":block": self.block_size}),
+            ReturnValues="UPDATED_NEW",
+        )
+        last = int(response["Attributes"]["next_value"]["N"])
+        if last >= 10 ** SEQUENCE_DIGITS:
+            raise PnrSpaceExhaustedError(f"PNR sequence passed {10 ** SEQUENCE_DIGITS - 1}")
+        self.leases += 1
+        self._last_lease = now
+        return last - self.block_size + 1, last
+
+    def _take(self) -> Optional[int]:
+        with self._lock:
+            if self._next > self._end:
+                return None
+            sequence = self._next
+            self._next += 1
+            return sequence
+
+    def allocate(self) -> str:
+        """Next PNR, leasing a new block first when the current one is used up"""
+        while True:
+            sequence = self._take()
+            if sequence is not None:
+                return format_pnr(sequence)
+            with self._lease_lock:
+                # Another thread may have leased while this one waited
+                with self._lock:
+                    if self._next <= self._end:
+                        continue
+                first, last = self._lease()
+                with self._lock:
+                    self._next, self._end = first, last
+
+    async def allocate_async(self) -> str:
+        """`allocate` without leaving the event loop unless a block has to be leased"""
+        sequence = self._take()
+        if sequence is not None:
+            return format_pnr(sequence)
+        return await dynamo.run(self.allocate)
+
+
+pnr_allocator = PnrAllocator()
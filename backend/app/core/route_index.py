@@ -0,0 +1,175 @@
+"""
+Warm-process route index for train search.
+
+The index is built from a full read of the `trains` table the first time a
+search runs in a Lambda container and is rebuilt once its TTL has elapsed.
+Searches are then answered from memory: the trains stopping at the origin and
+the trains stopping at the destination are intersected, stop positions are
+compared, and the day of run is checked against a per-train bitmask. Origin and
+destination may be any stops on the route, not only the terminals.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from boto3.dynamodb.types import TypeDeserializer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = int(os.getenv("TRAIN_ROUTE_INDEX_TTL_SECONDS", "900"))
+
+# Bit assigned to each day of run, keyed by the lowercase %a abbreviation
+DAY_BITS = {
+    "mon": 1 << 0,
+    "tue": 1 << 1,
+    "wed": 1 << 2,
+    "thu": 1 << 3,
+    "fri": 1 << 4,
+    "sat": 1 << 5,
+    "sun": 1 << 6,
+}
+
+deserializer = TypeDeserializer()
+
+
+def unmarshal(item):
+    """Recursively unmarshal a DynamoDB item"""
+    if isinstance(item, dict) and set(item.keys()) <= {'S', 'N', 'BOOL', 'NULL', 'M', 'L'}:
+        return deserializer.deserialize(item)
+    elif isinstance(item, dict):
+        return {k: unmarshal(v) for k, v in item.items()}
+    elif isinstance(item, list):
+        return [unmarshal(x) for x in item]
+    else:
+        return item
+
+
+def normalize_route(train: Dict[str, Any]) -> List[Optional[str]]:
+    """Return the train route as a list of station codes (string or dict entries)"""
+    return [s if isinstance(s, str) else s.get('station_code') or s.get('S') for s in train.get('route', [])]
+
+
+def normalize_days_of_run(train: Dict[str, Any]) -> List[str]:
+    """Return days_of_run as a list of strings"""
+    days_of_run = train.get('days_of_run', [])
+    if days_of_run and isinstance(days_of_run[0], dict):
+        days_of_run = [d.get('S') or str(d) for d in days_of_run]
+    return days_of_run
+
+
+def days_mask(days_of_run: Iterable[Any]) -> int:
+    """Build the day-of-week bitmask for a train's days_of_run"""
+    mask = 0
+    for day in days_of_run:
+        if isinstance(day, str):
+            mask |= DAY_BITS.get(day.lower(), 0)
+    return mask
+
+
+class RouteIndex:
+    """
+    In-memory station -> trains index with TTL based refresh.
+
+    Args:
+        loader: Callable returning every item of the trains table
+        ttl_seconds: Age after which the next search rebuilds the index
+    """
+
+    def __init__(self, loader: Callable[[], List[Dict[str, Any]]], ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._built_at: Optional[float] = None
+        self._trains: List[Dict[str, Any]] = []
+        self._stops: Dict[str, Dict[int, int]] = {}
+        self._days: List[int] = []
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.last_build_seconds: Optional[float] = None
+
+    def _is_fresh(self) -> bool:
+        return self._built_at is not None and (time.monotonic() - self._built_at) < self.ttl_seconds
+
+    def build(self, items: Optional[List[Dict[str, Any]]] = None) -> None:
+        """(Re)build the index from the given items, or from the loader"""
+        started = time.perf_counter()
+        if items is None:
+            items = self.loader()
+
+        trains: List[Dict[str, Any]] = []
+        stops: Dict[str, Dict[int, int]] = {}
+        days: List[int] = []
+        for item in items:
+            train = unmarshal(item)
+            train_idx = len(trains)
+            trains.append(train)
+            days.append(days_mask(normalize_days_of_run(train)))
+            # Keep the first position of each station, matching list.index()
+            for position, station in enumerate(normalize_route(train)):
+                if station is None:
+                    continue
+                stops.setdefault(station, {}).setdefault(train_idx, position)
+
+        self._trains = trains
+        self._stops = stops
+        self._days = days
+        self._built_at = time.monotonic()
+        self.rebuilds += 1
+        self.last_build_seconds = time.perf_counter() - started
+        logger.info(f"Route index built with {len(trains)} trains and {len(stops)} stations in {self.last_build_seconds:.3f}s")
+
+    def ensure_fresh(self) -> None:
+        """Build the index on first use and after the TTL has expired"""
+        if self._is_fresh():
+            self.hits += 1
+            return
+        with self._lock:
+            if self._is_fresh():
+                self.hits += 1
+                return
+            self.misses += 1
+            self.build()
+
+    def invalidate(self) -> None:
+        """Force a rebuild on the next search"""
+        self._built_at = None
+
+    def search(self, origin: str, destination: str, day_of_week: str) -> List[Dict[str, Any]]:
+        """
+        Find trains that stop at `origin` and later at `destination` on `day_of_week`.
+
+        Both stations may be intermediate stops; the origin only has to come
+        before the destination in the route.
+        """
+        self.ensure_fresh()
+        origin_stops = self._stops.get(origin)
+        destination_stops = self._stops.get(destination)
+        if not origin_stops or not destination_stops:
+            return []
+
+        day_bit = DAY_BITS.get(day_of_week.lower(), 0)
+        results = []
+        for train_idx in sorted(origin_stops.keys() & destination_stops.keys()):
+            if origin_stops[train_idx] >= destination_stops[train_idx]:
+                continue
+            if not self._days[train_idx] & day_bit:
+                continue
+            results.append(dict(self._trains[train_idx]))
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/rebuild counters and index size"""
+        age = None if self._built_at is None else time.monotonic() - self._built_at
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'rebuilds': self.rebuilds,
+            'trains': len(self._trains),
+            'stations': len(self._stops),
+            'ttl_seconds': self.ttl_seconds,
+            'age_seconds': age,
+            'last_build_seconds': self.last_build_seconds,
+        }
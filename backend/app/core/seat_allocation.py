@@ -0,0 +1,210 @@
+"""
+Berth assignment for a party over the free berths of a class.
+
+Each coach's free berths are a bitmap (bit b-1 set when berth b is free).
+A coach is a row of bays: the 8-berth bays of SL/3A/3E (LB MB UB LB MB UB
+SL SU), the 6-berth bays of 2A, the 4-berth cabins of 1A, and the seat rows
+of the chair car classes (window/middle/aisle). For every layout the type
+of each berth is tabulated once, and so is, for every
+possible free pattern of one bay, its free count and its free berths per
+type, so scoring a bay is a shift, a mask and a table lookup.
+
+A party is placed in the narrowest window of adjacent bays of one coach
+that has room for all of it (one bay when it fits). Among those windows it
+takes the one satisfying the most berth preferences, then the one leaving
+the fewest free berths behind, so whole bays stay free for larger parties.
+Coaches are scanned from one picked at random, weighted by free berths,
+and the first coach that satisfies
+every preference wins, which keeps a burst of similar requests from
+racing for the same berths. A party no coach can hold is spread over the
+coaches with the most free berths.
+"""
+import random
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LOWER, MIDDLE, UPPER, SIDE_LOWER, SIDE_UPPER = "LB", "MB", "UB", "SL", "SU"
+WINDOW, MIDDLE_SEAT, AISLE = "WS", "MS", "AS"
+BERTH_TYPES = (LOWER, MIDDLE, UPPER, SIDE_LOWER, SIDE_UPPER, WINDOW, MIDDLE_SEAT, AISLE)
+
+# Berth types of one bay, in berth order, per class
+BAY_TYPES = {
+    "1A": (LOWER, UPPER, LOWER, UPPER),
+    "2A": (LOWER, UPPER, LOWER, UPPER, SIDE_LOWER, SIDE_UPPER),
+    "3A": (LOWER, MIDDLE, UPPER, LOWER, MIDDLE, UPPER, SIDE_LOWER, SIDE_UPPER),
+    "3E": (LOWER, MIDDLE, UPPER, LOWER, MIDDLE, UPPER, SIDE_LOWER, SIDE_UPPER),
+    "SL": (LOWER, MIDDLE, UPPER, LOWER, MIDDLE, UPPER, SIDE_LOWER, SIDE_UPPER),
+    "CC": (WINDOW, MIDDLE_SEAT, AISLE, AISLE, WINDOW),
+    "2S": (WINDOW, MIDDLE_SEAT, AISLE, AISLE, MIDDLE_SEAT, WINDOW),
+    "EC": (WINDOW, AISLE, AISLE, WINDOW),
+}
+
+_ALIASES = {
+    "LOWER": LOWER, "MIDDLE": MIDDLE, "UPPER": UPPER,
+    "SIDE LOWER": SIDE_LOWER, "SIDE UPPER": SIDE_UPPER, "SIDELOWER": SIDE_LOWER, "SIDEUPPER": SIDE_UPPER,
+    "WINDOW": WINDOW, "AISLE": AISLE,
+}
+
+
+def normalize_preference(preference: Optional[str]) -> Optional[str]:
+    """Berth type code for a preference ("LB", "lower", ...), or None for no or unknown preference"""
+    if not preference:
+        return None
+    code = str(preference).strip().upper()
+    code = _ALIASES.get(code, code)
+    return code if code in BERTH_TYPES else None
+
+
+class CoachLayout:
+    """Lookup tables for the coaches of one class"""
+
+    def __init__(self, bay_types: Sequence[str], berths: int):
+        self.berths = berths
+        self.bay_size = len(bay_types)
+        self.bays = -(-berths // self.bay_size)
+        self.types = tuple(dict.fromkeys(bay_types))
+        type_index = {berth_type: index for index, berth_type in enumerate(self.types)}
+
+        # Per berth (1-based; index 0 unused)
+        self.berth_type = [None] + [bay_types[(berth - 1) % self.bay_size] for berth in range(1, berths + 1)]
+        # Per type: bits of the bay offsets of that type
+        self.type_bits = [sum(1 << offset for offset, berth_type in enumerate(bay_types) if berth_type == t)
+                          for t in self.types]
+        # Per bay pattern: free berths, and free berths of each type
+        patterns = range(1 << self.bay_size)
+        self.popcount = [bin(pattern).count("1") for pattern in patterns]
+        self.type_counts = [[self.popcount[pattern & bits] for pattern in patterns] for bits in self.type_bits]
+        self.bay_mask = (1 << self.bay_size) - 1
+        self.type_index = type_index
+
+    def bay_patterns(self, free: int) -> List[int]:
+        """Free pattern of every bay of a coach"""
+        return [(free >> (bay * self.bay_size)) & self.bay_mask for bay in range(self.bays)]
+
+
+_layouts: Dict[Tuple[str, int], CoachLayout] = {}
+
+
+def layout_for(travel_class: str, berths: int) -> CoachLayout:
+    """Cached lookup tables of a class (SL-style bays for unknown classes)"""
+    key = (travel_class, berths)
+    layout = _layouts.get(key)
+    if layout is None:
+        layout = _layouts[key] = CoachLayout(BAY_TYPES.get(travel_class, BAY_TYPES["SL"]), berths)
+    return layout
+
+
+def free_bitmap(berths: int, sold) -> int:
+    """Free-berth bitmap of a coach from its sold berth numbers"""
+    sold_bits = 0
+    for berth in sold:
+        sold_bits |= 1 << (int(berth) - 1)
+    return ((1 << berths) - 1) & ~sold_bits
+
+
+def _assign(layout: CoachLayout, free: List[Tuple[int, int]], preferences: Sequence[Optional[str]]) -> List[Tuple[int, int]]:
+    """(coach, berth) per passenger from `free`: preferred types first, the rest in berth order"""
+    chosen: List[Optional[Tuple[int, int]]] = [None] * len(preferences)
+    taken = set()
+    for index, preference in enumerate(preferences):
+        if preference is None:
+            continue
+        for seat in free:
+            if seat not in taken and layout.berth_type[seat[1]] == preference:
+                chosen[index] = seat
+                taken.add(seat)
+                break
+    remaining = (seat for seat in free if seat not in taken)
+    return [seat if seat is not None else next(remaining) for seat in chosen]
+
+
+def allocate(layout: CoachLayout, coaches: Sequence[int], preferences: Sequence[Optional[str]],
+             rng: random.Random = random) -> Optional[List[Tuple[int, int]]]:
+    """
+    Place a party, one preference (or None) per passenger.
+
+    Args:
+        layout: Lookup tables of the class (layout_for)
+        coaches: Free-berth bitmap of each coach
+        preferences: Berth type codes as returned by normalize_preference
+
+    Returns:
+        (coach index, berth) per passenger in passenger order, or None when
+        the coaches have fewer free berths than passengers
+    """
+    count = len(preferences)
+    if count == 0:
+        return []
+    demand = [0] * len(layout.types)
+    for preference in preferences:
+        if preference in layout.type_index:
+            demand[layout.type_index[preference]] += 1
+    wanted = [(index, n) for index, n in enumerate(demand) if n]
+
+    # Per coach, running totals of free berths over its bays, and the narrowest window of
+    # adjacent bays holding the whole party
+    popcount = layout.popcount
+    running_free = []
+    narrowest = []
+    for free in coaches:
+        running = list(accumulate(map(popcount.__getitem__, layout.bay_patterns(free)), initial=0))
+        running_free.append(running)
+        width = None
+        if running[-1] >= count:
+            start = 0
+            for end in range(1, layout.bays + 1):
+                while running[end] - running[start + 1] >= count:
+                    start += 1
+                if running[end] - running[start] >= count and (width is None or end - start < width):
+                    width = end - start
+        narrowest.append(width)
+
+    widths = [width for width in narrowest if width is not None]
+    if widths:
+        # Narrowest window first; then most preferences met, then best fit. Coaches are visited
+        # from a random one on (weighted by free berths) and the first coach meeting every
+        # preference is taken, so concurrent requests spread over the train instead of
+        # converging on the tightest bay.
+        width = min(widths)
+        stated = sum(n for _, n in wanted)
+        first_coach = rng.choices(range(len(coaches)), weights=[running[-1] for running in running_free])[0]
+        best, best_key, ties = None, None, 0
+        for coach in list(range(first_coach, len(coaches))) + list(range(first_coach)):
+            if narrowest[coach] != width:
+                continue
+            running = running_free[coach]
+            bays = layout.bay_patterns(coaches[coach])
+            by_type = [(n, list(accumulate(map(layout.type_counts[index].__getitem__, bays), initial=0)))
+                       for index, n in wanted]
+            for start in range(layout.bays - width + 1):
+                end = start + width
+                free = running[end] - running[start]
+                if free < count:
+                    continue
+                met = 0
+                for n, type_running in by_type:
+                    have = type_running[end] - type_running[start]
+                    met += n if have >= n else have
+                key = (met, count - free)
+                if best_key is None or key > best_key:
+                    best, best_key, ties = (coach, start), key, 1
+                elif key == best_key:
+                    # Equally good windows: pick one at random, so stale reads rarely collide
+                    ties += 1
+                    if rng.randrange(ties) == 0:
+                        best = (coach, start)
+            if best_key[0] == stated:
+                break
+        coach, start = best
+        first = start * layout.bay_size + 1
+        last = min((start + width) * layout.bay_size, layout.berths)
+        free = [(coach, berth) for berth in range(first, last + 1) if coaches[coach] >> (berth - 1) & 1]
+        return _assign(layout, free, preferences)
+
+    # No coach holds the whole party: spread it over the coaches with the most free berths
+    free = []
+    for coach in sorted(range(len(coaches)), key=lambda coach: -running_free[coach][-1]):
+        free.extend((coach, berth) for berth in range(1, layout.berths + 1) if coaches[coach] >> (berth - 1) & 1)
+        if len(free) >= count:
+            return _assign(layout, free, preferences)
+    return None
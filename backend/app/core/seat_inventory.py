@@ -0,0 +1,291 @@
+"""
+Seat inventory per train, journey date and class.
+
+Each (train, journey date, class) is one partition of the seat_inventory
+table, with one item per coach:
+
+    PK         INVENTORY#<train_number>#<journey_date>#<class>
+    SK         COACH#<nn>
+    coach      coach label, e.g. "S3"
+    berths     berths in the coach
+    available  berths not sold
+    sold       number set of the sold berth numbers (absent while none are)
+
+All coaches of a class come back from one Query. A reservation updates
+every coach it takes berths from in one TransactWriteItems call with
+`ADD sold :berths, available :minus`, conditioned on `available >= :count`
+and `NOT contains(sold, :bN)` for each berth taken, so no berth can be sold
+twice. Two requests only collide when they pick the same berth; the loser
+re-reads the coaches and picks again. Berths are picked by
+app.core.seat_allocation from the free-berth bitmaps of the coaches, by
+berth preference and keeping a party in one bay, starting from a random
+coach so a burst on one train spreads over its coaches instead of racing
+for the first free berth. Releasing seats is the inverse update,
+conditioned on the berths still being sold.
+
+`build_items` lets the caller commit its own items (the booking) in the
+same transaction as the seats: a booking is never written without its
+seats, and seats are never held without a booking.
+
+Coaches are created on first use from the train's `coaches` map (class ->
+number of coaches, as written by mock_api/generate_synthetic_timetable.py)
+or DEFAULT_COACHES; mock_api/load_synthetic_to_dynamodb.py loads them ahead
+of time from a synthetic inventory.
+"""
+import random
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from botocore.exceptions import ClientError
+
+from app.core import dynamo, seat_allocation
+from app.core.dynamo import marshal, unmarshal
+
+SEAT_INVENTORY_TABLE = "seat_inventory"
+TRAINS_TABLE = "trains"
+
+# Reads and commits per reservation before giving up under contention
+MAX_RESERVE_ATTEMPTS = 8
+
+BERTHS_PER_COACH = {"1A": 24, "2A": 48, "3A": 64, "3E": 72, "SL": 72, "2S": 108, "CC": 78, "EC": 56}
+DEFAULT_COACHES = {"1A": 1, "2A": 2, "3A": 5, "3E": 2, "SL": 10, "2S": 4, "CC": 8, "EC": 1}
+COACH_PREFIX = {"1A": "H", "2A": "A", "3A": "B", "3E": "M", "SL": "S", "2S": "D", "CC": "C", "EC": "E"}
+
+_SEAT_LABEL = re.compile(r"^([A-Z]+)(\d+)-(\d+)$")
+
+
+class SoldOutError(Exception):
+    def __init__(self, travel_class: str, available: int, requested: int):
+        super().__init__(f"Only {available} seats left in {travel_class} class, {requested} requested")
+        self.travel_class = travel_class
+        self.available = available
+        self.requested = requested
+
+
+class InventoryContentionError(Exception):
+    pass
+
+
+def inventory_pk(train_number: str, journey_date: str, travel_class: str) -> str:
+    return f"INVENTORY#{train_number}#{journey_date}#{travel_class}"
+
+
+def coach_key(pk: str, number: int) -> Dict[str, str]:
+    return {"PK": pk, "SK": f"COACH#{number:02d}"}
+
+
+def seat_label(coach: str, berth: int) -> str:
+    return f"{coach}-{berth}"
+
+
+def parse_seat(label: Any) -> Optional[Tuple[str, int, int]]:
+    """(coach label, coach number, berth) for a label made by seat_label(), or None"""
+    match = _SEAT_LABEL.match(str(label or ""))
+    if not match:
+        return None
+    return f"{match.group(1)}{match.group(2)}", int(match.group(2)), int(match.group(3))
+
+
+def layout(train: Optional[Dict[str, Any]], travel_class: str) -> Tuple[int, int]:
+    """(coaches, berths per coach) of a class on `train`"""
+    coaches = (train or {}).get("coaches") or {}
+    return int(coaches.get(travel_class) or DEFAULT_COACHES.get(travel_class, 4)), BERTHS_PER_COACH.get(travel_class, 72)
+
+
+def coach_items(train_number: str, journey_date: str, travel_class: str, coaches: int, berths: int,
+                sold: Optional[Dict[int, Iterable[int]]] = None) -> List[Dict[str, Any]]:
+    """Coach items of a class; `sold` maps coach numbers to berths already sold"""
+    pk = inventory_pk(train_number, journey_date, travel_class)
+    prefix = COACH_PREFIX.get(travel_class, travel_class[:1])
+    items = []
+    for number in range(1, coaches + 1):
+        taken = {int(berth) for berth in (sold or {}).get(number, ())}
+        item = {**coach_key(pk, number), "coach": f"{prefix}{number}", "berths": berths, "available": berths - len(taken)}
+        if taken:
+            item["sold"] = taken
+        items.append(item)
+    return items
+
+
+def _coach(item: Dict[str, Any]) -> Dict[str, Any]:
+    coach = dict(item)
+    coach["berths"] = int(coach["berths"])
+    coach["available"] = int(coach["available"])
+    coach["sold"] = {int(berth) for berth in coach.get("sold") or ()}
+    return coach
+
+
+def plan(coaches: List[Dict[str, Any]], travel_class: str, preferences: Sequence[Optional[str]],
+         rng: random.Random = random) -> List[Tuple[Dict[str, Any], int]]:
+    """(coach, berth) per passenger, placed by app.core.seat_allocation; empty if they do not fit"""
+    layout = seat_allocation.layout_for(travel_class, max(coach["berths"] for coach in coaches))
+    bitmaps = [seat_allocation.free_bitmap(coach["berths"], coach["sold"]) for coach in coaches]
+    placed = seat_allocation.allocate(layout, bitmaps, preferences, rng) or []
+    return [(coaches[index], berth) for index, berth in placed]
+
+
+def reserve_update(coach: Dict[str, Any], berths: List[int]) -> Dict[str, Any]:
+    """TransactItems entry selling `berths` of `coach`, unless any of them is already sold"""
+    values = {":berths": set(berths), ":minus": -len(berths), ":count": len(berths)}
+    conditions = ["available >= :count"]
+    for index, berth in enumerate(berths):
+        values[f":b{index}"] = berth
+        conditions.append(f"NOT contains(sold, :b{index})")
+    return dynamo.transact_update(
+        SEAT_INVENTORY_TABLE,
+        {"PK": coach["PK"], "SK": coach["SK"]},
+        "ADD sold :berths, available :minus",
+        values=values,
+        condition=" AND ".join(conditions),
+    )
+
+
+def load_coaches(train_number: str, journey_date: str, travel_class: str, client=None) -> List[Dict[str, Any]]:
+    """Coach items of a class, read consistently, in coach order"""
+    client = client or dynamo.get_client()
+    query = {
+        "TableName": SEAT_INVENTORY_TABLE,
+        "KeyConditionExpression": "PK = :pk",
+        "ExpressionAttributeValues": marshal({":pk": inventory_pk(train_number, journey_date, travel_class)}),
+        "ConsistentRead": True,
+    }
+    coaches = []
+    while True:
+        response = client.query(**query)
+        coaches.extend(_coach(unmarshal(item)) for item in response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return coaches
+        query["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def initialize(train_number: str, journey_date: str, travel_class: str, train: Optional[Dict[str, Any]] = None,
+               client=None) -> None:
+    """Create the coach items of a class from the train's composition, unless they exist"""
+    client = client or dynamo.get_client()
+    if train is None:
+        response = client.get_item(
+            TableName=TRAINS_TABLE,
+            Key=marshal({"PK": f"TRAIN#{train_number}", "SK": "METADATA"}),
+            ProjectionExpression="coaches",
+        )
+        train = unmarshal(response["Item"]) if "Item" in response else None
+    coaches, berths = layout(train, travel_class)
+    items = [dynamo.transact_put(SEAT_INVENTORY_TABLE, item, condition="attribute_not_exists(PK)")
+             for item in coach_items(train_number, journey_date, travel_class, coaches, berths)]
+    try:
+        client.transact_write_items(TransactItems=items)
+    except ClientError as e:
+        # Another request created them first
+        if e.response["Error"]["Code"] != "TransactionCanceledException":
+            raise
+
+
+def reserve(train_number: str, journey_date: str, travel_class: str, count: int,
+            build_items: Optional[Callable[[List[str]], List[Dict[str, Any]]]] = None,
+            train: Optional[Dict[str, Any]] = None, client=None,
+            preferences: Optional[Sequence[Optional[str]]] = None) -> List[str]:
+    """
+    Reserve `count` seats and return their labels ("S3-45"), in passenger order
+
+    Args:
+        build_items: Called with the seat labels of each attempt; the
+            TransactItems it returns are committed together with the seats
+        train: Train item, used for its coach composition if the class has
+            no inventory yet (read from the trains table otherwise)
+        preferences: Berth preference per passenger ("LB", "UB", ... or None)
+
+    Raises:
+        SoldOutError: Fewer than `count` seats are left
+        InventoryContentionError: Every attempt lost its berths to another request
+    """
+    client = client or dynamo.get_client()
+    if count < 1:
+        items = build_items([]) if build_items is not None else []
+        if items:
+            client.transact_write_items(TransactItems=items)
+        return []
+    preferences = [seat_allocation.normalize_preference(p) for p in (list(preferences or []) + [None] * count)[:count]]
+
+    for attempt in range(MAX_RESERVE_ATTEMPTS):
+        coaches = load_coaches(train_number, journey_date, travel_class, client)
+        if not coaches:
+            initialize(train_number, journey_date, travel_class, train, client)
+            coaches = load_coaches(train_number, journey_date, travel_class, client)
+        available = sum(coach["available"] for coach in coaches)
+        if available < count:
+            raise SoldOutError(travel_class, available, count)
+
+        placed = plan(coaches, travel_class, preferences)
+        seats = [seat_label(coach["coach"], berth) for coach, berth in placed]
+        by_coach: Dict[str, Tuple[Dict[str, Any], List[int]]] = {}
+        for coach, berth in placed:
+            by_coach.setdefault(coach["SK"], (coach, []))[1].append(berth)
+        items = [reserve_update(coach, berths) for coach, berths in by_coach.values()]
+        if build_items is not None:
+            items += build_items(seats)
+        try:
+            client.transact_write_items(TransactItems=items)
+            return seats
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            codes = [reason.get("Code") for reason in e.response.get("CancellationReasons") or []]
+            # Only retry when the seats were lost; a failed condition on the caller's items is theirs
+            if not any(code in ("ConditionalCheckFailed", "TransactionConflict") for code in codes[:len(by_coach)]):
+                raise
+            time.sleep(random.uniform(0, min(0.01 * (2 ** attempt), 0.2)))
+    raise InventoryContentionError(
+        f"Could not reserve {count} seats in {travel_class} on train {train_number} for {journey_date} "
+        f"after {MAX_RESERVE_ATTEMPTS} attempts"
+    )
+
+
+def release(train_number: str, journey_date: str, travel_class: str, seats: Iterable[Any], client=None) -> int:
+    """
+    Return sold seats to the inventory; returns how many were released.
+
+    Labels that are not inventory seats (older bookings) and berths that are
+    no longer sold are skipped, so releasing twice is harmless.
+    """
+    pk = inventory_pk(train_number, journey_date, travel_class)
+    by_coach: Dict[int, List[int]] = {}
+    for label in seats:
+        parsed = parse_seat(label)
+        if parsed:
+            by_coach.setdefault(parsed[1], []).append(parsed[2])
+
+    client = client or dynamo.get_client()
+    released = 0
+    for number, berths in by_coach.items():
+        values = {":berths": set(berths), ":count": len(berths)}
+        values.update({f":b{index}": berth for index, berth in enumerate(berths)})
+        try:
+            client.update_item(
+                TableName=SEAT_INVENTORY_TABLE,
+                Key=marshal(coach_key(pk, number)),
+                UpdateExpression="DELETE sold :berths ADD available :count",
+                ConditionExpression=" AND ".join(f"contains(sold, :b{index})" for index in range(len(berths))),
+                ExpressionAttributeValues=marshal(values),
+            )
+            released += len(berths)
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+    return released
+
+
+def availability(train_number: str, journey_date: str, travel_class: str) -> Optional[int]:
+    """Seats left in a class, or None if it has no inventory yet"""
+    coaches = load_coaches(train_number, journey_date, travel_class)
+    return sum(coach["available"] for coach in coaches) if coaches else None
+
+
+async def reserve_async(*args, **kwargs) -> List[str]:
+    """`reserve` on the DynamoDB thread pool, for async endpoints"""
+    return await dynamo.run(reserve, *args, **kwargs)
+
+
+async def release_async(*args, **kwargs) -> int:
+    """`release` on the DynamoDB thread pool, for async endpoints"""
+    return await dynamo.run(release, *args, **kwargs)
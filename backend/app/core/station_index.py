@@ -0,0 +1,218 @@
+"""
+Station autocomplete index.
+
+Station names and codes are normalized (Unicode diacritics folded, case
+folded, punctuation collapsed to single spaces, so "Kolkāta" -> "kolkata")
+and stored as search keys in one sorted list. A query is normalized the same
+way and answered with a bisect to the first key it prefixes, then a short
+walk forward. Keys per station:
+
+- the station code ("ndls")
+- the full name ("new delhi") and every later word start of it ("delhi"),
+  so "delhi" also finds "New Delhi"
+
+Matches are ranked exact code, exact name, code prefix, name prefix, word
+prefix, then by the station's position in the source (cities.json lists
+major cities first), and the first `limit` are returned. Recent queries are
+kept in a small LRU cache.
+
+The index is built on first use from a loader (the stations table), or from
+a prebuilt artifact written by `python -m app.core.station_index`, and is
+rebuilt once its TTL has elapsed.
+"""
+import bisect
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = int(os.getenv("STATION_INDEX_TTL_SECONDS", "3600"))
+CACHE_SIZE = 1024
+ARTIFACT_VERSION = 1
+
+# Match kinds, best first
+EXACT_CODE = 0
+EXACT_NAME = 1
+CODE_PREFIX = 2
+NAME_PREFIX = 3
+WORD_PREFIX = 4
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: Any) -> str:
+    """Fold diacritics and case, and collapse everything but letters and digits to single spaces"""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    folded = "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+    return _NON_ALNUM.sub(" ", folded).strip()
+
+
+def station_code(record: Dict[str, Any]) -> str:
+    """Code of a stations table item or a cities.json entry"""
+    return str(record.get("station_code") or record.get("keyword") or "")
+
+
+def station_name(record: Dict[str, Any]) -> str:
+    """Name of a stations table item or a cities.json entry"""
+    return str(record.get("station_name") or record.get("name") or record.get("city") or "")
+
+
+def build_keys(records: List[Dict[str, Any]]) -> List[Tuple[str, int, int]]:
+    """Sorted (key, record position, kind) entries for `records`"""
+    entries = []
+    for position, record in enumerate(records):
+        code = normalize(station_code(record))
+        if code:
+            entries.append((code, position, CODE_PREFIX))
+        name = normalize(station_name(record))
+        if name:
+            entries.append((name, position, NAME_PREFIX))
+            for match in re.finditer(r" (?=\S)", name):
+                entries.append((name[match.end():], position, WORD_PREFIX))
+    entries.sort()
+    return entries
+
+
+def load_artifact(path: str) -> Tuple[List[Dict[str, Any]], List[Tuple[str, int, int]]]:
+    """Read records and sorted keys from an artifact written by write_artifact()"""
+    with open(path, "r", encoding="utf-8") as f:
+        artifact = json.load(f)
+    if artifact.get("version") != ARTIFACT_VERSION:
+        raise ValueError(f"Unsupported station index artifact version: {artifact.get('version')}")
+    return artifact["records"], [tuple(entry) for entry in artifact["keys"]]
+
+
+def write_artifact(records: List[Dict[str, Any]], path: str) -> int:
+    """Write records and their sorted keys to `path`; returns the number of keys"""
+    keys = build_keys(records)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": ARTIFACT_VERSION, "records": records, "keys": keys}, f, ensure_ascii=False,
+                  separators=(",", ":"), default=str)
+    return len(keys)
+
+
+class StationIndex:
+    """
+    In-memory prefix index over station names and codes with TTL based refresh.
+
+    Args:
+        loader: Callable returning every station record
+        artifact_path: Prebuilt artifact to load instead of calling the loader
+        ttl_seconds: Age after which the next search rebuilds the index
+    """
+
+    def __init__(self, loader: Optional[Callable[[], List[Dict[str, Any]]]] = None,
+                 artifact_path: Optional[str] = None, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.loader = loader
+        self.artifact_path = artifact_path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._built_at: Optional[float] = None
+        self._records: List[Dict[str, Any]] = []
+        self._entries: List[Tuple[str, int, int]] = []
+        self._keys: List[str] = []
+        self._cache: "OrderedDict[Tuple[str, int], List[Dict[str, Any]]]" = OrderedDict()
+        self.searches = 0
+        self.cache_hits = 0
+        self.rebuilds = 0
+        self.last_build_seconds: Optional[float] = None
+
+    def _is_fresh(self) -> bool:
+        return self._built_at is not None and (time.monotonic() - self._built_at) < self.ttl_seconds
+
+    def build(self, records: Optional[List[Dict[str, Any]]] = None) -> None:
+        """(Re)build the index from the given records, the artifact, or the loader"""
+        started = time.perf_counter()
+        if records is None and self.artifact_path:
+            records, entries = load_artifact(self.artifact_path)
+        else:
+            if records is None:
+                records = self.loader()
+            entries = build_keys(records)
+
+        self._records = records
+        self._entries = entries
+        self._keys = [entry[0] for entry in entries]
+        self._cache = OrderedDict()
+        self._built_at = time.monotonic()
+        self.rebuilds += 1
+        self.last_build_seconds = time.perf_counter() - started
+        logger.info(f"Station index built with {len(records)} stations and {len(entries)} keys in {self.last_build_seconds:.3f}s")
+
+    def ensure_fresh(self) -> None:
+        """Build the index on first use and after the TTL has expired"""
+        if self._is_fresh():
+            return
+        with self._lock:
+            if not self._is_fresh():
+                self.build()
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Return up to `limit` stations whose code, name or a word of the name starts with `query`"""
+        self.ensure_fresh()
+        self.searches += 1
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        cache_key = (prefix, limit)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            self.cache_hits += 1
+            return cached
+
+        # Best kind per station among the keys the prefix matches
+        best: Dict[int, int] = {}
+        entries = self._entries
+        index = bisect.bisect_left(self._keys, prefix)
+        while index < len(entries):
+            key, position, kind = entries[index]
+            if not key.startswith(prefix):
+                break
+            if key == prefix and kind != WORD_PREFIX:
+                kind = EXACT_CODE if kind == CODE_PREFIX else EXACT_NAME
+            if kind < best.get(position, WORD_PREFIX + 1):
+                best[position] = kind
+            index += 1
+
+        ranked = sorted(best.items(), key=lambda match: (match[1], match[0]))[:limit]
+        results = [self._records[position] for position, _ in ranked]
+
+        self._cache[cache_key] = results
+        if len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Return search/cache/rebuild counters and index size"""
+        age = None if self._built_at is None else time.monotonic() - self._built_at
+        return {
+            "searches": self.searches,
+            "cache_hits": self.cache_hits,
+            "rebuilds": self.rebuilds,
+            "stations": len(self._records),
+            "keys": len(self._entries),
+            "ttl_seconds": self.ttl_seconds,
+            "age_seconds": age,
+            "last_build_seconds": self.last_build_seconds,
+            "source": self.artifact_path or "loader",
+        }
+
+
+if __name__ == "__main__":
+    # Build an artifact from a JSON list of stations, e.g. mock_api/cities.json:
+    #   python -m app.core.station_index mock_api/cities.json station_index.json
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m app.core.station_index <stations.json> <artifact.json>")
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        source = json.load(f)
+    print(f"Wrote {write_artifact(source, sys.argv[2])} keys for {len(source)} stations to {sys.argv[2]}")
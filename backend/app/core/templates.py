@@ -0,0 +1,83 @@
+"""
+Email template registry.
+
+One Jinja2 environment per process, loading from app/templates with a
+FileSystemLoader and a filesystem bytecode cache. A template is compiled the
+first time it is rendered (or by `precompile()`) and then reused from the
+environment's cache; the bytecode cache lets new processes, e.g. Lambda cold
+starts, skip compilation too.
+
+Precompiling is optional:
+- at startup: set PRECOMPILE_TEMPLATES=1 (see main.py)
+- at build time: `python -m app.core.templates` from backend/, with
+  TEMPLATE_BYTECODE_CACHE_DIR pointing at a directory shipped with the build
+"""
+import os
+import pathlib
+import tempfile
+import threading
+from typing import Any, List, Optional
+
+import jinja2
+
+TEMPLATE_DIR = pathlib.Path(__file__).parent.parent / "templates"
+BYTECODE_CACHE_DIR = os.getenv(
+    "TEMPLATE_BYTECODE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "tatkalpro-jinja-cache")
+)
+PRECOMPILE_ON_STARTUP = os.getenv("PRECOMPILE_TEMPLATES", "false").lower() in ("1", "true", "yes")
+
+BOOKING_CONFIRMATION_EMAIL = "booking_confirmation_email.html"
+OTP_EMAIL = "otp_email.html"
+
+_lock = threading.Lock()
+_environment: Optional[jinja2.Environment] = None
+
+
+def _bytecode_cache() -> Optional[jinja2.FileSystemBytecodeCache]:
+    try:
+        os.makedirs(BYTECODE_CACHE_DIR, exist_ok=True)
+        return jinja2.FileSystemBytecodeCache(BYTECODE_CACHE_DIR)
+    except OSError as e:
+        # Read-only filesystem: templates are still cached in memory
+        print(f"[TatkalPro][Templates] Bytecode cache disabled: {e}")
+        return None
+
+
+def get_environment() -> jinja2.Environment:
+    """Return the process-wide Jinja2 environment, creating it on first use"""
+    global _environment
+    if _environment is None:
+        with _lock:
+            if _environment is None:
+                _environment = jinja2.Environment(
+                    loader=jinja2.FileSystemLoader(str(TEMPLATE_DIR)),
+                    bytecode_cache=_bytecode_cache(),
+                    autoescape=jinja2.select_autoescape(["html"]),
+                    # Templates ship with the code; never stat them again after loading
+                    auto_reload=False,
+                )
+    return _environment
+
+
+def get_template(name: str) -> jinja2.Template:
+    """Return a compiled template, compiling it once per process"""
+    return get_environment().get_template(name)
+
+
+def render(name: str, **context: Any) -> str:
+    """Render a template from app/templates"""
+    return get_template(name).render(**context)
+
+
+def precompile() -> List[str]:
+    """Compile every HTML template into the environment and bytecode caches"""
+    env = get_environment()
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return names
+
+
+if __name__ == "__main__":
+    compiled = precompile()
+    print(f"[TatkalPro][Templates] Precompiled {len(compiled)} templates into {BYTECODE_CACHE_DIR}: {', '.join(compiled)}")
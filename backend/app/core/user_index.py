@@ -0,0 +1,50 @@
+"""
+UserID -> profile lookup.
+
+Profiles are keyed `USER#<email>`, but bookings, notifications and FCM
+registrations refer to users by their `UserID` (a UUID). Each profile has a
+pointer item in the users table (PK `USERID#<uuid>`, SK `LOOKUP`) holding
+its `user_pk`, written by `create_user` in the same transaction as the
+profile; `backfill_user_id_index.py` writes pointers for older profiles.
+
+`resolve_user()` accepts either form of id and finds the profile with at
+most two key lookups: the pointer, then the profile it points at, or the
+profile keyed directly by the id when there is no pointer.
+"""
+from typing import Any, Dict, Optional
+
+from app.core import dynamo
+
+USERS_TABLE = "users"
+LOOKUP_SK = "LOOKUP"
+
+
+def user_id_key(user_id: str) -> Dict[str, str]:
+    return {"PK": f"USERID#{user_id}", "SK": LOOKUP_SK}
+
+
+def claim(user_pk: str, user_id: str) -> Dict[str, Any]:
+    """TransactItems entry pointing `user_id` at `user_pk`, unless another profile holds it"""
+    return dynamo.transact_put(
+        USERS_TABLE,
+        {**user_id_key(user_id), "user_pk": user_pk},
+        condition="attribute_not_exists(PK) OR user_pk = :user_pk",
+        values={":user_pk": user_pk},
+    )
+
+
+async def resolve_user(user_id: str, projection: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Return the profile for a UserID or an email, or None.
+
+    Args:
+        user_id: The UserID (UUID) or the email the profile is keyed by
+        projection: Optional ProjectionExpression for the profile read; PK is always included
+    """
+    users_table = dynamo.async_table(USERS_TABLE)
+    pointer = (await users_table.get_item(Key=user_id_key(user_id))).get("Item")
+    user_pk = pointer["user_pk"] if pointer else f"USER#{user_id}"
+    kwargs = {"Key": {"PK": user_pk, "SK": "PROFILE"}}
+    if projection:
+        kwargs["ProjectionExpression"] = f"PK, {projection}"
+    return (await users_table.get_item(**kwargs)).get("Item")
@@ -0,0 +1,178 @@
+"""
+Atomic wallet credits and debits.
+
+A money movement is a single TransactWriteItems call:
+
+- Update of the wallet item with `ADD balance :delta`, conditioned on the
+  wallet existing, holding a numeric balance and, for debits,
+  `balance >= :amount`
+- Put of the wallet transaction item (conditioned on the txn not existing,
+  so a retried call cannot write it twice), plus any extra items the caller
+  wants committed together
+
+Both writes succeed or neither does, and concurrent debits can no longer
+lose updates or overdraw the wallet.
+
+Wallets created before this module stored `balance` as a string, which ADD
+cannot operate on. When the condition fails on such a wallet, the balance is
+converted to a number with a compare-and-set and the call is retried.
+"""
+import random
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from botocore.exceptions import ClientError
+
+from app.core import dynamo
+from app.core.dynamo import marshal, unmarshal
+
+WALLET_TABLE = "wallet"
+WALLET_TRANSACTIONS_TABLE = "wallet_transactions"
+
+CREDIT = "credit"
+DEBIT = "debit"
+
+# Attempts for TransactionConflict cancellations and legacy balance conversion
+MAX_TRANSACT_ATTEMPTS = 10
+
+
+class WalletNotFoundError(Exception):
+    def __init__(self, wallet_id: str):
+        super().__init__(f"Wallet with ID {wallet_id} not found")
+        self.wallet_id = wallet_id
+
+
+class InsufficientBalanceError(Exception):
+    def __init__(self, wallet_id: str, balance: Decimal, amount: Decimal):
+        super().__init__(f"Insufficient balance in wallet: {balance} < {amount}")
+        self.wallet_id = wallet_id
+        self.balance = balance
+        self.amount = amount
+
+
+def wallet_key(wallet_id: str) -> Dict[str, str]:
+    return {"PK": f"WALLET#{wallet_id}", "SK": "METADATA"}
+
+
+def transaction_status_update(wallet_id: str, txn_id: str, new_status: str, expected_status: str) -> Dict[str, Any]:
+    """TransactItems entry moving an existing wallet transaction from one status to another"""
+    return {
+        "Update": {
+            "TableName": WALLET_TRANSACTIONS_TABLE,
+            "Key": marshal({"PK": f"WALLET#{wallet_id}", "SK": f"TXN#{txn_id}"}),
+            "UpdateExpression": "SET #status = :status",
+            "ConditionExpression": "#status = :expected_status",
+            "ExpressionAttributeNames": {"#status": "status"},
+            "ExpressionAttributeValues": marshal({":status": new_status, ":expected_status": expected_status}),
+        }
+    }
+
+
+def build_transact_items(wallet_id: str, txn_type: str, amount: Decimal,
+                         txn_item: Optional[Dict[str, Any]] = None,
+                         extra_items: Iterable[Dict[str, Any]] = (),
+                         updated_at: Optional[str] = None) -> List[Dict[str, Any]]:
+    """TransactItems for one credit or debit of `amount`"""
+    if txn_type not in (CREDIT, DEBIT):
+        raise ValueError(f"Unknown transaction type: {txn_type}")
+
+    condition = "attribute_exists(PK) AND attribute_type(balance, :number_type)"
+    values = {
+        ":delta": amount if txn_type == CREDIT else -amount,
+        ":number_type": "N",
+        ":updated_at": updated_at or datetime.utcnow().isoformat(),
+    }
+    if txn_type == DEBIT:
+        condition += " AND balance >= :amount"
+        values[":amount"] = amount
+
+    items = [{
+        "Update": {
+            "TableName": WALLET_TABLE,
+            "Key": marshal(wallet_key(wallet_id)),
+            "UpdateExpression": "ADD balance :delta SET updated_at = :updated_at",
+            "ConditionExpression": condition,
+            "ExpressionAttributeValues": marshal(values),
+            "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+        }
+    }]
+    if txn_item is not None:
+        items.append({
+            "Put": {
+                "TableName": WALLET_TRANSACTIONS_TABLE,
+                "Item": marshal(txn_item),
+                "ConditionExpression": "attribute_not_exists(PK)",
+            }
+        })
+    items.extend(extra_items)
+    return items
+
+
+def _convert_legacy_balance(client, wallet_id: str, balance: Any) -> None:
+    """Store a string (or missing) balance as a number, unless another writer got there first"""
+    if balance is None:
+        condition, values = "attribute_not_exists(balance)", {":number": Decimal("0")}
+    else:
+        condition, values = "balance = :legacy", {":number": Decimal(str(balance)), ":legacy": balance}
+    try:
+        client.update_item(
+            TableName=WALLET_TABLE,
+            Key=marshal(wallet_key(wallet_id)),
+            UpdateExpression="SET balance = :number",
+            ConditionExpression=condition,
+            ExpressionAttributeValues=marshal(values),
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+
+def apply_transaction(wallet_id: str, txn_type: str, amount: Any,
+                      txn_item: Optional[Dict[str, Any]] = None,
+                      extra_items: Iterable[Dict[str, Any]] = (),
+                      client=None) -> None:
+    """
+    Credit or debit a wallet and write its transaction item in one atomic call.
+
+    Raises WalletNotFoundError if the wallet does not exist and
+    InsufficientBalanceError if a debit exceeds the balance; other failures
+    (e.g. a txn item that already exists) surface as botocore ClientError.
+    """
+    client = client or dynamo.get_client()
+    amount = Decimal(str(amount))
+    extra_items = list(extra_items)
+
+    for attempt in range(MAX_TRANSACT_ATTEMPTS):
+        try:
+            client.transact_write_items(
+                TransactItems=build_transact_items(wallet_id, txn_type, amount, txn_item, extra_items)
+            )
+            return
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            reasons = e.response.get("CancellationReasons") or []
+            codes = [reason.get("Code") for reason in reasons]
+            if "TransactionConflict" in codes and attempt < MAX_TRANSACT_ATTEMPTS - 1:
+                # Another transaction is touching the same wallet; back off with jitter
+                time.sleep(random.uniform(0, min(0.02 * (2 ** attempt), 1.0)))
+                continue
+            if not codes or codes[0] != "ConditionalCheckFailed":
+                raise
+
+            old_wallet = reasons[0].get("Item")
+            if not old_wallet:
+                raise WalletNotFoundError(wallet_id)
+            balance = unmarshal(old_wallet).get("balance")
+            if isinstance(balance, Decimal):
+                raise InsufficientBalanceError(wallet_id, balance, amount)
+            if attempt == MAX_TRANSACT_ATTEMPTS - 1:
+                raise
+            _convert_legacy_balance(client, wallet_id, balance)
+
+
+async def apply_transaction_async(*args, **kwargs) -> None:
+    """`apply_transaction` on the DynamoDB thread pool, for async endpoints"""
+    return await dynamo.run(apply_transaction, *args, **kwargs)
@@ -17,6 +17,7 @@ class PassengerInfo(BaseModel):
     age: int
     gender: str
     seat: Optional[str] = None
+    berth_preference: Optional[str] = None
     status: str = "confirmed"
     id_type: Optional[str] = None
     id_number: Optional[str] = None
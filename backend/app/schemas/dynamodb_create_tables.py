@@ -2,7 +2,7 @@
 Script to create DynamoDB tables for IRCTC-style train booking application.
 Assumes boto3 is installed and AWS credentials are configured.
 - Will NOT recreate the 'users' table, but documents attributes to add if missing.
-- Creates: bookings, payments, wallet, wallet_transactions, trains, stations, notifications, support_tickets, admin_logs.
+- Creates: bookings, payments, wallet, wallet_transactions, trains, train_stops, seat_inventory, sequences, stations, notifications, outbox, support_tickets, admin_logs.
 - All tables use on-demand billing for simplicity.
 """
 import boto3
@@ -19,6 +19,8 @@ def create_table(**kwargs):
 # USERS TABLE (already exists)
 # PK: USER#<user_id> (string)
 # SK: PROFILE (string)
+# Phone lookup items: PK PHONE#<number>, SK LOOKUP, user_pk (see app/core/phone_index.py)
+# UserID lookup items: PK USERID#<uuid>, SK LOOKUP, user_pk (see app/core/user_index.py)
 # Recommended attributes (add if missing):
 # - kyc_status, wallet_balance, wallet_id, recent_bookings, preferences (JSON), is_active, created_at, updated_at
 
@@ -160,6 +162,87 @@ create_table(
     BillingMode='PAY_PER_REQUEST',
 )
 
+# TRAIN STOPS TABLE
+# One item per (boarding stop, later stop) pair of a train, see mock_api/migrate_trains_to_dynamodb.py
+create_table(
+    TableName='train_stops',
+    KeySchema=[
+        {'AttributeName': 'PK', 'KeyType': 'HASH'},  # STOP#<origin_station_code>
+        {'AttributeName': 'SK', 'KeyType': 'RANGE'}, # DEST#<destination_station_code>#TRAIN#<train_id>
+    ],
+    AttributeDefinitions=[
+        {'AttributeName': 'PK', 'AttributeType': 'S'},
+        {'AttributeName': 'SK', 'AttributeType': 'S'},
+    ],
+    BillingMode='PAY_PER_REQUEST',
+)
+
+# SEAT INVENTORY TABLE
+# One item per coach with the sold berths as a number set, see app/core/seat_inventory.py
+create_table(
+    TableName='seat_inventory',
+    KeySchema=[
+        {'AttributeName': 'PK', 'KeyType': 'HASH'},  # INVENTORY#<train_number>#<journey_date>#<class>
+        {'AttributeName': 'SK', 'KeyType': 'RANGE'}, # COACH#<nn>
+    ],
+    AttributeDefinitions=[
+        {'AttributeName': 'PK', 'AttributeType': 'S'},
+        {'AttributeName': 'SK', 'AttributeType': 'S'},
+    ],
+    BillingMode='PAY_PER_REQUEST',
+)
+
+# SEQUENCES TABLE
+# Counters handed out in leased blocks, e.g. SEQUENCE#PNR, see app/core/pnr.py
+create_table(
+    TableName='sequences',
+    KeySchema=[
+        {'AttributeName': 'PK', 'KeyType': 'HASH'},  # SEQUENCE#<name>
+        {'AttributeName': 'SK', 'KeyType': 'RANGE'}, # METADATA
+    ],
+    AttributeDefinitions=[
+        {'AttributeName': 'PK', 'AttributeType': 'S'},
+        {'AttributeName': 'SK', 'AttributeType': 'S'},
+    ],
+    BillingMode='PAY_PER_REQUEST',
+)
+
+# OUTBOX TABLE
+# Side-effect records written with the business item, see app/core/outbox.py.
+# Only undelivered records carry pending_shard/available_at (sparse index).
+create_table(
+    TableName='outbox',
+    KeySchema=[
+        {'AttributeName': 'PK', 'KeyType': 'HASH'},  # OUTBOX#<event_id>
+        {'AttributeName': 'SK', 'KeyType': 'RANGE'}, # METADATA
+    ],
+    AttributeDefinitions=[
+        {'AttributeName': 'PK', 'AttributeType': 'S'},
+        {'AttributeName': 'SK', 'AttributeType': 'S'},
+        {'AttributeName': 'pending_shard', 'AttributeType': 'S'},
+        {'AttributeName': 'available_at', 'AttributeType': 'S'},
+    ],
+    GlobalSecondaryIndexes=[
+        {
+            'IndexName': 'pending_shard-available_at-index',
+            'KeySchema': [
+                {'AttributeName': 'pending_shard', 'KeyType': 'HASH'},  # PENDING#<shard>
+                {'AttributeName': 'available_at', 'KeyType': 'RANGE'},
+            ],
+            'Projection': {'ProjectionType': 'ALL'},
+        },
+    ],
+    BillingMode='PAY_PER_REQUEST',
+)
+try:
+    # Delivered and dead records expire after the retention period
+    dynamodb.update_time_to_live(
+        TableName='outbox',
+        TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'expires_at'},
+    )
+except Exception as e:
+    print(f"Could not enable TTL on outbox: {e}")
+
 # STATIONS TABLE
 create_table(
     TableName='stations',
@@ -179,7 +262,7 @@ create_table(
     TableName='notifications',
     KeySchema=[
         {'AttributeName': 'PK', 'KeyType': 'HASH'},  # USER#<user_id>
-        {'AttributeName': 'SK', 'KeyType': 'RANGE'}, # NOTIF#<notif_id>
+        {'AttributeName': 'SK', 'KeyType': 'RANGE'}, # NOTIF#<notif_id> | COUNTERS
     ],
     AttributeDefinitions=[
         {'AttributeName': 'PK', 'AttributeType': 'S'},
@@ -24,6 +24,9 @@ DEFAULTS = {
 }
 
 def update_user(user):
+    # The table also holds PHONE#<number> and USERID#<uuid> lookup items
+    if user.get('SK') != 'PROFILE':
+        return
     update_expr = []
     expr_attr_values = {}
     expr_attr_names = {}
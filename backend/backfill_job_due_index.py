@@ -0,0 +1,92 @@
+import boto3
+import os
+import time
+
+from dotenv import load_dotenv
+
+from app.core.job_due_index import DUE_INDEX_NAME, due_key_update
+
+# Load environment variables from .env file
+load_dotenv()
+
+aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID")
+aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY")
+region_name = os.getenv("AWS_REGION", "ap-south-1")
+
+dynamodb = boto3.resource(
+    'dynamodb',
+    aws_access_key_id=aws_access_key_id,
+    aws_secret_access_key=aws_secret_access_key,
+    region_name=region_name
+)
+
+JOBS_TABLE = "jobs"
+
+def ensure_due_index(table):
+    """Add the due-time GSI to an existing jobs table and wait until it is active"""
+    table.reload()
+    indexes = {index['IndexName']: index for index in (table.global_secondary_indexes or [])}
+    if DUE_INDEX_NAME not in indexes:
+        print(f"Creating index {DUE_INDEX_NAME} on {JOBS_TABLE}...")
+        index = {
+            'IndexName': DUE_INDEX_NAME,
+            'KeySchema': [
+                {'AttributeName': 'due_date', 'KeyType': 'HASH'},
+                {'AttributeName': 'due_time', 'KeyType': 'RANGE'},
+            ],
+            'Projection': {'ProjectionType': 'ALL'},
+        }
+        if table.billing_mode_summary is None or table.billing_mode_summary.get('BillingMode') != 'PAY_PER_REQUEST':
+            index['ProvisionedThroughput'] = {'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
+        table.meta.client.update_table(
+            TableName=JOBS_TABLE,
+            AttributeDefinitions=[
+                {'AttributeName': 'due_date', 'AttributeType': 'S'},
+                {'AttributeName': 'due_time', 'AttributeType': 'S'},
+            ],
+            GlobalSecondaryIndexUpdates=[{'Create': index}]
+        )
+
+    while True:
+        table.reload()
+        index_status = {index['IndexName']: index['IndexStatus'] for index in (table.global_secondary_indexes or [])}
+        if index_status.get(DUE_INDEX_NAME) == 'ACTIVE':
+            print(f"Index {DUE_INDEX_NAME} is active.")
+            return
+        print(f"Waiting for {DUE_INDEX_NAME} (status: {index_status.get(DUE_INDEX_NAME)})...")
+        time.sleep(10)
+
+def backfill_due_keys(table):
+    """Set or remove due_date/due_time on every job according to its current state"""
+    indexed = 0
+    cleared = 0
+    scan_kwargs = {}
+    while True:
+        response = table.scan(**scan_kwargs)
+        for job in response.get('Items', []):
+            if job.get('SK') != 'METADATA':
+                continue
+            expression_values = {}
+            due_set, due_remove = due_key_update(job, expression_values)
+            if due_set:
+                table.update_item(
+                    Key={'PK': job['PK'], 'SK': job['SK']},
+                    UpdateExpression=f"SET {due_set}",
+                    ExpressionAttributeValues=expression_values
+                )
+                indexed += 1
+            elif 'due_date' in job or 'due_time' in job:
+                table.update_item(
+                    Key={'PK': job['PK'], 'SK': job['SK']},
+                    UpdateExpression=f"REMOVE {due_remove}"
+                )
+                cleared += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    print(f"Backfill complete: {indexed} jobs indexed, {cleared} stale keys removed.")
+
+if __name__ == "__main__":
+    jobs_table = dynamodb.Table(JOBS_TABLE)
+    ensure_due_index(jobs_table)
+    backfill_due_keys(jobs_table)
@@ -0,0 +1,57 @@
+import boto3
+import os
+
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+
+from app.core.phone_index import USERS_TABLE, phone_key
+
+# Load environment variables from .env file
+load_dotenv()
+
+aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID")
+aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY")
+region_name = os.getenv("AWS_REGION", "ap-south-1")
+
+dynamodb = boto3.resource(
+    'dynamodb',
+    aws_access_key_id=aws_access_key_id,
+    aws_secret_access_key=aws_secret_access_key,
+    region_name=region_name
+)
+
+def backfill_phone_pointers(table):
+    """Write a PHONE#<number> lookup item for every profile with a phone number"""
+    written = 0
+    conflicts = 0
+    scan_kwargs = {
+        'FilterExpression': "SK = :profile AND attribute_exists(Phone)",
+        'ExpressionAttributeValues': {':profile': "PROFILE"},
+        'ProjectionExpression': "PK, Phone"
+    }
+    while True:
+        response = table.scan(**scan_kwargs)
+        for user in response.get('Items', []):
+            phone = user.get('Phone')
+            if not phone:
+                continue
+            try:
+                table.put_item(
+                    Item={**phone_key(phone), 'user_pk': user['PK']},
+                    ConditionExpression="attribute_not_exists(PK) OR user_pk = :user_pk",
+                    ExpressionAttributeValues={':user_pk': user['PK']}
+                )
+                written += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                # The first profile scanned keeps the number; the others need manual review
+                print(f"Phone {phone} of {user['PK']} is already claimed by another user, skipped.")
+                conflicts += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    print(f"Backfill complete: {written} phone lookup items written, {conflicts} duplicate numbers skipped.")
+
+if __name__ == "__main__":
+    backfill_phone_pointers(dynamodb.Table(USERS_TABLE))
@@ -0,0 +1,56 @@
+import boto3
+import os
+
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+
+from app.core.user_index import USERS_TABLE, user_id_key
+
+# Load environment variables from .env file
+load_dotenv()
+
+aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID")
+aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY")
+region_name = os.getenv("AWS_REGION", "ap-south-1")
+
+dynamodb = boto3.resource(
+    'dynamodb',
+    aws_access_key_id=aws_access_key_id,
+    aws_secret_access_key=aws_secret_access_key,
+    region_name=region_name
+)
+
+def backfill_user_id_pointers(table):
+    """Write a USERID#<uuid> lookup item for every profile with a UserID"""
+    written = 0
+    conflicts = 0
+    scan_kwargs = {
+        'FilterExpression': "SK = :profile AND attribute_exists(UserID)",
+        'ExpressionAttributeValues': {':profile': "PROFILE"},
+        'ProjectionExpression': "PK, UserID"
+    }
+    while True:
+        response = table.scan(**scan_kwargs)
+        for user in response.get('Items', []):
+            user_id = user.get('UserID')
+            if not user_id:
+                continue
+            try:
+                table.put_item(
+                    Item={**user_id_key(user_id), 'user_pk': user['PK']},
+                    ConditionExpression="attribute_not_exists(PK) OR user_pk = :user_pk",
+                    ExpressionAttributeValues={':user_pk': user['PK']}
+                )
+                written += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                print(f"UserID {user_id} of {user['PK']} already points at another profile, skipped.")
+                conflicts += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    print(f"Backfill complete: {written} UserID lookup items written, {conflicts} duplicate UserIDs skipped.")
+
+if __name__ == "__main__":
+    backfill_user_id_pointers(dynamodb.Table(USERS_TABLE))
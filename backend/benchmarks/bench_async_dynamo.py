@@ -0,0 +1,171 @@
+"""
+Load benchmark: blocking boto3 calls in async endpoints vs the app.core.dynamo offload path.
+
+Starts a local DynamoDB stand-in (an in-process HTTP server speaking the
+DynamoDB JSON protocol for GetItem/PutItem with a fixed per-request latency)
+unless DYNAMODB_ENDPOINT_URL points at a real DynamoDB Local, then serves two
+routes with uvicorn and fires concurrent requests at both:
+
+- before: `async def` handler calling `wallet_table.sync.get_item` directly,
+  i.e. the handler body as it was before the async access path
+- after:  the real `GET /wallet/{wallet_id}` endpoint, which awaits
+  `wallet_table.get_item` on the DynamoDB thread pool
+
+Usage (from backend/):
+    python benchmarks/bench_async_dynamo.py [requests] [concurrency] [latency_ms]
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+STAND_IN_LATENCY = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.02
+WALLET_ID = "bench-wallet"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Minimal DynamoDB stand-in: GetItem and PutItem on an in-memory store"""
+
+    store = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        operation = self.headers.get("X-Amz-Target", "").split(".")[-1]
+        time.sleep(STAND_IN_LATENCY)
+        key = lambda table, k: (table, json.dumps(k, sort_keys=True))
+        if operation == "GetItem":
+            with self.lock:
+                item = self.store.get(key(body["TableName"], body["Key"]))
+            payload = {"Item": item} if item else {}
+        elif operation == "PutItem":
+            item = body["Item"]
+            with self.lock:
+                self.store[key(body["TableName"], {"PK": item["PK"], "SK": item["SK"]})] = item
+            payload = {}
+        else:
+            self.send_response(400)
+            self.end_headers()
+            return
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-amz-json-1.0")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_stand_in():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if not os.getenv("DYNAMODB_ENDPOINT_URL"):
+    os.environ["DYNAMODB_ENDPOINT_URL"] = start_stand_in()
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, HTTPException  # noqa: E402
+
+from app.core import dynamo  # noqa: E402
+from app.api.v1.endpoints import wallet  # noqa: E402
+
+app = FastAPI()
+app.include_router(wallet.router, prefix="/after")
+
+
+@app.get("/before/{wallet_id}")
+async def get_wallet_blocking(wallet_id: str):
+    response = wallet.wallet_table.sync.get_item(Key={"PK": f"WALLET#{wallet_id}", "SK": "METADATA"})
+    if "Item" not in response:
+        raise HTTPException(status_code=404, detail=f"Wallet with ID {wallet_id} not found")
+    item = response["Item"]
+    return {
+        "wallet_id": item["wallet_id"],
+        "user_id": item["user_id"],
+        "balance": item["balance"],
+        "status": item["status"],
+        "created_at": datetime.fromisoformat(item["created_at"]),
+        "updated_at": datetime.fromisoformat(item["updated_at"]),
+    }
+
+
+def seed_wallet():
+    now = datetime.utcnow().isoformat()
+    dynamo.get_table(wallet.WALLET_TABLE).put_item(Item={
+        "PK": f"WALLET#{WALLET_ID}",
+        "SK": "METADATA",
+        "wallet_id": WALLET_ID,
+        "user_id": "bench-user",
+        "balance": "100.0",
+        "status": "active",
+        "created_at": now,
+        "updated_at": now,
+    })
+
+
+async def load(base_url, path, total, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "throughput_rps": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+
+    seed_wallet()
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    print(f"{total} requests, concurrency {concurrency}, DynamoDB at {os.environ['DYNAMODB_ENDPOINT_URL']}"
+          f" (stand-in latency {STAND_IN_LATENCY * 1000:.0f} ms)")
+    for label, path in (("before", f"/before/{WALLET_ID}"), ("after", f"/after/{WALLET_ID}")):
+        asyncio.run(load(base_url, path, min(total, 20), concurrency))  # warm up
+        result = asyncio.run(load(base_url, path, total, concurrency))
+        print(f"{label:>6}: {result['throughput_rps']:8.1f} req/s  p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms")
+    print(f"pool: {json.dumps({k: v for k, v in dynamo.pool_stats().items() if k in ('peak_in_flight', 'saturated_calls', 'calls')})}")
+
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
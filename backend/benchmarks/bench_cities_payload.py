@@ -0,0 +1,90 @@
+"""
+/cities cost per call: serializing the station list vs the precomputed payload.
+
+Builds station items from mock_api/cities.json the way
+mock_api/migrate_cities_to_dynamodb.py writes them (numbers as Decimal, as
+boto3 returns them), then compares per call:
+
+- before: encode every item for JSON (FastAPI's jsonable_encoder when it is
+  installed, a json.dumps default otherwise) and serialize the list
+- after:  look up app.core.cities_payload's stored bytes (gzip or plain)
+- 304:    If-None-Match matches the ETag, no body
+
+The DynamoDB scan the old endpoint also ran on every call is not included.
+
+Usage (from backend/):
+    python benchmarks/bench_cities_payload.py [calls]
+"""
+import json
+import os
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND_DIR)
+
+from app.core.cities_payload import CitiesPayload, CitiesPayloadCache, _json_default  # noqa: E402
+
+try:
+    from fastapi.encoders import jsonable_encoder
+except ImportError:
+    jsonable_encoder = None
+
+
+def station_items():
+    with open(os.path.join(BACKEND_DIR, "mock_api", "cities.json"), "r", encoding="utf-8") as f:
+        cities = json.load(f, parse_float=Decimal)
+    return [{
+        "PK": f"STATION#{city['keyword']}",
+        "SK": "METADATA",
+        "station_code": city["keyword"],
+        "station_name": city["name"],
+        "city": city["name"],
+        "state": city["state"],
+        **{k: Decimal(v) if isinstance(v, int) else v for k, v in city.items() if k not in ["keyword", "name", "state"]},
+    } for city in cities]
+
+
+def serialize_per_call(items):
+    if jsonable_encoder is not None:
+        return json.dumps(jsonable_encoder(items), ensure_ascii=False).encode("utf-8")
+    return json.dumps(items, default=_json_default, ensure_ascii=False).encode("utf-8")
+
+
+def timed(fn, calls):
+    latencies = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        body = fn()
+        latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies) * 1e6, len(body)
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    items = station_items()
+
+    started = time.perf_counter()
+    payload = CitiesPayload.from_items(items)
+    print(f"{len(items)} stations; payload built once in {(time.perf_counter() - started) * 1000:.1f} ms, ETag {payload.etag}")
+
+    # No artifact: the cache builds the payload from the items once
+    cache = CitiesPayloadCache(loader=lambda: items, artifact_path="")
+    cache.get()
+
+    def if_none_match():
+        return b"" if cache.get().etag == payload.etag else cache.get().body
+
+    encoder = "jsonable_encoder" if jsonable_encoder is not None else "json.dumps"
+    for label, fn in ((f"before ({encoder})", lambda: serialize_per_call(items)),
+                      ("after, gzip", lambda: cache.get().gzip_body),
+                      ("after, identity", lambda: cache.get().body),
+                      ("after, 304", if_none_match)):
+        p50, size = timed(fn, calls)
+        print(f"{label:>24}: {p50:10.1f} us per call  {size / 1024:8.1f} KB on the wire")
+
+
+if __name__ == "__main__":
+    main()
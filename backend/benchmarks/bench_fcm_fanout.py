@@ -0,0 +1,157 @@
+"""
+Push fan-out benchmark: one messaging.send per token vs multicast batches.
+
+A fake FCM transport stands in for firebase_admin.messaging: every call
+costs a fixed round trip, and a share of the device tokens is reported as
+unregistered. The users table is an in-process stand-in. Profiles start
+with a legacy list of tokens, so the first prune also converts the
+attribute to a string set.
+
+- serial: the old send_push_notification loop, one blocking send per
+  token inside the coroutine
+- multicast: fcm_utils.send_push_notification (batches of up to 500
+  tokens, dead tokens pruned from the profile)
+
+For each device count, the benchmark sends to 10 such users at once. It
+reports wall time, FCM calls, and the number of tokens left on the
+profiles after two rounds.
+
+Usage (from backend/):
+    python benchmarks/bench_fcm_fanout.py [fcm_ms] [dead_percent]
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+
+from botocore.exceptions import ClientError  # noqa: E402
+from firebase_admin import messaging  # noqa: E402
+
+from app.core import dynamo  # noqa: E402
+from app.api.v1.utils import fcm_utils  # noqa: E402
+
+USERS = 10
+
+
+class FakeFCM:
+    """send() and send_each_for_multicast() with a fixed round trip per call"""
+
+    def __init__(self, latency, dead_tokens):
+        self.latency = latency
+        self.dead_tokens = dead_tokens
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _result(self, token):
+        if token in self.dead_tokens:
+            return messaging.SendResponse(None, messaging.UnregisteredError("Requested entity was not found."))
+        return messaging.SendResponse({"name": f"projects/bench/messages/{token}"}, None)
+
+    def send(self, message):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        result = self._result(message.token)
+        if result.exception:
+            raise result.exception
+        return result.message_id
+
+    def send_each_for_multicast(self, message):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return messaging.BatchResponse([self._result(token) for token in message.tokens])
+
+
+class UsersTable:
+    """get_item and the fcm_tokens updates of fcm_utils"""
+
+    def __init__(self):
+        self.items = {}
+        self.lock = threading.Lock()
+
+    def get_item(self, Key, **kwargs):
+        with self.lock:
+            item = self.items.get(Key["PK"])
+            return {"Item": dict(item)} if item else {}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues, ConditionExpression=None, **kwargs):
+        values = ExpressionAttributeValues
+        with self.lock:
+            item = self.items[Key["PK"]]
+            tokens = item.get("fcm_tokens")
+            if ConditionExpression == "fcm_tokens = :legacy" and tokens != values[":legacy"]:
+                raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+            action = UpdateExpression.split()[0]
+            if action in ("ADD", "DELETE"):
+                if isinstance(tokens, list):
+                    raise ClientError({"Error": {"Code": "ValidationException"}}, "UpdateItem")
+                tokens = set(tokens or ()) | values[":tokens"] if action == "ADD" else set(tokens or ()) - values[":tokens"]
+                if tokens:
+                    item["fcm_tokens"] = tokens
+                else:
+                    item.pop("fcm_tokens", None)
+            elif action == "SET":
+                item["fcm_tokens"] = values[":tokens"]
+            else:
+                item.pop("fcm_tokens", None)
+        return {}
+
+
+async def serial_send(user_id, title, body, data=None):
+    """The old loop: one blocking messaging.send per token"""
+    tokens = await fcm_utils.get_user_fcm_tokens(user_id)
+    success = False
+    for token in tokens:
+        try:
+            fcm_utils.transport.send(messaging.Message(notification=messaging.Notification(title=title, body=body),
+                                                       data=data or {}, token=token))
+            success = True
+        except Exception:
+            pass
+    return success
+
+
+def setup(devices, dead_share, latency):
+    users = UsersTable()
+    dynamo.get_table = lambda name: users
+    dead = set()
+    for u in range(USERS):
+        tokens = [f"user{u}-device{d}" for d in range(devices)]
+        dead.update(tokens[:int(devices * dead_share)])
+        users.items[f"USER#user{u}"] = {"PK": f"USER#user{u}", "SK": "PROFILE", "fcm_tokens": tokens}
+    fake = FakeFCM(latency, dead)
+    fcm_utils.transport = fake
+    return users, fake
+
+
+async def run(label, send, devices, dead_share, latency):
+    users, fake = setup(devices, dead_share, latency)
+    timings = []
+    for _ in range(2):
+        started = time.perf_counter()
+        await asyncio.gather(*(send(f"user{u}", "Booking Confirmed", "PNR 1234567890") for u in range(USERS)))
+        timings.append(time.perf_counter() - started)
+    left = sum(len(item.get("fcm_tokens", ())) for item in users.items.values())
+    print(f"  {label:>9}: round 1 {timings[0] * 1000:8.1f} ms  round 2 {timings[1] * 1000:8.1f} ms  "
+          f"FCM calls {fake.calls:6d}  tokens left {left}")
+
+
+async def main():
+    latency = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.040
+    dead_share = float(sys.argv[2]) / 100 if len(sys.argv) > 2 else 0.1
+
+    print(f"{USERS} users at once, FCM {latency * 1000:.0f} ms per call, {dead_share:.0%} of tokens unregistered")
+    for devices in (1, 10, 100, 1200):
+        print(f"-- {devices} devices per user")
+        if devices <= 100:
+            await run("serial", serial_send, devices, dead_share, latency)
+        await run("multicast", fcm_utils.send_push_notification, devices, dead_share, latency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,300 @@
+"""
+Request latency benchmark: inline booking side effects vs app.core.outbox.
+
+POST /bookings used to put the booking, create the notification (DynamoDB
+put + one blocking FCM send per device token) and send the SendGrid email
+before responding. With the outbox the request commits the booking and its
+outbox records in one TransactWriteItems call and returns; the dispatcher
+delivers the side effects afterwards.
+
+DynamoDB, FCM and SendGrid are replaced by in-process stand-ins with fixed
+latencies. The DynamoDB stand-in understands just the expressions used by
+bookings, notifications and the outbox dispatcher.
+
+- inline: the old create_booking sequence
+- outbox: the real bookings.create_booking, followed by one
+  dispatcher.drain_once() to check that every notification and email is
+  delivered exactly once
+
+Usage (from backend/):
+    python benchmarks/bench_outbox.py [requests] [concurrency] [dynamo_ms] [fcm_ms] [email_ms]
+"""
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+os.environ.setdefault("SENDGRIDAPIKEY", "bench")
+
+from botocore.exceptions import ClientError  # noqa: E402
+from firebase_admin import messaging  # noqa: E402
+
+from app.core import dynamo, outbox  # noqa: E402
+from app.api.v1.endpoints import bookings  # noqa: E402
+from app.api.v1.utils import fcm_utils, notification_utils  # noqa: E402
+from app.schemas.booking import BookingCreate  # noqa: E402
+from app.schemas.notification import NotificationType  # noqa: E402
+
+USER_ID = "bench-user"
+
+
+class StandInDB:
+    """Items per table, keyed by their primary key attributes"""
+
+    KEYS = {"passengers": ("id",)}
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.tables = {}
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def round_trip(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+    def key(self, table, item):
+        return tuple(item[name] for name in self.KEYS.get(table, ("PK", "SK")))
+
+    def items(self, table):
+        return self.tables.setdefault(table, {})
+
+
+def _resolve(token, names):
+    return names.get(token, token)
+
+
+def _check(item, condition, names, values):
+    """Conjunctions of attribute_(not_)exists(x) and `x = :v`"""
+    if not condition:
+        return True
+    for term in condition.split(" AND "):
+        term = term.strip()
+        match = re.fullmatch(r"attribute_(not_)?exists\((\S+)\)", term)
+        if match:
+            present = item is not None and _resolve(match.group(2), names) in item
+            if present == bool(match.group(1)):
+                return False
+            continue
+        left, right = (part.strip() for part in term.split(" = "))
+        if item is None or item.get(_resolve(left, names)) != values[right]:
+            return False
+    return True
+
+
+def _apply_update(item, expression, names, values):
+    """SET a = :v[, ...], ADD a :n, REMOVE a[, ...]"""
+    for action, body in re.findall(r"(SET|ADD|REMOVE) (.*?)(?= (?:SET|ADD|REMOVE) |$)", expression):
+        for part in (p.strip() for p in body.split(",")):
+            if action == "SET":
+                name, value = (side.strip() for side in part.split(" = "))
+                item[_resolve(name, names)] = values[value]
+            elif action == "ADD":
+                name, value = part.split()
+                name = _resolve(name, names)
+                item[name] = item.get(name, Decimal(0)) + values[value]
+            else:
+                item.pop(_resolve(part, names), None)
+
+
+def _key_matches(item, condition):
+    expression = condition.get_expression()
+    operator, operands = expression["operator"], expression["values"]
+    if operator == "AND":
+        return all(_key_matches(item, operand) for operand in operands)
+    name, value = operands[0].name, operands[1]
+    if name not in item:
+        return False
+    return item[name] == value if operator == "=" else item[name] <= value
+
+
+def _conditional_check_failed(operation):
+    return ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, operation)
+
+
+class StandInTable:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+
+    def put_item(self, Item, **kwargs):
+        self.db.round_trip()
+        with self.db.lock:
+            self.db.items(self.name)[self.db.key(self.name, Item)] = dict(Item)
+        return {}
+
+    def get_item(self, Key, **kwargs):
+        self.db.round_trip()
+        with self.db.lock:
+            item = self.db.items(self.name).get(self.db.key(self.name, Key))
+            return {"Item": dict(item)} if item else {}
+
+    def query(self, KeyConditionExpression, Limit=None, **kwargs):
+        self.db.round_trip()
+        with self.db.lock:
+            items = [dict(item) for item in self.db.items(self.name).values() if _key_matches(item, KeyConditionExpression)]
+        return {"Items": items[:Limit] if Limit else items}
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues=None, **kwargs):
+        self.db.round_trip()
+        names, values = ExpressionAttributeNames or {}, ExpressionAttributeValues or {}
+        with self.db.lock:
+            table = self.db.items(self.name)
+            key = self.db.key(self.name, Key)
+            if not _check(table.get(key), ConditionExpression, names, values):
+                raise _conditional_check_failed("UpdateItem")
+            item = table.setdefault(key, dict(Key))
+            _apply_update(item, UpdateExpression, names, values)
+            return {"Attributes": dict(item)} if ReturnValues == "ALL_NEW" else {}
+
+
+class StandInClient:
+    def __init__(self, db):
+        self.db = db
+
+    def transact_write_items(self, TransactItems):
+        self.db.round_trip()
+        with self.db.lock:
+            writes = []
+            for entry in TransactItems:
+                (action, params), = entry.items()
+                table = params["TableName"]
+                names = params.get("ExpressionAttributeNames", {})
+                values = dynamo.unmarshal(params.get("ExpressionAttributeValues", {}))
+                item = dynamo.unmarshal(params["Item"] if action == "Put" else params["Key"])
+                key = self.db.key(table, item)
+                if not _check(self.db.items(table).get(key), params.get("ConditionExpression"), names, values):
+                    raise ClientError({"Error": {"Code": "TransactionCanceledException"}}, "TransactWriteItems")
+                writes.append((action, table, key, item, params, names, values))
+            for action, table, key, item, params, names, values in writes:
+                items = self.db.items(table)
+                if action == "Put":
+                    items[key] = item
+                elif action == "Delete":
+                    items.pop(key, None)
+                else:
+                    _apply_update(items.setdefault(key, item), params["UpdateExpression"], names, values)
+        return {}
+
+
+class StandInSendGrid:
+    sent = []
+    latency = 0.0
+
+    def __init__(self, api_key):
+        pass
+
+    def send(self, message):
+        time.sleep(self.latency)
+        self.sent.append(message)
+        return type("Response", (), {"status_code": 202})()
+
+
+def install_stand_ins(dynamo_latency, fcm_latency, email_latency):
+    db = StandInDB(dynamo_latency)
+    tables = {}
+    dynamo.get_table = lambda name: tables.setdefault(name, StandInTable(db, name))
+    client = StandInClient(db)
+    dynamo.get_client = lambda: client
+
+    pushes = []
+
+    class StandInFCM:
+        @staticmethod
+        def send_each_for_multicast(message):
+            time.sleep(fcm_latency)
+            pushes.extend(message.tokens)
+            return messaging.BatchResponse([messaging.SendResponse({"name": "projects/bench/messages/1"}, None)
+                                            for _ in message.tokens])
+
+    fcm_utils.transport = StandInFCM
+    StandInSendGrid.latency = email_latency
+    StandInSendGrid.sent = []
+    bookings.sendgrid.SendGridAPIClient = StandInSendGrid
+    db.items("users")[(f"USER#{USER_ID}", "PROFILE")] = {
+        "PK": f"USER#{USER_ID}", "SK": "PROFILE", "UserID": USER_ID, "fcm_tokens": ["device-1", "device-2"],
+    }
+    return db, pushes
+
+
+def booking_request():
+    return BookingCreate(
+        user_id=USER_ID, train_id="12951", train_name="Mumbai Rajdhani (12951)", journey_date="2026-12-01",
+        origin_station_code="NDLS", destination_station_code="MMCT", travel_class="3A", fare=Decimal("2450"),
+        booking_email="bench@example.com",
+        passengers=[{"name": "Asha", "age": 34, "gender": "F"}, {"name": "Ravi", "age": 36, "gender": "M"}],
+    )
+
+
+async def inline_create_booking(booking):
+    """What create_booking did before the outbox"""
+    booking_id = f"inline-{time.perf_counter_ns()}"
+    booking_item = {
+        "PK": f"BOOKING#{booking_id}", "SK": "METADATA", "booking_id": booking_id, "user_id": booking.user_id,
+        "pnr": bookings.generate_pnr(), "journey_date": booking.journey_date, "booking_email": booking.booking_email,
+        "origin_station_code": booking.origin_station_code, "destination_station_code": booking.destination_station_code,
+        "passengers": [p.dict() for p in booking.passengers], "created_at": "2026-10-17T10:00:00",
+    }
+    await bookings.bookings_table.put_item(Item=booking_item)
+    await notification_utils.create_notification(
+        user_id=booking.user_id, title="Booking Confirmed", message="Your booking has been confirmed",
+        notification_type=NotificationType.BOOKING, reference_id=booking_id,
+    )
+    bookings.send_booking_confirmation_email(booking_item)
+
+
+async def measure(label, create, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await create(booking_request())
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{label:>6}: {requests / elapsed:7.1f} bookings/s  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms")
+
+
+async def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    dynamo_latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.008
+    fcm_latency = float(sys.argv[4]) / 1000 if len(sys.argv) > 4 else 0.060
+    email_latency = float(sys.argv[5]) / 1000 if len(sys.argv) > 5 else 0.200
+
+    print(f"{requests} bookings, {concurrency} concurrent; DynamoDB {dynamo_latency * 1000:.0f} ms, "
+          f"FCM {fcm_latency * 1000:.0f} ms per multicast (2 tokens), email {email_latency * 1000:.0f} ms")
+
+    install_stand_ins(dynamo_latency, fcm_latency, email_latency)
+    await measure("inline", inline_create_booking, requests, concurrency)
+
+    db, pushes = install_stand_ins(dynamo_latency, fcm_latency, email_latency)
+    await measure("outbox", bookings.create_booking, requests, concurrency)
+
+    started = time.perf_counter()
+    stats = await outbox.dispatcher.drain_once()
+    elapsed = time.perf_counter() - started
+    records = db.items(outbox.OUTBOX_TABLE).values()
+    delivered = sum(1 for item in records if item["status"] == outbox.STATUS_DELIVERED)
+    notifications = sum(1 for key in db.items("notifications") if key[1].startswith("NOTIF#"))
+    print(f"drain : {stats['processed']} records in {elapsed:.2f} s; {delivered}/{len(records)} delivered, "
+          f"{notifications} notifications, {len(pushes)} pushes, {len(StandInSendGrid.sent)} emails, "
+          f"{stats['retried']} retried")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
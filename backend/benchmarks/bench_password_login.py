@@ -0,0 +1,158 @@
+"""
+Login burst benchmark: inline bcrypt vs the app.core.passwords pool.
+
+Serves two login routes with uvicorn and fires a burst of concurrent logins
+at each, while a second client keeps calling a cheap sync endpoint (the
+shape of most routes in this API) to show what the burst does to everything
+else:
+
+- before: the old `login_user` body, a sync handler calling bcrypt.checkpw
+  inline on the request thread pool
+- after:  the real `POST /dynamodb/users/login`, which awaits
+  passwords.verify_password on the bounded hashing pool
+
+The users table is an in-process stand-in. Every login uses a distinct
+account whose hash was made with BCRYPT_ROUNDS.
+
+Usage (from backend/):
+    python benchmarks/bench_password_login.py [logins] [concurrency] [rounds]
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+if len(sys.argv) > 3:
+    os.environ["BCRYPT_ROUNDS"] = sys.argv[3]
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+os.environ.setdefault("OUTBOX_DISPATCHER", "false")
+
+import bcrypt  # noqa: E402
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, HTTPException  # noqa: E402
+
+from app.core import dynamo, passwords  # noqa: E402
+from app.api.v1 import dynamodb_user  # noqa: E402
+
+PASSWORD = "Tatkal@1234"
+
+
+class UsersTable:
+    """get_item and update_item on an in-memory dict"""
+
+    def __init__(self):
+        self.items = {}
+        self.lock = threading.Lock()
+
+    def get_item(self, Key, **kwargs):
+        with self.lock:
+            item = self.items.get((Key["PK"], Key["SK"]))
+            return {"Item": dict(item)} if item else {}
+
+    def update_item(self, Key, ExpressionAttributeValues, **kwargs):
+        with self.lock:
+            self.items[(Key["PK"], Key["SK"])]["LastLoginAt"] = ExpressionAttributeValues[":now"]
+        return {}
+
+
+users = UsersTable()
+dynamo.get_table = lambda name: users
+
+app = FastAPI()
+app.include_router(dynamodb_user.router, prefix="/after")
+
+
+@app.post("/before/login")
+def login_inline(login: dynamodb_user.UserLoginRequest):
+    user = users.get_item(Key={"PK": f"USER#{login.email}", "SK": "PROFILE"}).get("Item")
+    if not user or not bcrypt.checkpw(login.password.encode("utf-8"), user["PasswordHash"].encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    users.update_item(Key={"PK": user["PK"], "SK": "PROFILE"}, ExpressionAttributeValues={":now": "now"})
+    user.pop("PasswordHash", None)
+    return {"message": "Login successful", "user": user}
+
+
+@app.get("/ping")
+def ping():
+    return {"status": "ok"}
+
+
+def seed(count):
+    stored_hash = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(passwords.BCRYPT_ROUNDS)).decode("utf-8")
+    for i in range(count):
+        email = f"user{i}@example.com"
+        users.items[(f"USER#{email}", "PROFILE")] = {
+            "PK": f"USER#{email}", "SK": "PROFILE", "Email": email, "PasswordHash": stored_hash,
+        }
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)] * 1000 if values else 0.0
+
+
+async def burst(base_url, path, logins, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    login_latencies, ping_latencies = [], []
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        done = asyncio.Event()
+
+        async def login(i):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(path, json={"email": f"user{i}@example.com", "password": PASSWORD})
+                response.raise_for_status()
+                login_latencies.append(time.perf_counter() - started)
+
+        async def pinger():
+            while not done.is_set():
+                started = time.perf_counter()
+                (await client.get("/ping")).raise_for_status()
+                ping_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        ping_task = asyncio.create_task(pinger())
+        started = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await ping_task
+    return {
+        "logins_per_s": logins / elapsed,
+        "login_p50_ms": percentile(login_latencies, 0.5),
+        "ping_p50_ms": percentile(ping_latencies, 0.5),
+        "ping_p99_ms": percentile(ping_latencies, 0.99),
+    }
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    seed(logins)
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    base_url = f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}"
+
+    passwords.get_executor()
+    print(f"{logins} logins, concurrency {concurrency}, bcrypt cost {passwords.BCRYPT_ROUNDS}, "
+          f"{passwords.WORKERS} hashing workers ({type(passwords.get_executor()).__name__})")
+    for label, path in (("before", "/before/login"), ("after", "/after/dynamodb/users/login")):
+        result = asyncio.run(burst(base_url, path, logins, concurrency))
+        print(f"{label:>6}: {result['logins_per_s']:7.1f} logins/s  login p50 {result['login_p50_ms']:8.1f} ms  "
+              f"ping p50 {result['ping_p50_ms']:7.1f} ms  p99 {result['ping_p99_ms']:7.1f} ms")
+
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+PNR uniqueness and throughput: timestamp PNRs vs app.core.pnr.
+
+Several runners (separate PnrAllocator instances, as separate API
+processes and cron Lambdas would have) with several threads each allocate
+PNRs at once against an in-process stand-in for the sequence item: an
+atomic ADD with a fixed per-call latency.
+
+- flat out: every thread allocates as fast as it can; reports the rate,
+  leases and final block size, and checks every PNR is unique and passes
+  its check digit
+- paced:    the same runners held to a target rate (10k/s by default) for
+  a few seconds; reports allocation latency and leases per second
+- legacy:   "PNR" + %y%m%d%H%M%S at the same rate, and how many bookings
+  would share a PNR
+- typos:    share of single-digit substitutions and adjacent transpositions
+  the check digit catches
+
+Usage (from backend/):
+    python benchmarks/bench_pnr_allocator.py [runners] [threads_per_runner] [total] [rate] [latency_ms]
+"""
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+
+from app.core.pnr import PnrAllocator, format_pnr, has_valid_check_digit  # noqa: E402
+
+
+class StandInClient:
+    """The sequence item's ADD ... ReturnValues UPDATED_NEW, with network latency"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.value = 0
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def update_item(self, TableName, Key, UpdateExpression, ExpressionAttributeValues, ReturnValues):
+        time.sleep(self.latency / 2)
+        with self.lock:
+            self.calls += 1
+            self.value += int(ExpressionAttributeValues[":block"]["N"])
+            value = self.value
+        time.sleep(self.latency / 2)
+        return {"Attributes": {"next_value": {"N": str(value)}}}
+
+
+def flat_out(runners, threads, total, latency):
+    client = StandInClient(latency)
+    allocators = [PnrAllocator(client=client) for _ in range(runners)]
+    per_thread = total // (runners * threads)
+
+    def work(allocator):
+        return [allocator.allocate() for _ in range(per_thread)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=runners * threads) as pool:
+        batches = list(pool.map(work, [allocator for allocator in allocators for _ in range(threads)]))
+    elapsed = time.perf_counter() - started
+
+    pnrs = [pnr for batch in batches for pnr in batch]
+    duplicates = len(pnrs) - len(set(pnrs))
+    invalid = sum(not has_valid_check_digit(pnr) for pnr in pnrs)
+    print(f" flat out: {len(pnrs) / elapsed:10.0f} PNRs/s  {client.calls} leases  "
+          f"block sizes {sorted({allocator.block_size for allocator in allocators})}  "
+          f"duplicates {duplicates}  bad check digits {invalid}  unused numbers {client.value - len(pnrs)}")
+    return duplicates == 0 and invalid == 0
+
+
+def paced(runners, threads, rate, seconds, latency):
+    client = StandInClient(latency)
+    allocators = [PnrAllocator(client=client) for _ in range(runners)]
+    workers = runners * threads
+    interval = workers / rate
+    latencies, pnrs = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def work(index):
+        allocator = allocators[index % runners]
+        mine, taken = [], []
+        next_at = time.perf_counter() + interval * index / workers
+        while next_at < deadline:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            started = time.perf_counter()
+            mine.append(allocator.allocate())
+            taken.append(time.perf_counter() - started)
+            next_at += interval
+        with lock:
+            pnrs.extend(mine)
+            latencies.extend(taken)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(work, range(workers)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"   paced: {len(pnrs) / elapsed:10.0f} PNRs/s (target {rate})  {client.calls / elapsed:5.1f} leases/s  "
+          f"p50 {statistics.median(latencies) * 1e6:6.1f} us  p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e6:8.1f} us  "
+          f"duplicates {len(pnrs) - len(set(pnrs))}")
+    return len(pnrs) == len(set(pnrs))
+
+
+def legacy(rate, seconds):
+    start = datetime(2026, 1, 1, 10, 0, 0)
+    pnrs = [f"PNR{(start + timedelta(seconds=n / rate)).strftime('%y%m%d%H%M%S')}" for n in range(int(rate * seconds))]
+    shared = sum(count for count in Counter(pnrs).values() if count > 1)
+    print(f"   legacy: {len(pnrs)} PNRs at {rate}/s -> {len(set(pnrs))} distinct, {shared} bookings share a PNR")
+
+
+def typos(samples=2000):
+    caught = missed = swaps_caught = swaps_missed = 0
+    for sequence in range(1, samples + 1):
+        pnr = format_pnr(sequence * 7919)
+        digits = pnr[3:]
+        for position in range(len(digits)):
+            for digit in "0123456789":
+                if digit != digits[position]:
+                    ok = not has_valid_check_digit("PNR" + digits[:position] + digit + digits[position + 1:])
+                    caught, missed = caught + ok, missed + (not ok)
+        for position in range(len(digits) - 1):
+            if digits[position] != digits[position + 1]:
+                swapped = digits[:position] + digits[position + 1] + digits[position] + digits[position + 2:]
+                ok = not has_valid_check_digit("PNR" + swapped)
+                swaps_caught, swaps_missed = swaps_caught + ok, swaps_missed + (not ok)
+    print(f"    typos: single digit wrong caught {caught / (caught + missed):.1%}, "
+          f"adjacent digits swapped caught {swaps_caught / (swaps_caught + swaps_missed):.1%}")
+
+
+def main():
+    runners = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    total = int(sys.argv[3]) if len(sys.argv) > 3 else 200000
+    rate = int(sys.argv[4]) if len(sys.argv) > 4 else 10000
+    latency = float(sys.argv[5]) / 1000 if len(sys.argv) > 5 else 0.005
+
+    print(f"{runners} runners x {threads} threads, {latency * 1000:.0f} ms per lease")
+    ok = flat_out(runners, threads, total, latency)
+    ok = paced(runners, threads, rate, 3, latency) and ok
+    legacy(rate, 3)
+    typos()
+    if not ok:
+        sys.exit("Duplicate or invalid PNRs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Berth assignment over a full train: app.core.seat_allocation vs random seats.
+
+Sells out one class of a train (24 coaches x 72 SL berths by default) to
+parties of 1-6 passengers with random berth preferences (LB/MB/UB/SL/SU or
+none), assigning each party from the current free-berth bitmaps, and
+compares:
+
+- random:     free berths picked at random in a coach picked at random,
+              as the seats were assigned before (preferences ignored)
+- allocation: seat_allocation.allocate
+
+Reports the time per assignment over the whole fill (p50/p99/max), the
+share of stated preferences met, and how parties were placed: all in one
+bay, in adjacent bays of one coach, in one coach, or across coaches.
+
+Usage (from backend/):
+    python benchmarks/bench_seat_allocation.py [coaches] [berths] [class] [seed]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.core import seat_allocation  # noqa: E402
+
+PREFERENCES = ["LB", "MB", "UB", "SL", "SU", None, None]
+
+
+def random_seats(layout, coaches, preferences, rng):
+    """Random free berths in a random coach that has room, else anywhere"""
+    count = len(preferences)
+    fits = [coach for coach, free in enumerate(coaches) if bin(free).count("1") >= count]
+    pool = [fits[rng.randrange(len(fits))]] if fits else range(len(coaches))
+    free = [(coach, berth) for coach in pool for berth in range(1, layout.berths + 1) if coaches[coach] >> (berth - 1) & 1]
+    return rng.sample(free, count) if len(free) >= count else None
+
+
+def allocation_seats(layout, coaches, preferences, rng):
+    return seat_allocation.allocate(layout, coaches, preferences, rng)
+
+
+def placement(layout, seats):
+    coaches = {coach for coach, _ in seats}
+    if len(coaches) > 1:
+        return "across coaches"
+    bays = sorted({(berth - 1) // layout.bay_size for _, berth in seats})
+    if len(bays) == 1:
+        return "one bay"
+    if bays[-1] - bays[0] == len(bays) - 1:
+        return "adjacent bays"
+    return "one coach"
+
+
+def run(label, assign, coach_count, berths, travel_class, seed):
+    rng = random.Random(seed)
+    layout = seat_allocation.layout_for(travel_class, berths)
+    coaches = [(1 << berths) - 1] * coach_count
+    latencies, stated, met, parties = [], 0, 0, 0
+    placements = {"one bay": 0, "adjacent bays": 0, "one coach": 0, "across coaches": 0}
+    while any(coaches):
+        preferences = [seat_allocation.normalize_preference(rng.choice(PREFERENCES)) for _ in range(rng.randint(1, 6))]
+        started = time.perf_counter()
+        seats = assign(layout, coaches, preferences, rng)
+        latencies.append(time.perf_counter() - started)
+        if seats is None:
+            # Fewer berths left than passengers: try the next (smaller) party
+            continue
+        for (coach, berth), preference in zip(seats, preferences):
+            coaches[coach] &= ~(1 << (berth - 1))
+            if preference is not None:
+                stated += 1
+                met += layout.berth_type[berth] == preference
+        parties += 1
+        placements[placement(layout, seats)] += 1
+
+    latencies.sort()
+    print(f"{label:>10}: p50 {statistics.median(latencies) * 1e6:6.1f} us  p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e6:6.1f} us  "
+          f"max {latencies[-1] * 1e6:7.1f} us  preferences met {met / stated:6.1%}")
+    print(f"{'':>10}  {parties} parties: " + "  ".join(f"{name} {count / parties:6.1%}" for name, count in placements.items()))
+
+
+def main():
+    coach_count = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    berths = int(sys.argv[2]) if len(sys.argv) > 2 else 72
+    travel_class = sys.argv[3] if len(sys.argv) > 3 else "SL"
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 22
+
+    print(f"Selling out {coach_count} x {berths} {travel_class} berths to parties of 1-6")
+    run("random", random_seats, coach_count, berths, travel_class, seed)
+    run("allocation", allocation_seats, coach_count, berths, travel_class, seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Tatkal burst benchmark: random seat numbers vs app.core.seat_inventory.
+
+Many threads book the same train, date and class at once through an
+in-process DynamoDB stand-in with a fixed per-call latency. The stand-in
+models what the inventory relies on: consistent Query of the coach items,
+TransactWriteItems with the `available >= :count AND NOT contains(sold, :bN)`
+conditions, ADD on the sold set, and TransactionConflict when two
+transactions overlap on the same coach during the (1 ms) commit window.
+
+- legacy: generate_seat_numbers as create_booking and the cron runner used
+  it (random row/seat, no record of what was sold), then put the booking
+- inventory: seat_inventory.reserve with the booking put in the same
+  transaction
+
+Parties are 1-4 passengers (the Tatkal limit), and the burst asks for more
+seats than the class has, so part of it must be turned away. Reports
+throughput, round trips and attempts per booking, latency, seats sold
+against capacity, and seats sold twice.
+
+Usage (from backend/):
+    python benchmarks/bench_seat_inventory.py [threads] [bookings] [latency_ms] [coaches]
+"""
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+
+from boto3.dynamodb.types import TypeDeserializer  # noqa: E402
+from botocore.exceptions import ClientError  # noqa: E402
+
+from app.core import seat_inventory  # noqa: E402
+from app.core.dynamo import marshal  # noqa: E402
+
+_deserializer = TypeDeserializer()
+
+TRAIN, DATE, CLASS = "12951", "2026-11-01", "SL"
+
+
+def _plain(values):
+    return {k: _deserializer.deserialize(v) for k, v in values.items()}
+
+
+def _cancelled(codes):
+    return ClientError({"Error": {"Code": "TransactionCanceledException"},
+                        "CancellationReasons": [{"Code": code} for code in codes]}, "TransactWriteItems")
+
+
+class StandInClient:
+    """Just enough of the DynamoDB client API for both booking paths"""
+
+    def __init__(self, latency, commit_time=0.001):
+        self.latency = latency
+        self.commit_time = commit_time
+        self.items = {}
+        self.lock = threading.Lock()
+        self.in_transaction = set()
+        self.calls = 0
+
+    def _round_trip(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+    def query(self, TableName, KeyConditionExpression, ExpressionAttributeValues, **kwargs):
+        self._round_trip()
+        pk = _plain(ExpressionAttributeValues)[":pk"]
+        with self.lock:
+            items = [dict(item, sold=set(item["sold"])) if "sold" in item else dict(item)
+                     for (table, item_pk, _), item in sorted(self.items.items()) if table == TableName and item_pk == pk]
+        return {"Items": [marshal(item) for item in items]}
+
+    def get_item(self, TableName, Key, **kwargs):
+        self._round_trip()
+        key = _plain(Key)
+        item = self.items.get((TableName, key["PK"], key["SK"]))
+        return {"Item": marshal(item)} if item else {}
+
+    def put_item(self, TableName, Item):
+        self._round_trip()
+        item = _plain(Item)
+        with self.lock:
+            self.items[(TableName, item["PK"], item["SK"])] = item
+
+    def _check(self, entry):
+        """Whether a TransactItems entry's condition holds (called under the lock)"""
+        if "Put" in entry:
+            item = _plain(entry["Put"]["Item"])
+            exists = (entry["Put"]["TableName"], item["PK"], item["SK"]) in self.items
+            return not (exists and entry["Put"].get("ConditionExpression") == "attribute_not_exists(PK)")
+        update = entry["Update"]
+        key = _plain(update["Key"])
+        coach = self.items.get((update["TableName"], key["PK"], key["SK"]))
+        values = _plain(update["ExpressionAttributeValues"])
+        return coach is not None and coach["available"] >= values[":count"] and not (coach.get("sold", set()) & values[":berths"])
+
+    def _apply(self, entry):
+        if "Put" in entry:
+            item = _plain(entry["Put"]["Item"])
+            self.items[(entry["Put"]["TableName"], item["PK"], item["SK"])] = item
+            return
+        update = entry["Update"]
+        key = _plain(update["Key"])
+        coach = self.items[(update["TableName"], key["PK"], key["SK"])]
+        values = _plain(update["ExpressionAttributeValues"])
+        coach["sold"] = coach.get("sold", set()) | values[":berths"]
+        coach["available"] += values[":minus"]
+
+    def transact_write_items(self, TransactItems):
+        keys = set()
+        for entry in TransactItems:
+            operation = entry.get("Put") or entry.get("Update")
+            key = _plain(operation.get("Key") or operation["Item"])
+            keys.add((operation["TableName"], key["PK"], key["SK"]))
+        # Network time is spent outside the commit; items are only locked
+        # (and overlapping transactions rejected) during the commit window
+        time.sleep(self.latency / 2)
+        with self.lock:
+            self.calls += 1
+            conflict = bool(keys & self.in_transaction)
+            if not conflict:
+                self.in_transaction |= keys
+        try:
+            if conflict:
+                raise _cancelled(["TransactionConflict"] * len(TransactItems))
+            time.sleep(self.commit_time)
+            with self.lock:
+                checks = [self._check(entry) for entry in TransactItems]
+                if not all(checks):
+                    raise _cancelled(["None" if ok else "ConditionalCheckFailed" for ok in checks])
+                for entry in TransactItems:
+                    self._apply(entry)
+        finally:
+            with self.lock:
+                if not conflict:
+                    self.in_transaction -= keys
+            time.sleep(self.latency / 2)
+
+
+def legacy_seat_numbers(travel_class, passenger_count):
+    """generate_seat_numbers as it was in bookings.py and the cron runner"""
+    class_patterns = {
+        '1A': {'prefix': 'A', 'rows': range(1, 10), 'seats': range(1, 5)},
+        '2A': {'prefix': 'B', 'rows': range(1, 15), 'seats': range(1, 5)},
+        '3A': {'prefix': 'C', 'rows': range(1, 21), 'seats': range(1, 9)},
+        'SL': {'prefix': 'S', 'rows': range(1, 26), 'seats': range(1, 9)},
+        'CC': {'prefix': 'D', 'rows': range(1, 16), 'seats': range(1, 6)},
+        '2S': {'prefix': 'E', 'rows': range(1, 31), 'seats': range(1, 9)},
+    }
+    pattern = class_patterns.get(travel_class.upper(), class_patterns['SL'])
+    return [f"{pattern['prefix']}{random.choice(pattern['rows']):02d}{random.choice(pattern['seats']):02d}"
+            for _ in range(passenger_count)]
+
+
+def booking_item(seats):
+    booking_id = str(uuid.uuid4())
+    return {"PK": f"BOOKING#{booking_id}", "SK": "METADATA", "booking_id": booking_id,
+            "train_number": TRAIN, "journey_date": DATE, "class": CLASS,
+            "passengers": [{"name": f"P{i}", "seat": seat} for i, seat in enumerate(seats)]}
+
+
+def legacy_book(client, party):
+    seats = legacy_seat_numbers(CLASS, party)
+    client.put_item(TableName="bookings", Item=marshal(booking_item(seats)))
+    return seats, 1
+
+
+def inventory_book(client, party):
+    attempts = 0
+
+    def build_items(seats):
+        nonlocal attempts
+        attempts += 1
+        return [{"Put": {"TableName": "bookings", "Item": marshal(booking_item(seats))}}]
+
+    try:
+        return seat_inventory.reserve(TRAIN, DATE, CLASS, party, build_items=build_items, client=client), attempts
+    except seat_inventory.SoldOutError:
+        return None, attempts
+    except seat_inventory.InventoryContentionError:
+        return False, attempts
+
+
+def run(label, book, threads, parties, latency, coaches):
+    client = StandInClient(latency)
+    berths = seat_inventory.BERTHS_PER_COACH[CLASS]
+    client.items[("trains", f"TRAIN#{TRAIN}", "METADATA")] = {
+        "PK": f"TRAIN#{TRAIN}", "SK": "METADATA", "coaches": {CLASS: coaches},
+    }
+    # Set up the inventory before the burst, as the loader does
+    seat_inventory.initialize(TRAIN, DATE, CLASS, client=client)
+    client.calls = 0
+
+    latencies = []
+
+    def timed(party):
+        started = time.perf_counter()
+        result = book(client, party)
+        latencies.append(time.perf_counter() - started)
+        return result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(timed, parties))
+    elapsed = time.perf_counter() - started
+
+    sold = Counter(seat for seats, _ in results if seats for seat in seats)
+    booked = sum(1 for seats, _ in results if seats)
+    sold_out = sum(1 for seats, _ in results if seats is None)
+    gave_up = sum(1 for seats, _ in results if seats is False)
+    attempts = sum(attempts for _, attempts in results)
+    latencies.sort()
+    print(f"{label:>9}: {len(results) / elapsed:7.1f} bookings/s  {client.calls / len(results):4.2f} calls/booking  "
+          f"{attempts / len(results):4.2f} commits/booking  p50 {statistics.median(latencies) * 1000:5.1f} ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:6.1f} ms")
+    print(f"{'':>9}  booked {booked:4d}  sold out {sold_out:4d}  gave up {gave_up:3d}  "
+          f"seats sold {sum(sold.values()):5d} of {coaches * berths}  seats sold twice or more {sum(n > 1 for n in sold.values()):4d}")
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    bookings = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+    latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.005
+    coaches = int(sys.argv[4]) if len(sys.argv) > 4 else 4
+
+    rng = random.Random(21)
+    parties = [rng.choice((1, 1, 2, 2, 3, 4)) for _ in range(bookings)]
+    print(f"{threads} threads, {bookings} bookings of 1-4 passengers ({sum(parties)} seats) for "
+          f"{coaches} x {seat_inventory.BERTHS_PER_COACH[CLASS]} {CLASS} berths, {latency * 1000:.0f} ms per call")
+    run("legacy", legacy_book, threads, parties, latency, coaches)
+    run("inventory", inventory_book, threads, parties, latency, coaches)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Station autocomplete latency: app.core.station_index vs a linear filter.
+
+Loads mock_api/cities.json, builds the index from it and from a prebuilt
+artifact, then answers random prefixes of station names and codes (1-6
+characters, with and without diacritics) three ways:
+
+- linear: normalize every station on each query and filter, roughly what
+  searching the full /cities payload costs
+- index:  bisect over the sorted keys, result cache cleared before each query
+- cached: the same queries repeated, answered from the LRU cache
+
+Both linear and index must return the same set of stations per query
+(before the top-k cut).
+
+Usage (from backend/):
+    python benchmarks/bench_station_search.py [num_queries] [limit]
+"""
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND_DIR)
+
+from app.core import station_index  # noqa: E402
+from app.core.station_index import StationIndex, normalize, station_code, station_name  # noqa: E402
+
+CITIES_JSON = os.path.join(BACKEND_DIR, "mock_api", "cities.json")
+
+
+def linear_search(records, query):
+    prefix = normalize(query)
+    matches = []
+    for record in records:
+        code = normalize(station_code(record))
+        name = normalize(station_name(record))
+        words = [name[i + 1:] for i, ch in enumerate(name) if ch == " "]
+        if code.startswith(prefix) or name.startswith(prefix) or any(word.startswith(prefix) for word in words):
+            matches.append(record)
+    return matches
+
+
+def timed(fn, queries):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return statistics.median(latencies) * 1e6, latencies[int(len(latencies) * 0.99) - 1] * 1e6
+
+
+def main():
+    num_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    with open(CITIES_JSON, "r", encoding="utf-8") as f:
+        records = json.load(f)
+
+    rng = random.Random(42)
+    queries = []
+    for _ in range(num_queries):
+        record = rng.choice(records)
+        source = station_name(record) if rng.random() < 0.8 else station_code(record)
+        prefix = source[:rng.randint(1, 6)]
+        queries.append(prefix if rng.random() < 0.5 else normalize(prefix))
+
+    index = StationIndex(loader=lambda: records)
+    index.build()
+    print(f"{len(records)} stations; build from records {index.last_build_seconds * 1000:.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = os.path.join(tmp, "station_index.json")
+        station_index.write_artifact(records, artifact)
+        from_artifact = StationIndex(artifact_path=artifact)
+        from_artifact.build()
+        print(f"artifact {os.path.getsize(artifact) / 1024:.0f} KB; load {from_artifact.last_build_seconds * 1000:.1f} ms")
+
+    # Same stations either way, before the top-k cut
+    for query in queries[:200]:
+        expected = {id(record) for record in linear_search(records, query)}
+        found = {id(record) for record in index.search(query, len(records))}
+        assert expected == found, query
+
+    def uncached(query):
+        index._cache.clear()
+        return index.search(query, limit)
+
+    for label, fn in (("linear", lambda q: linear_search(records, q)[:limit]),
+                      ("index", uncached),
+                      ("cached", lambda q: index.search(q, limit))):
+        p50, p99 = timed(fn, queries)
+        print(f"{label:>6}: p50 {p50:9.1f} us  p99 {p99:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
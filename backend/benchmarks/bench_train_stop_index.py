@@ -0,0 +1,180 @@
+"""
+Benchmark: intermediate-station search via the train_stops index vs a full scan.
+
+Builds the origin/destination pair items (STOP#<origin>, DEST#<destination>#
+TRAIN#<train_id>) with mock_api/migrate_trains_to_dynamodb.py and answers
+random origin/destination/day searches three ways:
+
+- full scan:       read every train item and filter route order and day of run
+- origin partition: read every item of one stop per train under STOP#<origin>
+                   and filter on the downstream stations (the earlier layout)
+- pair query:      read the items under STOP#<origin> beginning with
+                   DEST#<destination>#, filter on run_days, then fetch the
+                   matching trains by key
+
+All three must return the same trains. Items read per search stands in for
+DynamoDB read capacity; items written per train is the price of the pair
+layout (n * (n - 1) / 2 for a route of n stops).
+
+Two datasets:
+
+- mock:      the 1000-train mock dataset (same shape as
+             mock_api/generate_large_mock_data.py, seeded), 10 stations
+- synthetic: trains from mock_api/generate_synthetic_timetable.py, searched
+             from its busiest hub stations, where the origin partition is
+             largest
+
+Usage (from backend/):
+    python benchmarks/bench_train_stop_index.py [num_trains] [num_queries] [synthetic_trains]
+"""
+import importlib.util
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def load_module(name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BACKEND_DIR, "mock_api", f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+migrate = load_module("migrate_trains_to_dynamodb")
+
+STATIONS = ["NDLS", "CNB", "ALD", "HWH", "BCT", "RTM", "KOTA", "LKO", "GWL", "AGC"]
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+HUBS = 5
+
+
+def generate_trains(count, rng):
+    trains = []
+    for i in range(count):
+        train_num = str(12000 + i)
+        route = rng.sample(STATIONS, k=rng.randint(3, 6))
+        dep_time = datetime(2025, 5, 1, 6, 0) + timedelta(minutes=rng.randint(0, 1440))
+        trains.append({
+            "PK": f"TRAIN#{train_num}",
+            "SK": "METADATA",
+            "train_id": train_num,
+            "train_number": train_num,
+            "train_name": f"Mock Express {i+1}",
+            "route": route,
+            "source_station": route[0],
+            "destination_station": route[-1],
+            "departure_time": dep_time.strftime("%H:%M"),
+            "days_of_run": rng.sample(DAYS, k=rng.randint(3, 7)),
+        })
+    return trains
+
+
+class Dataset:
+    """Trains with their pair items, and the partitions of the earlier one-item-per-stop layout"""
+
+    def __init__(self, trains):
+        self.trains = trains
+        self.trains_by_id = {str(t["train_id"]): t for t in trains}
+        self.pairs = {}
+        self.stops_at = Counter()
+        self.stop_partitions = {}
+        self.items_written = 0
+        for train in trains:
+            route = list(dict.fromkeys(train["route"]))
+            run_days = {d.lower() for d in train["days_of_run"]}
+            for position, station in enumerate(route[:-1]):
+                self.stops_at[station] += 1
+                self.stop_partitions.setdefault(station, []).append((str(train["train_id"]), set(route[position + 1:]), run_days))
+            for item in migrate.build_stop_items(train):
+                self.pairs.setdefault((item["PK"], item["SK"].rsplit("#TRAIN#", 1)[0]), []).append(item)
+                self.items_written += 1
+
+    def full_scan(self, origin, destination, day):
+        results = []
+        for train in self.trains:
+            route = train["route"]
+            if origin in route and destination in route and route.index(origin) < route.index(destination):
+                if any(d.lower() == day.lower() for d in train["days_of_run"]):
+                    results.append(train)
+        return results, len(self.trains)
+
+    def origin_partition(self, origin, destination, day):
+        partition = self.stop_partitions.get(origin, [])
+        day = day.lower()
+        matches = [train_id for train_id, downstream, run_days in partition if destination in downstream and day in run_days]
+        return [self.trains_by_id[train_id] for train_id in matches], len(partition) + len(matches)
+
+    def pair_query(self, origin, destination, day):
+        read = self.pairs.get((f"STOP#{origin}", f"DEST#{destination}"), [])
+        matches = [item for item in read if day.lower() in item["run_days"]]
+        return [self.trains_by_id[item["train_id"]] for item in matches], len(read) + len(matches)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(label, dataset, queries):
+    searches = {"full scan": dataset.full_scan, "origin partition": dataset.origin_partition, "pair query": dataset.pair_query}
+    timings = {name: [] for name in searches}
+    items_read = {name: 0 for name in searches}
+    found = 0
+    for origin, destination, day in queries:
+        expected = None
+        for name, search in searches.items():
+            start = time.perf_counter()
+            results, read = search(origin, destination, day)
+            timings[name].append(time.perf_counter() - start)
+            items_read[name] += read
+            ids = {str(t["train_id"]) for t in results}
+            assert expected is None or ids == expected, (name, origin, destination, day)
+            expected = ids
+        found += len(expected)
+
+    print(f"{label}: {len(dataset.trains)} trains, {dataset.items_written} pair items "
+          f"({dataset.items_written / len(dataset.trains):.1f} per train), {len(queries)} searches, "
+          f"{found / len(queries):.1f} trains found per search")
+    for name in searches:
+        values = timings[name]
+        print(f"  {name:>16}: p50 {percentile(values, 50) * 1e6:9.1f} us  p95 {percentile(values, 95) * 1e6:9.1f} us  "
+              f"items read/search {items_read[name] / len(queries):8.1f}")
+
+
+def hub_queries(dataset, count, rng):
+    """Searches from the busiest stations to stations some train reaches from there"""
+    hubs = [station for station, _ in dataset.stops_at.most_common(HUBS)]
+    destinations = {hub: sorted({sk[len("DEST#"):] for pk, sk in dataset.pairs if pk == f"STOP#{hub}"}) for hub in hubs}
+    print("hubs: " + ", ".join(f"{hub} ({dataset.stops_at[hub]} trains stop)" for hub in hubs))
+    queries = []
+    for _ in range(count):
+        hub = rng.choice(hubs)
+        queries.append((hub, rng.choice(destinations[hub]), rng.choice(DAYS)))
+    return queries
+
+
+def main():
+    num_trains = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    num_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    synthetic_trains = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+    rng = random.Random(42)
+
+    mock = Dataset(generate_trains(num_trains, rng))
+    queries = [(*rng.sample(STATIONS, k=2), rng.choice(DAYS)) for _ in range(num_queries)]
+    run("mock", mock, queries)
+
+    timetable = load_module("generate_synthetic_timetable")
+    grid = timetable.StationGrid(timetable.load_stations())
+    synthetic = Dataset([timetable.generate_train(42, index, grid) for index in range(synthetic_trains)])
+    run("synthetic, from hubs", synthetic, hub_queries(synthetic, num_queries // 4, rng))
+    print(f"  route length: mean {statistics.mean(len(t['route']) for t in synthetic.trains):.1f} stops, "
+          f"max {max(len(t['route']) for t in synthetic.trains)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Contention benchmark: read-modify-write wallet debits vs app.core.wallet_ledger.
+
+Many threads debit the same wallet at once through an in-process DynamoDB
+stand-in with a fixed per-call latency. The stand-in models the parts of
+DynamoDB that matter here: GetItem/UpdateItem/PutItem for the old path, and
+TransactWriteItems with condition checks, ADD, ALL_OLD cancellation reasons
+and TransactionConflict when two transactions overlap on the same wallet
+during the (1 ms) commit window.
+
+- legacy: get wallet -> put txn (PENDING) -> SET balance -> txn SUCCESS,
+  the sequence create_transaction and the cron runner used before
+- ledger: wallet_ledger.apply_transaction (one TransactWriteItems call)
+
+Reports throughput, round trips, the final balance against the expected one
+and how many debits overdrew the wallet.
+
+Usage (from backend/):
+    python benchmarks/bench_wallet_ledger.py [threads] [debits_per_thread] [latency_ms]
+"""
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+
+from botocore.exceptions import ClientError  # noqa: E402
+
+from app.core import wallet_ledger  # noqa: E402
+from app.core.wallet_ledger import marshal  # noqa: E402
+from boto3.dynamodb.types import TypeDeserializer  # noqa: E402
+
+_deserializer = TypeDeserializer()
+
+
+def _plain(values):
+    return {k: _deserializer.deserialize(v) for k, v in values.items()}
+
+
+class StandInClient:
+    """Just enough of the DynamoDB client API for the two debit paths"""
+
+    def __init__(self, latency, commit_time=0.001):
+        self.latency = latency
+        self.commit_time = commit_time
+        self.items = {}
+        self.lock = threading.Lock()
+        self.in_transaction = set()
+        self.calls = 0
+
+    def _round_trip(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+    @staticmethod
+    def _key(table, key):
+        key = _plain(key)
+        return table, key["PK"], key["SK"]
+
+    def get_item(self, TableName, Key):
+        self._round_trip()
+        with self.lock:
+            item = self.items.get(self._key(TableName, Key))
+            return {"Item": marshal(item)} if item else {}
+
+    def put_item(self, TableName, Item):
+        self._round_trip()
+        with self.lock:
+            item = _plain(Item)
+            self.items[(TableName, item["PK"], item["SK"])] = item
+
+    def update_item(self, TableName, Key, UpdateExpression, ExpressionAttributeValues, ConditionExpression=None, **kwargs):
+        self._round_trip()
+        values = _plain(ExpressionAttributeValues)
+        with self.lock:
+            item = self.items[self._key(TableName, Key)]
+            if ConditionExpression == "balance = :legacy" and item.get("balance") != values[":legacy"]:
+                raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+            attribute, placeholder = UpdateExpression[len("SET "):].split(" = ")
+            attribute = kwargs.get("ExpressionAttributeNames", {}).get(attribute, attribute)
+            item[attribute] = values[placeholder]
+
+    def transact_write_items(self, TransactItems):
+        wallet_update = TransactItems[0]["Update"]
+        wallet_key = self._key(wallet_update["TableName"], wallet_update["Key"])
+        # Network time is spent outside the commit; the item is only locked
+        # (and conflicting transactions rejected) during the commit window
+        time.sleep(self.latency / 2)
+        with self.lock:
+            self.calls += 1
+            conflict = wallet_key in self.in_transaction
+            self.in_transaction.add(wallet_key)
+        try:
+            if conflict:
+                raise ClientError({"Error": {"Code": "TransactionCanceledException"},
+                                   "CancellationReasons": [{"Code": "TransactionConflict"}] + [{"Code": "None"}] * (len(TransactItems) - 1)},
+                                  "TransactWriteItems")
+            time.sleep(self.commit_time)
+            values = _plain(wallet_update["ExpressionAttributeValues"])
+            with self.lock:
+                wallet = self.items.get(wallet_key)
+                ok = wallet is not None and isinstance(wallet.get("balance"), Decimal)
+                if ok and ":amount" in values:
+                    ok = wallet["balance"] >= values[":amount"]
+                if not ok:
+                    raise ClientError({"Error": {"Code": "TransactionCanceledException"},
+                                       "CancellationReasons": [{"Code": "ConditionalCheckFailed", **({"Item": marshal(wallet)} if wallet else {})}]
+                                       + [{"Code": "None"}] * (len(TransactItems) - 1)},
+                                      "TransactWriteItems")
+                wallet["balance"] += values[":delta"]
+                wallet["updated_at"] = values[":updated_at"]
+                for entry in TransactItems[1:]:
+                    item = _plain(entry["Put"]["Item"])
+                    self.items[(entry["Put"]["TableName"], item["PK"], item["SK"])] = item
+        finally:
+            with self.lock:
+                if not conflict:
+                    self.in_transaction.discard(wallet_key)
+            time.sleep(self.latency / 2)
+
+
+def legacy_debit(client, wallet_id, amount):
+    """The old sequence: check, write PENDING txn, SET the computed balance, mark SUCCESS"""
+    key = marshal(wallet_ledger.wallet_key(wallet_id))
+    wallet = _plain(client.get_item(TableName="wallet", Key=key)["Item"])
+    balance = Decimal(str(wallet["balance"]))
+    if balance < amount:
+        return False
+    txn_id = str(uuid.uuid4())
+    txn_key = {"PK": f"WALLET#{wallet_id}", "SK": f"TXN#{txn_id}"}
+    client.put_item(TableName="wallet_transactions", Item=marshal({**txn_key, "amount": str(amount), "status": "pending"}))
+    client.update_item(TableName="wallet", Key=key, UpdateExpression="SET balance = :balance",
+                       ExpressionAttributeValues=marshal({":balance": balance - amount}))
+    client.update_item(TableName="wallet_transactions", Key=marshal(txn_key), UpdateExpression="SET #status = :status",
+                       ExpressionAttributeNames={"#status": "status"}, ExpressionAttributeValues=marshal({":status": "success"}))
+    return True
+
+
+def ledger_debit(client, wallet_id, amount):
+    txn_id = str(uuid.uuid4())
+    try:
+        wallet_ledger.apply_transaction(wallet_id, wallet_ledger.DEBIT, amount, txn_item={
+            "PK": f"WALLET#{wallet_id}", "SK": f"TXN#{txn_id}", "amount": str(amount), "status": "success",
+        }, client=client)
+        return True
+    except wallet_ledger.InsufficientBalanceError:
+        return False
+
+
+def run(label, debit, threads, per_thread, latency, opening_balance):
+    client = StandInClient(latency)
+    wallet_id = "bench-wallet"
+    # Legacy string balance: the ledger path converts it on first use
+    client.items[("wallet", f"WALLET#{wallet_id}", "METADATA")] = {
+        "PK": f"WALLET#{wallet_id}", "SK": "METADATA", "balance": str(opening_balance),
+    }
+    amount = Decimal("1")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda _: debit(client, wallet_id, amount), range(threads * per_thread)))
+    elapsed = time.perf_counter() - started
+
+    succeeded = sum(results)
+    final = Decimal(str(client.items[("wallet", f"WALLET#{wallet_id}", "METADATA")]["balance"]))
+    expected = opening_balance - succeeded * amount
+    txns = sum(1 for key in client.items if key[0] == "wallet_transactions")
+    print(f"{label:>6}: {len(results) / elapsed:8.1f} debits/s  {client.calls / len(results):4.2f} calls/debit  "
+          f"succeeded {succeeded:4d}  txns {txns:4d}  final balance {final} (expected {expected}, "
+          f"lost updates {final - expected})")
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.005
+    total = threads * per_thread
+
+    print(f"{threads} threads x {per_thread} debits of 1 on one wallet, {latency * 1000:.0f} ms per call")
+    for opening_balance, title in ((Decimal(total), "balance covers every debit"),
+                                   (Decimal(total // 2), "balance covers half the debits")):
+        print(f"-- opening balance {opening_balance} ({title})")
+        run("legacy", legacy_debit, threads, per_thread, latency, opening_balance)
+        run("ledger", ledger_debit, threads, per_thread, latency, opening_balance)
+
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,8 @@ def create_jobs_table():
                 {'AttributeName': 'user_id', 'AttributeType': 'S'},
                 {'AttributeName': 'job_status', 'AttributeType': 'S'},
                 {'AttributeName': 'journey_date', 'AttributeType': 'S'},
+                {'AttributeName': 'due_date', 'AttributeType': 'S'},
+                {'AttributeName': 'due_time', 'AttributeType': 'S'},
             ],
             GlobalSecondaryIndexes=[
                 {
@@ -76,6 +78,21 @@ def create_jobs_table():
                         'WriteCapacityUnits': 5,
                     }
                 },
+                {
+                    # Sparse: only runnable jobs carry due_date (DUE#<yyyy-mm-dd>) and due_time (HH:MM)
+                    'IndexName': 'due_date-due_time-index',
+                    'KeySchema': [
+                        {'AttributeName': 'due_date', 'KeyType': 'HASH'},
+                        {'AttributeName': 'due_time', 'KeyType': 'RANGE'},
+                    ],
+                    'Projection': {
+                        'ProjectionType': 'ALL',
+                    },
+                    'ProvisionedThroughput': {
+                        'ReadCapacityUnits': 5,
+                        'WriteCapacityUnits': 5,
+                    }
+                },
             ],
             BillingMode='PROVISIONED',
             ProvisionedThroughput={
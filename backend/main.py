@@ -49,12 +49,50 @@ app.include_router(api_router, prefix="/api/v1")
 app.include_router(user_router, prefix="/api/v1")
 print(">>> Routers included")
 
+# Optionally compile email templates now instead of on the first email
+from app.core import templates
+if templates.PRECOMPILE_ON_STARTUP:
+    print(f">>> Precompiled templates: {templates.precompile()}")
+
 # Health check endpoint
 @app.get("/api/v1/health")
 def health_check():
     print(">>> Health check endpoint called")
     return {"status": "ok", "message": "Lambda is running"}
 
+@app.get("/api/v1/health/dynamo")
+def dynamo_health():
+    """DynamoDB connection pool configuration and saturation counters"""
+    from app.core import dynamo
+    return dynamo.pool_stats()
+
+@app.get("/api/v1/health/outbox")
+def outbox_health():
+    """Outbox dispatcher counters for this process"""
+    from app.core import outbox
+    return outbox.dispatcher.stats
+
+# Outbox dispatcher: delivers notifications and emails queued by the endpoints.
+# Only for long-running servers; on Lambda the outbox function drains on a schedule.
+@app.on_event("startup")
+async def start_outbox_dispatcher():
+    from app.core import outbox
+    if outbox.DISPATCHER_ENABLED:
+        outbox.dispatcher.start()
+
+@app.on_event("shutdown")
+async def stop_outbox_dispatcher():
+    from app.core import outbox
+    await outbox.dispatcher.stop()
+
+def outbox_handler(event, context):
+    """Scheduled Lambda entry point draining due outbox records"""
+    import asyncio
+    from app.core import outbox
+    result = asyncio.run(outbox.dispatcher.drain_once())
+    print(f">>> Outbox drained: {result}")
+    return result
+
 @app.get("/")
 def root():
     print(">>> Root endpoint called")
@@ -63,7 +101,8 @@ def root():
 # Mangum integration for AWS Lambda
 try:
     from mangum import Mangum
-    lambda_handler = Mangum(app)
+    # No lifespan: Mangum would run startup/shutdown around every invocation
+    lambda_handler = Mangum(app, lifespan="off")
     print(">>> Mangum lambda_handler created for AWS Lambda integration")
 except ImportError:
     print("!!! Mangum not installed; lambda_handler not created")
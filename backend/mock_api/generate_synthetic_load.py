@@ -0,0 +1,385 @@
+"""
+Seeded users, wallets, jobs and bookings for load tests, on top of a
+timetable written by generate_synthetic_timetable.py.
+
+Trains are read from the timetable one line at a time; a fixed size
+reservoir of trips (a train and a boarding/alighting pair on its route) is
+kept, so memory depends on --trip-pool and not on the timetable size. Users
+are numbered and each one is drawn from its own Random seeded with (seed,
+user number), so jobs and bookings can refer to any user without keeping
+the users around.
+
+Items are written in the shape the API stores them, one table per file:
+
+    <out>/users.ndjson     profiles plus their USERID#/PHONE# lookup items
+    <out>/wallets.ndjson   one funded wallet per user
+    <out>/jobs.ndjson      Scheduled jobs, keyed for the due-time index;
+                           Tatkal jobs run at 10:00 (AC) or 11:00 (non-AC)
+                           the day before the journey
+    <out>/bookings.ndjson  bookings on journey dates the trains run
+
+Every user gets the --password password when bcrypt is installed, hashed
+once with a salt drawn from the seed (so the output stays reproducible);
+without bcrypt the profiles have no PasswordHash.
+
+Usage (from backend/mock_api/):
+    python generate_synthetic_load.py --users 50000 --jobs 20000 --bookings 200000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from generate_synthetic_timetable import DAYS, DEFAULT_OUT_DIR, MIN_FARE, open_ndjson, read_ndjson, write_line
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.core.job_due_index import job_due_key  # noqa: E402
+
+try:
+    import bcrypt
+except ImportError:
+    bcrypt = None
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Arjun", "Sai", "Rohan", "Ishaan", "Kabir", "Rahul", "Vikram",
+               "Ananya", "Diya", "Priya", "Kavya", "Meera", "Saanvi", "Aisha", "Neha", "Pooja", "Lakshmi"]
+LAST_NAMES = ["Sharma", "Verma", "Gupta", "Patel", "Reddy", "Iyer", "Nair", "Singh", "Das", "Banerjee",
+              "Mukherjee", "Rao", "Khan", "Joshi", "Mehta", "Chopra", "Pillai", "Yadav", "Kulkarni", "Bose"]
+BERTH_PREFERENCES = ["LB", "MB", "UB", "SL", "SU", None]
+AC_CLASSES = {"1A", "2A", "3A", "CC", "EC"}
+SEAT_PREFIX = {"1A": "A", "2A": "B", "3A": "C", "SL": "S", "CC": "D", "2S": "E", "EC": "H"}
+
+# job_type: share, job id prefix
+JOB_TYPES = {"Tatkal": (0.7, "TKL"), "Premium Tatkal": (0.15, "PTK"), "General": (0.15, "GEN")}
+# bcrypt's base64 alphabet; the last salt character only carries 4 bits
+BCRYPT_ALPHABET = "./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+BCRYPT_ROUNDS = 12
+BOOKING_STATUSES = [("confirmed", 0.85), ("cancelled", 0.1), ("waitlist", 0.05)]
+
+
+def user_record(seed, number):
+    """Identity of user `number`; the same pair always gives the same user"""
+    rng = random.Random(f"{seed}:user:{number}")
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    email = f"loadtest.{first.lower()}.{last.lower()}.{number}@example.com"
+    return {
+        "user_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "wallet_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "email": email,
+        "phone": str(6000000000 + number),
+        "name": f"{first} {last}",
+        "created_at": datetime(2025, 1, 1) + timedelta(seconds=rng.randrange(200 * 86400)),
+    }
+
+
+def seeded_salt(seed):
+    """bcrypt salt drawn from the seed instead of os.urandom"""
+    rng = random.Random(f"{seed}:password")
+    chars = "".join(rng.choice(BCRYPT_ALPHABET) for _ in range(21)) + rng.choice(BCRYPT_ALPHABET[::16])
+    return f"$2b${BCRYPT_ROUNDS}${chars}".encode("ascii")
+
+
+def user_items(user, password_hash):
+    """Profile item plus its UserID and phone lookup items"""
+    user_pk = f"USER#{user['email']}"
+    profile = {
+        "PK": user_pk,
+        "SK": "PROFILE",
+        "UserID": user["user_id"],
+        "Email": user["email"],
+        "Username": user["email"].split("@")[0],
+        "CreatedAt": user["created_at"].isoformat(),
+        "LastLoginAt": None,
+        "IsActive": True,
+        "OtherAttributes": {"FullName": user["name"], "Role": "user"},
+        "Phone": user["phone"],
+        "wallet_id": user["wallet_id"],
+        "wallet_balance": 0,
+        "preferences": {},
+        "recent_bookings": [],
+        "bookings": [],
+        "google_signin": False,
+    }
+    if password_hash:
+        profile["PasswordHash"] = password_hash
+    return [
+        profile,
+        {"PK": f"USERID#{user['user_id']}", "SK": "LOOKUP", "user_pk": user_pk},
+        {"PK": f"PHONE#{user['phone']}", "SK": "LOOKUP", "user_pk": user_pk},
+    ]
+
+
+def wallet_item(rng, user):
+    created_at = user["created_at"].isoformat()
+    return {
+        "PK": f"WALLET#{user['wallet_id']}",
+        "SK": "METADATA",
+        "wallet_id": user["wallet_id"],
+        "user_id": user["user_id"],
+        "balance": rng.choice((2000, 5000, 10000, 25000, 50000)),
+        "status": "active",
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def stop_minutes(stop, field):
+    """Minutes from the origin's day 1 midnight to a stop's arrival or departure"""
+    hours, minutes = map(int, stop[field].split(":"))
+    clock = (stop["day"] - 1) * 1440 + hours * 60 + minutes
+    if field == "departure" and stop["arrival"] != "--" and stop["departure"] < stop["arrival"]:
+        clock += 1440  # left after midnight
+    return clock
+
+
+def trip_from_train(rng, train):
+    """A boarding/alighting pair on `train` with its fares, or None for a single stop train"""
+    schedule = train.get("schedule") or []
+    if len(schedule) < 2:
+        return None
+    # Most trips run end to end or close to it
+    board = 0 if rng.random() < 0.5 else rng.randrange(len(schedule) - 1)
+    alight = len(schedule) - 1 if rng.random() < 0.5 else rng.randrange(board + 1, len(schedule))
+    minutes = stop_minutes(schedule[alight], "arrival") - stop_minutes(schedule[board], "departure")
+    share = (schedule[alight]["distance_km"] - schedule[board]["distance_km"]) / max(train["distance_km"], 1)
+    return {
+        "train_id": train["train_id"],
+        "train_number": train["train_number"],
+        "train_name": train["train_name"],
+        "origin": schedule[board]["station_code"],
+        "destination": schedule[alight]["station_code"],
+        "departure_time": schedule[board]["departure"],
+        "arrival_time": schedule[alight]["arrival"],
+        "duration": f"{minutes // 60}h {minutes % 60}m",
+        "days_of_run": train["days_of_run"],
+        "fares": {travel_class: max(MIN_FARE[travel_class], int(price * share))
+                  for travel_class, price in train["class_prices"].items()},
+    }
+
+
+def sample_trips(path, size, seed):
+    """Reservoir sample of `size` trips over the trains in `path`"""
+    rng = random.Random(f"{seed}:trips")
+    trips = []
+    for seen, train in enumerate(read_ndjson(path)):
+        trip = trip_from_train(rng, train)
+        if trip is None:
+            continue
+        if len(trips) < size:
+            trips.append(trip)
+        else:
+            slot = rng.randrange(seen + 1)
+            if slot < size:
+                trips[slot] = trip
+    return trips
+
+
+def journey_date_for(rng, trip, start_date, days):
+    """A date in the window the trip's train runs on"""
+    run_days = set(trip["days_of_run"])
+    offsets = [offset for offset in range(days) if DAYS[(start_date + timedelta(days=offset)).weekday()] in run_days]
+    return start_date + timedelta(days=rng.choice(offsets or [0]))
+
+
+def passengers(rng, count):
+    party = []
+    for _ in range(count):
+        age = rng.choice((rng.randint(18, 59), rng.randint(18, 59), rng.randint(5, 17), rng.randint(60, 85)))
+        party.append({
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "age": age,
+            "gender": rng.choice(("Male", "Female")),
+            "berth_preference": rng.choice(BERTH_PREFERENCES),
+            "is_senior_citizen": age >= 60,
+            "id_type": None,
+            "id_number": None,
+        })
+    return party
+
+
+def job_item(rng, seed, number, user, trip, start_date, days):
+    job_type = rng.choices(list(JOB_TYPES), weights=[share for share, _ in JOB_TYPES.values()])[0]
+    travel_class = rng.choice(list(trip["fares"]))
+    journey_date = journey_date_for(rng, trip, start_date + timedelta(days=1), days)
+    if job_type == "General":
+        job_date = journey_date - timedelta(days=rng.randint(1, 3))
+        execution_time = f"{rng.randint(6, 22):02d}:{rng.choice((0, 15, 30, 45)):02d}"
+    else:
+        # Tatkal opens the day before the journey, at 10:00 for AC classes and 11:00 for the rest
+        job_date = journey_date - timedelta(days=1)
+        execution_time = "10:00" if travel_class in AC_CLASSES else "11:00"
+    party = passengers(rng, rng.choice((1, 1, 2, 2, 3, 4)))
+    now = (datetime.combine(job_date, datetime.min.time()) - timedelta(minutes=rng.randrange(3 * 1440))).isoformat()
+
+    # Same PREFIX-XXXXXXXX shape as the API; multiplying by an odd constant keeps the numbers distinct
+    job_id = f"{JOB_TYPES[job_type][1]}-{(number * 2654435761 + seed) % 2 ** 32:08X}"
+    item = {
+        "PK": f"JOB#{job_id}",
+        "SK": "METADATA",
+        "job_id": job_id,
+        "user_id": user["user_id"],
+        "origin_station_code": trip["origin"],
+        "destination_station_code": trip["destination"],
+        "journey_date": journey_date.isoformat(),
+        "booking_time": execution_time,
+        "travel_class": travel_class,
+        "passengers": party,
+        "job_type": job_type,
+        "booking_email": user["email"],
+        "booking_phone": user["phone"],
+        "job_status": "Scheduled",
+        "auto_upgrade": rng.random() < 0.3,
+        "auto_book_alternate_date": rng.random() < 0.2,
+        "payment_method": "wallet",
+        "notes": None,
+        "opt_for_insurance": rng.random() < 0.4,
+        "execution_attempts": 0,
+        "max_attempts": 3,
+        "created_at": now,
+        "updated_at": now,
+        "train_details": {
+            "train_number": trip["train_number"],
+            "train_name": trip["train_name"],
+            "departure_time": trip["departure_time"],
+            "arrival_time": trip["arrival_time"],
+            "duration": trip["duration"],
+        },
+        "job_date": job_date.isoformat(),
+        "job_execution_time": execution_time,
+    }
+    item["due_date"], item["due_time"] = job_due_key(item)
+    return item
+
+
+def booking_item(rng, number, user, trip, start_date, days):
+    travel_class = rng.choice(list(trip["fares"]))
+    journey_date = journey_date_for(rng, trip, start_date, days)
+    booked_at = datetime.combine(journey_date, datetime.min.time()) - timedelta(minutes=rng.randrange(60 * 1440))
+    status = rng.choices([status for status, _ in BOOKING_STATUSES], weights=[share for _, share in BOOKING_STATUSES])[0]
+
+    party = []
+    for passenger in passengers(rng, rng.choice((1, 1, 2, 2, 3, 4, 5, 6))):
+        party.append({
+            "name": passenger["name"],
+            "age": passenger["age"],
+            "gender": passenger["gender"],
+            "seat": None if status == "waitlist" else
+            f"{SEAT_PREFIX[travel_class]}{rng.randint(1, 24):02d}{rng.randint(1, 72):02d}",
+            "status": status,
+            "id_type": None,
+            "id_number": None,
+            "is_senior": passenger["is_senior_citizen"],
+        })
+    seniors = sum(1 for passenger in party if passenger["is_senior"])
+    adults = len(party) - seniors
+    fare = trip["fares"][travel_class]
+    total = adults * fare * 0.9 + seniors * fare * 0.6
+
+    created_at = booked_at.isoformat()
+    booking_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    return {
+        "PK": f"BOOKING#{booking_id}",
+        "SK": "METADATA",
+        "booking_id": booking_id,
+        "user_id": user["user_id"],
+        "train_id": trip["train_id"],
+        "train_name": trip["train_name"],
+        "train_number": trip["train_number"],
+        "pnr": f"PNR{number:012d}",
+        "booking_status": status,
+        "payment_status": "refunded" if status == "cancelled" else "paid",
+        "payment_method": "wallet",
+        "journey_date": journey_date.isoformat(),
+        "origin_station_code": trip["origin"],
+        "destination_station_code": trip["destination"],
+        "class": travel_class,
+        "fare": str(fare),
+        "tax": "0",
+        "total_amount": str(total),
+        "price_details": {
+            "base_fare": str(float(fare)),
+            "total": str(total),
+            "tax": "0.0",
+            "adult_count": adults,
+            "senior_count": seniors,
+            "base_fare_per_adult": str(fare * 0.9),
+            "base_fare_per_senior": str(fare * 0.6),
+        },
+        "passengers": party,
+        "booking_email": user["email"],
+        "booking_phone": user["phone"],
+        "booking_date": booked_at.strftime("%Y-%m-%d"),
+        "booking_time": booked_at.strftime("%H:%M:%S"),
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate seeded users, wallets, jobs and bookings as NDJSON")
+    parser.add_argument("--timetable", default=DEFAULT_OUT_DIR, help="directory written by generate_synthetic_timetable.py")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--bookings", type=int, default=50000)
+    parser.add_argument("--trip-pool", type=int, default=20000, help="trips sampled from the timetable")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default="LoadTest@123")
+    parser.add_argument("--out", default=None, help="output directory (default: the timetable directory)")
+    args = parser.parse_args()
+
+    with open(os.path.join(args.timetable, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    start_date = datetime.strptime(manifest["start_date"], "%Y-%m-%d").date()
+    days = manifest["days"]
+    suffix = manifest["suffix"]
+    out = args.out or args.timetable
+    os.makedirs(out, exist_ok=True)
+    started = time.perf_counter()
+
+    trips = sample_trips(os.path.join(args.timetable, "trains" + suffix), args.trip_pool, args.seed)
+    if not trips:
+        sys.exit(f"No trips found in {args.timetable}")
+    print(f"Sampled {len(trips)} trips in {time.perf_counter() - started:.1f}s")
+
+    password_hash = None
+    if bcrypt is not None:
+        password_hash = bcrypt.hashpw(args.password.encode("utf-8"), seeded_salt(args.seed)).decode("utf-8")
+    else:
+        print("bcrypt is not installed; users are written without a PasswordHash")
+
+    rng = random.Random(f"{args.seed}:load")
+    with open_ndjson(os.path.join(out, "users" + suffix), "w") as users_file, \
+            open_ndjson(os.path.join(out, "wallets" + suffix), "w") as wallets_file:
+        for number in range(args.users):
+            user = user_record(args.seed, number)
+            for item in user_items(user, password_hash):
+                write_line(users_file, item)
+            write_line(wallets_file, wallet_item(rng, user))
+
+    # A few users create most jobs and bookings
+    user_weights = [1.0 / (1 + number) ** 0.5 for number in range(args.users)]
+    cum_weights = []
+    total = 0.0
+    for weight in user_weights:
+        total += weight
+        cum_weights.append(total)
+
+    def pick_user():
+        return user_record(args.seed, rng.choices(range(args.users), cum_weights=cum_weights)[0])
+
+    with open_ndjson(os.path.join(out, "jobs" + suffix), "w") as f:
+        for number in range(args.jobs):
+            write_line(f, job_item(rng, args.seed, number, pick_user(), rng.choice(trips), start_date, days))
+    with open_ndjson(os.path.join(out, "bookings" + suffix), "w") as f:
+        for number in range(args.bookings):
+            write_line(f, booking_item(rng, number, pick_user(), rng.choice(trips), start_date, days))
+
+    print(f"Generated {args.users} users, {args.jobs} jobs and {args.bookings} bookings in {out} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+"""
+Seeded synthetic timetable for benchmarking search and the cron runner.
+
+Stations are the cities in cities.json, placed with the lat/lng and
+population of the matching worldcities.csv row (cities.json was generated
+from the Indian rows of that file, in the same order) and given unique
+station codes: the cities.json keyword when it is free, otherwise the
+keyword plus a letter of the name or a number.
+
+Each train is drawn from its own Random seeded with (seed, train index), so
+the first 10k trains of a 100k run are the same 10k trains as a 10k run:
+
+- a train type (Rajdhani ... MEMU) with its share, speed, stop spacing,
+  route length band and coach composition
+- an origin weighted by population, and a destination found at a route
+  length drawn from the type's band, in a random direction
+- intermediate stops picked near evenly spaced points on the line between
+  them, preferring bigger cities for faster trains
+- arrival/departure times from track distance, speed and dwell times, the
+  day counter, days of run, end to end fares and seats per class
+
+Per-date seat inventory (`--days` dates from `--start-date`, run days only)
+is drawn from the same seed. Everything is written as NDJSON, one object per
+line, as it is generated, so memory stays flat whatever the train count:
+
+    <out>/stations.ndjson   stations table records
+    <out>/trains.ndjson     trains in the db.json train shape plus
+                            seat_availability, class_prices and timings
+    <out>/inventory.ndjson  one record per train, journey date and class
+    <out>/manifest.json     arguments and counts
+
+Usage (from backend/mock_api/):
+    python generate_synthetic_timetable.py --trains 100000 --seed 7 --days 30 --gzip
+"""
+import argparse
+import csv
+import gzip
+import itertools
+import json
+import math
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+MOCK_API_DIR = os.path.dirname(os.path.abspath(__file__))
+CITIES_JSON = os.path.join(MOCK_API_DIR, "cities.json")
+WORLDCITIES_CSV = os.path.join(MOCK_API_DIR, "worldcities.csv")
+DEFAULT_OUT_DIR = os.path.join(MOCK_API_DIR, "synthetic")
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+GRID_DEGREES = 0.5
+KM_PER_DEGREE = 111.2
+TRACK_FACTOR = 1.15  # track length over straight line distance
+MAX_STOPS = 80
+
+# Berths (or seats) per coach, fare per km and minimum fare per class
+BERTHS_PER_COACH = {"1A": 24, "2A": 48, "3A": 64, "SL": 72, "2S": 108, "CC": 78, "EC": 56}
+FARE_PER_KM = {"1A": 3.6, "2A": 2.1, "3A": 1.5, "SL": 0.55, "2S": 0.32, "CC": 1.25, "EC": 2.6}
+MIN_FARE = {"1A": 1200, "2A": 750, "3A": 520, "SL": 160, "2S": 45, "CC": 250, "EC": 520}
+
+# name: share, average speed km/h, stop spacing km, route length band km,
+# preference for big cities when picking stops (population exponent),
+# coaches as (class, min coaches, max coaches, probability of the class)
+TRAIN_TYPES = {
+    "Rajdhani": (0.03, 78, 260, (900, 2600), 1.0, [("1A", 1, 1, 1.0), ("2A", 2, 4, 1.0), ("3A", 8, 12, 1.0)]),
+    "Duronto": (0.02, 74, 420, (800, 2300), 1.0, [("1A", 1, 1, 0.5), ("2A", 1, 2, 1.0), ("3A", 4, 8, 1.0), ("SL", 4, 8, 0.7)]),
+    "Shatabdi": (0.03, 72, 110, (250, 750), 0.9, [("EC", 1, 2, 1.0), ("CC", 8, 12, 1.0)]),
+    "Vande Bharat": (0.03, 82, 140, (300, 800), 0.9, [("EC", 2, 2, 1.0), ("CC", 12, 14, 1.0)]),
+    "Superfast": (0.16, 58, 90, (300, 2200), 0.8, [("1A", 1, 1, 0.3), ("2A", 1, 2, 0.9), ("3A", 3, 6, 1.0), ("SL", 6, 10, 1.0), ("2S", 2, 3, 0.6)]),
+    "Express": (0.28, 48, 55, (150, 1800), 0.6, [("2A", 1, 2, 0.7), ("3A", 2, 5, 1.0), ("SL", 6, 11, 1.0), ("2S", 2, 4, 0.7)]),
+    "Mail": (0.06, 50, 60, (300, 1800), 0.6, [("1A", 1, 1, 0.3), ("2A", 1, 2, 0.8), ("3A", 3, 5, 1.0), ("SL", 8, 12, 1.0), ("2S", 2, 4, 0.7)]),
+    "Intercity": (0.10, 50, 40, (80, 450), 0.5, [("CC", 1, 3, 0.7), ("2S", 6, 12, 1.0)]),
+    "Passenger": (0.17, 32, 15, (40, 300), 0.2, [("SL", 1, 2, 0.3), ("2S", 8, 14, 1.0)]),
+    "MEMU": (0.12, 38, 10, (20, 160), 0.1, [("2S", 8, 12, 1.0)]),
+}
+TYPE_NAMES = list(TRAIN_TYPES)
+TYPE_WEIGHTS = [TRAIN_TYPES[name][0] for name in TYPE_NAMES]
+
+# Share of seats sold by class, on top of the train's own popularity
+CLASS_DEMAND = {"1A": 0.7, "2A": 0.85, "3A": 1.0, "SL": 1.05, "2S": 0.9, "CC": 0.95, "EC": 0.75}
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+def open_ndjson(path, mode="r"):
+    """Open an NDJSON file for text reading or writing, gzipped when the name ends in .gz"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def read_ndjson(path):
+    """Yield the objects of an NDJSON file one at a time"""
+    with open_ndjson(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_line(f, obj):
+    f.write(json.dumps(obj, ensure_ascii=False, separators=(",", ":")))
+    f.write("\n")
+
+
+def ascii_letters(text):
+    return "".join(ch for ch in text.upper() if "A" <= ch <= "Z")
+
+
+def station_code_for(keyword, ascii_name, taken):
+    """
+    The first free code of: the keyword, the keyword plus a later letter of
+    the name, the first letter plus two or three later letters in order,
+    then the keyword plus a number
+    """
+    letters = ascii_letters(ascii_name) or "X"
+    if keyword != ascii_letters(keyword):
+        keyword = letters[:3]
+    candidates = itertools.chain(
+        [keyword],
+        (keyword + letter for letter in letters[len(keyword):]),
+        (letters[0] + "".join(rest) for size in (2, 3) for rest in itertools.combinations(letters[1:], size)),
+        (f"{keyword}{number}" for number in itertools.count(1)),
+    )
+    return next(code for code in candidates if code not in taken)
+
+
+def load_stations(limit=0):
+    """
+    cities.json entries joined with their worldcities.csv coordinates, with
+    unique station codes. `limit` keeps only the first (most populous) ones.
+    """
+    with open(CITIES_JSON, "r", encoding="utf-8") as f:
+        cities = json.load(f)
+    with open(WORLDCITIES_CSV, newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.DictReader(f) if row["country"] == "India"]
+
+    stations = []
+    taken = set()
+    for city, row in zip(cities, rows):
+        if city["name"] != row["city"] or not row["lat"] or not row["lng"]:
+            continue
+        code = station_code_for(city["keyword"], row["city_ascii"], taken)
+        taken.add(code)
+        stations.append({
+            "station_code": code,
+            "station_name": city["name"],
+            "city": city["name"],
+            "state": city["state"],
+            "city_id": city["city_id"],
+            "lat": float(row["lat"]),
+            "lng": float(row["lng"]),
+            "population": int(float(row["population"] or 0)) or 5000,
+        })
+        if limit and len(stations) >= limit:
+            break
+    return stations
+
+
+def grid_cell(lat, lng):
+    return int(math.floor(lat / GRID_DEGREES)), int(math.floor(lng / GRID_DEGREES))
+
+
+class StationGrid:
+    """Stations bucketed by GRID_DEGREES cells, for picking stations near a point"""
+
+    def __init__(self, stations):
+        self.stations = stations
+        self.points = [(station["lat"], station["lng"]) for station in stations]
+        self.cells = {}
+        for position, station in enumerate(stations):
+            self.cells.setdefault(grid_cell(station["lat"], station["lng"]), []).append(position)
+        # Origins are drawn by population, damped so hubs don't take every train
+        self.origin_weights = []
+        total = 0.0
+        for station in stations:
+            total += station["population"] ** 0.6
+            self.origin_weights.append(total)
+
+    def near(self, lat, lng, radius_km):
+        """Positions of the stations within `radius_km` of (lat, lng), with their distances"""
+        rows = int(radius_km / (KM_PER_DEGREE * GRID_DEGREES)) + 1
+        cols = int(radius_km / (KM_PER_DEGREE * GRID_DEGREES * max(math.cos(math.radians(lat)), 0.2))) + 1
+        row, col = grid_cell(lat, lng)
+        # Equirectangular distances; close enough at these radii and much cheaper
+        lng_km = KM_PER_DEGREE * math.cos(math.radians(lat))
+        found = []
+        for r in range(row - rows, row + rows + 1):
+            for c in range(col - cols, col + cols + 1):
+                for position in self.cells.get((r, c), ()):
+                    station_lat, station_lng = self.points[position]
+                    distance = math.hypot((station_lat - lat) * KM_PER_DEGREE, (station_lng - lng) * lng_km)
+                    if distance <= radius_km:
+                        found.append((position, distance))
+        return found
+
+    def pick_near(self, rng, lat, lng, radius_km, hub_bias, exclude):
+        """A station within `radius_km` of (lat, lng), weighted by population ** hub_bias, or None"""
+        candidates = [(position, distance) for position, distance in self.near(lat, lng, radius_km)
+                      if position not in exclude]
+        if not candidates:
+            return None
+        weights = [self.stations[position]["population"] ** hub_bias / (1.0 + distance / radius_km)
+                   for position, distance in candidates]
+        return rng.choices(candidates, weights=weights)[0][0]
+
+
+def offset_point(lat, lng, distance_km, bearing):
+    lat2 = lat + distance_km * math.cos(bearing) / KM_PER_DEGREE
+    lng2 = lng + distance_km * math.sin(bearing) / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.2))
+    return lat2, lng2
+
+
+def pick_route(rng, grid, train_type):
+    """Station positions from origin to destination, or None if no destination fits the type"""
+    _, _, spacing, (min_km, max_km), hub_bias, _ = TRAIN_TYPES[train_type]
+    stations = grid.stations
+    origin = rng.choices(range(len(stations)), cum_weights=grid.origin_weights)[0]
+    start = stations[origin]
+
+    destination = None
+    for _ in range(12):
+        length = math.exp(rng.uniform(math.log(min_km), math.log(max_km))) / TRACK_FACTOR
+        lat, lng = offset_point(start["lat"], start["lng"], length, rng.uniform(0, 2 * math.pi))
+        destination = grid.pick_near(rng, lat, lng, min(max(length * 0.1, 15), 60), hub_bias, {origin})
+        if destination is not None:
+            break
+    if destination is None:
+        return None
+
+    end = stations[destination]
+    straight = haversine_km(start["lat"], start["lng"], end["lat"], end["lng"])
+    stops = min(int(straight * TRACK_FACTOR / spacing) - 1, MAX_STOPS - 2)
+    route = [origin]
+    used = {origin, destination}
+    jitter = min(spacing, straight) * 0.2 / KM_PER_DEGREE
+    for k in range(1, stops + 1):
+        share = k / (stops + 1)
+        lat = start["lat"] + (end["lat"] - start["lat"]) * share + rng.uniform(-jitter, jitter)
+        lng = start["lng"] + (end["lng"] - start["lng"]) * share + rng.uniform(-jitter, jitter)
+        stop = grid.pick_near(rng, lat, lng, max(spacing * 0.5, 20), hub_bias, used)
+        if stop is not None:
+            route.append(stop)
+            used.add(stop)
+    route.append(destination)
+    return route
+
+
+def format_clock(minutes):
+    return f"{(minutes // 60) % 24:02d}:{minutes % 60:02d}"
+
+
+def format_duration(minutes):
+    return f"{minutes // 60}h {minutes % 60}m"
+
+
+def dwell_minutes(rng, population):
+    if population >= 1_000_000:
+        return rng.randint(5, 10)
+    if population >= 100_000:
+        return rng.randint(2, 5)
+    return rng.randint(1, 2)
+
+
+def generate_train(seed, index, grid):
+    """Train number `index` for `seed`; the same pair always gives the same train"""
+    rng = random.Random(f"{seed}:{index}")
+    route = None
+    while route is None:
+        train_type = rng.choices(TYPE_NAMES, weights=TYPE_WEIGHTS)[0]
+        route = pick_route(rng, grid, train_type)
+    _, speed, _, _, _, composition = TRAIN_TYPES[train_type]
+    speed *= rng.uniform(0.9, 1.1)
+    stations = [grid.stations[position] for position in route]
+
+    # Departures cluster in the morning and evening
+    departure = int(rng.choice((rng.gauss(7 * 60, 90), rng.gauss(19 * 60, 120), rng.uniform(0, 1440)))) % 1440
+    departure -= departure % 5
+    clock = departure
+    distance = 0.0
+    schedule = []
+    for position, station in enumerate(stations):
+        if position > 0:
+            previous = stations[position - 1]
+            segment = haversine_km(previous["lat"], previous["lng"], station["lat"], station["lng"]) * TRACK_FACTOR
+            distance += segment
+            clock += max(int(round(segment / speed * 60)), 2)
+        arrival = "--" if position == 0 else format_clock(clock)
+        day = 1 + clock // 1440
+        if position == len(stations) - 1:
+            departure_clock = "--"
+        else:
+            if position > 0:
+                clock += dwell_minutes(rng, station["population"])
+            departure_clock = format_clock(clock)
+        schedule.append({
+            "station_code": station["station_code"],
+            "station_name": station["station_name"],
+            "arrival": arrival,
+            "departure": departure_clock,
+            "day": day,
+            "distance_km": int(round(distance)),
+        })
+    distance_km = int(round(distance))
+    travel_minutes = clock - departure
+
+    if distance_km < 1000 and rng.random() < 0.75:
+        days_of_run = list(DAYS)
+    elif distance_km >= 1000 and rng.random() < 0.45:
+        days_of_run = list(DAYS)
+    else:
+        run_days = set(rng.sample(range(7), rng.choice((1, 2, 3)) if distance_km >= 1000 else rng.choice((5, 6))))
+        days_of_run = [DAYS[day] for day in sorted(run_days)]
+
+    coaches = {}
+    for travel_class, low, high, probability in composition:
+        if rng.random() < probability:
+            coaches[travel_class] = rng.randint(low, high)
+    if not coaches:
+        travel_class, low, high, _ = composition[-1]
+        coaches[travel_class] = rng.randint(low, high)
+
+    seats = {travel_class: count * BERTHS_PER_COACH[travel_class] for travel_class, count in coaches.items()}
+    surcharge = 1.2 if train_type in ("Rajdhani", "Duronto", "Shatabdi", "Vande Bharat") else 1.0
+    prices = {travel_class: max(MIN_FARE[travel_class], int(round(FARE_PER_KM[travel_class] * distance_km * surcharge / 5.0)) * 5)
+              for travel_class in coaches}
+
+    number = str(10001 + index)
+    origin, destination = stations[0], stations[-1]
+    return {
+        "train_id": number,
+        "train_number": number,
+        "train_name": f"{origin['city']} {destination['city']} {train_type}",
+        "train_type": train_type,
+        "source_station": origin["station_code"],
+        "source_station_name": origin["station_name"],
+        "destination_station": destination["station_code"],
+        "destination_station_name": destination["station_name"],
+        "route": [station["station_code"] for station in stations],
+        "classes_available": list(coaches),
+        "schedule": schedule,
+        "days_of_run": days_of_run,
+        "departure_time": format_clock(departure),
+        "arrival_time": format_clock(clock),
+        "duration": format_duration(travel_minutes),
+        "distance_km": distance_km,
+        "coaches": coaches,
+        "seat_availability": seats,
+        "class_prices": prices,
+        "updated_at": "2025-05-01T00:00:00Z",
+    }
+
+
+def inventory_records(seed, index, train, start_date, days):
+    """Seats per class for each date in the window the train leaves its origin on"""
+    rng = random.Random(f"{seed}:{index}:inventory")
+    popularity = rng.betavariate(2.5, 2.0)
+    for offset in range(days):
+        journey_date = start_date + timedelta(days=offset)
+        if DAYS[journey_date.weekday()] not in train["days_of_run"]:
+            continue
+        # Dates further out have sold less; weekends sell more
+        sold_share = popularity * (0.45 + 0.55 * math.exp(-offset / 12.0))
+        if journey_date.weekday() >= 4:
+            sold_share += 0.1
+        for travel_class, coaches in train["coaches"].items():
+            total = train["seat_availability"][travel_class]
+            share = min(max(sold_share * CLASS_DEMAND[travel_class] + rng.gauss(0, 0.05), 0.0), 1.0)
+            booked = int(total * share)
+            yield {
+                "train_id": train["train_id"],
+                "journey_date": journey_date.isoformat(),
+                "class": travel_class,
+                "coaches": coaches,
+                "berths_per_coach": BERTHS_PER_COACH[travel_class],
+                "total_seats": total,
+                "booked_seats": booked,
+                "available_seats": total - booked,
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic timetable as NDJSON")
+    parser.add_argument("--trains", type=int, default=10000)
+    parser.add_argument("--stations", type=int, default=0, help="use the N most populous cities (default: all)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start-date", default=date.today().isoformat(), help="first inventory date, YYYY-MM-DD")
+    parser.add_argument("--days", type=int, default=7, help="inventory dates per train")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR)
+    parser.add_argument("--gzip", action="store_true", help="write .ndjson.gz files")
+    args = parser.parse_args()
+
+    start_date = datetime.strptime(args.start_date, "%Y-%m-%d").date()
+    suffix = ".ndjson.gz" if args.gzip else ".ndjson"
+    os.makedirs(args.out, exist_ok=True)
+    started = time.perf_counter()
+
+    stations = load_stations(args.stations)
+    grid = StationGrid(stations)
+    with open_ndjson(os.path.join(args.out, "stations" + suffix), "w") as f:
+        for station in stations:
+            write_line(f, station)
+
+    counts = {"stations": len(stations), "trains": 0, "stops": 0, "inventory": 0}
+    by_type = {name: 0 for name in TYPE_NAMES}
+    with open_ndjson(os.path.join(args.out, "trains" + suffix), "w") as trains_file, \
+            open_ndjson(os.path.join(args.out, "inventory" + suffix), "w") as inventory_file:
+        for index in range(args.trains):
+            train = generate_train(args.seed, index, grid)
+            write_line(trains_file, train)
+            for record in inventory_records(args.seed, index, train, start_date, args.days):
+                write_line(inventory_file, record)
+                counts["inventory"] += 1
+            counts["trains"] += 1
+            counts["stops"] += len(train["route"])
+            by_type[train["train_type"]] += 1
+            if counts["trains"] % 10000 == 0:
+                print(f"{counts['trains']} trains in {time.perf_counter() - started:.1f}s")
+
+    with open(os.path.join(args.out, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "seed": args.seed,
+            "start_date": start_date.isoformat(),
+            "days": args.days,
+            "suffix": suffix,
+            "counts": counts,
+            "train_types": by_type,
+        }, f, indent=2)
+
+    print(f"Generated {counts['trains']} trains ({counts['stops']} stops, {counts['inventory']} inventory records) "
+          f"over {counts['stations']} stations in {args.out} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Load a directory written by generate_synthetic_timetable.py and
+generate_synthetic_load.py into DynamoDB.
+
+Files are streamed line by line into batch writers, so any size loads in
+flat memory. Stations and trains get the keys the migrate_* scripts give
+them, and every train its train_stops items. Each inventory record becomes
+the seat_inventory coach items of its class, with its booked seats marked
+sold at berths drawn from the record's key; the other files already hold
+table items.
+
+Usage (from backend/mock_api/):
+    python load_synthetic_to_dynamodb.py [directory] [file ...]
+    python load_synthetic_to_dynamodb.py synthetic trains jobs
+"""
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+import boto3
+from dotenv import load_dotenv
+
+from generate_synthetic_timetable import DEFAULT_OUT_DIR, open_ndjson
+from migrate_trains_to_dynamodb import STOPS_TABLE_NAME, build_stop_items
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.core.seat_inventory import SEAT_INVENTORY_TABLE, coach_items  # noqa: E402
+
+# Load AWS credentials from .env in the parent directory
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+# file name: table name
+TABLES = {
+    "stations": "stations",
+    "trains": "trains",
+    "users": "users",
+    "wallets": "wallet",
+    "jobs": "jobs",
+    "bookings": "bookings",
+    "inventory": SEAT_INVENTORY_TABLE,
+}
+
+
+def read_items(path):
+    with open_ndjson(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line, parse_float=Decimal)
+
+
+def sold_berths(record):
+    """Coach number -> berths sold, `booked_seats` of them drawn from the record's key"""
+    coaches, berths = int(record["coaches"]), int(record["berths_per_coach"])
+    rng = random.Random(f"{record['train_id']}:{record['journey_date']}:{record['class']}")
+    sold = {}
+    for seat in rng.sample(range(coaches * berths), int(record["booked_seats"])):
+        sold.setdefault(seat // berths + 1, []).append(seat % berths + 1)
+    return sold
+
+
+def table_items(name, record):
+    if name == "stations":
+        return [{"PK": f"STATION#{record['station_code']}", "SK": "METADATA", **record}]
+    if name == "trains":
+        return [{"PK": f"TRAIN#{record['train_id']}", "SK": "METADATA", **record}]
+    if name == "inventory":
+        return coach_items(record["train_id"], record["journey_date"], record["class"],
+                           int(record["coaches"]), int(record["berths_per_coach"]), sold_berths(record))
+    return [record]
+
+
+def load_file(dynamodb, name, path):
+    table = dynamodb.Table(TABLES[name])
+    stops_table = dynamodb.Table(STOPS_TABLE_NAME) if name == "trains" else None
+    count = 0
+    started = time.perf_counter()
+    stops_writer = stops_table.batch_writer(overwrite_by_pkeys=["PK", "SK"]) if stops_table else contextlib.nullcontext()
+    with table.batch_writer(overwrite_by_pkeys=["PK", "SK"]) as batch, stops_writer as stops_batch:
+        for record in read_items(path):
+            for item in table_items(name, record):
+                batch.put_item(Item=item)
+            if stops_batch:
+                for stop in build_stop_items(record):
+                    stops_batch.put_item(Item=stop)
+            count += 1
+            if count % 10000 == 0:
+                print(f"{name}: {count} items in {time.perf_counter() - started:.0f}s")
+    print(f"Loaded {count} {name} into {TABLES[name]} in {time.perf_counter() - started:.0f}s")
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_OUT_DIR
+    names = sys.argv[2:] or list(TABLES)
+    with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as f:
+        suffix = json.load(f)["suffix"]
+
+    dynamodb = boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "ap-south-1"))
+    for name in names:
+        if name not in TABLES:
+            sys.exit(f"Unknown file {name}; expected one of {', '.join(TABLES)}")
+        path = os.path.join(directory, name + suffix)
+        if not os.path.exists(path):
+            print(f"Skipping {name}: {path} not found")
+            continue
+        load_file(dynamodb, name, path)
+
+
+if __name__ == "__main__":
+    main()
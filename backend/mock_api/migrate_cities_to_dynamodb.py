@@ -2,8 +2,12 @@ import json
 import boto3
 from decimal import Decimal
 import os
+import sys
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app.core.cities_payload import ARTIFACT_PATH, write_artifact
+
 # Load AWS credentials from .env in the parent directory
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
@@ -31,6 +35,16 @@ def put_station_to_dynamodb(table, city):
     }
     table.put_item(Item=item)
 
+def scan_stations(table):
+    items = []
+    scan_kwargs = {}
+    while True:
+        response = table.scan(**scan_kwargs)
+        items.extend(item for item in response.get("Items", []) if item.get("PK", "").startswith("STATION#"))
+        if "LastEvaluatedKey" not in response:
+            return items
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
 def main():
     dynamodb = boto3.resource("dynamodb", region_name="ap-south-1")
     table = dynamodb.Table(TABLE_NAME)
@@ -39,5 +53,9 @@ def main():
         put_station_to_dynamodb(table, city)
         print(f"Inserted station {city['keyword']} ({city.get('name', '')})")
 
+    # The stations changed: regenerate the precomputed /cities payload from the table
+    payload = write_artifact(scan_stations(table))
+    print(f"Wrote {ARTIFACT_PATH} ({len(payload.gzip_body)} bytes gzipped, ETag {payload.etag})")
+
 if __name__ == "__main__":
     main()
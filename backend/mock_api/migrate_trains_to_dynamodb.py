@@ -1,4 +1,5 @@
 import json
+import sys
 import boto3
 from decimal import Decimal
 import os
@@ -10,8 +11,9 @@ load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 # Path to your mock data (relative to this script)
 DB_JSON_PATH = os.path.join(os.path.dirname(__file__), "db.json")
 
-# DynamoDB table name
+# DynamoDB table names
 TABLE_NAME = "trains"
+STOPS_TABLE_NAME = "train_stops"
 
 def load_trains_from_json():
     with open(DB_JSON_PATH, "r", encoding="utf-8") as f:
@@ -27,12 +29,89 @@ def put_train_to_dynamodb(table, train):
     }
     table.put_item(Item=item)
 
+def build_stop_items(train):
+    """
+    One item per (boarding stop, later stop) pair of the train.
+
+    Items are keyed STOP#<origin> / DEST#<destination>#TRAIN#<train_id>, so the
+    trains stopping at A and later at B are exactly the items under STOP#A whose
+    sort key begins with DEST#B#: one Query that reads only those trains, with
+    the lowercase `run_days` left as the only filter. A route of n stops
+    writes n * (n - 1) / 2 items.
+    """
+    route = [s if isinstance(s, str) else s.get("station_code") for s in train.get("route", [])]
+    days = [d.lower() for d in train.get("days_of_run", []) if isinstance(d, str)]
+    first_position = {}
+    for position, station in enumerate(route):
+        if station:
+            first_position.setdefault(station, position)
+
+    items = []
+    for station, position in first_position.items():
+        for destination, destination_position in first_position.items():
+            if destination_position <= position:
+                continue
+            items.append({
+                "PK": f"STOP#{station}",
+                "SK": f"DEST#{destination}#TRAIN#{train['train_id']}",
+                "train_id": str(train["train_id"]),
+                "train_number": str(train.get("train_number", train["train_id"])),
+                "position": position,
+                "destination_position": destination_position,
+                "run_days": days,
+            })
+    return items
+
+def put_stops_to_dynamodb(stops_table, train):
+    with stops_table.batch_writer(overwrite_by_pkeys=["PK", "SK"]) as batch:
+        for item in build_stop_items(train):
+            batch.put_item(Item=item)
+
+def delete_legacy_stop_items(stops_table):
+    """Delete the per-stop items of the old layout (SK TRAIN#<train_id>)"""
+    scan_kwargs = {
+        "FilterExpression": "begins_with(SK, :legacy)",
+        "ExpressionAttributeValues": {":legacy": "TRAIN#"},
+        "ProjectionExpression": "PK, SK",
+    }
+    deleted = 0
+    with stops_table.batch_writer() as batch:
+        while True:
+            response = stops_table.scan(**scan_kwargs)
+            for item in response.get("Items", []):
+                batch.delete_item(Key={"PK": item["PK"], "SK": item["SK"]})
+                deleted += 1
+            if "LastEvaluatedKey" not in response:
+                return deleted
+            scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+def scan_trains_from_dynamodb(table):
+    items = []
+    response = table.scan()
+    items.extend(response.get("Items", []))
+    while "LastEvaluatedKey" in response:
+        response = table.scan(ExclusiveStartKey=response["LastEvaluatedKey"])
+        items.extend(response.get("Items", []))
+    return [item for item in items if item.get("SK") == "METADATA"]
+
 def main():
     dynamodb = boto3.resource("dynamodb", region_name="ap-south-1")
     table = dynamodb.Table(TABLE_NAME)
+    stops_table = dynamodb.Table(STOPS_TABLE_NAME)
+
+    # --stops-only backfills train_stops from the trains already in DynamoDB
+    if "--stops-only" in sys.argv[1:]:
+        trains = scan_trains_from_dynamodb(table)
+        for train in trains:
+            put_stops_to_dynamodb(stops_table, train)
+            print(f"Indexed stops for train {train['train_id']} ({train.get('train_name', '')})")
+        print(f"Deleted {delete_legacy_stop_items(stops_table)} stop items of the old layout")
+        return
+
     trains = load_trains_from_json()
     for train in trains:
         put_train_to_dynamodb(table, train)
+        put_stops_to_dynamodb(stops_table, train)
         print(f"Inserted train {train['train_id']} ({train.get('train_name', '')})")
 
 if __name__ == "__main__":
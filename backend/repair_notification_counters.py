@@ -0,0 +1,71 @@
+import boto3
+import os
+import sys
+from collections import defaultdict
+
+from boto3.dynamodb.conditions import Key
+from dotenv import load_dotenv
+
+from app.core.notification_counters import (
+    NOTIFICATIONS_TABLE,
+    NOTIFICATION_SK_PREFIX,
+    counters_item,
+    tally,
+)
+
+# Load environment variables from .env file
+load_dotenv()
+
+aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID")
+aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY")
+region_name = os.getenv("AWS_REGION", "ap-south-1")
+
+dynamodb = boto3.resource(
+    'dynamodb',
+    aws_access_key_id=aws_access_key_id,
+    aws_secret_access_key=aws_secret_access_key,
+    region_name=region_name
+)
+
+def paginate(call, **kwargs):
+    """Yield the items of every page of a query or scan"""
+    while True:
+        response = call(**kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def count_all(table):
+    """(total, unread) per user over the whole table"""
+    items_by_user = defaultdict(list)
+    for item in paginate(table.scan, ProjectionExpression="PK, SK, #status",
+                         ExpressionAttributeNames={'#status': 'status'}):
+        if item['PK'].startswith("USER#"):
+            items_by_user[item['PK'][len("USER#"):]].append(item)
+    return {user_id: tally(items) for user_id, items in items_by_user.items()}
+
+def count_user(table, user_id):
+    """(total, unread) for one user's partition"""
+    return tally(paginate(
+        table.query,
+        KeyConditionExpression=Key('PK').eq(f"USER#{user_id}") & Key('SK').begins_with(NOTIFICATION_SK_PREFIX),
+        ProjectionExpression="SK, #status",
+        ExpressionAttributeNames={'#status': 'status'}
+    ))
+
+def repair_counters(table, user_ids=None):
+    """Overwrite the counter items with counts taken from the notification items"""
+    if user_ids:
+        counts = {user_id: count_user(table, user_id) for user_id in user_ids}
+    else:
+        counts = count_all(table)
+    with table.batch_writer() as batch:
+        for user_id, (total, unread) in counts.items():
+            batch.put_item(Item=counters_item(user_id, total, unread))
+    print(f"Repair complete: counters rebuilt for {len(counts)} users.")
+
+if __name__ == "__main__":
+    # Run while notification traffic is low: writes landing between the count
+    # and the overwrite are lost from the counters until the next repair
+    repair_counters(dynamodb.Table(NOTIFICATIONS_TABLE), sys.argv[1:])
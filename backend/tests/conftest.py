@@ -0,0 +1,54 @@
+"""
+Shared fixtures: an in-memory DynamoDB (moto) behind app.core.dynamo.
+
+Run from backend/:
+    pip install -r requirements-dev.txt
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+from moto import mock_aws  # noqa: E402
+
+from app.core import dynamo  # noqa: E402
+
+
+def create_table(name, indexes=()):
+    """Create a PK/SK table with the given (index_name, hash_key, range_key or None) GSIs"""
+    attributes = {"PK", "SK"}
+    table = {
+        "TableName": name,
+        "KeySchema": [{"AttributeName": "PK", "KeyType": "HASH"}, {"AttributeName": "SK", "KeyType": "RANGE"}],
+        "BillingMode": "PAY_PER_REQUEST",
+    }
+    gsis = []
+    for index_name, hash_key, range_key in indexes:
+        schema = [{"AttributeName": hash_key, "KeyType": "HASH"}]
+        attributes.add(hash_key)
+        if range_key:
+            schema.append({"AttributeName": range_key, "KeyType": "RANGE"})
+            attributes.add(range_key)
+        gsis.append({"IndexName": index_name, "KeySchema": schema, "Projection": {"ProjectionType": "ALL"}})
+    if gsis:
+        table["GlobalSecondaryIndexes"] = gsis
+    table["AttributeDefinitions"] = [{"AttributeName": a, "AttributeType": "S"} for a in sorted(attributes)]
+    dynamo.get_client().create_table(**table)
+    return dynamo.get_table(name)
+
+
+@pytest.fixture
+def aws():
+    """Fresh moto DynamoDB with the shared session, resource, client and table caches reset"""
+    with mock_aws():
+        dynamo._session = dynamo._resource = dynamo._client = None
+        dynamo._tables.clear()
+        yield
+        dynamo._session = dynamo._resource = dynamo._client = None
+        dynamo._tables.clear()
@@ -0,0 +1,40 @@
+import asyncio
+
+from app.core import dynamo, notification_counters
+from app.core.notification_counters import NOTIFICATIONS_TABLE, counters_key, counters_update
+from app.schemas.notification import NotificationStatus
+from conftest import create_table
+
+
+def notification(user_id, notification_id, status=NotificationStatus.UNREAD.value):
+    return {"PK": f"USER#{user_id}", "SK": f"NOTIF#{notification_id}", "status": status}
+
+
+def test_first_write_after_deploy_seeds_counters_from_history(aws):
+    table = create_table(NOTIFICATIONS_TABLE)
+    # History written before the counters existed
+    table.put_item(Item=notification("u1", "n1"))
+    table.put_item(Item=notification("u1", "n2"))
+    table.put_item(Item=notification("u1", "n3", NotificationStatus.READ.value))
+
+    failed = asyncio.run(notification_counters.commit([
+        dynamo.transact_put(NOTIFICATIONS_TABLE, notification("u1", "n4"), condition="attribute_not_exists(SK)"),
+        counters_update("u1", total=1, unread=1),
+    ]))
+
+    assert failed is None
+    assert asyncio.run(notification_counters.get_counts("u1")) == (4, 3)
+
+
+def test_condition_failure_of_the_callers_item_is_returned(aws):
+    table = create_table(NOTIFICATIONS_TABLE)
+    table.put_item(Item=notification("u1", "n1"))
+    asyncio.run(notification_counters.get_counts("u1"))
+
+    failed = asyncio.run(notification_counters.commit([
+        dynamo.transact_put(NOTIFICATIONS_TABLE, notification("u1", "n1"), condition="attribute_not_exists(SK)"),
+        counters_update("u1", total=1, unread=1),
+    ]))
+
+    assert failed[0]["Code"] == "ConditionalCheckFailed"
+    assert table.get_item(Key=counters_key("u1"))["Item"]["total_count"] == 1
@@ -0,0 +1,28 @@
+import asyncio
+
+from app.core import dynamo, outbox
+from conftest import create_table
+
+delivered = []
+
+
+@outbox.handler("test")
+async def deliver(payload, event_id):
+    delivered.append((payload["value"], event_id))
+
+
+def test_write_commits_business_item_and_record_then_drain_delivers(aws):
+    table = create_table(outbox.OUTBOX_TABLE, [(outbox.PENDING_INDEX, "pending_shard", "available_at")])
+    create_table("bookings")
+    record = outbox.record("test", {"value": "booked"})
+
+    asyncio.run(outbox.write([dynamo.transact_put("bookings", {"PK": "BOOKING#b1", "SK": "METADATA"})], [record]))
+    assert dynamo.get_table("bookings").get_item(Key={"PK": "BOOKING#b1", "SK": "METADATA"})["Item"]
+
+    result = asyncio.run(outbox.OutboxDispatcher().drain_once())
+
+    assert result["processed"] == 1
+    assert delivered == [("booked", record["event_id"])]
+    stored = table.get_item(Key={"PK": record["PK"], "SK": "METADATA"})["Item"]
+    assert stored["status"] == outbox.STATUS_DELIVERED
+    assert "pending_shard" not in stored
@@ -0,0 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core import pnr
+from conftest import create_table
+
+
+def test_allocators_lease_disjoint_blocks(aws):
+    create_table(pnr.SEQUENCES_TABLE)
+    allocators = [pnr.PnrAllocator(min_block=5, max_block=20) for _ in range(2)]
+
+    pnrs = [allocators[index % 3 % 2].allocate() for index in range(200)]
+
+    assert len(set(pnrs)) == 200
+    assert all(pnr.has_valid_check_digit(number) for number in pnrs)
+    assert allocators[0].leases > 1 and allocators[1].leases > 1
+
+
+def test_threads_share_the_leased_block(aws):
+    create_table(pnr.SEQUENCES_TABLE)
+    allocator = pnr.PnrAllocator(min_block=5, max_block=20)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        pnrs = list(pool.map(lambda _: allocator.allocate(), range(200)))
+
+    assert len(set(pnrs)) == 200
@@ -0,0 +1,37 @@
+import pytest
+
+from app.core import dynamo, seat_inventory
+from app.core.seat_inventory import SEAT_INVENTORY_TABLE, TRAINS_TABLE, SoldOutError
+from conftest import create_table
+
+
+@pytest.fixture
+def inventory(aws):
+    create_table(SEAT_INVENTORY_TABLE)
+    create_table("bookings")
+    trains = create_table(TRAINS_TABLE)
+    trains.put_item(Item={"PK": "TRAIN#12001", "SK": "METADATA", "coaches": {"1A": 1}})
+
+
+def test_reserve_commits_seats_with_the_booking_and_release_returns_them(inventory):
+    seats = seat_inventory.reserve(
+        "12001", "2025-06-01", "1A", 2,
+        build_items=lambda seats: [dynamo.transact_put("bookings", {"PK": "BOOKING#b1", "SK": "METADATA", "seats": seats})],
+    )
+
+    assert len(set(seats)) == 2
+    booking = dynamo.get_table("bookings").get_item(Key={"PK": "BOOKING#b1", "SK": "METADATA"})["Item"]
+    assert booking["seats"] == seats
+    assert seat_inventory.availability("12001", "2025-06-01", "1A") == seat_inventory.BERTHS_PER_COACH["1A"] - 2
+
+    assert seat_inventory.release("12001", "2025-06-01", "1A", seats) == 2
+    assert seat_inventory.availability("12001", "2025-06-01", "1A") == seat_inventory.BERTHS_PER_COACH["1A"]
+
+
+def test_reserve_never_sells_more_than_the_coach_holds(inventory):
+    berths = seat_inventory.BERTHS_PER_COACH["1A"]
+    sold = seat_inventory.reserve("12001", "2025-06-01", "1A", berths)
+
+    assert len(set(sold)) == berths
+    with pytest.raises(SoldOutError):
+        seat_inventory.reserve("12001", "2025-06-01", "1A", 1)
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1 import dynamodb_user
+from app.api.v1.dynamodb_user import UserUpdateRequest
+from app.core import notification_counters, passwords, phone_index, user_index
+from conftest import create_table
+
+
+@pytest.fixture
+def users(aws):
+    table = create_table(phone_index.USERS_TABLE)
+    for email, phone in (("a@example.com", "9000000001"), ("b@example.com", "9000000002")):
+        table.put_item(Item={"PK": f"USER#{email}", "SK": "PROFILE", "Email": email, "Phone": phone})
+        table.put_item(Item={**phone_index.phone_key(phone), "user_pk": f"USER#{email}"})
+    return table
+
+
+def test_phone_change_moves_the_lookup_item(users):
+    dynamodb_user.update_user_profile("a@example.com", UserUpdateRequest(Phone="9000000003"))
+
+    assert phone_index.find_user("9000000003")["Email"] == "a@example.com"
+    assert phone_index.find_user("9000000001") is None
+    assert "Item" not in users.get_item(Key=phone_index.phone_key("9000000001"))
+
+
+def test_phone_change_to_a_number_in_use_is_rejected(users):
+    with pytest.raises(HTTPException) as error:
+        dynamodb_user.update_user_profile("a@example.com", UserUpdateRequest(Phone="9000000002"))
+
+    assert error.value.status_code == 409
+    assert phone_index.find_user("9000000001")["Email"] == "a@example.com"
+
+
+def signup(email, phone):
+    return dynamodb_user.UserCreateRequest(
+        PK=f"USER#{email}", SK="PROFILE", UserID=f"id-{email}", Email=email, Username=email.split("@")[0],
+        PasswordHash="correct horse", CreatedAt=datetime.utcnow(), LastLoginAt=None, IsActive=True,
+        OtherAttributes={"FullName": "Test User", "Role": "user"}, Phone=phone,
+    )
+
+
+@pytest.fixture
+def signup_tables(users):
+    create_table(dynamodb_user.WALLET_TABLE, [("user_id-index", "user_id", None)])
+    create_table(notification_counters.NOTIFICATIONS_TABLE)
+    return users
+
+
+def test_signup_writes_profile_lookups_and_wallet(signup_tables):
+    response = dynamodb_user.create_user(signup("c@example.com", "9000000003"))
+
+    profile = signup_tables.get_item(Key={"PK": "USER#c@example.com", "SK": "PROFILE"})["Item"]
+    assert profile["wallet_id"] == response["user"]["wallet_id"]
+    assert asyncio.run(passwords.verify_password("correct horse", profile["PasswordHash"]))[0]
+    assert phone_index.find_user("9000000003")["Email"] == "c@example.com"
+    assert "Item" in signup_tables.get_item(Key=user_index.user_id_key("id-c@example.com"))
+
+
+def test_signup_with_a_phone_in_use_is_rejected(signup_tables):
+    with pytest.raises(HTTPException) as error:
+        dynamodb_user.create_user(signup("c@example.com", "9000000001"))
+
+    assert error.value.status_code == 409
+    assert "Item" not in signup_tables.get_item(Key={"PK": "USER#c@example.com", "SK": "PROFILE"})
+
+
+def test_login_rehashes_an_outdated_hash_and_records_the_login(users, monkeypatch):
+    old_hash = passwords._hash("correct horse", 4)
+    users.update_item(Key={"PK": "USER#a@example.com", "SK": "PROFILE"},
+                      UpdateExpression="SET PasswordHash = :hash", ExpressionAttributeValues={":hash": old_hash})
+    monkeypatch.setattr(passwords, "BCRYPT_ROUNDS", 5)
+
+    asyncio.run(dynamodb_user.login_user(dynamodb_user.UserLoginRequest(email="a@example.com", password="correct horse")))
+
+    profile = users.get_item(Key={"PK": "USER#a@example.com", "SK": "PROFILE"})["Item"]
+    assert passwords.hash_rounds(profile["PasswordHash"]) == 5
+    assert profile["LastLoginAt"]
+
+
+def test_login_is_recorded_when_the_password_changed_during_the_rehash(users, monkeypatch):
+    users.update_item(Key={"PK": "USER#a@example.com", "SK": "PROFILE"},
+                      UpdateExpression="SET PasswordHash = :hash", ExpressionAttributeValues={":hash": "old"})
+
+    async def verify_password(password, stored_hash):
+        # Another request changes the password between the read and the rehash
+        users.update_item(Key={"PK": "USER#a@example.com", "SK": "PROFILE"},
+                          UpdateExpression="SET PasswordHash = :hash", ExpressionAttributeValues={":hash": "changed"})
+        return True, "rehashed"
+
+    monkeypatch.setattr(passwords, "verify_password", verify_password)
+
+    asyncio.run(dynamodb_user.login_user(dynamodb_user.UserLoginRequest(email="a@example.com", password="correct horse")))
+
+    profile = users.get_item(Key={"PK": "USER#a@example.com", "SK": "PROFILE"})["Item"]
+    assert profile["PasswordHash"] == "changed"
+    assert profile["LastLoginAt"]
@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+import pytest
+
+from app.core import wallet_ledger
+from app.core.wallet_ledger import DEBIT, CREDIT, InsufficientBalanceError
+from conftest import create_table
+
+
+@pytest.fixture
+def wallets(aws):
+    wallet_table = create_table(wallet_ledger.WALLET_TABLE)
+    create_table(wallet_ledger.WALLET_TRANSACTIONS_TABLE)
+    wallet_table.put_item(Item={"PK": "WALLET#w1", "SK": "METADATA", "balance": Decimal("100")})
+    return wallet_table
+
+
+def test_credit_and_debit_through_the_shared_client(wallets):
+    wallet_ledger.apply_transaction("w1", CREDIT, "50", {"PK": "TXN#t1", "SK": "METADATA", "amount": Decimal("50")})
+    wallet_ledger.apply_transaction("w1", DEBIT, "120", {"PK": "TXN#t2", "SK": "METADATA", "amount": Decimal("120")})
+
+    assert wallets.get_item(Key={"PK": "WALLET#w1", "SK": "METADATA"})["Item"]["balance"] == Decimal("30")
+    with pytest.raises(InsufficientBalanceError):
+        wallet_ledger.apply_transaction("w1", DEBIT, "31", {"PK": "TXN#t3", "SK": "METADATA"})
+
+
+def test_legacy_string_balance_is_converted(wallets):
+    wallets.put_item(Item={"PK": "WALLET#w2", "SK": "METADATA", "balance": "80.50"})
+
+    wallet_ledger.apply_transaction("w2", DEBIT, "0.50")
+
+    assert wallets.get_item(Key={"PK": "WALLET#w2", "SK": "METADATA"})["Item"]["balance"] == Decimal("80")
@@ -0,0 +1,169 @@
+"""
+Booking commits for the cron runner.
+
+A job's booking used to take about ten sequential round trips once a train
+was chosen: booking put, payment put, booking update with the payment ID,
+job update, a 100 ms sleep, wallet query, wallet transaction put, payment
+update, wallet update. A failure part way through left a confirmed booking
+without a payment, or a pending payment that was never debited.
+
+Now the seats, the booking (with its payment_id), the payment, the wallet
+debit and its transaction item, and the job's completion are one
+TransactWriteItems call, built on SeatInventory.reserve:
+
+- seat inventory: `ADD sold :berths` on each coach, conditioned on the
+  berths being free (reserve re-reads and picks again on conflict)
+- wallet:  `ADD balance :delta` conditioned on `balance >= :amount`, and
+  the transaction item put (WalletLedger.build_transact_items)
+- booking, payment: puts conditioned on `attribute_not_exists(PK)`
+- job: `SET job_status = Completed ... REMOVE due_date, due_time` and the
+  lease, conditioned on the job still being In Progress under this
+  runner's lease (so a runner whose lease expired and was taken over, or
+  whose job was cancelled meanwhile, books nothing)
+
+Either all of it is written or none of it is.
+"""
+import logging
+import random
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from app.services.seat_inventory import SeatInventory, marshal
+from app.services.wallet_ledger import DEBIT, WalletLedger
+
+logger = logging.getLogger(__name__)
+
+MAX_COMMIT_ATTEMPTS = 5
+
+
+class JobLeaseLostError(Exception):
+    pass
+
+
+class BookingCommit:
+    """
+    Books a job's seats, payment and completion in one transaction.
+
+    The transaction is committed by the seat inventory's low-level client.
+
+    Args:
+        seat_inventory: SeatInventory the seats are sold from
+        wallet_ledger: WalletLedger building the wallet debit items
+        bookings_table: Name of the bookings table
+        payments_table: Name of the payments table
+        jobs_table: Name of the jobs table
+    """
+
+    def __init__(self, seat_inventory: SeatInventory, wallet_ledger: WalletLedger,
+                 bookings_table: str, payments_table: str, jobs_table: str):
+        self.seat_inventory = seat_inventory
+        self.wallet_ledger = wallet_ledger
+        self.bookings_table = bookings_table
+        self.payments_table = payments_table
+        self.jobs_table = jobs_table
+
+    def job_update(self, job_id: str, lease_owner: str, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """Update marking the job Completed with `updates`, while `lease_owner` holds it In Progress"""
+        names = {'#status': 'job_status'}
+        values = {':completed': 'Completed', ':in_progress': 'In Progress', ':owner': lease_owner}
+        assignments = ["#status = :completed"]
+        for index, (key, value) in enumerate(updates.items()):
+            if key == 'job_status':
+                continue
+            names[f'#f{index}'] = key
+            values[f':v{index}'] = value
+            assignments.append(f"#f{index} = :v{index}")
+        return {
+            'Update': {
+                'TableName': self.jobs_table,
+                'Key': marshal({'PK': f"JOB#{job_id}", 'SK': "METADATA"}),
+                # Completed jobs leave the due-time index and release their lease
+                'UpdateExpression': "SET " + ", ".join(assignments) + " REMOVE due_date, due_time, lease_owner, lease_expires_at",
+                'ConditionExpression': "#status = :in_progress AND lease_owner = :owner",
+                'ExpressionAttributeNames': names,
+                'ExpressionAttributeValues': marshal(values),
+            }
+        }
+
+    def commit(self, job_id: str, lease_owner: str, booking_item: Dict[str, Any], payment_item: Dict[str, Any],
+               job_updates: Dict[str, Any], wallet_id: Optional[str] = None,
+               txn_item: Optional[Dict[str, Any]] = None) -> Tuple[List[str], float]:
+        """
+        Reserve seats for the booking's passengers and write everything in one transaction
+
+        The passengers' seats are set in booking_item['passengers'].
+
+        Args:
+            job_id: Job to mark Completed
+            lease_owner: Runner holding the job's lease
+            booking_item: Booking to put, with payment_id set
+            payment_item: Payment to put, with its final status
+            job_updates: Attributes to set on the job besides job_status
+            wallet_id: Wallet to debit by the payment amount, or None for other payment methods
+            txn_item: Wallet transaction item, written with the debit
+
+        Returns:
+            The seat labels in passenger order, and the commit latency in milliseconds
+
+        Raises:
+            SoldOutError: Fewer seats are left than passengers
+            InventoryContentionError: Other bookings kept taking the chosen berths
+            WalletNotFoundError: The wallet does not exist
+            InsufficientBalanceError: The wallet balance is less than the amount
+            JobLeaseLostError: The job is no longer In Progress under this runner's lease
+        """
+        passengers = booking_item['passengers']
+        amount = Decimal(str(payment_item['amount']))
+        updated_at = booking_item['updated_at']
+        committed: List[Dict[str, Any]] = []
+
+        def build_items(seats: List[str]) -> List[Dict[str, Any]]:
+            for passenger, seat in zip(passengers, seats):
+                passenger['seat'] = seat
+            items = []
+            if wallet_id:
+                items += self.wallet_ledger.build_transact_items(
+                    {'PK': f"WALLET#{wallet_id}", 'SK': "METADATA"}, DEBIT, amount, txn_item, updated_at
+                )
+            items += [
+                {'Put': {'TableName': self.bookings_table, 'Item': marshal(booking_item),
+                         'ConditionExpression': "attribute_not_exists(PK)"}},
+                {'Put': {'TableName': self.payments_table, 'Item': marshal(payment_item),
+                         'ConditionExpression': "attribute_not_exists(PK)"}},
+                self.job_update(job_id, lease_owner, job_updates),
+            ]
+            committed[:] = items
+            return items
+
+        started = time.perf_counter()
+        for attempt in range(MAX_COMMIT_ATTEMPTS):
+            try:
+                seats = self.seat_inventory.reserve(
+                    booking_item['train_number'], booking_item['journey_date'], booking_item['class'],
+                    len(passengers), build_items=build_items,
+                    preferences=[passenger.get('berth_preference') for passenger in passengers]
+                )
+                return seats, (time.perf_counter() - started) * 1000
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'TransactionCanceledException':
+                    raise
+                # The booking items follow the inventory updates, so count back from the end
+                reasons = (e.response.get('CancellationReasons') or [])[-len(committed):]
+                codes = [reason.get('Code') for reason in reasons]
+                if not committed or len(codes) != len(committed):
+                    raise
+                if codes[-1] == 'ConditionalCheckFailed':
+                    raise JobLeaseLostError(f"Job {job_id} is no longer In Progress under the lease of {lease_owner}")
+                if wallet_id and codes[0] == 'ConditionalCheckFailed':
+                    # Raises unless the wallet had a legacy string balance, converted now
+                    self.wallet_ledger.check_failed(wallet_id, amount, reasons[0])
+                elif 'TransactionConflict' not in codes:
+                    raise
+                if attempt == MAX_COMMIT_ATTEMPTS - 1:
+                    raise
+                logger.info(f"Booking commit for job {job_id} cancelled ({', '.join(str(code) for code in codes)}), "
+                            f"retrying (attempt {attempt + 1})")
+                time.sleep(random.uniform(0, min(0.02 * (2 ** attempt), 0.5)))
@@ -4,15 +4,29 @@ import json
 import logging
 import time
 import uuid
-import random
 import decimal
 import traceback
 import re
+import threading
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional, Union, Tuple
 from decimal import Decimal
-from boto3.dynamodb.conditions import Key, Attr
+from boto3.dynamodb.conditions import Key
 from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+
+from app.services.job_event_buffer import JobEventBuffer
+from app.services.wallet_ledger import WalletLedger, WalletNotFoundError
+from app.services.seat_inventory import SeatInventory
+from app.services.pnr_allocator import PnrAllocator
+from app.services.booking_commit import BookingCommit, JobLeaseLostError
+from app.services.job_executor import (
+    JobExecutor,
+    CRON_SAFETY_MARGIN_SECONDS,
+    STATUS_SUCCEEDED,
+    STATUS_TIMED_OUT,
+    STATUS_DEFERRED,
+)
 
 # Define IST timezone (UTC+5:30)
 IST = timezone(timedelta(hours=5, minutes=30))
@@ -36,12 +50,89 @@ PAYMENTS_TABLE = os.getenv('PAYMENTS_TABLE', 'payments')
 WALLET_TABLE = os.getenv('WALLET_TABLE', 'wallet')
 WALLET_TRANSACTIONS_TABLE = os.getenv('WALLET_TRANSACTIONS_TABLE', 'wallet_transactions')
 TRAINS_TABLE = os.getenv('TRAINS_TABLE', 'trains')
+TRAIN_STOPS_TABLE = os.getenv('TRAIN_STOPS_TABLE', 'train_stops')
+SEAT_INVENTORY_TABLE = os.getenv('SEAT_INVENTORY_TABLE', 'seat_inventory')
+SEQUENCES_TABLE = os.getenv('SEQUENCES_TABLE', 'sequences')
+
+# Sparse due-time index on the jobs table (see backend/app/core/job_due_index.py)
+JOBS_DUE_INDEX = os.getenv('JOBS_DUE_INDEX', 'due_date-due_time-index')
+MAX_EXECUTION_ATTEMPTS = 5
+# How long a claimed job stays leased to its runner; must exceed the Lambda timeout.
+# A job left In Progress by a runner that died is picked up again once its lease expires.
+CRON_JOB_LEASE_SECONDS = int(os.getenv('CRON_JOB_LEASE_SECONDS', '300'))
 
 # Get AWS region from environment variable
 AWS_REGION = os.getenv('REGION', os.getenv('AWS_REGION', 'ap-south-1'))
 
-# Initialize DynamoDB resource
-dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
+class ThreadLocalDynamoDB:
+    """DynamoDB resource proxy giving each thread its own boto3 session and resource.
+
+    boto3 sessions and resources are not thread safe, and jobs run on a thread pool.
+    With low_level=True the proxy wraps a plain DynamoDB client instead, for calls built
+    from DynamoDB attribute values (the resource's meta.client would serialize them again).
+    """
+    def __init__(self, region_name: str, low_level: bool = False):
+        self.region_name = region_name
+        self.low_level = low_level
+        self._local = threading.local()
+
+    def _resource(self):
+        resource = getattr(self._local, 'resource', None)
+        if resource is None:
+            session = boto3.session.Session()
+            if self.low_level:
+                resource = session.client('dynamodb', region_name=self.region_name)
+            else:
+                resource = session.resource('dynamodb', region_name=self.region_name)
+            self._local.resource = resource
+        return resource
+
+    def __getattr__(self, name):
+        return getattr(self._resource(), name)
+
+# Initialize DynamoDB resource, and the low-level client for transactions
+dynamodb = ThreadLocalDynamoDB(AWS_REGION)
+dynamodb_client = ThreadLocalDynamoDB(AWS_REGION, low_level=True)
+
+# Per-invocation buffer for job events, flushed with BatchWriteItem
+job_event_buffer = JobEventBuffer(dynamodb, JOB_LOGS_TABLE)
+
+# Atomic wallet debits (balance change + transaction item in one TransactWriteItems call)
+wallet_ledger = WalletLedger(dynamodb_client, WALLET_TABLE, WALLET_TRANSACTIONS_TABLE)
+
+# Seats sold per coach with conditional updates, committed together with the booking
+seat_inventory = SeatInventory(dynamodb_client, SEAT_INVENTORY_TABLE, TRAINS_TABLE)
+
+# PNRs from blocks leased from the shared sequence, unique across concurrent runners
+pnr_allocator = PnrAllocator(dynamodb_client, SEQUENCES_TABLE)
+
+# Seats, booking, payment, wallet debit and job completion written in one TransactWriteItems call
+booking_commit = BookingCommit(seat_inventory, wallet_ledger, BOOKINGS_TABLE, PAYMENTS_TABLE, JOBS_TABLE)
+
+def job_due_key(job: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """
+    Due-time key (due_date, due_time) for the jobs due index, or None if the job should not run
+    
+    Scheduled jobs are keyed on job_date/job_execution_time; Failed jobs with
+    attempts left and In Progress jobs are keyed at 00:00 so the next run retries them
+    (In Progress ones once their lease has expired).
+    """
+    job_date = job.get('job_date')
+    if not job_date:
+        return None
+    
+    status = job.get('job_status')
+    if status == 'Scheduled':
+        return f"DUE#{job_date}", job.get('job_execution_time') or '00:00'
+    if status == 'In Progress':
+        return f"DUE#{job_date}", '00:00'
+    if status == 'Failed':
+        if int(job.get('execution_attempts') or 0) >= MAX_EXECUTION_ATTEMPTS:
+            return None
+        if job.get('failure_reason') == 'Cancelled by user':
+            return None
+        return f"DUE#{job_date}", '00:00'
+    return None
 
 # Helper class for JSON serialization of Decimal types
 class DecimalEncoder(json.JSONEncoder):
@@ -82,43 +173,6 @@ def ist_to_utc(ist_dt: datetime) -> datetime:
         ist_dt = ist_dt.replace(tzinfo=IST)
     return ist_dt.astimezone(timezone.utc)
 
-# Generate seat numbers for passengers
-def generate_seat_numbers(train_number: str, travel_class: str, passenger_count: int) -> List[str]:
-    """
-        Generate seat numbers for passengers based on train number and travel class.
-                
-        Args:
-        train_number: The train number (e.g., '12345')
-        travel_class: The travel class (e.g., '3A', '2A', 'SL')
-        passenger_count: Number of seat numbers to generate
-                    
-        Returns:
-        List of seat numbers as strings
-    """
-                
-        # Define seat patterns based on class
-    class_patterns = {
-            '1A': {'prefix': 'A', 'rows': range(1, 10), 'seats': range(1, 5)},  # 1st AC
-            '2A': {'prefix': 'B', 'rows': range(1, 15), 'seats': range(1, 5)},  # 2nd AC
-            '3A': {'prefix': 'C', 'rows': range(1, 21), 'seats': range(1, 9)},  # 3rd AC
-            'SL': {'prefix': 'S', 'rows': range(1, 26), 'seats': range(1, 9)},  # Sleeper
-            'CC': {'prefix': 'D', 'rows': range(1, 16), 'seats': range(1, 6)},  # Chair Car
-            '2S': {'prefix': 'E', 'rows': range(1, 31), 'seats': range(1, 9)},  # 2nd Seater
-        }
-                
-        # Get the pattern for the requested class, default to SL if not found
-    pattern = class_patterns.get(travel_class.upper(), class_patterns['SL'])
-                
-        # Generate seat numbers
-    seat_numbers = []
-    for _ in range(passenger_count):
-        row = random.choice(pattern['rows'])
-        seat = random.choice(pattern['seats'])
-        seat_number = f"{pattern['prefix']}{row:02d}{seat:02d}"
-        seat_numbers.append(seat_number)
-                
-    return seat_numbers
-
 # Helper function to safely get values from dictionaries
 def safe_get(dictionary: Optional[Dict], key: str, default: Any = None) -> Any:
     """Safely get a value from a dictionary, returning default if dictionary is None or key doesn't exist"""
@@ -162,6 +216,8 @@ class CronjobService:
         """
         Log a job event to the job logs table
         
+        Events are buffered and written in batches; see flush_job_events.
+        
         Args:
             job_id: Job ID
             event_type: Event type
@@ -177,8 +233,8 @@ class CronjobService:
                 logger.error("Cannot log job event: job_id is empty")
                 return False
                 
-            # Create event ID with microsecond precision to avoid collisions
-            timestamp = int(time.time() * 1000)  # millisecond precision
+            # Create event ID with millisecond precision, strictly increasing per job to keep ordering
+            timestamp = job_event_buffer.next_timestamp(job_id)
             event_id = f"EVENT{timestamp}_{job_id}"
             
             # Create event item
@@ -219,20 +275,10 @@ class CronjobService:
                 
                 event_item['details'] = sanitized_details
             
-            # Log the item being inserted for debugging
-            logger.info(f"Inserting job event: {event_type} for job {job_id} with ID {event_id}")
-            
-            # Put event item into job logs table
-            job_logs_table = dynamodb.Table(JOB_LOGS_TABLE)
-            response = job_logs_table.put_item(Item=event_item)
-            
-            # Check if the put_item was successful
-            if response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 200:
-                logger.info(f"Logged event for job {job_id}: {event_type} - {description}")
-                return True
-            else:
-                logger.error(f"Failed to log event for job {job_id}: {event_type}. DynamoDB response: {response}")
-                return False
+            # Buffer the event; it is written with the next BatchWriteItem flush
+            job_event_buffer.add(event_item)
+            logger.info(f"Logged event for job {job_id}: {event_type} - {description}")
+            return True
                 
         except Exception as e:
             logger.error(f"Error logging job event: {str(e)}")
@@ -241,6 +287,23 @@ class CronjobService:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return False
     
+    @staticmethod
+    def flush_job_events(job_id: Optional[str] = None) -> int:
+        """
+        Write buffered job events to the job logs table
+        
+        Args:
+            job_id: Only flush events of this job, None to flush all
+            
+        Returns:
+            Number of events written
+        """
+        try:
+            return job_event_buffer.flush(job_id)
+        except Exception as e:
+            logger.error(f"Error flushing job events: {str(e)}")
+            return 0
+    
     @staticmethod
     def record_job_execution(job_id: str, execution_status: str, details: Dict[str, Any] = None) -> bool:
         """
@@ -281,6 +344,8 @@ class CronjobService:
                     execution_item['pnr'] = details['pnr']
                 if 'error_message' in details:
                     execution_item['error_message'] = details['error_message']
+                if 'commit_latency_ms' in details:
+                    execution_item['commit_latency_ms'] = Decimal(f"{details['commit_latency_ms']:.1f}")
                 
                 # Add execution attempt number if available
                 if 'execution_attempts' in details:
@@ -376,245 +441,307 @@ class CronjobService:
         return station_str.strip()
     
     @staticmethod
-    def _search_trains_for_date(job_id: str, origin: str, destination: str, date_str: str, day_of_week: str, travel_class: str) -> Tuple[List[Dict], List[str]]:
+    def _query_trains_via_stops(origin_code: str, destination_code: str) -> List[Dict]:
         """
-        Helper method to search for trains with available seats for a specific date
+        Find trains that stop at origin_code and later at destination_code
+        
+        Queries the origin/destination pair items of the train stops table
+        (STOP#<origin>, sort key beginning DEST#<destination>#), then batch-reads
+        the train items.
+        
+        Args:
+            origin_code: Origin station code
+            destination_code: Destination station code
+            
+        Returns:
+            List of raw train items, ordered by train ID
+        """
+        stops_table = dynamodb.Table(TRAIN_STOPS_TABLE)
+        query_kwargs = {
+            'KeyConditionExpression': Key('PK').eq(f"STOP#{origin_code}") & Key('SK').begins_with(f"DEST#{destination_code}#")
+        }
+        stops = []
+        response = stops_table.query(**query_kwargs)
+        stops.extend(response.get('Items', []))
+        while 'LastEvaluatedKey' in response:
+            response = stops_table.query(ExclusiveStartKey=response['LastEvaluatedKey'], **query_kwargs)
+            stops.extend(response.get('Items', []))
+        
+        train_ids = list(dict.fromkeys(str(stop['train_id']) for stop in stops))
+        trains = []
+        for start in range(0, len(train_ids), 100):
+            request = {
+                TRAINS_TABLE: {
+                    'Keys': [{'PK': f"TRAIN#{train_id}", 'SK': 'METADATA'} for train_id in train_ids[start:start + 100]]
+                }
+            }
+            while request:
+                response = dynamodb.batch_get_item(RequestItems=request)
+                trains.extend(response.get('Responses', {}).get(TRAINS_TABLE, []))
+                request = response.get('UnprocessedKeys') or None
+        
+        order = {train_id: idx for idx, train_id in enumerate(train_ids)}
+        trains.sort(key=lambda train: order.get(str(train.get('train_id')), len(order)))
+        return trains
+    
+    @staticmethod
+    def _search_trains_for_dates(job_id: str, origin: str, destination: str, dates: List[str], travel_class: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Search for trains with available seats on several dates in one pass
+        
+        The candidate trains are fetched, unmarshalled and checked for route,
+        class and seats once; each date is then evaluated against the trains'
+        days of run. No job events are logged here, see _log_train_search_result.
         
         Args:
             job_id: Job ID for logging
             origin: Origin station code or station name with code
             destination: Destination station code or station name with code
-            date_str: Date string in YYYY-MM-DD format
-            day_of_week: Day of week (e.g., Monday, Tuesday)
+            dates: Date strings in YYYY-MM-DD format, in order of preference
             travel_class: Travel class code (e.g., 1A, 2A, 3A, SL, 2S)
             
         Returns:
-            List of available trains sorted by departure time (earliest first)
+            Map of date -> {'trains': available trains sorted by departure time (earliest first),
+            'errors': reasons trains were rejected, 'day_of_week', 'trains_checked',
+            'route_matches', 'day_matches'}, in the order of `dates`
         """
-        try:
-            # Initialize error collection
-            error_details = []
-            
-            # Extract station codes from station names if needed (format: "STATION NAME (CODE)")
-            origin_code = CronjobService._extract_station_code(origin)
-            destination_code = CronjobService._extract_station_code(destination)
-            
-            logger.info(f"Searching trains from {origin} (code: {origin_code}) to {destination} (code: {destination_code}) for {date_str}")
-            
-            # Query trains table by source station
-            trains_table = dynamodb.Table(TRAINS_TABLE)
-            response = trains_table.query(
-                IndexName="source-destination-station-index",
-                KeyConditionExpression=Key("source_station").eq(origin_code)
-            )
-            
-            # Process results
-            trains = response.get('Items', [])
-            logger.info(f"Found {len(trains)} trains with source station {origin_code} for date {date_str}")
-            
-            if not trains:
-                error_msg = f"No trains found with source station {origin_code}"
-                error_details.append(error_msg)
-                logger.warning(error_msg)
-            
-            # Filter trains by destination, day of run, and seat availability
-            available_trains = []
-            trains_with_route_match = []
-            trains_with_day_match = []
-            
-            for train in trains:
-                try:
-                    # Unmarshal DynamoDB item
-                    train = unmarshal_dynamodb_item(train)
-                    train_id = safe_get(train, 'train_number') or safe_get(train, 'train_id')
-                    train_name = safe_get(train, 'train_name', 'Unknown')
-                    
-                    # Check if train route includes both origin and destination
-                    # Try different possible route field names
-                    route_stations = None
-                    for field in ['route_stations', 'route', 'stations']:
-                        if field in train and isinstance(train[field], list):
-                            route_stations = train[field]
-                            break
-                    
-                    if not route_stations:
-                        error_msg = f"Train {train_id} ({train_name}) has no valid route information"
-                        error_details.append(error_msg)
-                        logger.debug(error_msg)
-                        continue
-                    
-                    # Use route directly if it's already a list of station codes
-                    processed_route = route_stations
-                    
-                    # Check if train route includes both stations in correct order
-                    if origin_code not in processed_route:
-                        error_msg = f"Train {train_id} ({train_name}) does not pass through origin station {origin} ({origin_code})"
-                        error_details.append(error_msg)
-                        logger.debug(error_msg)
-                        continue
-                        
-                    if destination_code not in processed_route:
-                        error_msg = f"Train {train_id} ({train_name}) does not pass through destination station {destination} ({destination_code})"
-                        error_details.append(error_msg)
-                        logger.debug(error_msg)
-                        continue
-                    
-                    origin_index = processed_route.index(origin_code)
-                    destination_index = processed_route.index(destination_code)
-                    
-                    if origin_index >= destination_index:
-                        error_msg = f"Train {train_id} ({train_name}) route order mismatch: origin at {origin_index}, destination at {destination_index}"
-                        error_details.append(error_msg)
-                        logger.debug(error_msg)
-                        continue
-                        
-                    # Train has matching route
-                    trains_with_route_match.append(train_id)
-                    logger.info(f"Train {train_id} ({train_name}) has matching route: {processed_route}")
-                    
-                    # Check if train runs on journey day
-                    days_of_run = train.get('days_of_run', [])
-                    if not isinstance(days_of_run, list) or not days_of_run:
-                        error_msg = f"Train {train_id} ({train_name}) has invalid days_of_run format: {days_of_run}"
-                        error_details.append(error_msg)
-                        logger.debug(error_msg)
-                        continue
-                    
-                    # Get day of week abbreviation (Mon, Tue, Wed, etc.)
-                    day_abbr = datetime.strptime(date_str, '%Y-%m-%d').strftime('%a')
-                    
-                    # Check if the train runs on this day
-                    day_match = False
-                    for run_day in days_of_run:
-                        if isinstance(run_day, str) and run_day.lower() == day_abbr.lower():
-                            day_match = True
-                            break
-                    
-                    if not day_match:
-                        error_msg = f"Train {train_id} ({train_name}) does not run on {day_abbr} (runs on: {', '.join(days_of_run)})"
-                        error_details.append(error_msg)
-                        logger.debug(error_msg)
-                        continue
-                        
-                    # Train runs on the requested day
-                    trains_with_day_match.append(train_id)
-                    logger.info(f"Train {train_id} ({train_name}) runs on {day_abbr} (days: {days_of_run})")
+        # Extract station codes from station names if needed (format: "STATION NAME (CODE)")
+        origin_code = CronjobService._extract_station_code(origin)
+        destination_code = CronjobService._extract_station_code(destination)
+        
+        logger.info(f"Searching trains from {origin} (code: {origin_code}) to {destination} (code: {destination_code}) for {', '.join(dates)}")
+        
+        # Query the stop-level index for trains stopping at origin and later at destination
+        trains = CronjobService._query_trains_via_stops(origin_code, destination_code)
+        logger.info(f"Found {len(trains)} trains stopping at {origin_code} then {destination_code}")
+        
+        # Evaluate the date-independent checks once per train. Each entry is
+        # (train, train_id, train_name, route_error, run_days, class_or_seat_error)
+        candidates = []
+        for train in trains:
+            try:
+                # Unmarshal DynamoDB item
+                train = unmarshal_dynamodb_item(train)
+                train_id = safe_get(train, 'train_number') or safe_get(train, 'train_id')
+                train_name = safe_get(train, 'train_name', 'Unknown')
+                route_error = None
+                run_days = set()
+                class_error = None
+                
+                # Check if train route includes both origin and destination
+                # Try different possible route field names
+                route_stations = None
+                for field in ['route_stations', 'route', 'stations']:
+                    if field in train and isinstance(train[field], list):
+                        route_stations = train[field]
+                        break
+                
+                days_of_run = train.get('days_of_run', [])
+                if not route_stations:
+                    route_error = f"Train {train_id} ({train_name}) has no valid route information"
+                elif origin_code not in route_stations:
+                    route_error = f"Train {train_id} ({train_name}) does not pass through origin station {origin} ({origin_code})"
+                elif destination_code not in route_stations:
+                    route_error = f"Train {train_id} ({train_name}) does not pass through destination station {destination} ({destination_code})"
+                elif route_stations.index(origin_code) >= route_stations.index(destination_code):
+                    route_error = f"Train {train_id} ({train_name}) route order mismatch: origin at {route_stations.index(origin_code)}, destination at {route_stations.index(destination_code)}"
+                elif not isinstance(days_of_run, list) or not days_of_run:
+                    route_error = f"Train {train_id} ({train_name}) has invalid days_of_run format: {days_of_run}"
+                else:
+                    logger.info(f"Train {train_id} ({train_name}) has matching route: {route_stations}")
+                    run_days = {run_day.lower() for run_day in days_of_run if isinstance(run_day, str)}
                     
                     # Check if the requested class is even available on this train
                     classes_available = safe_get(train, 'classes_available', [])
-                    class_available = travel_class in classes_available
-                    
-                    if not class_available:
-                        error_msg = f"Train {train_id} ({train_name}) does not offer {travel_class} class. Available classes: {classes_available}"
-                        error_details.append(error_msg)
-                        logger.info(error_msg)
-                        continue
-                    
-                    # Check seat availability for the requested class
-                    # Structure: {seat_availability: {"2S": 143, "3E": 24}}
-                    seat_availability = safe_get(train, 'seat_availability', {})
-                    available_seats = safe_get(seat_availability, travel_class, 0)
-                    
-                    # If no seats found in seat_availability, try alternative fields
-                    if not available_seats:
-                        # Try class_availability if it exists
-                        class_availability = safe_get(train, 'class_availability', {})
-                        available_seats = safe_get(class_availability, travel_class, 0)
-                    
-                    # If seats are available, add to results
-                    if available_seats > 0:
-                        train['available_seats'] = available_seats
-                        available_trains.append(train)
-                        logger.info(f"Found train {train_id} ({train_name}) with {available_seats} seats in {travel_class} class")
+                    if travel_class not in classes_available:
+                        class_error = f"Train {train_id} ({train_name}) does not offer {travel_class} class. Available classes: {classes_available}"
                     else:
-                        error_msg = f"Train {train_id} ({train_name}) has no available seats in {travel_class} class"
-                        error_details.append(error_msg)
-                        logger.info(error_msg)
-                except Exception as train_error:
-                    logger.error(f"Error processing train {safe_get(train, 'train_id', 'unknown')}: {str(train_error)}")
-                    continue
+                        # Check seat availability for the requested class
+                        # Structure: {seat_availability: {"2S": 143, "3E": 24}}
+                        seat_availability = safe_get(train, 'seat_availability', {})
+                        available_seats = safe_get(seat_availability, travel_class, 0)
+                        
+                        # If no seats found in seat_availability, try alternative fields
+                        if not available_seats:
+                            class_availability = safe_get(train, 'class_availability', {})
+                            available_seats = safe_get(class_availability, travel_class, 0)
+                        
+                        if available_seats > 0:
+                            train['available_seats'] = available_seats
+                        else:
+                            class_error = f"Train {train_id} ({train_name}) has no available seats in {travel_class} class"
+                
+                if route_error:
+                    logger.debug(route_error)
+                candidates.append((train, train_id, train_name, route_error, run_days, class_error))
+            except Exception as train_error:
+                logger.error(f"Error processing train {safe_get(train, 'train_id', 'unknown')}: {str(train_error)}")
+                continue
+        
+        # Evaluate every date against the pre-checked candidates
+        results = {}
+        for date_str in dates:
+            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+            day_abbr = date_obj.strftime('%a')
+            day_key = day_abbr.lower()
             
-            logger.info(f"Found {len(trains_with_route_match)} trains with matching route")
-            logger.info(f"Found {len(trains_with_day_match)} trains running on {day_of_week}")
-            logger.info(f"Found {len(available_trains)} trains with available seats in {travel_class} class for {date_str}")
+            available_trains = []
+            error_details = []
+            route_matches = 0
+            day_matches = 0
+            for train, train_id, train_name, route_error, run_days, class_error in candidates:
+                if route_error:
+                    error_details.append(route_error)
+                    continue
+                route_matches += 1
+                
+                if day_key not in run_days:
+                    error_details.append(f"Train {train_id} ({train_name}) does not run on {day_abbr} (runs on: {', '.join(str(d) for d in train.get('days_of_run', []))})")
+                    continue
+                day_matches += 1
+                
+                if class_error:
+                    error_details.append(class_error)
+                    continue
+                
+                # Copy so that a selected train can be modified per date
+                available_trains.append(dict(train))
             
             # Sort trains by departure time (earliest first)
-            if available_trains:
-                available_trains.sort(key=lambda x: safe_get(x, 'departure_time', '23:59'))
+            available_trains.sort(key=lambda x: safe_get(x, 'departure_time', '23:59'))
             
             # If no trains found, add a summary error message
             if not available_trains and not error_details:
                 error_details.append(f"No trains found from {origin} to {destination} on {date_str} for {travel_class} class")
             
-            # Log the search results to the job log table
-            if not available_trains and error_details:
-                error_summary = "\n- " + "\n- ".join(error_details)
-                CronjobService.log_job_event(
-                    job_id,
-                    'TRAIN_SEARCH_DETAILS',
-                    f"No trains found for {date_str}. Reasons:{error_summary}",
-                    {
-                        'origin': origin,
-                        'destination': destination,
-                        'date': date_str,
-                        'day_of_week': day_of_week,
-                        'travel_class': travel_class,
-                        'trains_checked': len(trains),
-                        'route_matches': len(trains_with_route_match),
-                        'day_matches': len(trains_with_day_match),
-                        'error_count': len(error_details)
-                    }
-                )
-            elif available_trains:
-                # Log successful train search
-                CronjobService.log_job_event(
-                    job_id,
-                    'TRAIN_SEARCH_SUCCESS',
-                    f"Found {len(available_trains)} trains with available seats for {date_str}",
-                    {
-                        'origin': origin,
-                        'destination': destination,
-                        'date': date_str,
-                        'day_of_week': day_of_week,
-                        'travel_class': travel_class,
-                        'trains_found': len(available_trains),
-                        'trains_checked': len(trains)
-                    }
-                )
-                
-            return available_trains, error_details
-            
-        except Exception as e:
-            error_msg = f"Error searching trains for date {date_str}: {str(e)}"
-            logger.error(error_msg)
-            
-            # Log the exception to the job log table
+            logger.info(f"Found {len(available_trains)} trains with available seats in {travel_class} class for {date_str} ({route_matches} route matches, {day_matches} running on {day_abbr})")
+            results[date_str] = {
+                'trains': available_trains,
+                'errors': error_details,
+                'day_of_week': date_obj.strftime('%A'),
+                'trains_checked': len(trains),
+                'route_matches': route_matches,
+                'day_matches': day_matches
+            }
+        
+        return results
+    
+    @staticmethod
+    def _log_train_search_result(job_id: str, origin: str, destination: str, date_str: str, travel_class: str, result: Dict[str, Any]) -> None:
+        """
+        Log the outcome of a train search for one date to the job log table
+        
+        Args:
+            job_id: Job ID for logging
+            origin: Origin station as given in the job
+            destination: Destination station as given in the job
+            date_str: Date string in YYYY-MM-DD format
+            travel_class: Travel class code
+            result: Entry for date_str returned by _search_trains_for_dates
+        """
+        available_trains = result['trains']
+        error_details = result['errors']
+        if not available_trains and error_details:
+            error_summary = "\n- " + "\n- ".join(error_details)
             CronjobService.log_job_event(
                 job_id,
-                'TRAIN_SEARCH_ERROR',
-                f"Error searching trains for {date_str}: {str(e)}",
+                'TRAIN_SEARCH_DETAILS',
+                f"No trains found for {date_str}. Reasons:{error_summary}",
                 {
                     'origin': origin,
                     'destination': destination,
                     'date': date_str,
-                    'day_of_week': day_of_week,
+                    'day_of_week': result['day_of_week'],
                     'travel_class': travel_class,
-                    'error_type': type(e).__name__,
-                    'error_message': str(e)
+                    'trains_checked': result['trains_checked'],
+                    'route_matches': result['route_matches'],
+                    'day_matches': result['day_matches'],
+                    'error_count': len(error_details)
                 }
             )
+        elif available_trains:
+            # Log successful train search
+            CronjobService.log_job_event(
+                job_id,
+                'TRAIN_SEARCH_SUCCESS',
+                f"Found {len(available_trains)} trains with available seats for {date_str}",
+                {
+                    'origin': origin,
+                    'destination': destination,
+                    'date': date_str,
+                    'day_of_week': result['day_of_week'],
+                    'travel_class': travel_class,
+                    'trains_found': len(available_trains),
+                    'trains_checked': result['trains_checked']
+                }
+            )
+    
+    @staticmethod
+    def _log_train_search_error(job_id: str, origin: str, destination: str, dates: List[str], travel_class: str, error: Exception) -> List[str]:
+        """
+        Log a failed train search to the job log table
+        
+        Returns:
+            Error details for the caller
+        """
+        date_label = ', '.join(dates)
+        error_msg = f"Error searching trains for date {date_label}: {str(error)}"
+        logger.error(error_msg)
+        
+        # Log the exception to the job log table
+        CronjobService.log_job_event(
+            job_id,
+            'TRAIN_SEARCH_ERROR',
+            f"Error searching trains for {date_label}: {str(error)}",
+            {
+                'origin': origin,
+                'destination': destination,
+                'date': date_label,
+                'travel_class': travel_class,
+                'error_type': type(error).__name__,
+                'error_message': str(error)
+            }
+        )
+        return [error_msg]
+    
+    @staticmethod
+    def _search_trains_for_date(job_id: str, origin: str, destination: str, date_str: str, day_of_week: str, travel_class: str) -> Tuple[List[Dict], List[str]]:
+        """
+        Helper method to search for trains with available seats for a specific date
+        
+        Thin wrapper over _search_trains_for_dates for a single date.
+        
+        Args:
+            job_id: Job ID for logging
+            origin: Origin station code or station name with code
+            destination: Destination station code or station name with code
+            date_str: Date string in YYYY-MM-DD format
+            day_of_week: Day of week (e.g., Monday, Tuesday)
+            travel_class: Travel class code (e.g., 1A, 2A, 3A, SL, 2S)
             
-            return [], [error_msg]
+        Returns:
+            List of available trains sorted by departure time (earliest first)
+        """
+        try:
+            result = CronjobService._search_trains_for_dates(job_id, origin, destination, [date_str], travel_class)[date_str]
+            CronjobService._log_train_search_result(job_id, origin, destination, date_str, travel_class, result)
+            return result['trains'], result['errors']
+        except Exception as e:
+            return [], CronjobService._log_train_search_error(job_id, origin, destination, [date_str], travel_class, e)
     
     @staticmethod
-    def update_job_status(job_id: str, status: str, additional_data: Dict[str, Any] = None) -> bool:
+    def update_job_status(job_id: str, status: str, additional_data: Dict[str, Any] = None,
+                          lease_owner: Optional[str] = None) -> bool:
         """
         Update the status of a job
         
+        Any status other than In Progress releases the job's lease.
+        
         Args:
             job_id: Job ID
             status: New job status
             additional_data: Additional data to update
+            lease_owner: Only update the job while this runner holds its lease
             
         Returns:
             True if successful, False otherwise
@@ -669,12 +796,41 @@ class CronjobService:
             elif additional_data is not None:
                 logger.warning(f"Ignoring invalid additional_data format: {type(additional_data)}")
             
+            # Keep the due-time index key in sync with the new status
+            updated_job = dict(get_response['Item'])
+            if additional_data and isinstance(additional_data, dict):
+                updated_job.update(additional_data)
+            updated_job['job_status'] = status
+            due_key = job_due_key(updated_job)
+            removed = []
+            if due_key:
+                update_expression += ", due_date = :due_date, due_time = :due_time"
+                expression_values[':due_date'], expression_values[':due_time'] = due_key
+            else:
+                removed += ['due_date', 'due_time']
+            if status != 'In Progress':
+                removed += ['lease_owner', 'lease_expires_at']
+            if removed:
+                update_expression += " REMOVE " + ", ".join(removed)
+            
+            update_kwargs = {}
+            if lease_owner is not None:
+                update_kwargs['ConditionExpression'] = "lease_owner = :lease_owner"
+                expression_values[':lease_owner'] = lease_owner
+            
             # Update the job
-            jobs_table.update_item(
-                Key={'PK': pk, 'SK': sk},
-                UpdateExpression=update_expression,
-                ExpressionAttributeValues=expression_values
-            )
+            try:
+                jobs_table.update_item(
+                    Key={'PK': pk, 'SK': sk},
+                    UpdateExpression=update_expression,
+                    ExpressionAttributeValues=expression_values,
+                    **update_kwargs
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                logger.warning(f"Not updating job {job_id} to {status}: its lease is no longer held by {lease_owner}")
+                return False
             
             # Log the status update
             logger.info(f"Updated job {job_id} status to {status}")
@@ -692,10 +848,77 @@ class CronjobService:
             logger.error(f"Error updating job status: {str(e)}")
             return False
             
+    @staticmethod
+    def claim_job(job: Dict[str, Any], lease_owner: str, lease_seconds: int = CRON_JOB_LEASE_SECONDS) -> Optional[int]:
+        """
+        Atomically claim a job for this runner and mark it In Progress
+        
+        The claim is a conditional update setting lease_owner and lease_expires_at
+        (epoch seconds); it succeeds only if the job is runnable and nobody holds an
+        unexpired lease on it, so overlapping runners never execute the same job.
+        
+        Args:
+            job: The job to claim
+            lease_owner: ID of this runner
+            lease_seconds: Lease length; must exceed the Lambda timeout
+            
+        Returns:
+            The job's execution attempt number, or None if another runner holds the job
+            or it is no longer runnable
+        """
+        job_id = job.get('job_id')
+        now = int(time.time())
+        current_time = get_current_ist_time().isoformat()
+        assignments = ("job_status = :in_progress, lease_owner = :owner, lease_expires_at = :expires, "
+                       "last_execution_time = :now_iso, updated_at = :now_iso")
+        expression_values = {
+            ':in_progress': 'In Progress',
+            ':scheduled': 'Scheduled',
+            ':failed': 'Failed',
+            ':cancelled': 'Cancelled by user',
+            ':owner': lease_owner,
+            ':expires': now + lease_seconds,
+            ':now': now,
+            ':now_iso': current_time,
+            ':one': 1,
+        }
+        due_key = job_due_key({**job, 'job_status': 'In Progress'})
+        if due_key:
+            assignments += ", due_date = :due_date, due_time = :due_time"
+            expression_values[':due_date'], expression_values[':due_time'] = due_key
+        
+        try:
+            response = dynamodb.Table(JOBS_TABLE).update_item(
+                Key={'PK': f"JOB#{job_id}", 'SK': "METADATA"},
+                UpdateExpression=f"SET {assignments} ADD execution_attempts :one",
+                ConditionExpression=(
+                    "attribute_exists(PK) AND job_status IN (:scheduled, :failed, :in_progress) "
+                    "AND (attribute_not_exists(failure_reason) OR failure_reason <> :cancelled) "
+                    "AND (attribute_not_exists(lease_expires_at) OR lease_expires_at < :now)"
+                ),
+                ExpressionAttributeValues=expression_values,
+                ReturnValues='UPDATED_NEW'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            logger.info(f"Job {job_id} not claimed: it is leased by another runner or no longer runnable")
+            return None
+        
+        execution_attempts = int(response['Attributes']['execution_attempts'])
+        logger.info(f"Claimed job {job_id} for {lease_owner} until {now + lease_seconds} (attempt {execution_attempts})")
+        CronjobService.log_job_event(
+            job_id,
+            'STATUS_UPDATED',
+            "Job status updated to In Progress",
+            {'status': 'In Progress', 'lease_owner': lease_owner, 'lease_expires_at': now + lease_seconds}
+        )
+        return execution_attempts
+    
     @staticmethod
     def scan_jobs_for_execution() -> List[Dict[str, Any]]:
         """
-        Scan the jobs table for jobs that need to be executed
+        Fetch the jobs that need to be executed from the jobs due-time index
         
         Returns:
             List of jobs that need to be executed
@@ -710,69 +933,39 @@ class CronjobService:
             time_window_start = (current_dt - timedelta(minutes=20)).strftime("%H:%M")
             time_window_end = (current_dt + timedelta(minutes=20)).strftime("%H:%M")
             
-            logger.info(f"Scanning for jobs with date >= {today_ist} in IST timezone")
             logger.info(f"Current IST time: {current_time_ist}, execution window: {time_window_start} to {time_window_end}")
             
+            # Query the sparse due-time index: every runnable job due today up to the end of the window.
+            # Failed and In Progress jobs are keyed at 00:00 so they are always included.
+            due_until = time_window_end if time_window_end >= current_time_ist else "23:59"
+            logger.info(f"Querying {JOBS_DUE_INDEX} for DUE#{today_ist} up to {due_until}")
+            
             jobs_table = dynamodb.Table(JOBS_TABLE)
             scheduled_jobs = []
+            query_kwargs = {
+                'IndexName': JOBS_DUE_INDEX,
+                'KeyConditionExpression': Key('due_date').eq(f"DUE#{today_ist}") & Key('due_time').lte(due_until)
+            }
+            response = jobs_table.query(**query_kwargs)
+            while True:
+                for item in response.get('Items', []):
+                    try:
+                        job = convert_dynamodb_item(item)
+                        if job.get('job_status') != 'Scheduled':
+                            logger.info(f"Found job with status '{job.get('job_status')}': {job.get('job_id')} ({job.get('execution_attempts', 0)} execution attempts)")
+                        scheduled_jobs.append(job)
+                    except Exception as job_error:
+                        logger.error(f"Error processing due job item: {str(job_error)}")
+                        continue
+                if 'LastEvaluatedKey' not in response:
+                    break
+                response = jobs_table.query(ExclusiveStartKey=response['LastEvaluatedKey'], **query_kwargs)
             
-            # 1. Scan for scheduled jobs
-            logger.info("Scanning for jobs with status 'Scheduled'")
-            response = jobs_table.scan(
-                FilterExpression=(
-                    Attr('job_status').eq('Scheduled') & 
-                    Attr('job_date').gte(today_ist)
-                )
-            )
-            
-            for item in response.get('Items', []):
-                try:
-                    job = convert_dynamodb_item(item)
-                    scheduled_jobs.append(job)
-                except Exception as job_error:
-                    logger.error(f"Error processing scheduled job item: {str(job_error)}")
-                    continue
-            
-            # 2. Scan for failed jobs with execution_attempts < 5
-            logger.info("Scanning for jobs with status 'Failed' and execution_attempts < 5")
-            failed_response = jobs_table.scan(
-                FilterExpression=(
-                    Attr('job_status').eq('Failed') & 
-                    Attr('job_date').gte(today_ist) &
-                    (Attr('execution_attempts').lt(5) | Attr('execution_attempts').not_exists())
-                )
-            )
-            
-            for item in failed_response.get('Items', []):
-                try:
-                    job = convert_dynamodb_item(item)
-                    execution_attempts = job.get('execution_attempts', 0)
-                    logger.info(f"Found failed job {job.get('job_id')} with {execution_attempts} execution attempts")
-                    scheduled_jobs.append(job)
-                except Exception as job_error:
-                    logger.error(f"Error processing failed job item: {str(job_error)}")
-                    continue
-            
-            # 3. Scan for In Progress jobs that might be stuck
-            logger.info("Scanning for jobs with status 'In Progress' that might be stuck")
-            in_progress_response = jobs_table.scan(
-                FilterExpression=(
-                    Attr('job_status').eq('In Progress') & 
-                    Attr('job_date').gte(today_ist)
-                )
-            )
-            
-            for item in in_progress_response.get('Items', []):
-                try:
-                    job = convert_dynamodb_item(item)
-                    logger.info(f"Found job with status 'In Progress': {job.get('job_id')}")
-                    scheduled_jobs.append(job)
-                except Exception as job_error:
-                    logger.error(f"Error processing in-progress job item: {str(job_error)}")
-                    continue
+            logger.info(f"Found {len(scheduled_jobs)} due jobs in the index")
             
             # Process and validate all collected jobs
             validated_jobs = []
+            now = int(time.time())
             for job in scheduled_jobs:
                 try:
                     # Validate job has all required fields
@@ -789,14 +982,21 @@ class CronjobService:
                     job_id = job.get('job_id', 'UNKNOWN')
                     job_status = job.get('job_status')
                     
-                    if execution_attempts >= 5 and job_status == 'Failed':
+                    if execution_attempts >= MAX_EXECUTION_ATTEMPTS and job_status == 'Failed':
                         logger.warning(f"Skipping job {job_id} with {execution_attempts} failed attempts")
                         continue
                     
                     # Check if job is scheduled for today in IST
                     job_date = job.get('job_date')
                     
-                    # For In Progress or Failed jobs, always include them for retry
+                    # In Progress jobs are being run by another runner until their lease expires;
+                    # after that (or without a lease) the runner is presumed dead and the job is retried
+                    lease_expires_at = job.get('lease_expires_at')
+                    if job_status == 'In Progress' and lease_expires_at is not None and int(lease_expires_at) >= now:
+                        logger.info(f"Skipping job {job_id} leased to {job.get('lease_owner')} until {lease_expires_at}")
+                        continue
+                    
+                    # For In Progress jobs with an expired lease or Failed jobs, include them for retry
                     if job_status in ['In Progress', 'Failed']:
                         logger.info(f"Including {job_status} job {job_id} for execution")
                         validated_jobs.append(job)
@@ -834,12 +1034,15 @@ class CronjobService:
             return []
     
     @staticmethod
-    def execute_job(job: Dict[str, Any]) -> bool:
+    def execute_job(job: Dict[str, Any], lease_owner: Optional[str] = None) -> bool:
         """
         Execute a job by creating a booking
         
+        The job is claimed first; if another runner holds its lease it is skipped.
+        
         Args:
             job: The job to execute
+            lease_owner: ID of this runner, a new one if not given
             
         Returns:
             bool: True if job execution was successful, False otherwise
@@ -853,16 +1056,13 @@ class CronjobService:
             logger.error("Job missing job_id")
             return False
             
+        lease_owner = lease_owner or str(uuid.uuid4())
         try:
-            # Get current execution attempts and increment
-            execution_attempts = job.get('execution_attempts', 0)
-            execution_attempts += 1
-            
-            # Update job status to In Progress and increment execution attempts
-            CronjobService.update_job_status(job_id, 'In Progress', {
-                'execution_attempts': execution_attempts,
-                'last_execution_time': get_current_ist_time().isoformat()
-            })
+            # Claim the job (In Progress, leased to this runner, execution attempts incremented);
+            # overlapping runners that selected the same job skip it
+            execution_attempts = CronjobService.claim_job(job, lease_owner)
+            if execution_attempts is None:
+                return False
             
             # Log job event
             CronjobService.log_job_event(
@@ -896,7 +1096,7 @@ class CronjobService:
                     'error_message': error_msg,
                     'execution_attempts': execution_attempts,
                     'last_execution_time': get_current_ist_time().isoformat()
-                })
+                }, lease_owner=lease_owner)
                 CronjobService.log_job_event(job_id, 'EXECUTION_FAILED', error_msg)
                 return False
                 
@@ -1006,12 +1206,29 @@ class CronjobService:
                     journey_datetime = datetime.strptime(journey_date, '%Y-%m-%d')
                     day_of_week = journey_datetime.strftime('%A')
                     
-                    # Search for trains on the original journey date
-                    available_trains, error_details = CronjobService._search_trains_for_date(
-                        job_id, origin, destination, journey_date, day_of_week, travel_class
-                    )
+                    # Search the original journey date and, if allowed, all alternate dates in one pass
+                    search_dates = [journey_date]
+                    if auto_book_alternate_date:
+                        search_dates += [(journey_datetime + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, max_days_to_check)]
+                    try:
+                        search_results = CronjobService._search_trains_for_dates(
+                            job_id, origin, destination, search_dates, travel_class
+                        )
+                    except Exception as search_error:
+                        search_errors = CronjobService._log_train_search_error(
+                            job_id, origin, destination, search_dates, travel_class, search_error
+                        )
+                        search_results = {
+                            date: {'trains': [], 'errors': search_errors} for date in search_dates
+                        }
                     
-                    # Note: The _search_trains_for_date method now handles logging errors to job_logs table
+                    # Log the result for the original journey date
+                    available_trains = search_results[journey_date]['trains']
+                    error_details = search_results[journey_date]['errors']
+                    if 'trains_checked' in search_results[journey_date]:
+                        CronjobService._log_train_search_result(
+                            job_id, origin, destination, journey_date, travel_class, search_results[journey_date]
+                        )
                     
                     if available_trains:
                         # Found trains on original date
@@ -1057,10 +1274,13 @@ class CronjobService:
                                 f"Searching for trains on alternate date: {next_date} ({next_day})"
                             )
                             
-                            # Search for trains on alternate date
-                            alternate_trains, date_errors = CronjobService._search_trains_for_date(
-                                job_id, origin, destination, next_date, next_day, travel_class
-                            )
+                            # Use the result computed in the multi-date search
+                            alternate_trains = search_results[next_date]['trains']
+                            date_errors = search_results[next_date]['errors']
+                            if 'trains_checked' in search_results[next_date]:
+                                CronjobService._log_train_search_result(
+                                    job_id, origin, destination, next_date, travel_class, search_results[next_date]
+                                )
                             
                             # Add any new errors to the all_errors list
                             for error in date_errors:
@@ -1152,11 +1372,11 @@ class CronjobService:
                             'job_status': 'Failed',
                             'failure_reason': failure_reason,
                             'failure_time': datetime.now(IST).isoformat(),
-                            'execution_attempts': safe_get(job, 'execution_attempts', 0) + 1
+                            'execution_attempts': execution_attempts
                         }
                         
                         # Update the job status in DynamoDB
-                        CronjobService.update_job_status(job_id, 'Failed', job_update_data)
+                        CronjobService.update_job_status(job_id, 'Failed', job_update_data, lease_owner=lease_owner)
                         return False
                 except Exception as search_error:
                     error_message = f"Error during train search: {str(search_error)}"
@@ -1203,11 +1423,11 @@ class CronjobService:
                             'job_status': 'Failed',
                             'failure_reason': failure_reason,
                             'failure_time': datetime.now(IST).isoformat(),
-                            'execution_attempts': safe_get(job, 'execution_attempts', 0) + 1
+                            'execution_attempts': execution_attempts
                         }
                         
                         # Update the job status in DynamoDB
-                        CronjobService.update_job_status(job_id, 'Failed', job_update_data)
+                        CronjobService.update_job_status(job_id, 'Failed', job_update_data, lease_owner=lease_owner)
                         return False
                     
                     return False
@@ -1417,7 +1637,7 @@ class CronjobService:
             CronjobService.update_job_status(job_id, 'Failed', {
                 'error_message': error_msg,
                 'failure_time': get_current_ist_time().isoformat()
-            })
+            }, lease_owner=lease_owner)
             
             # Log job event
             CronjobService.log_job_event(
@@ -1442,15 +1662,15 @@ class CronjobService:
         try:
             # Generate booking ID using UUID for consistency with example
             booking_id = str(uuid.uuid4())
-            current_datetime = get_current_ist_time()
-            pnr = f"PNR{current_datetime.strftime('%y%m%d%H%M%S')}"  # Format: PNRyymmddHHMMSS
+            pnr = pnr_allocator.allocate()
+            payment_id = str(uuid.uuid4())
+            payment_method = safe_get(job, 'payment_method', 'wallet')
+            current_time = get_current_ist_time().isoformat()
             
-            # Process passengers to ensure proper serialization and assign seat numbers
+            # Process passengers to ensure proper serialization; seats are assigned by the inventory
             sanitized_passengers = []
-            passenger_count = len([p for p in passengers if isinstance(p, dict)])
-            seat_numbers = generate_seat_numbers(train_id, travel_class, passenger_count)
             
-            for idx, passenger in enumerate(passengers):
+            for passenger in passengers:
                 if isinstance(passenger, dict):
                     # Convert any float values to Decimal
                     sanitized_passenger = {}
@@ -1460,10 +1680,6 @@ class CronjobService:
                         else:
                             sanitized_passenger[key] = value
                     
-                    # Assign seat number if available
-                    if idx < len(seat_numbers):
-                        sanitized_passenger['seat'] = seat_numbers[idx]
-                    
                     sanitized_passengers.append(sanitized_passenger)
                 else:
                     logger.warning(f"Skipping invalid passenger format: {type(passenger)}")
@@ -1489,24 +1705,18 @@ class CronjobService:
                 'total_amount': str(total_fare),  # Add total_amount field as string
                 'price_details': price_details,  # Add price_details object from calculation
                 'payment_status': 'paid',  # Match frontend lowercase value
-                'payment_method': safe_get(job, 'payment_method', 'wallet'),
+                'payment_method': payment_method,
+                'payment_id': payment_id,
                 'booking_date': get_current_ist_time().strftime('%Y-%m-%d'),
                 'booking_time': get_current_ist_time().strftime('%H:%M:%S'),
                 'booking_email': safe_get(job, 'booking_email', ''),
                 'booking_phone': safe_get(job, 'booking_phone', ''),
-                'created_at': get_current_ist_time().isoformat(),
-                'updated_at': get_current_ist_time().isoformat(),
+                'created_at': current_time,
+                'updated_at': current_time,
             }
             
-            bookings_table = dynamodb.Table(BOOKINGS_TABLE)
-            bookings_table.put_item(Item=booking_item)
-            
-            logger.info(f"Created booking with ID: {booking_id}")
-            
-            # Create payment record with initial status
-            payment_id = str(uuid.uuid4())
-            current_time = get_current_ist_time().isoformat()
-            payment_table = dynamodb.Table(PAYMENTS_TABLE)
+            # Payment is written already settled: the wallet debit commits with it
+            transaction_id = str(uuid.uuid4())
             payment_item = {
                 'PK': f"PAYMENT#{payment_id}",
                 'SK': "METADATA",
@@ -1514,259 +1724,126 @@ class CronjobService:
                 'user_id': user_id,
                 'booking_id': booking_id,
                 'amount': str(total_fare),  # Match frontend string format
-                'payment_method': safe_get(job, 'payment_method', 'wallet'),
-                'payment_status': 'pending',  # Initial status before wallet transaction
-                'initiated_at': current_time
-                # transaction_reference and completed_at will be added after wallet transaction
+                'payment_method': payment_method,
+                'payment_status': 'success',
+                'initiated_at': current_time,
+                'completed_at': current_time,
+                'transaction_reference': transaction_id,
+                'gateway_response': {
+                    'method': payment_method,
+                    'status': 'success',
+                    'timestamp': current_time,
+                    'transaction_id': transaction_id
+                }
             }
-            payment_table.put_item(Item=payment_item)
-            
-            logger.info(f"Created payment with ID: {payment_id}")
             
-            # Update booking with payment ID (matching frontend Step 5)
-            bookings_table.update_item(
-                Key={'PK': f"BOOKING#{booking_id}", 'SK': "METADATA"},
-                UpdateExpression="SET payment_id = :payment_id",
-                ExpressionAttributeValues={
-                    ':payment_id': payment_id
+            # Find the wallet to debit; the job fails before anything is written if there is none
+            wallet_id = None
+            transaction_item = None
+            if safe_get(job, 'payment_method') == 'wallet':
+                wallet_response = dynamodb.Table(WALLET_TABLE).query(
+                    IndexName="user_id-index",
+                    KeyConditionExpression=Key('user_id').eq(user_id),
+                    Limit=1
+                )
+                wallet_id = (wallet_response.get('Items') or [{}])[0].get('wallet_id')
+                if not wallet_id:
+                    raise WalletNotFoundError(f"Wallet not found for user {user_id}")
+                
+                # Create transaction with UUID format to match frontend
+                transaction_item = {
+                    'PK': f"WALLET#{wallet_id}",
+                    'SK': f"TXN#{transaction_id}",
+                    'txn_id': transaction_id,
+                    'wallet_id': wallet_id,
+                    'user_id': user_id,
+                    'amount': str(total_fare),  # Convert to string to match frontend format
+                    'type': 'debit',  # Match frontend key
+                    'source': 'booking',  # Match frontend key
+                    'notes': f"Payment for booking {pnr} on {train_name}",  # Match frontend key
+                    'reference_id': booking_id,
+                    'status': 'success',  # Match frontend value
+                    'created_at': current_time,
                 }
-            )
             
-            # Update job with booking details
-            CronjobService.update_job_status(
-                job_id, 
-                'Completed', 
+            # Sell the seats and write the booking, payment, wallet debit and job completion
+            # in one transaction; nothing is written if any of it fails
+            seat_numbers, commit_latency_ms = booking_commit.commit(
+                job_id,
+                lease_owner,
+                booking_item,
+                payment_item,
                 {
                     'booking_id': booking_id,
                     'pnr': pnr,
-                    'payment_id': payment_id,  # Include payment ID
-                    'completed_at': get_current_ist_time().isoformat()
-                }
+                    'payment_id': payment_id,
+                    'execution_attempts': execution_attempts,
+                    'last_execution_time': current_time,
+                    'completion_time': current_time,
+                    'completed_at': current_time,
+                    'updated_at': current_time
+                },
+                wallet_id=wallet_id,
+                txn_item=transaction_item
             )
-                
+            
+            logger.info(f"Committed booking {booking_id} (PNR {pnr}, payment {payment_id}, seats {', '.join(seat_numbers)}) "
+                        f"for job {job_id} in {commit_latency_ms:.1f} ms")
+            
+            CronjobService.log_job_event(
+                job_id,
+                'STATUS_UPDATED',
+                "Job status updated to Completed",
+                {'status': 'Completed'}
+            )
+            
             # Log booking creation
             CronjobService.log_job_event(
                 job_id, 
                 'BOOKING_CREATED', 
                 f"Created booking with ID: {booking_id}, payment ID: {payment_id}",
-                {'booking_id': booking_id, 'pnr': pnr, 'payment_id': payment_id}
+                {'booking_id': booking_id, 'pnr': pnr, 'payment_id': payment_id,
+                 'commit_latency_ms': Decimal(f"{commit_latency_ms:.1f}")}
             )
             
-            # Add a small delay to ensure payment record is created before any wallet operations
-            time.sleep(0.1)
-                
-            # Create wallet transaction if payment method is wallet
-            if safe_get(job, 'payment_method') == 'wallet':
-                try:
-                    # Get user's wallet
-                    wallet_table = dynamodb.Table(WALLET_TABLE)
-                    wallet_response = wallet_table.query(
-                    IndexName="user_id-index",
-                    KeyConditionExpression=Key('user_id').eq(user_id),
-                    Limit=1
-                    )
-                        
-                    if wallet_response.get('Items'):
-                        wallet = wallet_response['Items'][0]
-                        wallet_id = wallet.get('wallet_id')
-                            
-                        if wallet_id:
-                            # Create transaction with UUID format to match frontend
-                            txn_id = str(uuid.uuid4())
-                                
-                            wallet_transactions_table = dynamodb.Table(WALLET_TRANSACTIONS_TABLE)
-                            transaction_item = {
-                                'PK': f"WALLET#{wallet_id}",
-                                'SK': f"TXN#{txn_id}",
-                                'txn_id': txn_id,
-                                'wallet_id': wallet_id,
-                                'user_id': user_id,
-                                'amount': str(total_fare),  # Convert to string to match frontend format
-                                'type': 'debit',  # Match frontend key
-                                'source': 'booking',  # Match frontend key
-                                'notes': f"Payment for booking {pnr} on {train_name}",  # Match frontend key
-                                'reference_id': booking_id,
-                                'status': 'success',  # Match frontend value
-                                'created_at': get_current_ist_time().isoformat(),
-                            }
-                                
-                            wallet_transactions_table.put_item(Item=transaction_item)
-                            
-                            # Update payment record with transaction reference and completed status
-                            payment_table.update_item(
-                                Key={'PK': f"PAYMENT#{payment_id}", 'SK': "METADATA"},
-                                UpdateExpression="SET payment_status = :status, completed_at = :completed_at, transaction_reference = :txn_id, gateway_response = :gateway_response",
-                                ExpressionAttributeValues={
-                                    ':status': 'success',
-                                    ':completed_at': get_current_ist_time().isoformat(),
-                                    ':txn_id': txn_id,
-                                    ':gateway_response': {
-                                        'method': safe_get(job, 'payment_method', 'wallet'),
-                                        'status': 'success',
-                                        'timestamp': get_current_ist_time().isoformat(),
-                                        'transaction_id': txn_id
-                                    }
-                                }
-                            )
-                                
-                            # Update wallet balance
-                            # Get current balance as Decimal to avoid float issues
-                            if 'balance' in wallet:
-                                if isinstance(wallet['balance'], Decimal):
-                                    current_balance = wallet['balance']
-                                else:
-                                    current_balance = Decimal(str(wallet.get('balance', '0')))
-                            else:
-                                current_balance = Decimal('0')
-                                    
-                            new_balance = current_balance - total_fare
-                                
-                            wallet_table.update_item(
-                                Key={'PK': wallet.get('PK'), 'SK': wallet.get('SK')},
-                                UpdateExpression="SET balance = :balance, updated_at = :updated_at",
-                                ExpressionAttributeValues={
-                                    ':balance': new_balance,
-                                    ':updated_at': get_current_ist_time().isoformat()
-                                }
-                            )
-                                
-                            logger.info(f"Updated wallet balance: {current_balance} -> {new_balance}")
-                                
-                            CronjobService.log_job_event(
-                                job_id, 
-                                'WALLET_TRANSACTION', 
-                                f"Created wallet transaction: {txn_id}",
-                                {'txn_id': txn_id, 'amount': str(total_fare), 'new_balance': str(new_balance)}
-                            )
-                        else:
-                            logger.error(f"Wallet ID not found for user {user_id}")
-                            
-                            # Update payment record to indicate failure
-                            try:
-                                payment_table.update_item(
-                                    Key={ 'PK': f"PAYMENT#{payment_id}", 'SK': "METADATA"},
-                                    UpdateExpression="SET payment_status = :status, completed_at = :completed_at, error_message = :error_message, gateway_response = :gateway_response",
-                                    ExpressionAttributeValues={
-                                        ':status': 'failed',
-                                        ':completed_at': get_current_ist_time().isoformat(),
-                                        ':error_message': f"Wallet ID not found for user {user_id}",
-                                        ':gateway_response': {
-                                            'method': safe_get(job, 'payment_method', 'wallet'),
-                                            'status': 'failed',
-                                            'timestamp': get_current_ist_time().isoformat(),
-                                            'error': f"Wallet ID not found for user {user_id}"
-                                        }
-                                    }
-                                )
-                                logger.info(f"Updated payment {payment_id} status to failed due to missing wallet ID")
-                            except Exception as payment_update_error:
-                                logger.error(f"Error updating payment status after wallet ID not found: {str(payment_update_error)}")
-                    else:
-                        logger.error(f"Wallet not found for user {user_id}")
-                        
-                        # Update payment record to indicate failure
-                        try:
-                            payment_table.update_item(
-                                Key={'PK': f"PAYMENT#{payment_id}", 'SK': "METADATA"},
-                                UpdateExpression="SET payment_status = :status, completed_at = :completed_at, error_message = :error_message, gateway_response = :gateway_response",
-                                ExpressionAttributeValues={
-                                    ':status': 'failed',
-                                    ':completed_at': get_current_ist_time().isoformat(),
-                                    ':error_message': f"Wallet not found for user {user_id}",
-                                    ':gateway_response': {
-                                        'method': safe_get(job, 'payment_method', 'wallet'),
-                                        'status': 'failed',
-                                        'timestamp': get_current_ist_time().isoformat(),
-                                        'error': f"Wallet not found for user {user_id}"
-                                    }
-                                }
-                            )
-                            logger.info(f"Updated payment {payment_id} status to failed due to missing wallet")
-                        except Exception as payment_update_error:
-                            logger.error(f"Error updating payment status after wallet not found: {str(payment_update_error)}")
-                except Exception as wallet_error:
-                    error_message = f"Error processing wallet transaction: {str(wallet_error)}"
-                    logger.error(error_message)
-                    
-                    # Update payment record to indicate failure
-                    try:
-                        payment_table.update_item(
-                            Key={'PK': f"PAYMENT#{payment_id}", 'SK': "METADATA"},
-                            UpdateExpression="SET payment_status = :status, completed_at = :completed_at, error_message = :error_message, gateway_response = :gateway_response",
-                            ExpressionAttributeValues={
-                                ':status': 'failed',
-                                ':completed_at': get_current_ist_time().isoformat(),
-                                ':error_message': error_message,
-                                ':gateway_response': {
-                                    'method': safe_get(job, 'payment_method', 'wallet'),
-                                    'status': 'failed',
-                                    'timestamp': get_current_ist_time().isoformat(),
-                                    'error': str(wallet_error)
-                                }
-                            }
-                        )
-                        logger.info(f"Updated payment {payment_id} status to failed due to wallet transaction error")
-                    except Exception as payment_update_error:
-                        logger.error(f"Error updating payment status after wallet transaction failure: {str(payment_update_error)}")
-                    # Don't fail the job if wallet transaction fails
-            else:
-                # For non-wallet payment methods, update payment with success status
-                # In a real implementation, this would integrate with other payment gateways
-                try:
-                    # Generate a transaction reference for non-wallet payments
-                    transaction_id = str(uuid.uuid4())
-                    
-                    payment_table.update_item(
-                        Key={'PK': f"PAYMENT#{payment_id}", 'SK': "METADATA"},
-                        UpdateExpression="SET payment_status = :status, completed_at = :completed_at, transaction_reference = :txn_id, gateway_response = :gateway_response",
-                        ExpressionAttributeValues={
-                            ':status': 'success',
-                            ':completed_at': get_current_ist_time().isoformat(),
-                            ':txn_id': transaction_id,
-                            ':gateway_response': {
-                                'method': safe_get(job, 'payment_method', 'other'),
-                                'status': 'success',
-                                'timestamp': get_current_ist_time().isoformat(),
-                                'transaction_id': transaction_id
-                            }
-                        }
-                    )
-                    logger.info(f"Updated payment {payment_id} for non-wallet payment method")
-                except Exception as payment_update_error:
-                    logger.error(f"Error updating payment for non-wallet method: {str(payment_update_error)}")
-                
-                # Job completed successfully - update status with execution attempts
-                completion_time = get_current_ist_time().isoformat()
-                
-                # Update job status to Completed
-                CronjobService.update_job_status(job_id, 'Completed', {
-                    'execution_attempts': execution_attempts,
-                    'last_execution_time': completion_time,
-                    'completion_time': completion_time
-                })
-                
-                # Log job event
+            if wallet_id:
                 CronjobService.log_job_event(
                     job_id, 
-                    'EXECUTION_COMPLETED', 
-                    f"Job execution completed successfully (attempt {execution_attempts})"
+                    'WALLET_TRANSACTION', 
+                    f"Created wallet transaction: {transaction_id}",
+                    {'txn_id': transaction_id, 'amount': str(total_fare)}
                 )
-                
-                # Record successful job execution in job_executions table
-                execution_details = {
-                    'execution_attempts': int(execution_attempts),
-                    'completion_time': completion_time,
-                    'booking_id': booking_id,
-                    'pnr': pnr
-                }
-                
-                CronjobService.record_job_execution(
-                    job_id,
-                    'success',
-                    execution_details
-                )
-                
-                return True
+            
+            # Log job event
+            CronjobService.log_job_event(
+                job_id, 
+                'EXECUTION_COMPLETED', 
+                f"Job execution completed successfully (attempt {execution_attempts})"
+            )
+            
+            # Record successful job execution in job_executions table
+            execution_details = {
+                'execution_attempts': int(execution_attempts),
+                'completion_time': current_time,
+                'booking_id': booking_id,
+                'payment_id': payment_id,
+                'pnr': pnr,
+                'commit_latency_ms': commit_latency_ms
+            }
+            
+            CronjobService.record_job_execution(
+                job_id,
+                'success',
+                execution_details
+            )
+            
+            return True
+        except JobLeaseLostError as lease_error:
+            # The lease expired and another runner took the job over, or it was cancelled;
+            # nothing was written here
+            logger.warning(str(lease_error))
+            CronjobService.log_job_event(job_id, 'EXECUTION_SKIPPED', str(lease_error))
+            return False
         except Exception as booking_error:
             error_msg = f"Error creating booking: {str(booking_error)}"
             logger.error(error_msg)
@@ -1780,7 +1857,7 @@ class CronjobService:
                 'execution_attempts': execution_attempts,
                 'last_execution_time': failure_time,
                 'failure_time': failure_time
-            })
+            }, lease_owner=lease_owner)
             
             # Log job event
             CronjobService.log_job_event(
@@ -1816,7 +1893,7 @@ class CronjobService:
                 'execution_attempts': execution_attempts,
                 'last_execution_time': failure_time,
                 'failure_time': failure_time
-            })
+            }, lease_owner=lease_owner)
             
             # Log job event
             CronjobService.log_job_event(
@@ -1841,6 +1918,39 @@ class CronjobService:
             return False
 
 
+def run_job_and_check_status(job: Dict[str, Any], lease_owner: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+    """
+    Execute a single job for the job executor
+    
+    The job is considered successful if execute_job returns True or if the job
+    status is 'Completed' regardless of the return value. This covers cases
+    where the job completes successfully but returns False.
+    
+    Args:
+        job: The job to execute
+        lease_owner: ID of this runner, used to claim the job
+        
+    Returns:
+        Tuple of (success, error message or None)
+    """
+    job_id = job.get('job_id', 'UNKNOWN')
+    logger.info(f"Executing job {job_id}")
+    try:
+        success = CronjobService.execute_job(job, lease_owner)
+    finally:
+        # Write this job's events as soon as it finishes
+        CronjobService.flush_job_events(job_id)
+    
+    # Check if job was updated to Completed status during execution
+    updated_job = CronjobService.get_job(job_id)
+    updated_status = updated_job.get('job_status', '') if updated_job else ''
+    
+    if success or updated_status == 'Completed':
+        return True, None
+    if updated_status == 'In Progress' and updated_job.get('lease_owner') != lease_owner:
+        return False, f"Job is leased by another runner ({updated_job.get('lease_owner')})"
+    return False, 'Job execution failed'
+
 def run_cronjob_service(event=None, context=None):
     """
     Main Lambda handler function for the cronjob service
@@ -1872,8 +1982,11 @@ def run_cronjob_service(event=None, context=None):
         'jobs_executed': 0,
         'jobs_succeeded': 0,
         'jobs_failed': 0,
+        'jobs_timed_out': 0,
+        'jobs_deferred': 0,
         'errors': [],
-        'jobs_found': 0
+        'jobs_found': 0,
+        'jobs': []
     }
     
     try:
@@ -1883,48 +1996,48 @@ def run_cronjob_service(event=None, context=None):
         
         logger.info(f"Found {len(jobs)} jobs to execute")
         
-        # Execute each job
-        for job in jobs:
-            job_id = job.get('job_id', 'UNKNOWN')
-            
-            try:
-                logger.info(f"Executing job {job_id}")
-                # Execute the job and track success/failure
-                success = CronjobService.execute_job(job)
-                
-                results['jobs_executed'] += 1
-                
-                # The job is considered successful if execute_job returns True
-                # or if the job status is 'Completed' regardless of the return value
-                # This fixes cases where the job completes successfully but returns False
-                job_status = job.get('job_status', '')
-                
-                # Check if job was updated to Completed status during execution
-                updated_job = CronjobService.get_job(job_id)
-                updated_status = updated_job.get('job_status', '') if updated_job else ''
-                
-                if success or updated_status == 'Completed':
-                    results['jobs_succeeded'] += 1
-                    logger.info(f"Job {job_id} execution marked as successful")
-                else:
-                    results['jobs_failed'] += 1
-                    results['errors'].append({
-                        'job_id': job_id,
-                        'error': 'Job execution failed'
-                    })
-                    logger.info(f"Job {job_id} execution marked as failed")
-            except Exception as job_error:
-                logger.error(f"Error executing job {job_id}: {str(job_error)}")
+        # Leave a safety margin before the Lambda timeout
+        time_budget = None
+        if context and hasattr(context, 'get_remaining_time_in_millis'):
+            time_budget = context.get_remaining_time_in_millis() / 1000.0 - CRON_SAFETY_MARGIN_SECONDS
+        
+        # Jobs are claimed under this invocation's ID, so overlapping invocations never run the same job
+        lease_owner = context.aws_request_id if context and getattr(context, 'aws_request_id', None) else str(uuid.uuid4())
+        results['lease_owner'] = lease_owner
+        
+        # Execute jobs concurrently, one user's jobs at a time
+        executor = JobExecutor(lambda job: run_job_and_check_status(job, lease_owner))
+        outcomes = executor.execute(jobs, time_budget_seconds=time_budget)
+        results['jobs'] = outcomes
+        
+        for outcome in outcomes:
+            job_id = outcome['job_id']
+            if outcome['status'] == STATUS_DEFERRED:
+                results['jobs_deferred'] += 1
+                logger.info(f"Job {job_id} deferred to next run: {outcome['error']}")
+                continue
+            
+            results['jobs_executed'] += 1
+            if outcome['status'] == STATUS_SUCCEEDED:
+                results['jobs_succeeded'] += 1
+                logger.info(f"Job {job_id} execution marked as successful ({outcome['latency_seconds']}s)")
+            else:
+                if outcome['status'] == STATUS_TIMED_OUT:
+                    results['jobs_timed_out'] += 1
                 results['jobs_failed'] += 1
                 results['errors'].append({
                     'job_id': job_id,
-                    'error': str(job_error)
+                    'error': outcome['error'] or 'Job execution failed'
                 })
+                logger.info(f"Job {job_id} execution marked as failed ({outcome['latency_seconds']}s)")
     except Exception as e:
         logger.error(f"Error in cronjob service: {str(e)}")
         results['errors'].append({
             'error': str(e)
         })
+    finally:
+        # Guaranteed flush before the handler returns
+        results['job_events_flushed'] = CronjobService.flush_job_events()
     
     # Calculate execution time
     end_ist_time = get_current_ist_time()
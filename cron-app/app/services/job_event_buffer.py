@@ -0,0 +1,116 @@
+"""
+Buffered writer for job events.
+
+`CronjobService.log_job_event` adds events here instead of writing each one
+with `put_item`. The buffer is flushed with `BatchWriteItem` (25 items per
+request, unprocessed items retried with backoff) whenever it fills, when a
+job finishes and when the Lambda handler exits.
+
+Event IDs keep the `EVENT<ms>_<job_id>` format. Timestamps are made strictly
+increasing per job, so events logged within the same millisecond keep their
+order and never overwrite each other.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BATCH_WRITE_LIMIT = 25
+MAX_BATCH_RETRIES = 5
+
+
+class JobEventBuffer:
+    """
+    Thread-safe buffer of job event items for one table.
+
+    Args:
+        dynamodb: DynamoDB resource used for BatchWriteItem
+        table_name: Name of the job logs table
+        max_items: Number of buffered items that triggers a flush
+    """
+
+    def __init__(self, dynamodb, table_name: str, max_items: int = BATCH_WRITE_LIMIT):
+        self.dynamodb = dynamodb
+        self.table_name = table_name
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._items: List[Dict[str, Any]] = []
+        self._last_timestamps: Dict[str, int] = {}
+
+    def next_timestamp(self, job_id: str) -> int:
+        """Millisecond timestamp for a new event, strictly increasing per job"""
+        timestamp = int(time.time() * 1000)
+        with self._lock:
+            last = self._last_timestamps.get(job_id)
+            if last is not None and timestamp <= last:
+                timestamp = last + 1
+            self._last_timestamps[job_id] = timestamp
+        return timestamp
+
+    def add(self, item: Dict[str, Any]) -> None:
+        """Buffer an event item, flushing once the buffer is full"""
+        with self._lock:
+            self._items.append(item)
+            full = len(self._items) >= self.max_items
+        if full:
+            self.flush()
+
+    def pending(self) -> int:
+        """Number of buffered items"""
+        with self._lock:
+            return len(self._items)
+
+    def flush(self, job_id: Optional[str] = None) -> int:
+        """
+        Write buffered items with BatchWriteItem
+
+        Flushing one job's events also drops its timestamp state; the job is
+        done, and the buffer lives as long as the Lambda container.
+
+        Args:
+            job_id: Only flush this job's events, None to flush everything
+
+        Returns:
+            Number of items written
+        """
+        with self._lock:
+            if job_id is None:
+                items, self._items = self._items, []
+            else:
+                items = [item for item in self._items if item.get('job_id') == job_id]
+                self._items = [item for item in self._items if item.get('job_id') != job_id]
+
+        written = 0
+        for start in range(0, len(items), BATCH_WRITE_LIMIT):
+            written += self._write_batch(items[start:start + BATCH_WRITE_LIMIT])
+        if job_id is not None:
+            with self._lock:
+                self._last_timestamps.pop(job_id, None)
+        if not items:
+            return 0
+        logger.info(f"Flushed {written} of {len(items)} job events to {self.table_name}")
+        return written
+
+    def _write_batch(self, items: List[Dict[str, Any]]) -> int:
+        request = {self.table_name: [{'PutRequest': {'Item': item}} for item in items]}
+        for attempt in range(MAX_BATCH_RETRIES + 1):
+            try:
+                response = self.dynamodb.batch_write_item(RequestItems=request)
+            except Exception as e:
+                logger.error(f"Error writing job events batch (attempt {attempt + 1}): {str(e)}")
+                response = {'UnprocessedItems': request}
+            unprocessed = response.get('UnprocessedItems') or {}
+            if not unprocessed.get(self.table_name):
+                return len(items)
+            request = unprocessed
+            if attempt < MAX_BATCH_RETRIES:
+                # Exponential backoff with a cap, as recommended for throttled batch writes
+                time.sleep(min(0.05 * (2 ** attempt), 1.0))
+
+        dropped = request.get(self.table_name, [])
+        for entry in dropped:
+            item = entry['PutRequest']['Item']
+            logger.error(f"Dropping job event {item.get('event_id')} ({item.get('event_type')}) after {MAX_BATCH_RETRIES} retries")
+        return len(items) - len(dropped)
@@ -0,0 +1,215 @@
+"""
+Bounded concurrent executor for cron jobs.
+
+Jobs are grouped by user_id and each user's jobs run one after another on a
+single worker, so two jobs never debit the same wallet at the same time. Users
+are spread over a fixed-size thread pool.
+
+Deadlines:
+- per job: once a job has run longer than `job_deadline_seconds` it is
+  reported as timed out and the remaining jobs of that user are deferred to
+  the next cron run (the running thread cannot be killed, so they must not
+  start behind it)
+- per batch: jobs that have not started when the batch deadline (derived from
+  the Lambda's remaining time) passes are deferred as well; jobs still running
+  then are reported as timed out, since their threads keep running after the
+  batch returns
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CRON_MAX_WORKERS = int(os.getenv('CRON_MAX_WORKERS', '8'))
+CRON_JOB_DEADLINE_SECONDS = float(os.getenv('CRON_JOB_DEADLINE_SECONDS', '60'))
+# Time kept free at the end of the Lambda invocation for logging and the response
+CRON_SAFETY_MARGIN_SECONDS = float(os.getenv('CRON_SAFETY_MARGIN_SECONDS', '10'))
+
+STATUS_SUCCEEDED = 'succeeded'
+STATUS_FAILED = 'failed'
+STATUS_TIMED_OUT = 'timed_out'
+STATUS_DEFERRED = 'deferred'
+
+
+class JobExecutor:
+    """
+    Run jobs on a thread pool while keeping per-user ordering.
+
+    Args:
+        run_job: Callable executing one job, returning (success, error message or None)
+        max_workers: Number of worker threads
+        job_deadline_seconds: Maximum run time of a single job
+    """
+
+    def __init__(self, run_job: Callable[[Dict[str, Any]], Any],
+                 max_workers: int = CRON_MAX_WORKERS,
+                 job_deadline_seconds: float = CRON_JOB_DEADLINE_SECONDS):
+        self.run_job = run_job
+        self.max_workers = max(1, max_workers)
+        self.job_deadline_seconds = job_deadline_seconds
+        self._lock = threading.Lock()
+        self._running: Dict[str, Dict[str, Any]] = {}
+        self._outcomes: Dict[str, Dict[str, Any]] = {}
+        self._expired_users = set()
+        self._stopped = False
+        self._pool_size = self.max_workers
+
+    @staticmethod
+    def group_by_user(jobs: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Group jobs by user_id, keeping the scan order within each user
+
+        Jobs without a user_id get their own group.
+        """
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for idx, job in enumerate(jobs):
+            user_key = job.get('user_id') or f"NO_USER#{job.get('job_id', idx)}"
+            groups.setdefault(user_key, []).append(job)
+        return groups
+
+    def _record(self, job: Dict[str, Any], user_key: str, status: str, latency: Optional[float], error: Optional[str] = None) -> None:
+        job_id = job.get('job_id', 'UNKNOWN')
+        with self._lock:
+            # A job already reported as timed out keeps that status
+            if job_id in self._outcomes:
+                return
+            self._outcomes[job_id] = {
+                'job_id': job_id,
+                'user_id': job.get('user_id'),
+                'status': status,
+                'latency_seconds': round(latency, 3) if latency is not None else None,
+                'error': error,
+            }
+
+    def _run_user_jobs(self, user_key: str, user_jobs: List[Dict[str, Any]], batch_deadline: float) -> None:
+        for job in user_jobs:
+            job_id = job.get('job_id', 'UNKNOWN')
+            with self._lock:
+                expired = user_key in self._expired_users
+                stopped = self._stopped
+            if stopped:
+                self._record(job, user_key, STATUS_DEFERRED, None, 'Batch stopped before the job started')
+                continue
+            if expired:
+                self._record(job, user_key, STATUS_DEFERRED, None, 'Previous job of this user exceeded its deadline')
+                continue
+            if time.monotonic() >= batch_deadline:
+                self._record(job, user_key, STATUS_DEFERRED, None, 'Batch deadline reached before the job started')
+                continue
+
+            started = time.monotonic()
+            with self._lock:
+                self._running[job_id] = {'job': job, 'user_key': user_key, 'started': started}
+            try:
+                success, error = self.run_job(job)
+                status = STATUS_SUCCEEDED if success else STATUS_FAILED
+            except Exception as job_error:
+                logger.error(f"Error executing job {job_id}: {str(job_error)}")
+                status, error = STATUS_FAILED, str(job_error)
+            finally:
+                with self._lock:
+                    self._running.pop(job_id, None)
+            self._record(job, user_key, status, time.monotonic() - started, error)
+
+    def _expire_overrunning_jobs(self) -> Optional[float]:
+        """Mark jobs past their deadline as timed out; return seconds until the next deadline"""
+        now = time.monotonic()
+        next_deadline = None
+        with self._lock:
+            running = list(self._running.items())
+        for job_id, entry in running:
+            remaining = entry['started'] + self.job_deadline_seconds - now
+            if remaining <= 0:
+                with self._lock:
+                    if job_id in self._outcomes:
+                        continue
+                    self._expired_users.add(entry['user_key'])
+                logger.warning(f"Job {job_id} exceeded its {self.job_deadline_seconds}s deadline")
+                self._record(entry['job'], entry['user_key'], STATUS_TIMED_OUT, now - entry['started'],
+                             f"Job exceeded its {self.job_deadline_seconds}s deadline")
+            elif next_deadline is None or remaining < next_deadline:
+                next_deadline = remaining
+        return next_deadline
+
+    def _time_out_running_jobs(self) -> None:
+        """Report jobs still running when the batch stops as timed out"""
+        now = time.monotonic()
+        with self._lock:
+            running = list(self._running.items())
+        for job_id, entry in running:
+            logger.warning(f"Job {job_id} still running when the batch stopped")
+            self._record(entry['job'], entry['user_key'], STATUS_TIMED_OUT, now - entry['started'],
+                         'Batch deadline reached while the job was running')
+
+    def _only_overrunning_jobs_left(self, pending: Dict[Any, str]) -> bool:
+        """True when every unfinished user chain is blocked behind a timed-out job"""
+        with self._lock:
+            stuck_users = {entry['user_key'] for job_id, entry in self._running.items() if job_id in self._outcomes}
+        running = [user_key for future, user_key in pending.items() if future.running()]
+        if not running:
+            return False
+        if any(user_key not in stuck_users for user_key in running):
+            return False
+        # Queued chains can only start if a worker is free
+        return len(running) >= self._pool_size or len(running) == len(pending)
+
+    def execute(self, jobs: List[Dict[str, Any]], time_budget_seconds: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Execute jobs concurrently
+
+        Args:
+            jobs: Jobs in scan order
+            time_budget_seconds: Wall-clock budget for the whole batch, None for no limit
+
+        Returns:
+            One outcome dict per job (job_id, user_id, status, latency_seconds, error) in input order
+        """
+        if not jobs:
+            return []
+
+        started = time.monotonic()
+        batch_deadline = started + time_budget_seconds if time_budget_seconds is not None else float('inf')
+        groups = self.group_by_user(jobs)
+        self._pool_size = min(self.max_workers, len(groups))
+        logger.info(f"Executing {len(jobs)} jobs for {len(groups)} users on {self._pool_size} workers")
+
+        pool = ThreadPoolExecutor(max_workers=self._pool_size, thread_name_prefix='cron-job')
+        try:
+            pending = {pool.submit(self._run_user_jobs, user_key, user_jobs, batch_deadline): user_key
+                       for user_key, user_jobs in groups.items()}
+            while pending:
+                next_deadline = self._expire_overrunning_jobs()
+                if self._only_overrunning_jobs_left(pending):
+                    break
+                timeout = batch_deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                if next_deadline is not None:
+                    timeout = min(timeout, next_deadline)
+                done, _ = wait(set(pending), timeout=max(timeout, 0.05), return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.pop(future, None)
+        finally:
+            with self._lock:
+                self._stopped = True
+            # Do not block on overrunning jobs; their threads finish in the background
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        self._expire_overrunning_jobs()
+        self._time_out_running_jobs()
+        outcomes = []
+        with self._lock:
+            for job in jobs:
+                job_id = job.get('job_id', 'UNKNOWN')
+                outcomes.append(self._outcomes.get(job_id) or {
+                    'job_id': job_id,
+                    'user_id': job.get('user_id'),
+                    'status': STATUS_DEFERRED,
+                    'latency_seconds': None,
+                    'error': 'Batch stopped before the job started',
+                })
+        return outcomes
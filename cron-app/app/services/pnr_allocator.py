@@ -0,0 +1,105 @@
+"""
+PNR allocation for the cron runner.
+
+Mirrors backend/app/core/pnr.py: PNRs are "PNR" + a 10-digit sequence
+number + a Luhn check digit, handed out from blocks leased from the shared
+PNR sequence item with one atomic `ADD next_value :block`. Blocks never
+overlap between Lambdas or the API, so PNRs are unique however many run at
+once; blocks start small, double while each lasts under a second and halve
+when one lasts longer.
+"""
+import logging
+import threading
+import time
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+PNR_SEQUENCE_KEY = {'PK': {'S': "SEQUENCE#PNR"}, 'SK': {'S': "METADATA"}}
+PREFIX = "PNR"
+SEQUENCE_DIGITS = 10
+GROWTH_SECONDS = 1.0
+
+
+class PnrSpaceExhaustedError(Exception):
+    pass
+
+
+def luhn_check_digit(digits: str) -> int:
+    """Check digit that makes `digits` + it pass the Luhn check"""
+    total = 0
+    for position, digit in enumerate(reversed(digits)):
+        value = int(digit)
+        if position % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return (10 - total % 10) % 10
+
+
+def format_pnr(sequence: int) -> str:
+    digits = f"{sequence:0{SEQUENCE_DIGITS}d}"
+    return f"{PREFIX}{digits}{luhn_check_digit(digits)}"
+
+
+class PnrAllocator:
+    """
+    Hands out PNRs from leased blocks; thread safe.
+
+    Args:
+        client: Low-level DynamoDB client (or ThreadLocalDynamoDB proxy with low_level=True)
+        table: Name of the sequences table
+        min_block: Numbers in the first block, and the smallest block
+        max_block: Largest block
+    """
+
+    def __init__(self, client, table: str, min_block: int = 20, max_block: int = 5000):
+        self.client = client
+        self.table = table
+        self.min_block = min_block
+        self.max_block = max_block
+        self.block_size = min_block
+        self.leases = 0
+        self._next = 1
+        self._end = 0
+        self._last_lease = 0.0
+        self._lock = threading.Lock()
+        self._lease_lock = threading.Lock()
+
+    def _lease(self) -> Tuple[int, int]:
+        now = time.monotonic()
+        if self.leases and now - self._last_lease < GROWTH_SECONDS:
+            self.block_size = min(self.block_size * 2, self.max_block)
+        elif self.leases:
+            self.block_size = max(self.block_size // 2, self.min_block)
+        response = self.client.update_item(
+            TableName=self.table,
+            Key=PNR_SEQUENCE_KEY,
+            UpdateExpression="ADD next_value :block",
+            ExpressionAttributeValues={':block': {'N': str(self.block_size)}},
+            ReturnValues="UPDATED_NEW",
+        )
+        last = int(response['Attributes']['next_value']['N'])
+        if last >= 10 ** SEQUENCE_DIGITS:
+            raise PnrSpaceExhaustedError(f"PNR sequence passed {10 ** SEQUENCE_DIGITS - 1}")
+        self.leases += 1
+        self._last_lease = now
+        logger.info(f"Leased PNR block {last - self.block_size + 1}-{last}")
+        return last - self.block_size + 1, last
+
+    def allocate(self) -> str:
+        """Next PNR, leasing a new block first when the current one is used up"""
+        while True:
+            with self._lock:
+                if self._next <= self._end:
+                    sequence = self._next
+                    self._next += 1
+                    return format_pnr(sequence)
+            with self._lease_lock:
+                with self._lock:
+                    if self._next <= self._end:
+                        continue
+                first, last = self._lease()
+                with self._lock:
+                    self._next, self._end = first, last
@@ -0,0 +1,234 @@
+"""
+Seat inventory for the cron runner.
+
+Mirrors backend/app/core/seat_inventory.py: one item per coach under
+INVENTORY#<train_number>#<journey_date>#<class>, holding a number set of
+the sold berths. A reservation sells berths with
+`ADD sold :berths, available :minus` conditioned on none of them being sold
+yet, in one TransactWriteItems call together with the caller's items, and
+re-reads and picks again when another booking took the same berths. Berths
+are picked by seat_allocation, by berth preference and keeping a party in
+one bay.
+"""
+import logging
+import random
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+from app.services import seat_allocation
+
+logger = logging.getLogger(__name__)
+
+MAX_RESERVE_ATTEMPTS = 8
+
+BERTHS_PER_COACH = {"1A": 24, "2A": 48, "3A": 64, "3E": 72, "SL": 72, "2S": 108, "CC": 78, "EC": 56}
+DEFAULT_COACHES = {"1A": 1, "2A": 2, "3A": 5, "3E": 2, "SL": 10, "2S": 4, "CC": 8, "EC": 1}
+COACH_PREFIX = {"1A": "H", "2A": "A", "3A": "B", "3E": "M", "SL": "S", "2S": "D", "CC": "C", "EC": "E"}
+
+_SEAT_LABEL = re.compile(r"^([A-Z]+)(\d+)-(\d+)$")
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+class SoldOutError(Exception):
+    def __init__(self, travel_class: str, available: int, requested: int):
+        super().__init__(f"Only {available} seats left in {travel_class} class, {requested} requested")
+        self.travel_class = travel_class
+        self.available = available
+        self.requested = requested
+
+
+class InventoryContentionError(Exception):
+    pass
+
+
+def marshal(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a plain item or value map to DynamoDB attribute values"""
+    return {k: _serializer.serialize(v) for k, v in values.items()}
+
+
+def inventory_pk(train_number: str, journey_date: str, travel_class: str) -> str:
+    return f"INVENTORY#{train_number}#{journey_date}#{travel_class}"
+
+
+def parse_seat(label: Any) -> Optional[Tuple[str, int, int]]:
+    """(coach label, coach number, berth) for an inventory seat label ("S3-45"), or None"""
+    match = _SEAT_LABEL.match(str(label or ""))
+    if not match:
+        return None
+    return f"{match.group(1)}{match.group(2)}", int(match.group(2)), int(match.group(3))
+
+
+def plan(coaches: List[Dict[str, Any]], travel_class: str,
+         preferences: Sequence[Optional[str]]) -> List[Tuple[Dict[str, Any], int]]:
+    """(coach, berth) per passenger, placed by seat_allocation as in the backend"""
+    layout = seat_allocation.layout_for(travel_class, max(coach['berths'] for coach in coaches))
+    bitmaps = [seat_allocation.free_bitmap(coach['berths'], coach['sold']) for coach in coaches]
+    placed = seat_allocation.allocate(layout, bitmaps, preferences) or []
+    return [(coaches[index], berth) for index, berth in placed]
+
+
+class SeatInventory:
+    """
+    Seat reservations as single TransactWriteItems calls.
+
+    Args:
+        client: Low-level DynamoDB client (or ThreadLocalDynamoDB proxy with low_level=True)
+        table: Name of the seat inventory table
+        trains_table: Name of the trains table, read for coach compositions
+    """
+
+    def __init__(self, client, table: str, trains_table: str):
+        self.client = client
+        self.table = table
+        self.trains_table = trains_table
+
+    def load_coaches(self, pk: str) -> List[Dict[str, Any]]:
+        query = {
+            'TableName': self.table,
+            'KeyConditionExpression': "PK = :pk",
+            'ExpressionAttributeValues': marshal({':pk': pk}),
+            'ConsistentRead': True,
+        }
+        coaches = []
+        while True:
+            response = self.client.query(**query)
+            for raw in response.get('Items', []):
+                item = {k: _deserializer.deserialize(v) for k, v in raw.items()}
+                item['berths'] = int(item['berths'])
+                item['available'] = int(item['available'])
+                item['sold'] = {int(b) for b in item.get('sold') or ()}
+                coaches.append(item)
+            if 'LastEvaluatedKey' not in response:
+                return coaches
+            query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def initialize(self, train_number: str, journey_date: str, travel_class: str) -> None:
+        """Create the coach items of a class from the train's composition, unless they exist"""
+        raw = self.client.get_item(
+            TableName=self.trains_table,
+            Key=marshal({'PK': f"TRAIN#{train_number}", 'SK': "METADATA"}),
+            ProjectionExpression="coaches",
+        ).get('Item') or {}
+        train = {k: _deserializer.deserialize(v) for k, v in raw.items()}
+        coaches = int((train.get('coaches') or {}).get(travel_class) or DEFAULT_COACHES.get(travel_class, 4))
+        berths = BERTHS_PER_COACH.get(travel_class, 72)
+        prefix = COACH_PREFIX.get(travel_class, travel_class[:1])
+        pk = inventory_pk(train_number, journey_date, travel_class)
+        items = [{
+            'Put': {
+                'TableName': self.table,
+                'Item': marshal({'PK': pk, 'SK': f"COACH#{number:02d}", 'coach': f"{prefix}{number}",
+                                 'berths': berths, 'available': berths}),
+                'ConditionExpression': "attribute_not_exists(PK)",
+            }
+        } for number in range(1, coaches + 1)]
+        try:
+            self.client.transact_write_items(TransactItems=items)
+        except ClientError as e:
+            # Another runner or the API created them first
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+
+    def reserve_update(self, coach: Dict[str, Any], berths: List[int]) -> Dict[str, Any]:
+        values = {':berths': set(berths), ':minus': -len(berths), ':count': len(berths)}
+        conditions = ["available >= :count"]
+        for index, berth in enumerate(berths):
+            values[f':b{index}'] = berth
+            conditions.append(f"NOT contains(sold, :b{index})")
+        return {
+            'Update': {
+                'TableName': self.table,
+                'Key': marshal({'PK': coach['PK'], 'SK': coach['SK']}),
+                'UpdateExpression': "ADD sold :berths, available :minus",
+                'ConditionExpression': " AND ".join(conditions),
+                'ExpressionAttributeValues': marshal(values),
+            }
+        }
+
+    def reserve(self, train_number: str, journey_date: str, travel_class: str, count: int,
+                build_items: Optional[Callable[[List[str]], List[Dict[str, Any]]]] = None,
+                preferences: Optional[Sequence[Optional[str]]] = None) -> List[str]:
+        """
+        Reserve `count` seats and return their labels, in passenger order
+
+        Args:
+            build_items: Called with the seat labels of each attempt; the
+                low-level TransactItems it returns are committed together with the seats
+            preferences: Berth preference per passenger ("LB", "UB", ... or None)
+
+        Raises:
+            SoldOutError: Fewer than `count` seats are left
+            InventoryContentionError: Every attempt lost its berths to another booking
+        """
+        if count < 1:
+            items = build_items([]) if build_items is not None else []
+            if items:
+                self.client.transact_write_items(TransactItems=items)
+            return []
+
+        pk = inventory_pk(train_number, journey_date, travel_class)
+        preferences = [seat_allocation.normalize_preference(p) for p in (list(preferences or []) + [None] * count)[:count]]
+        for attempt in range(MAX_RESERVE_ATTEMPTS):
+            coaches = self.load_coaches(pk)
+            if not coaches:
+                self.initialize(train_number, journey_date, travel_class)
+                coaches = self.load_coaches(pk)
+            available = sum(coach['available'] for coach in coaches)
+            if available < count:
+                raise SoldOutError(travel_class, available, count)
+
+            placed = plan(coaches, travel_class, preferences)
+            seats = [f"{coach['coach']}-{berth}" for coach, berth in placed]
+            by_coach: Dict[str, Tuple[Dict[str, Any], List[int]]] = {}
+            for coach, berth in placed:
+                by_coach.setdefault(coach['SK'], (coach, []))[1].append(berth)
+            items = [self.reserve_update(coach, berths) for coach, berths in by_coach.values()]
+            if build_items is not None:
+                items += build_items(seats)
+            try:
+                self.client.transact_write_items(TransactItems=items)
+                return seats
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'TransactionCanceledException':
+                    raise
+                codes = [reason.get('Code') for reason in e.response.get('CancellationReasons') or []]
+                if not any(code in ('ConditionalCheckFailed', 'TransactionConflict') for code in codes[:len(by_coach)]):
+                    raise
+                logger.info(f"Seats on {pk} taken by another booking, retrying (attempt {attempt + 1})")
+                time.sleep(random.uniform(0, min(0.01 * (2 ** attempt), 0.2)))
+        raise InventoryContentionError(
+            f"Could not reserve {count} seats in {travel_class} on train {train_number} for {journey_date} "
+            f"after {MAX_RESERVE_ATTEMPTS} attempts"
+        )
+
+    def release(self, train_number: str, journey_date: str, travel_class: str, seats: Iterable[Any]) -> int:
+        """Return sold seats to the inventory; seats that are not sold are skipped"""
+        pk = inventory_pk(train_number, journey_date, travel_class)
+        by_coach: Dict[int, List[int]] = {}
+        for label in seats:
+            parsed = parse_seat(label)
+            if parsed:
+                by_coach.setdefault(parsed[1], []).append(parsed[2])
+
+        released = 0
+        for number, berths in by_coach.items():
+            values = {':berths': set(berths), ':count': len(berths)}
+            values.update({f':b{index}': berth for index, berth in enumerate(berths)})
+            try:
+                self.client.update_item(
+                    TableName=self.table,
+                    Key=marshal({'PK': pk, 'SK': f"COACH#{number:02d}"}),
+                    UpdateExpression="DELETE sold :berths ADD available :count",
+                    ConditionExpression=" AND ".join(f"contains(sold, :b{index})" for index in range(len(berths))),
+                    ExpressionAttributeValues=marshal(values),
+                )
+                released += len(berths)
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+        return released
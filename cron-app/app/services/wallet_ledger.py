@@ -0,0 +1,171 @@
+"""
+Atomic wallet debits for the cron runner.
+
+Mirrors backend/app/core/wallet_ledger.py: the balance change
+(`ADD balance :delta`, conditioned on `balance >= :amount` for debits) and
+the wallet transaction item are written in one TransactWriteItems call, so
+a booking payment can neither overdraw the wallet nor race a concurrent
+API debit. String balances from older wallets are converted to numbers on
+first use.
+"""
+import logging
+import random
+import time
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+CREDIT = 'credit'
+DEBIT = 'debit'
+MAX_TRANSACT_ATTEMPTS = 10
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+class WalletNotFoundError(Exception):
+    pass
+
+
+class InsufficientBalanceError(Exception):
+    def __init__(self, wallet_id: str, balance: Decimal, amount: Decimal):
+        super().__init__(f"Insufficient balance in wallet {wallet_id}: {balance} < {amount}")
+        self.balance = balance
+        self.amount = amount
+
+
+def marshal(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a plain item or value map to DynamoDB attribute values"""
+    return {k: _serializer.serialize(v) for k, v in values.items()}
+
+
+class WalletLedger:
+    """
+    Wallet credits and debits as single TransactWriteItems calls.
+
+    Args:
+        client: Low-level DynamoDB client (or ThreadLocalDynamoDB proxy with low_level=True)
+        wallet_table: Name of the wallet table
+        transactions_table: Name of the wallet transactions table
+    """
+
+    def __init__(self, client, wallet_table: str, transactions_table: str):
+        self.client = client
+        self.wallet_table = wallet_table
+        self.transactions_table = transactions_table
+
+    def build_transact_items(self, wallet_key: Dict[str, str], txn_type: str, amount: Decimal,
+                             txn_item: Optional[Dict[str, Any]], updated_at: str,
+                             extra_items: Iterable[Dict[str, Any]] = ()) -> List[Dict[str, Any]]:
+        condition = "attribute_exists(PK) AND attribute_type(balance, :number_type)"
+        values = {
+            ':delta': amount if txn_type == CREDIT else -amount,
+            ':number_type': 'N',
+            ':updated_at': updated_at,
+        }
+        if txn_type == DEBIT:
+            condition += " AND balance >= :amount"
+            values[':amount'] = amount
+
+        items = [{
+            'Update': {
+                'TableName': self.wallet_table,
+                'Key': marshal(wallet_key),
+                'UpdateExpression': "ADD balance :delta SET updated_at = :updated_at",
+                'ConditionExpression': condition,
+                'ExpressionAttributeValues': marshal(values),
+                'ReturnValuesOnConditionCheckFailure': 'ALL_OLD',
+            }
+        }]
+        if txn_item is not None:
+            items.append({
+                'Put': {
+                    'TableName': self.transactions_table,
+                    'Item': marshal(txn_item),
+                    'ConditionExpression': "attribute_not_exists(PK)",
+                }
+            })
+        items.extend(extra_items)
+        return items
+
+    def _convert_legacy_balance(self, wallet_key: Dict[str, str], balance: Any) -> None:
+        if balance is None:
+            condition, values = "attribute_not_exists(balance)", {':number': Decimal('0')}
+        else:
+            condition, values = "balance = :legacy", {':number': Decimal(str(balance)), ':legacy': balance}
+        try:
+            self.client.update_item(
+                TableName=self.wallet_table,
+                Key=marshal(wallet_key),
+                UpdateExpression="SET balance = :number",
+                ConditionExpression=condition,
+                ExpressionAttributeValues=marshal(values),
+            )
+            logger.info(f"Converted legacy string balance of {wallet_key['PK']} to a number")
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    def check_failed(self, wallet_id: str, amount: Decimal, reason: Dict[str, Any]) -> None:
+        """
+        Handle the cancellation reason of a wallet update whose condition failed
+
+        Converts a legacy string balance and returns, so the caller can retry.
+
+        Raises:
+            WalletNotFoundError: The wallet does not exist
+            InsufficientBalanceError: The balance is less than `amount`
+        """
+        old_wallet = reason.get('Item')
+        if not old_wallet:
+            raise WalletNotFoundError(f"Wallet {wallet_id} not found")
+        balance = _deserializer.deserialize(old_wallet['balance']) if 'balance' in old_wallet else None
+        if isinstance(balance, Decimal):
+            raise InsufficientBalanceError(wallet_id, balance, amount)
+        self._convert_legacy_balance({'PK': f"WALLET#{wallet_id}", 'SK': "METADATA"}, balance)
+
+    def apply(self, wallet_id: str, txn_type: str, amount: Any, txn_item: Optional[Dict[str, Any]],
+              updated_at: str, extra_items: Iterable[Dict[str, Any]] = ()) -> None:
+        """
+        Credit or debit a wallet and write its transaction item atomically
+
+        Args:
+            wallet_id: Wallet to update
+            txn_type: 'credit' or 'debit'
+            amount: Positive amount
+            txn_item: Wallet transaction item to put, or None
+            updated_at: Value for the wallet's updated_at
+            extra_items: Additional low-level TransactItems committed together
+
+        Raises:
+            WalletNotFoundError: The wallet does not exist
+            InsufficientBalanceError: A debit exceeds the balance
+        """
+        amount = Decimal(str(amount))
+        wallet_key = {'PK': f"WALLET#{wallet_id}", 'SK': "METADATA"}
+        extra_items = list(extra_items)
+
+        for attempt in range(MAX_TRANSACT_ATTEMPTS):
+            try:
+                self.client.transact_write_items(
+                    TransactItems=self.build_transact_items(wallet_key, txn_type, amount, txn_item, updated_at, extra_items)
+                )
+                return
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'TransactionCanceledException':
+                    raise
+                reasons = e.response.get('CancellationReasons') or []
+                codes = [reason.get('Code') for reason in reasons]
+                if 'TransactionConflict' in codes and attempt < MAX_TRANSACT_ATTEMPTS - 1:
+                    logger.info(f"Wallet transaction conflict on {wallet_id}, retrying (attempt {attempt + 1})")
+                    time.sleep(random.uniform(0, min(0.02 * (2 ** attempt), 1.0)))
+                    continue
+                if not codes or codes[0] != 'ConditionalCheckFailed':
+                    raise
+                self.check_failed(wallet_id, amount, reasons[0])
+                if attempt == MAX_TRANSACT_ATTEMPTS - 1:
+                    raise
@@ -2,7 +2,7 @@ import json
 import logging
 import os
 import traceback
-from app.services.cronjob_service import run_cronjob_service
+from app.services.cronjob_service_optimized import run_cronjob_service
 
 # Configure logging for Lambda
 logger = logging.getLogger()
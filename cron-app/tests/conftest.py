@@ -0,0 +1,54 @@
+"""
+Shared fixtures: an in-memory DynamoDB (moto) with the tables the cron runner uses.
+
+Run from cron-app/:
+    pip install -r requirements-dev.txt
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from app.services import cronjob_service_optimized as service  # noqa: E402
+
+
+def create_table(client, name, hash_key="PK", range_key="SK", indexes=()):
+    """Create a table with the given (index_name, hash_key) GSIs"""
+    attributes = {hash_key, range_key}
+    gsis = []
+    for index_name, index_hash_key in indexes:
+        attributes.add(index_hash_key)
+        gsis.append({"IndexName": index_name, "KeySchema": [{"AttributeName": index_hash_key, "KeyType": "HASH"}],
+                     "Projection": {"ProjectionType": "ALL"}})
+    table = {
+        "TableName": name,
+        "KeySchema": [{"AttributeName": hash_key, "KeyType": "HASH"}, {"AttributeName": range_key, "KeyType": "RANGE"}],
+        "AttributeDefinitions": [{"AttributeName": a, "AttributeType": "S"} for a in sorted(attributes)],
+        "BillingMode": "PAY_PER_REQUEST",
+    }
+    if gsis:
+        table["GlobalSecondaryIndexes"] = gsis
+    client.create_table(**table)
+
+
+@pytest.fixture
+def tables():
+    """The cron runner's tables in a fresh moto DynamoDB; yields the DynamoDB resource"""
+    with mock_aws():
+        client = boto3.client("dynamodb", region_name=service.AWS_REGION)
+        for name in (service.JOBS_TABLE, service.JOB_LOGS_TABLE, service.BOOKINGS_TABLE, service.PAYMENTS_TABLE,
+                     service.WALLET_TRANSACTIONS_TABLE, service.TRAINS_TABLE, service.SEAT_INVENTORY_TABLE,
+                     service.SEQUENCES_TABLE):
+            create_table(client, name)
+        create_table(client, service.WALLET_TABLE, indexes=[("user_id-index", "user_id")])
+        create_table(client, service.JOB_EXECUTIONS_TABLE, hash_key="job_id", range_key="execution_id")
+        yield boto3.resource("dynamodb", region_name=service.AWS_REGION)
@@ -0,0 +1,107 @@
+import threading
+from decimal import Decimal
+
+import pytest
+
+from app.services import cronjob_service_optimized as service
+from app.services.cronjob_service_optimized import CronjobService
+
+JOB_ID = "job-1"
+
+
+@pytest.fixture
+def job(tables):
+    tables.Table(service.WALLET_TABLE).put_item(Item={
+        "PK": "WALLET#w1", "SK": "METADATA", "wallet_id": "w1", "user_id": "u1", "balance": Decimal("5000"),
+    })
+    tables.Table(service.TRAINS_TABLE).put_item(Item={
+        "PK": "TRAIN#12001", "SK": "METADATA", "train_number": "12001", "coaches": {"SL": 1},
+    })
+    job = {
+        "PK": f"JOB#{JOB_ID}", "SK": "METADATA", "job_id": JOB_ID, "user_id": "u1", "job_status": "Scheduled",
+        "job_date": "2025-06-01", "job_execution_time": "10:00",
+        "origin_station_code": "NDLS", "destination_station_code": "CNB",
+        "journey_date": "2025-06-10", "travel_class": "SL", "payment_method": "wallet",
+        "passengers": [{"name": "A", "age": 30}, {"name": "B", "age": 32}],
+        "train_details": {"train_number": "12001", "train_name": "Test Express"},
+    }
+    tables.Table(service.JOBS_TABLE).put_item(Item=job)
+    return job
+
+
+def items(tables, name):
+    return tables.Table(name).scan()["Items"]
+
+
+def run_concurrently(job, pause_first_runner):
+    """
+    Run two runners on the same scanned job. The first one is held after its claim,
+    just before committing, and `pause_first_runner` runs while it waits.
+    """
+    allocate = service.pnr_allocator.allocate
+    first_claimed, second_done = threading.Event(), threading.Event()
+    results = {}
+
+    def held_allocate():
+        if threading.current_thread().name == "runner-1":
+            first_claimed.set()
+            second_done.wait(timeout=10)
+        return allocate()
+
+    def run(name):
+        results[name] = CronjobService.execute_job(dict(job), name)
+
+    def second_runner():
+        first_claimed.wait(timeout=10)
+        pause_first_runner()
+        run("runner-2")
+        second_done.set()
+
+    service.pnr_allocator.allocate = held_allocate
+    try:
+        threads = [threading.Thread(target=run, args=("runner-1",), name="runner-1"),
+                   threading.Thread(target=second_runner, name="runner-2")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+    finally:
+        service.pnr_allocator.allocate = allocate
+    return results
+
+
+def assert_booked_once(tables):
+    bookings = items(tables, service.BOOKINGS_TABLE)
+    assert len(bookings) == 1
+    assert len(items(tables, service.PAYMENTS_TABLE)) == 1
+    debits = items(tables, service.WALLET_TRANSACTIONS_TABLE)
+    assert len(debits) == 1
+    wallet = tables.Table(service.WALLET_TABLE).get_item(Key={"PK": "WALLET#w1", "SK": "METADATA"})["Item"]
+    assert wallet["balance"] == Decimal("5000") - Decimal(debits[0]["amount"])
+    job = tables.Table(service.JOBS_TABLE).get_item(Key={"PK": f"JOB#{JOB_ID}", "SK": "METADATA"})["Item"]
+    assert job["job_status"] == "Completed"
+    assert job["booking_id"] == bookings[0]["booking_id"]
+    assert "lease_owner" not in job
+    inventory = items(tables, service.SEAT_INVENTORY_TABLE)
+    assert sum(len(coach.get("sold", ())) for coach in inventory) == 2
+
+
+def test_runner_overlapping_a_live_lease_skips_the_job(tables, job):
+    results = run_concurrently(job, lambda: None)
+
+    assert results == {"runner-1": True, "runner-2": False}
+    assert_booked_once(tables)
+
+
+def test_runner_whose_lease_was_taken_over_books_nothing(tables, job):
+    def expire_first_lease():
+        tables.Table(service.JOBS_TABLE).update_item(
+            Key={"PK": f"JOB#{JOB_ID}", "SK": "METADATA"},
+            UpdateExpression="SET lease_expires_at = :expired",
+            ExpressionAttributeValues={":expired": 0},
+        )
+
+    results = run_concurrently(job, expire_first_lease)
+
+    assert results == {"runner-1": False, "runner-2": True}
+    assert_booked_once(tables)
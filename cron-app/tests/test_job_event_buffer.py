@@ -0,0 +1,20 @@
+from app.services import cronjob_service_optimized as service
+from app.services.job_event_buffer import JobEventBuffer
+
+
+def event(buffer, job_id):
+    timestamp = buffer.next_timestamp(job_id)
+    return {"PK": f"JOB#{job_id}", "SK": f"EVENT#{timestamp}", "job_id": job_id, "timestamp": timestamp}
+
+
+def test_flushing_a_job_writes_its_events_and_forgets_its_timestamps(tables):
+    buffer = JobEventBuffer(tables, service.JOB_LOGS_TABLE)
+    events = [event(buffer, "job-1") for _ in range(3)] + [event(buffer, "job-2")]
+    for item in events:
+        buffer.add(item)
+
+    assert len({item["timestamp"] for item in events[:3]}) == 3
+    assert buffer.flush("job-1") == 3
+    assert buffer.pending() == 1
+    assert set(buffer._last_timestamps) == {"job-2"}
+    assert len(tables.Table(service.JOB_LOGS_TABLE).scan()["Items"]) == 3
@@ -53,6 +53,8 @@ resource "aws_lambda_function" "cron_app" {
       BOOKINGS_TABLE            = "bookings"
       WALLET_TABLE              = "wallet"
       WALLET_TRANSACTIONS_TABLE = "wallet_transactions"
+      SEAT_INVENTORY_TABLE      = "seat_inventory"
+      SEQUENCES_TABLE           = "sequences"
       REGION                    = var.aws_region  # Using REGION instead of AWS_REGION as it's a reserved key
     }
   }
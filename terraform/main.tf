@@ -83,3 +83,39 @@ resource "aws_apigatewayv2_api_mapping" "mapping" {
   domain_name = aws_apigatewayv2_domain_name.custom_domain.id
   stage       = aws_apigatewayv2_stage.default.name
 }
+
+# Outbox dispatcher: drains notifications and emails queued by the API (main.outbox_handler)
+resource "aws_lambda_function" "outbox" {
+  function_name = "tatkalpro-outbox"
+  role          = aws_iam_role.lambda_exec.arn
+  handler       = "main.outbox_handler"
+  runtime       = "python3.11"
+  timeout       = 55
+
+  filename         = "${path.module}/../backend/lambda.zip"
+  source_code_hash = filebase64sha256("${path.module}/../backend/lambda.zip")
+
+  environment {
+    variables = {
+      # Same variables as the backend function
+    }
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "outbox_schedule" {
+  name                = "tatkalpro-outbox-schedule"
+  schedule_expression = var.outbox_schedule
+}
+
+resource "aws_cloudwatch_event_target" "outbox" {
+  rule = aws_cloudwatch_event_rule.outbox_schedule.name
+  arn  = aws_lambda_function.outbox.arn
+}
+
+resource "aws_lambda_permission" "outbox_schedule" {
+  statement_id  = "AllowEventBridgeInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.outbox.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.outbox_schedule.arn
+}
@@ -12,3 +12,9 @@ variable "custom_domain" {
   type        = string
   default     = "services.tatkalpro.in"
 }
+
+variable "outbox_schedule" {
+  description = "How often the outbox function drains queued notifications and emails."
+  type        = string
+  default     = "rate(1 minute)"
+}